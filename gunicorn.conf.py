@@ -0,0 +1,37 @@
+"""
+gunicorn 配置
+STORAGE_BACKEND=shared 時在 fork worker 之前啟動數據擁有者進程，主進程退出時關閉
+"""
+
+import multiprocessing
+import os
+import secrets
+from typing import Any, Optional
+
+# 在加載配置之前生成本次部署的連接密鑰，所有 worker 和擁有者進程共用
+os.environ.setdefault("SHARED_STORE_AUTHKEY", secrets.token_hex(32))
+
+from src.core import settings  # noqa: E402
+
+_owner: Optional[multiprocessing.process.BaseProcess] = None
+
+
+def on_starting(server: Any) -> None:
+    """啟動數據擁有者進程"""
+    global _owner
+    if settings.storage_backend == "shared":
+        from src.app.database.shared import start_owner
+
+        _owner = start_owner(
+            settings.shared_store_address,
+            os.environ["SHARED_STORE_AUTHKEY"].encode(),
+        )
+        server.log.info(f"數據擁有者進程已啟動: PID {_owner.pid}")
+
+
+def on_exit(server: Any) -> None:
+    """關閉數據擁有者進程（寫入最終快照）"""
+    if _owner is not None:
+        from src.app.database.shared import stop_owner
+
+        stop_owner(_owner)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+批量寫入基準測試
+比較逐條寫入與批量寫入的吞吐量，並測量通過 /items/bulk 載入商品的耗時
+
+用法: python scripts/benchmark_bulk.py [商品數量]   （默認 100000）
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+# 添加項目根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("POPULATE_SAMPLE_DATA", "false")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from src.app.database import MemoryDatabase, db  # noqa: E402
+from src.app.main import app  # noqa: E402
+
+
+def make_items(count: int) -> List[Dict[str, Any]]:
+    """生成商品數據"""
+    return [
+        {
+            "name": f"商品 {i}",
+            "description": "批量導入",
+            "price": float(i % 997 + 1),
+            "is_available": i % 2 == 0,
+        }
+        for i in range(count)
+    ]
+
+
+def timed(label: str, count: int, operation) -> None:
+    """執行操作並打印耗時和吞吐量"""
+    start = time.perf_counter()
+    operation()
+    seconds = time.perf_counter() - start
+    print(f"   {label:<16} {seconds:7.2f} 秒 {count / seconds:12,.0f} 條/秒")
+
+
+def main() -> None:
+    """運行基準測試"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    items = make_items(count)
+    print(f"📦 批量寫入: {count:,} 個商品")
+
+    single = MemoryDatabase()
+    timed("逐條創建", count, lambda: [single.create_item(item) for item in items])
+    bulk = MemoryDatabase()
+    timed("批量創建", count, lambda: bulk.create_items(items))
+    changes = [(item_id, {"price": 5.0}) for item_id in range(1, count + 1)]
+    timed("批量更新", count, lambda: bulk.update_items(changes))
+    timed("批量刪除", count, lambda: bulk.delete_items(list(range(1, count + 1))))
+
+    client = TestClient(app)
+    db.clear_all_data()
+    # 逐個請求太慢，只取前 2000 條估算吞吐量
+    sample = items[:2000]
+    timed(
+        "逐個 POST /items/",
+        len(sample),
+        lambda: [client.post("/items/", json=item) for item in sample],
+    )
+    db.clear_all_data()
+
+    def load() -> None:
+        response = client.post("/items/bulk", json=items)
+        assert response.json()["succeeded"] == count
+
+    timed("POST /items/bulk", count, load)
+    db.clear_all_data()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+列式存儲基準測試
+比較字典存儲與列式存儲的內存佔用、過濾吞吐量和價格統計耗時
+
+用法: python scripts/benchmark_columnar.py [數量 ...]   （默認 1000000 10000000）
+"""
+
+import multiprocessing
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+# 添加項目根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.app.database.columnar import ColumnarItemStore  # noqa: E402
+from src.app.database.records import ItemRecord  # noqa: E402
+
+QUERY_COUNT = 5
+
+
+def rss_bytes() -> int:
+    """當前進程常駐內存（Linux）"""
+    with open("/proc/self/statm") as statm:
+        pages = int(statm.read().split()[1])
+    return pages * 4096
+
+
+def build(engine: str, count: int) -> Any:
+    """構建指定引擎的商品存儲"""
+    rng = random.Random(0)
+    store: Any = ColumnarItemStore() if engine == "columnar" else {}
+    for item_id in range(1, count + 1):
+        store[item_id] = ItemRecord(
+            id=item_id,
+            name="商品",
+            description=None,
+            price=round(rng.uniform(1, 100_000), 2),
+            is_available=rng.random() < 0.8,
+        )
+    return store
+
+
+def dict_filter(store: Dict[int, ItemRecord], low: float, high: float) -> List:
+    """字典存儲的逐條過濾（Python 循環）"""
+    items = [item for item in store.values() if item["is_available"]]
+    items = [item for item in items if item["price"] >= low]
+    return [item for item in items if item["price"] <= high]
+
+
+def measure(engine: str, count: int, queue: "multiprocessing.Queue") -> None:
+    """在獨立進程中測量單個引擎，避免內存相互干擾"""
+    baseline = rss_bytes()
+    store = build(engine, count)
+    memory = rss_bytes() - baseline
+
+    lows = range(1_000, 1_000 + QUERY_COUNT * 7_000, 7_000)
+    ranges = [(low, low + 1_000) for low in lows]
+    start = time.perf_counter()
+    for low, high in ranges:
+        if engine == "columnar":
+            store.rows(store.filter_ids(low, high, available_only=True))
+        else:
+            dict_filter(store, low, high)
+    filter_time = (time.perf_counter() - start) / QUERY_COUNT
+
+    start = time.perf_counter()
+    if engine == "columnar":
+        store.price_bounds()
+    else:
+        prices = [item["price"] for item in store.values()]
+        min(prices), max(prices)
+    bounds_time = time.perf_counter() - start
+
+    queue.put((memory, filter_time, bounds_time))
+
+
+def main() -> None:
+    """運行基準測試"""
+    counts = [int(arg) for arg in sys.argv[1:]] or [1_000_000, 10_000_000]
+    for count in counts:
+        print(f"📦 {count:,} 個商品")
+        for engine in ("dict", "columnar"):
+            queue: "multiprocessing.Queue" = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=measure, args=(engine, count, queue)
+            )
+            process.start()
+            memory, filter_time, bounds_time = queue.get()
+            process.join()
+            print(
+                f"   {engine:<9} 內存: {memory / 1024 / 1024:8.1f} MB "
+                f"({memory / count:6.1f} B/條)  "
+                f"價格+可用性過濾: {filter_time * 1000:8.2f} ms/次  "
+                f"極值統計: {bounds_time * 1000:8.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
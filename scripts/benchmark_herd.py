@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+雷群負載基準測試
+同時發出大量相同的搜索、列表和統計請求，比較關閉和開啟讀請求合併時的
+讀鎖獲取次數、CPU 時間和總耗時（響應緩存關閉，只觀察合併的效果）
+
+用法: python scripts/benchmark_herd.py [商品數] [併發數]   （默認 200000 100）
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+# 添加項目根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("POPULATE_SAMPLE_DATA", "false")
+os.environ["RESPONSE_CACHE_ENTRIES"] = "0"
+
+import httpx  # noqa: E402
+from src.app.database import MemoryDatabase, async_db  # noqa: E402
+from src.app.database.locks import RWLock  # noqa: E402
+from src.app.main import app  # noqa: E402
+from src.core import settings  # noqa: E402
+
+PATHS = [
+    "/items/search/?q=商品&min_price=10&max_price=20",
+    "/items/?limit=1000",
+    "/stats/",
+]
+
+
+async def herd(path: str, requests: int) -> None:
+    """同時發出 requests 個相同請求"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = await asyncio.gather(*(client.get(path) for _ in range(requests)))
+    assert all(response.status_code == 200 for response in responses)
+
+
+def measure(path: str, requests: int) -> Tuple[int, float, float]:
+    """返回讀鎖獲取次數、CPU 時間和總耗時"""
+    acquisitions: List[None] = []
+    acquire_read = RWLock.acquire_read
+
+    def counting_acquire(lock: RWLock) -> None:
+        acquisitions.append(None)
+        acquire_read(lock)
+
+    RWLock.acquire_read = counting_acquire  # type: ignore[method-assign]
+    try:
+        cpu, wall = time.process_time(), time.perf_counter()
+        asyncio.run(herd(path, requests))
+        return (
+            len(acquisitions),
+            time.process_time() - cpu,
+            time.perf_counter() - wall,
+        )
+    finally:
+        RWLock.acquire_read = acquire_read  # type: ignore[method-assign]
+
+
+def main() -> None:
+    """運行基準測試"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    # 非 MVCC 的內存數據庫：每次搜索、列表和統計都要獲取讀鎖
+    database = MemoryDatabase()
+    database.create_items(
+        [{"name": f"商品 {i}", "price": float(i % 500 + 1)} for i in range(count)]
+    )
+    async_db.storage = database
+    print(f"🐘 {count:,} 個商品, 每個路徑 {requests} 個併發請求")
+
+    for path in PATHS:
+        print(f"   {path}")
+        for enabled in (False, True):
+            settings.read_coalescing = enabled
+            locks, cpu, wall = measure(path, requests)
+            label = "合併" if enabled else "不合併"
+            print(
+                f"     {label:<4} 讀鎖 {locks:5d} 次"
+                f"   CPU {cpu * 1000:8.1f} ms   耗時 {wall * 1000:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
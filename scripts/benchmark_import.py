@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+文件導入基準測試
+分別測量解析、校驗和通過 /items/import 端到端導入 NDJSON / CSV 的每秒行數
+
+用法: python scripts/benchmark_import.py [行數]   （默認 100000）
+"""
+
+import asyncio
+import csv
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+# 添加項目根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("POPULATE_SAMPLE_DATA", "false")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from src.app.database import db  # noqa: E402
+from src.app.main import app  # noqa: E402
+from src.app.services.item_import import (  # noqa: E402
+    make_parser,
+    read_lines,
+    validate_rows,
+)
+
+# 模擬網絡接收的數據塊大小
+CHUNK_SIZE = 64 * 1024
+
+
+def make_items(count: int) -> List[Dict[str, Any]]:
+    """生成商品數據"""
+    return [
+        {
+            "name": f"商品 {i}",
+            "description": "產品目錄導入" if i % 3 else "",
+            "price": float(i % 997 + 1),
+            "is_available": i % 2 == 0,
+        }
+        for i in range(count)
+    ]
+
+
+def encode(items: List[Dict[str, Any]], format: str) -> bytes:
+    """把商品編碼為 NDJSON 或 CSV 文件"""
+    if format == "ndjson":
+        return "".join(json.dumps(item) + "\n" for item in items).encode()
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(items[0]))
+    writer.writeheader()
+    writer.writerows(items)
+    return buffer.getvalue().encode()
+
+
+def timed(label: str, count: int, operation) -> None:
+    """執行操作並打印耗時和每秒行數"""
+    start = time.perf_counter()
+    operation()
+    seconds = time.perf_counter() - start
+    print(f"   {label:<14} {seconds:7.2f} 秒 {count / seconds:12,.0f} 行/秒")
+
+
+def parse(body: bytes, format: str) -> List[Any]:
+    """按 CHUNK_SIZE 分塊增量解析整個文件"""
+
+    async def chunks():
+        for start in range(0, len(body), CHUNK_SIZE):
+            yield body[start : start + CHUNK_SIZE]
+
+    async def run() -> List[Any]:
+        parser, rows = make_parser(format), []
+        async for lines in read_lines(chunks()):
+            rows.extend(parser.feed(lines))
+        return rows + parser.finish()
+
+    return asyncio.run(run())
+
+
+def main() -> None:
+    """運行基準測試"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    items = make_items(count)
+    client = TestClient(app)
+
+    for format in ("ndjson", "csv"):
+        body = encode(items, format)
+        print(f"📥 {format}: {count:,} 行, {len(body) / 1e6:.1f} MB")
+        rows = parse(body, format)
+        timed("解析", count, lambda: parse(body, format))
+        timed("校驗", count, lambda: validate_rows([row for _, row in rows]))
+        db.clear_all_data()
+
+        def load() -> None:
+            params = {"format": format}
+            response = client.post("/items/import", params=params, content=body)
+            assert response.json()["imported"] == count
+
+        timed("/items/import", count, load)
+        db.clear_all_data()
+
+
+if __name__ == "__main__":
+    main()
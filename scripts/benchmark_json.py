@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+JSON 序列化基準測試
+比較 10k 條記錄的列表響應在三種編碼路徑下的吞吐量：
+- response_model：FastAPI 按 List[Item] 逐條校驗後序列化（改造前的列表響應）
+- jsonable_encoder：遞歸轉換後 json.dumps（改造前的搜索響應）
+- 快速路徑：按模型字段順序轉換記錄後由 pydantic-core 直接編碼
+
+用法: python scripts/benchmark_json.py [記錄數]   （默認 10000）
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, List
+
+# 添加項目根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("POPULATE_SAMPLE_DATA", "false")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from src.app.database import db  # noqa: E402
+from src.app.database.records import ItemRecord, UserRecord  # noqa: E402
+from src.app.main import app  # noqa: E402
+from src.app.models import Item, User  # noqa: E402
+from src.app.services.fast_json import (  # noqa: E402
+    ITEM_FIELDS,
+    USER_FIELDS,
+    render_records,
+)
+
+ROUNDS = 20
+
+
+def response_model_path(model: Any) -> Callable[[List[Any]], bytes]:
+    """FastAPI 處理 response_model 的方式：校驗、轉換為 JSON 兼容值、json.dumps"""
+    adapter = TypeAdapter(List[model])
+
+    def encode(records: List[Any]) -> bytes:
+        validated = adapter.validate_python(records, from_attributes=True)
+        return JSONResponse(adapter.dump_python(validated, mode="json")).body
+
+    return encode
+
+
+def timed(label: str, count: int, operation: Callable[[], Any]) -> float:
+    """重複執行取最快一輪，打印耗時和每秒記錄數"""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        operation()
+        best = min(best, time.perf_counter() - start)
+    print(f"   {label:<18} {best * 1000:8.2f} ms {count / best:12,.0f} 條/秒")
+    return best
+
+
+def main() -> None:
+    """運行基準測試"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    items = [
+        ItemRecord(i, f"商品 {i}", "產品描述" if i % 2 else None, i % 997 + 0.5)
+        for i in range(1, count + 1)
+    ]
+    users = [
+        UserRecord(i, f"user{i}", f"user{i}@example.com", f"User {i}")
+        for i in range(1, count + 1)
+    ]
+
+    for name, records, model, fields in (
+        ("商品", items, Item, ITEM_FIELDS),
+        ("用戶", users, User, USER_FIELDS),
+    ):
+        print(f"📤 {count:,} 個{name}")
+        encode = response_model_path(model)
+        assert encode(records) == render_records(records, fields)
+        slow = timed("response_model", count, lambda: encode(records))
+        timed(
+            "jsonable_encoder",
+            count,
+            lambda: JSONResponse(jsonable_encoder(records)).body,
+        )
+        fast = timed("快速路徑", count, lambda: render_records(records, fields))
+        print(f"   加速 {slow / fast:.1f} 倍")
+
+    # 端到端：通過 HTTP 接口獲取整個商品列表
+    db.clear_all_data()
+    db.create_items([{"name": item.name, "price": item.price} for item in items])
+    client = TestClient(app)
+    print(f"🌐 GET /items/（{count:,} 個商品）")
+    timed("端到端", count, lambda: client.get("/items/").content)
+    db.clear_all_data()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+鎖競爭基準測試
+比較單一互斥鎖（改造前）與按集合分開的讀寫鎖在多線程下的吞吐量
+"""
+
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List
+
+# 添加項目根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.app.database import MemoryDatabase  # noqa: E402
+
+ITEM_COUNT = 20_000
+USER_COUNT = 1_000
+THREADS = 8
+DURATION = 3.0
+
+
+class ExclusiveLock:
+    """改造前的行為：讀寫都使用同一把（可重入）互斥鎖"""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._lock:
+            yield
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._lock:
+            yield
+
+
+def build_database(exclusive: bool) -> MemoryDatabase:
+    """構建測試數據庫"""
+    database = MemoryDatabase()
+    if exclusive:
+        lock = ExclusiveLock()
+        database._items_lock = lock  # type: ignore[assignment]
+        database._users_lock = lock  # type: ignore[assignment]
+
+    rng = random.Random(0)
+    for i in range(ITEM_COUNT):
+        database.create_item(
+            {
+                "name": f"商品 {i}",
+                "description": f"描述 {i}",
+                "price": round(rng.uniform(1, 10_000), 2),
+                "is_available": rng.random() < 0.8,
+            }
+        )
+    for i in range(USER_COUNT):
+        database.create_user({"username": f"user{i}", "email": f"user{i}@x.com"})
+    return database
+
+
+def workload(
+    database: MemoryDatabase, write_ratio: float
+) -> Callable[[random.Random], None]:
+    """生成單次操作：按比例混合商品搜索、用戶讀取和寫入"""
+
+    def operation(rng: random.Random) -> None:
+        roll = rng.random()
+        if roll < write_ratio:
+            item_id = rng.randint(1, ITEM_COUNT)
+            item = database.get_item_by_id(item_id)
+            if item is not None:
+                price = round(rng.uniform(1, 10_000), 2)
+                database.update_item(item_id, {**item, "price": price})
+        elif roll < 0.5:
+            low = rng.uniform(1, 9_000)
+            database.search_items(min_price=low, max_price=low + 500)
+        else:
+            database.get_user_by_id(rng.randint(1, USER_COUNT))
+            database.get_stats()
+
+    return operation
+
+
+def run(database: MemoryDatabase, write_ratio: float) -> float:
+    """多線程運行固定時長，返回每秒操作數"""
+    operation = workload(database, write_ratio)
+    counts: List[int] = [0] * THREADS
+    stop = threading.Event()
+
+    def worker(index: int) -> None:
+        rng = random.Random(index)
+        while not stop.is_set():
+            operation(rng)
+            counts[index] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / DURATION
+
+
+def main() -> None:
+    """運行基準測試"""
+    print(f"🔒 {THREADS} 線程，{ITEM_COUNT:,} 商品，每組 {DURATION}s")
+    for label, write_ratio in [("讀多寫少 (1% 寫)", 0.01), ("混合 (20% 寫)", 0.2)]:
+        before = run(build_database(exclusive=True), write_ratio)
+        after = run(build_database(exclusive=False), write_ratio)
+        print(f"📊 {label}")
+        print(f"   單一互斥鎖: {before:,.0f} ops/s")
+        print(f"   讀寫鎖:     {after:,.0f} ops/s ({after / before:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
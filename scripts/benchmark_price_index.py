@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+價格索引基準測試
+比較窄價格範圍查詢在全表掃描與有序價格索引下的耗時
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+# 添加項目根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.app.database import MemoryDatabase  # noqa: E402
+
+ITEM_COUNT = 1_000_000
+QUERY_COUNT = 200
+RANGE_WIDTH = 10.0
+
+
+def scan_price_range(database: MemoryDatabase, low: float, high: float) -> list:
+    """全表掃描實現（索引前的查詢方式）"""
+    items = database.get_all_items()
+    items = [item for item in items if item["is_available"]]
+    items = [item for item in items if item["price"] >= low]
+    return [item for item in items if item["price"] <= high]
+
+
+def main() -> None:
+    """運行基準測試"""
+    rng = random.Random(0)
+    database = MemoryDatabase()
+
+    print(f"📦 填充 {ITEM_COUNT:,} 個商品...")
+    start = time.perf_counter()
+    for i in range(ITEM_COUNT):
+        database.create_item(
+            {
+                "name": f"商品 {i}",
+                "description": None,
+                "price": round(rng.uniform(1, 100_000), 2),
+                "is_available": rng.random() < 0.8,
+            }
+        )
+    print(f"   耗時: {time.perf_counter() - start:.2f}s")
+
+    ranges = []
+    for _ in range(QUERY_COUNT):
+        low = rng.uniform(1, 100_000 - RANGE_WIDTH)
+        ranges.append((low, low + RANGE_WIDTH))
+
+    start = time.perf_counter()
+    scan_results = [scan_price_range(database, low, high) for low, high in ranges]
+    scan_time = (time.perf_counter() - start) / QUERY_COUNT
+
+    start = time.perf_counter()
+    index_results = [
+        database.search_items(min_price=low, max_price=high) for low, high in ranges
+    ]
+    index_time = (time.perf_counter() - start) / QUERY_COUNT
+
+    assert scan_results == index_results, "索引查詢結果與全表掃描不一致"
+
+    print(f"🔍 窄範圍查詢（寬度 {RANGE_WIDTH}）x {QUERY_COUNT}")
+    print(f"   全表掃描: {scan_time * 1000:.3f} ms/次")
+    print(f"   價格索引: {index_time * 1000:.3f} ms/次")
+    print(f"   加速比:   {scan_time / index_time:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
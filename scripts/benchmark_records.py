@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+記錄類型基準測試
+比較字典記錄與 __slots__ 不可變記錄的單條內存佔用，以及單次 GET /items/{id} 的分配次數
+"""
+
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# 添加項目根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.app.database import MemoryDatabase  # noqa: E402
+from src.app.database.records import ItemRecord  # noqa: E402
+from src.app.models import Item  # noqa: E402
+
+CALLS = 2_000
+
+SAMPLE: Dict[str, Any] = {
+    "id": 1,
+    "name": "iPhone 15",
+    "description": "最新款 iPhone",
+    "price": 32000.0,
+    "is_available": True,
+}
+
+
+def blocks_per_call(function: Callable[[], Any]) -> float:
+    """每次調用新分配且被返回結果持有的內存塊數"""
+    function()  # 預熱
+    results: List[Any] = [None] * CALLS
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for index in range(CALLS):
+        results[index] = function()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    growth = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return growth / CALLS
+
+
+def main() -> None:
+    """運行基準測試"""
+    as_dict = dict(SAMPLE)
+    as_record = ItemRecord(**SAMPLE)
+    print("📏 單條商品記錄大小（不含共享的字段值）")
+    print(f"   dict:       {sys.getsizeof(as_dict)} B")
+    print(f"   ItemRecord: {sys.getsizeof(as_record)} B")
+
+    db = MemoryDatabase()
+    item_id = db.create_item({k: v for k, v in SAMPLE.items() if k != "id"}).id
+
+    print(f"🧮 GET /items/{{id}} 數據路徑每次新增的分配塊數（{CALLS} 次平均）")
+    copy_blocks = blocks_per_call(lambda: db.get_item_by_id(item_id).to_dict())
+    record_blocks = blocks_per_call(lambda: db.get_item_by_id(item_id))
+    print(f"   讀取 - 防禦性複製（改造前）: {copy_blocks:.2f}")
+    print(f"   讀取 - 不可變記錄:           {record_blocks:.2f}")
+
+    # 響應校驗：從字典構建或通過 from_attributes 從記錄屬性構建 Item
+    copy_blocks = blocks_per_call(
+        lambda: Item.model_validate(db.get_item_by_id(item_id).to_dict())
+    )
+    record_blocks = blocks_per_call(
+        lambda: Item.model_validate(db.get_item_by_id(item_id), from_attributes=True)
+    )
+    print(f"   讀取+響應模型 - 防禦性複製: {copy_blocks:.2f}")
+    print(f"   讀取+響應模型 - 不可變記錄: {record_blocks:.2f}")
+
+
+if __name__ == "__main__":
+    main()
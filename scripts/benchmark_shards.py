@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+分片基準測試
+測量不同分片數量下多線程寫入、搜索以及讀寫混合負載的吞吐量
+
+用法: python scripts/benchmark_shards.py [商品數量]   （默認 200000）
+"""
+
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List
+
+# 添加項目根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.app.database import MemoryDatabase, ShardedDatabase  # noqa: E402
+
+SHARD_COUNTS = [1, 2, 4, 8]
+THREADS = 8
+DURATION = 2.0
+
+
+def throughput(workers: List[Callable[[random.Random], None]]) -> float:
+    """每個線程循環執行一個操作，返回總的每秒操作數"""
+    counts = [0] * len(workers)
+    stop = threading.Event()
+
+    def loop(index: int) -> None:
+        rng = random.Random(index)
+        operation = workers[index]
+        while not stop.is_set():
+            operation(rng)
+            counts[index] += 1
+
+    threads = [threading.Thread(target=loop, args=(i,)) for i in range(len(workers))]
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / DURATION
+
+
+def main() -> None:
+    """運行基準測試"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"🧩 {count:,} 個商品, {THREADS} 個線程, 每項 {DURATION:.0f} 秒")
+    print(
+        f"   {'分片':>4} {'寫入/秒':>10} {'價格搜索/秒':>12} "
+        f"{'關鍵字搜索/秒':>14} {'混合/秒':>10} {'統計/秒':>10}"
+    )
+
+    for shards in SHARD_COUNTS:
+        database = MemoryDatabase() if shards == 1 else ShardedDatabase(shards)
+        for i in range(count):
+            database.create_item(
+                {
+                    "name": f"商品 {i}",
+                    "price": float(i % 997),
+                    "is_available": i % 2 == 0,
+                }
+            )
+
+        def write(rng: random.Random) -> None:
+            item_id = rng.randint(1, count)
+            database.update_item(item_id, {"name": f"更新 {item_id}", "price": 5.0})
+
+        def price_search(rng: random.Random) -> None:
+            low = rng.randint(0, 990)
+            database.search_items(min_price=low, max_price=low + 2)
+
+        def text_search(rng: random.Random) -> None:
+            database.search_items(query=f"商品 {rng.randint(0, count)}")
+
+        def stats(rng: random.Random) -> None:
+            database.get_stats()
+
+        writes = throughput([write] * THREADS)
+        price = throughput([price_search] * THREADS)
+        text = throughput([text_search] * THREADS)
+        mixed = throughput([write, price_search] * (THREADS // 2))
+        stat = throughput([stats] * THREADS)
+        print(
+            f"   {shards:>4} {writes:>10,.0f} {price:>12,.0f} "
+            f"{text:>14,.0f} {mixed:>10,.0f} {stat:>10,.0f}"
+        )
+        if isinstance(database, ShardedDatabase):
+            database.close()
+
+
+if __name__ == "__main__":
+    main()
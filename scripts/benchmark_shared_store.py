@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+共享存儲基準測試
+啟動數據擁有者進程和不同數量的 worker 進程，測量聚合讀寫吞吐量，
+並校驗所有 worker 最終看到相同的數據
+
+用法: python scripts/benchmark_shared_store.py [商品數量]   （默認 100000）
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List
+
+# 添加項目根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.app.database import SharedStoreClient  # noqa: E402
+from src.app.database.shared import start_owner, stop_owner  # noqa: E402
+
+WORKER_COUNTS = [1, 2, 4]
+DURATION = 2.0
+WRITES = 500
+AUTHKEY = b"benchmark"
+
+
+def worker(address: str, index: int, count: int, barrier: Any, results: Any) -> None:
+    """一個 worker 進程：先併發寫入，再在本地副本上持續讀取"""
+    client = SharedStoreClient(address, AUTHKEY)
+    client.get_stats()  # 連接並加載副本
+    barrier.wait()
+
+    start = time.perf_counter()
+    for i in range(WRITES):
+        client.create_item({"name": f"worker {index} 新商品 {i}", "price": 1.0})
+    write_seconds = time.perf_counter() - start
+
+    barrier.wait()
+    reads = 0
+    deadline = time.perf_counter() + DURATION
+    while time.perf_counter() < deadline:
+        client.get_item_by_id(reads % count + 1)
+        client.search_items(min_price=100.0, max_price=110.0)
+        reads += 2
+
+    client.sync()
+    results.put(
+        {
+            "writes": WRITES / write_seconds,
+            "reads": reads / DURATION,
+            "fingerprint": zlib.crc32(repr(client.get_all_items()).encode()),
+        }
+    )
+    client.close()
+
+
+def run(address: str, workers: int, count: int) -> Dict[str, float]:
+    """運行一輪並返回聚合吞吐量"""
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(address, i, count, barrier, results))
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    reports: List[Dict[str, Any]] = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    if len({report["fingerprint"] for report in reports}) != 1:
+        raise AssertionError("worker 之間的數據不一致")
+    return {
+        "writes": sum(report["writes"] for report in reports),
+        "reads": sum(report["reads"] for report in reports),
+    }
+
+
+def main() -> None:
+    """運行基準測試"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    os.environ["POPULATE_SAMPLE_DATA"] = "false"
+    with tempfile.TemporaryDirectory() as d:
+        address = str(Path(d) / "store.sock")
+        print(f"🗄️ 共享存儲: {count:,} 個商品, CPU 核心 {os.cpu_count()}")
+        for workers in WORKER_COUNTS:
+            owner = start_owner(address, AUTHKEY)
+            try:
+                client = SharedStoreClient(address, AUTHKEY)
+                for i in range(count):
+                    client.create_item({"name": f"商品 {i}", "price": float(i % 997)})
+                client.close()
+                result = run(address, workers, count)
+            finally:
+                stop_owner(owner)
+            print(
+                f"   {workers} 個 worker: 讀取 {result['reads']:10,.0f} 次/秒, "
+                f"寫入 {result['writes']:8,.0f} 次/秒"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+快照啟動基準測試
+比較從預寫日誌完整重放與加載二進制快照的啟動耗時
+
+用法: python scripts/benchmark_snapshot.py [數量]   （默認 1000000）
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加項目根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.app.database import MemoryDatabase  # noqa: E402
+from src.app.database.snapshot import Snapshot, write_snapshot  # noqa: E402
+from src.app.database.wal import WriteAheadLog  # noqa: E402
+
+
+def main() -> None:
+    """運行基準測試"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as d:
+        wal_path = Path(d) / "wal.log"
+        snapshot_path = Path(d) / "snapshot.bin"
+
+        database = MemoryDatabase()
+        for i in range(count):
+            database.create_item(
+                {"name": f"商品 {i}", "description": f"描述 {i}", "price": i % 997}
+            )
+        # 寫出與上述寫入等價的日誌（只追加，關閉時統一 fsync）
+        wal = WriteAheadLog(wal_path, group_commit_window=3600)
+        list(wal.replay())
+        for item in database.get_all_items():
+            wal.append({"op": "put_item", "record": item.to_dict()})
+        wal.close()
+
+        start = time.perf_counter()
+        state = database.capture_snapshot()
+        capture = time.perf_counter() - start
+        start = time.perf_counter()
+        write_snapshot(snapshot_path, state)
+        write = time.perf_counter() - start
+        print(f"📦 {count:,} 個商品")
+        print(f"   捕獲狀態（持鎖）: {capture * 1000:8.0f} ms")
+        print(f"   寫入快照（後台）: {write * 1000:8.0f} ms")
+        print(f"   快照大小: {snapshot_path.stat().st_size / 1024 / 1024:.1f} MB")
+        print(f"   日誌大小: {wal_path.stat().st_size / 1024 / 1024:.1f} MB")
+        del database, state
+
+        start = time.perf_counter()
+        replayed = MemoryDatabase()
+        replayed.attach_wal(WriteAheadLog(wal_path))
+        print(f"📜 重放日誌啟動:     {time.perf_counter() - start:8.2f} s")
+        replayed.close_wal()
+        del replayed
+
+        start = time.perf_counter()
+        loaded = MemoryDatabase()
+        loaded.load_snapshot(Snapshot(snapshot_path))
+        print(f"📸 加載快照啟動:     {time.perf_counter() - start:8.2f} s")
+
+        start = time.perf_counter()
+        loaded.get_item_by_id(count // 2)
+        print(f"   首次單條讀取:     {(time.perf_counter() - start) * 1000:8.2f} ms")
+        start = time.perf_counter()
+        loaded.get_stats()
+        print(f"   首次統計（構建價格索引）: {time.perf_counter() - start:8.2f} s")
+        start = time.perf_counter()
+        loaded.warm_up()
+        print(f"   後台分批預熱完成: {time.perf_counter() - start:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
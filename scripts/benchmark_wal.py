@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+預寫日誌基準測試
+比較每次寫入都 fsync 與組提交（不同窗口）在多線程寫入下的吞吐量
+
+用法: python scripts/benchmark_wal.py [日誌目錄]   （默認使用臨時目錄）
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+# 添加項目根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.app.database import MemoryDatabase  # noqa: E402
+from src.app.database.wal import WriteAheadLog  # noqa: E402
+
+THREADS = 64
+DURATION = 3.0
+# (標籤, 組提交窗口秒數)
+MODES = [
+    ("每次 fsync", 0.0),
+    ("組提交 1ms", 0.001),
+    ("組提交 2ms", 0.002),
+    ("組提交 5ms", 0.005),
+]
+
+
+def run(path: Path, window: float) -> Tuple[float, float]:
+    """多線程持續創建商品，返回 (每秒寫入數, 每次 fsync 的平均寫入數)"""
+    database = MemoryDatabase()
+    wal = WriteAheadLog(path, group_commit_window=window)
+    database.attach_wal(wal)
+    counts: List[int] = [0] * THREADS
+    stop = threading.Event()
+
+    def worker(index: int) -> None:
+        while not stop.is_set():
+            database.create_item({"name": f"商品 {index}", "price": 1.0})
+            counts[index] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    database.close_wal()
+
+    writes = sum(counts)
+    return writes / elapsed, writes / max(wal.syncs, 1)
+
+
+def main() -> None:
+    """運行基準測試"""
+    directory = sys.argv[1] if len(sys.argv) > 1 else None
+    with tempfile.TemporaryDirectory(dir=directory) as d:
+        print(f"📝 {THREADS} 線程並發寫入，每組 {DURATION}s，日誌目錄: {d}")
+        baseline = None
+        for index, (label, window) in enumerate(MODES):
+            qps, per_sync = run(Path(d) / f"wal-{index}.log", window)
+            baseline = baseline or qps
+            print(
+                f"   {label:<10} {qps:10,.0f} 寫入/s ({qps / baseline:5.1f}x)  "
+                f"每次 fsync 平均 {per_sync:6.1f} 條"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -29,7 +29,6 @@ def test_imports():
 
         # 測試數據庫
         from src.app.database import MemoryDatabase
-        from src.app.database.memory_db import db
 
         print("✅ 數據庫模組導入成功")
 
@@ -68,7 +67,7 @@ def test_database_operations():
     print("\n🧪 測試數據庫操作...")
 
     try:
-        from src.app.database.memory_db import db
+        from src.app.database import db
 
         # 清理數據庫
         db.clear_all_data()
@@ -118,9 +117,10 @@ def test_services():
     print("\n🧪 測試服務層...")
 
     try:
+        import asyncio
         from src.app.services import ItemService, UserService
         from src.app.models import ItemCreate, UserCreate
-        from src.app.database.memory_db import db
+        from src.app.database import db
 
         # 清理數據庫
         db.clear_all_data()
@@ -133,10 +133,10 @@ def test_services():
             is_available=True,
         )
 
-        created_item = ItemService.create_item(item_data)
+        created_item = asyncio.run(ItemService.create_item(item_data))
         print(f"✅ 商品服務創建成功: {created_item['name']}")
 
-        items = ItemService.get_all_items()
+        items, _ = asyncio.run(ItemService.get_all_items())
         print(f"✅ 商品服務獲取列表: {len(items)} 個商品")
 
         # 測試用戶服務
@@ -146,10 +146,10 @@ def test_services():
             full_name="Service User",
         )
 
-        created_user = UserService.create_user(user_data)
+        created_user = asyncio.run(UserService.create_user(user_data))
         print(f"✅ 用戶服務創建成功: {created_user['username']}")
 
-        users = UserService.get_all_users()
+        users, _ = asyncio.run(UserService.get_all_users())
         print(f"✅ 用戶服務獲取列表: {len(users)} 個用戶")
 
         return True
@@ -3,6 +3,29 @@
 包含數據庫連接和操作相關功能
 """
 
-from .memory_db import MemoryDatabase
+from .async_storage import AsyncStorage
+from .changes import ChangeFeed
+from .memory_db import MemoryDatabase, DuplicateKeyError, VersionConflictError
+from .records import InvalidRecordError
+from .shared import SharedStoreClient, SharedStoreServer
+from .sharded import ShardedDatabase
+from .sqlite_db import SQLiteDatabase
+from .storage import Storage, async_db, change_feed, create_storage, db
 
-__all__ = ["MemoryDatabase"]
+__all__ = [
+    "MemoryDatabase",
+    "DuplicateKeyError",
+    "VersionConflictError",
+    "InvalidRecordError",
+    "SQLiteDatabase",
+    "Storage",
+    "create_storage",
+    "db",
+    "AsyncStorage",
+    "async_db",
+    "ChangeFeed",
+    "change_feed",
+    "SharedStoreClient",
+    "SharedStoreServer",
+    "ShardedDatabase",
+]
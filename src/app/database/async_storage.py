@@ -0,0 +1,299 @@
+"""
+異步存儲接口
+為事件循環提供非阻塞的存儲訪問：廉價讀取內聯執行，掃描交給有界線程池，
+寫入交給獨立的寫入線程池
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from .locks import WouldBlock, nonblocking
+from .memory_db import DuplicateKeyError
+from .records import ItemRecord, UserRecord
+
+
+class AsyncStorage:
+    """存儲的異步包裝
+
+    - 後端在 ``inline_reads`` 中聲明的點查詢直接在事件循環線程執行；
+      執行時處於非阻塞加鎖模式，鎖被佔用則改為交給線程池
+    - 其餘讀取（全量讀取、搜索、統計）在有界線程池中執行，
+      線程數即同時訪問存儲的最大併發，超出的請求在隊列中等待
+    - 寫入在獨立的寫入線程池中執行：寫入返回前要等待預寫日誌組提交，
+      等待期間佔用的是寫入線程，不會讓讀取在隊列中排隊
+
+    一次慢搜索最多佔用一個工作線程，事件循環始終可以響應其他請求。
+    """
+
+    def __init__(
+        self, storage: Any, max_workers: int = 4, write_workers: int = 16
+    ) -> None:
+        """初始化
+
+        Args:
+            storage: 實現 Storage 協議的同步存儲
+            max_workers: 讀取線程池大小
+            write_workers: 寫入線程池大小，即同時等待同一次組提交的寫入數上限
+        """
+        self.storage = storage
+        self._inline: FrozenSet[str] = getattr(storage, "inline_reads", frozenset())
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="storage"
+        )
+        self._writer = ThreadPoolExecutor(
+            max_workers=write_workers, thread_name_prefix="storage-writer"
+        )
+
+    def shutdown(self) -> None:
+        """等待進行中的操作完成並關閉線程池"""
+        self._writer.shutdown(wait=True)
+        self._executor.shutdown(wait=True)
+
+    async def _offload(
+        self,
+        method: str,
+        *args: Any,
+        executor: Optional[ThreadPoolExecutor] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """在線程池中執行存儲方法（默認為讀取線程池）"""
+        function: Callable[..., Any] = getattr(self.storage, method)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor or self._executor, functools.partial(function, *args, **kwargs)
+        )
+
+    async def _write(self, method: str, *args: Any) -> Any:
+        """在寫入線程池中執行寫入（含等待日誌持久化）"""
+        return await self._offload(method, *args, executor=self._writer)
+
+    async def _call(self, method: str, *args: Any) -> Any:
+        """廉價讀取優先內聯執行，無法立即獲得鎖時交給線程池"""
+        if method in self._inline:
+            try:
+                with nonblocking():
+                    return getattr(self.storage, method)(*args)
+            except WouldBlock:
+                pass
+        return await self._offload(method, *args)
+
+    # ===== 商品 =====
+
+    async def get_all_items(
+        self, after: int = 0, limit: Optional[int] = None
+    ) -> List[ItemRecord]:
+        """獲取所有商品"""
+        result: List[ItemRecord] = await self._offload("get_all_items", after, limit)
+        return result
+
+    async def get_item_by_id(self, item_id: int) -> Optional[ItemRecord]:
+        """根據 ID 獲取商品"""
+        result: Optional[ItemRecord] = await self._call("get_item_by_id", item_id)
+        return result
+
+    async def create_item(self, item_data: Dict[str, Any]) -> ItemRecord:
+        """創建新商品"""
+        result: ItemRecord = await self._write("create_item", item_data)
+        return result
+
+    async def update_item(
+        self, item_id: int, item_data: Dict[str, Any], version: Optional[int] = None
+    ) -> Optional[ItemRecord]:
+        """更新商品（提供 version 時為條件更新，需要後端支持版本）"""
+        args = (
+            (item_id, item_data) if version is None else (item_id, item_data, version)
+        )
+        result: Optional[ItemRecord] = await self._write("update_item", *args)
+        return result
+
+    async def delete_item(self, item_id: int) -> Optional[ItemRecord]:
+        """刪除商品"""
+        result: Optional[ItemRecord] = await self._write("delete_item", item_id)
+        return result
+
+    async def create_items(self, items_data: List[Dict[str, Any]]) -> List[ItemRecord]:
+        """批量創建商品"""
+        result: List[ItemRecord] = await self._write("create_items", items_data)
+        return result
+
+    async def update_items(
+        self, changes: List[Tuple[int, Dict[str, Any]]]
+    ) -> List[Optional[ItemRecord]]:
+        """批量部分更新商品"""
+        result: List[Optional[ItemRecord]] = await self._write("update_items", changes)
+        return result
+
+    async def delete_items(self, item_ids: List[int]) -> List[Optional[ItemRecord]]:
+        """批量刪除商品"""
+        result: List[Optional[ItemRecord]] = await self._write("delete_items", item_ids)
+        return result
+
+    async def search_items(
+        self,
+        query: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        available_only: bool = True,
+        after: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[ItemRecord]:
+        """搜索商品"""
+        result: List[ItemRecord] = await self._offload(
+            "search_items",
+            query=query,
+            min_price=min_price,
+            max_price=max_price,
+            available_only=available_only,
+            after=after,
+            limit=limit,
+        )
+        return result
+
+    async def iter_search_items(
+        self,
+        query: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        available_only: bool = True,
+        after: int = 0,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[List[ItemRecord]]:
+        """逐塊搜索商品（按 ID 升序，每塊最多 chunk_size 個）
+
+        後端提供 ``iter_search_items`` 時整個搜索共用一個迭代器，每塊在讀取
+        線程池中取出；否則每塊是一次從上一塊末尾開始的分頁搜索。
+        """
+        filters = (query, min_price, max_price, available_only)
+        if hasattr(self.storage, "iter_search_items"):
+            chunks = self.storage.iter_search_items(*filters, after, chunk_size)
+            loop = asyncio.get_running_loop()
+            while True:
+                rows: Optional[List[ItemRecord]] = await loop.run_in_executor(
+                    self._executor, lambda: next(chunks, None)
+                )
+                if rows is None:
+                    return
+                yield rows
+
+        while True:
+            chunk = await self.search_items(*filters, after, chunk_size)
+            if chunk:
+                yield chunk
+            if len(chunk) < chunk_size:
+                return
+            after = chunk[-1].id
+
+    # ===== 用戶 =====
+
+    async def get_all_users(
+        self, after: int = 0, limit: Optional[int] = None
+    ) -> List[UserRecord]:
+        """獲取所有用戶"""
+        result: List[UserRecord] = await self._offload("get_all_users", after, limit)
+        return result
+
+    async def get_user_by_id(self, user_id: int) -> Optional[UserRecord]:
+        """根據 ID 獲取用戶"""
+        result: Optional[UserRecord] = await self._call("get_user_by_id", user_id)
+        return result
+
+    async def get_user_by_username(self, username: str) -> Optional[UserRecord]:
+        """根據用戶名獲取用戶"""
+        result: Optional[UserRecord] = await self._call(
+            "get_user_by_username", username
+        )
+        return result
+
+    async def create_user(self, user_data: Dict[str, Any]) -> UserRecord:
+        """創建新用戶"""
+        result: UserRecord = await self._write("create_user", user_data)
+        return result
+
+    async def update_user(
+        self, user_id: int, user_data: Dict[str, Any], version: Optional[int] = None
+    ) -> Optional[UserRecord]:
+        """更新用戶（提供 version 時為條件更新，需要後端支持版本）"""
+        args = (
+            (user_id, user_data) if version is None else (user_id, user_data, version)
+        )
+        result: Optional[UserRecord] = await self._write("update_user", *args)
+        return result
+
+    async def delete_user(self, user_id: int) -> Optional[UserRecord]:
+        """刪除用戶"""
+        result: Optional[UserRecord] = await self._write("delete_user", user_id)
+        return result
+
+    async def create_users(
+        self, users_data: List[Dict[str, Any]]
+    ) -> List[Union[UserRecord, DuplicateKeyError]]:
+        """批量創建用戶"""
+        result: List[Union[UserRecord, DuplicateKeyError]] = await self._write(
+            "create_users", users_data
+        )
+        return result
+
+    async def update_users(
+        self, changes: List[Tuple[int, Dict[str, Any]]]
+    ) -> List[Union[UserRecord, DuplicateKeyError, None]]:
+        """批量部分更新用戶"""
+        result: List[Union[UserRecord, DuplicateKeyError, None]] = await self._write(
+            "update_users", changes
+        )
+        return result
+
+    async def delete_users(self, user_ids: List[int]) -> List[Optional[UserRecord]]:
+        """批量刪除用戶"""
+        result: List[Optional[UserRecord]] = await self._write("delete_users", user_ids)
+        return result
+
+    # ===== 版本 =====
+
+    @property
+    def versioned(self) -> bool:
+        """後端是否提供記錄版本和集合代數（用於 ETag）"""
+        return hasattr(self.storage, "item_version")
+
+    @property
+    def version_epoch(self) -> str:
+        """版本紀元：版本號只在同一紀元內可比較"""
+        epoch: str = self.storage.version_epoch
+        return epoch
+
+    async def item_version(self, item_id: int) -> Optional[int]:
+        """商品的版本，商品不存在時為 None"""
+        result: Optional[int] = await self._call("item_version", item_id)
+        return result
+
+    async def user_version(self, user_id: int) -> Optional[int]:
+        """用戶的版本，用戶不存在時為 None"""
+        result: Optional[int] = await self._call("user_version", user_id)
+        return result
+
+    async def items_generation(self) -> int:
+        """商品集合的代數"""
+        result: int = await self._call("items_generation")
+        return result
+
+    async def users_generation(self) -> int:
+        """用戶集合的代數"""
+        result: int = await self._call("users_generation")
+        return result
+
+    # ===== 統計 =====
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """獲取統計信息"""
+        result: Dict[str, Any] = await self._offload("get_stats")
+        return result
@@ -0,0 +1,149 @@
+"""
+變更數據捕獲（CDC）
+把存儲的每次寫入按變更序號記錄在有界環形緩衝區中，供下游增量跟隨
+"""
+
+import asyncio
+import secrets
+import threading
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# 變更條目：{"seq": 序號, "op": 操作, ...}，操作與預寫日誌一致：
+# put_item / put_user 帶完整的 record，delete_item / delete_user 帶 id，clear 無字段
+Change = Dict[str, Any]
+
+
+class ChangeFeed:
+    """變更訂閱緩衝區
+
+    - 通過存儲的 ``listen`` 掛載，在寫入時收到變更；存儲保證序號從掛載
+      時刻起連續、不重複，且變更在對讀者可見之後才發佈，重新同步時先讀
+      ``latest`` 再全量讀取，結果一定包含該序號的變更
+    - 分片存儲中不同分片的變更可能亂序到達：先到的較大序號暫存，補齊
+      之前的序號後再一起發佈，消費者看到的序號始終連續
+    - 序號只在同一紀元內可比較：紀元取自存儲的版本紀元，服務重啟後改變
+      （共享存儲的各 worker 沿用擁有者的紀元，保持一致）
+    - 只保留最近 capacity 條變更；落後超過緩衝區或紀元不同（序號來自
+      重啟前的進程）的消費者需要全量重新同步
+    - 異步等待新變更由事件循環的 future 實現，不佔用線程
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """初始化緩衝區
+
+        Args:
+            capacity: 保留的最近變更條數
+        """
+        if capacity < 1:
+            raise ValueError(f"變更緩衝區大小必須為正數: {capacity}")
+        self.capacity = capacity
+        self._changes: Deque[Change] = deque(maxlen=capacity)
+        self._latest = 0
+        # 已收到但前面還有序號未到達的變更
+        self._pending: Dict[int, Change] = {}
+        self._epoch = secrets.token_hex(4)
+        self._attached = False
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    @property
+    def attached(self) -> bool:
+        """是否已掛載到存儲（存儲後端不支持變更訂閱時為 False）"""
+        return self._attached
+
+    @property
+    def latest(self) -> int:
+        """最近一次變更的序號"""
+        return self._latest
+
+    @property
+    def epoch(self) -> str:
+        """變更序號的紀元"""
+        return self._epoch
+
+    def attach(self, storage: Any) -> bool:
+        """掛載到存儲，返回存儲是否支持變更訂閱"""
+        listen = getattr(storage, "listen", None)
+        if listen is None:
+            return False
+        # 不能持有自身的鎖調用 listen：寫者持有存儲的鎖調用 append
+        seq = listen(self.append)
+        with self._lock:
+            self._latest = max(self._latest, seq)
+            self._epoch = getattr(storage, "version_epoch", None) or self._epoch
+            self._attached = True
+            # listen 返回之前已到達的變更暫存在 _pending 中，丟棄掛載前的部分
+            for stale in [s for s in self._pending if s <= self._latest]:
+                del self._pending[stale]
+            waiters = self._publish()
+        _wake_all(waiters)
+        return True
+
+    def append(self, seq: int, entry: Dict[str, Any]) -> None:
+        """記錄一條變更並喚醒等待者（由存儲在寫入時調用）"""
+        with self._lock:
+            self._pending[seq] = {"seq": seq, **entry}
+            waiters = self._publish() if self._attached else []
+        _wake_all(waiters)
+
+    def _publish(self) -> List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]:
+        """發佈 _pending 中與 latest 連續的變更，返回需要喚醒的等待者（需持有鎖）"""
+        if self._latest + 1 not in self._pending:
+            return []
+        while self._latest + 1 in self._pending:
+            self._latest += 1
+            self._changes.append(self._pending.pop(self._latest))
+        waiters, self._waiters = self._waiters, []
+        return waiters
+
+    def since(
+        self, seq: int, limit: int, epoch: Optional[str] = None
+    ) -> Tuple[List[Change], bool]:
+        """返回序號大於 seq 的前 limit 條變更
+
+        Args:
+            epoch: seq 所屬的紀元，提供時與當前紀元不同即需要重新同步
+
+        Returns:
+            (變更列表, 是否需要全量重新同步)。紀元不同（服務已重啟），
+            seq 早於緩衝區中最舊的變更或大於當前序號時，無法增量跟隨。
+        """
+        with self._lock:
+            if epoch is not None and epoch != self._epoch:
+                return [], True
+            oldest = self._changes[0]["seq"] if self._changes else self._latest + 1
+            if seq > self._latest or seq < oldest - 1:
+                return [], True
+            start = seq - oldest + 1
+            return list(islice(self._changes, start, start + limit)), False
+
+    async def wait(self, seq: int, timeout: float) -> bool:
+        """等待序號大於 seq 的變更出現，超時返回 False"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._latest > seq:
+                return True
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            with self._lock:
+                if (loop, waiter) in self._waiters:
+                    self._waiters.remove((loop, waiter))
+            return self._latest > seq
+
+
+def _wake_all(waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]) -> None:
+    """喚醒等待者（在鎖外調用）"""
+    for loop, waiter in waiters:
+        loop.call_soon_threadsafe(_wake, waiter)
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    """在等待者所在的事件循環中完成 future"""
+    if not waiter.done():
+        waiter.set_result(None)
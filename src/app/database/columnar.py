@@ -0,0 +1,344 @@
+"""
+列式商品存儲
+以連續數組存放商品的數值列，價格與可用性過濾、價格統計使用 NumPy 向量化計算
+"""
+
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+from .records import ItemRecord
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 可選依賴
+    np = None  # type: ignore[assignment]
+
+
+class Bitmap:
+    """定長位圖：每行一位，按 np.packbits 的大端位序存於 uint8 數組
+
+    比布爾數組省去 7/8 的空間；過濾時按行範圍解包為布爾掩碼，解包與
+    掩碼的按位與同為一次向量化遍歷。
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """初始化全零位圖"""
+        self._bits = np.zeros((capacity + 7) // 8, dtype=np.uint8)
+
+    @classmethod
+    def from_bools(
+        cls, values: Union[List[bool], "np.ndarray"], capacity: int
+    ) -> "Bitmap":
+        """用布爾序列填充前 len(values) 行"""
+        bitmap = cls(capacity)
+        packed = np.packbits(np.asarray(values, dtype=np.bool_))
+        bitmap._bits[: len(packed)] = packed
+        return bitmap
+
+    @property
+    def nbytes(self) -> int:
+        """佔用的字節數"""
+        return self._bits.nbytes
+
+    def __getitem__(self, row: int) -> bool:
+        return bool(self._bits[row >> 3] & (0x80 >> (row & 7)))
+
+    def __setitem__(self, row: int, value: bool) -> None:
+        bit = 0x80 >> (row & 7)
+        if value:
+            self._bits[row >> 3] |= bit
+        else:
+            self._bits[row >> 3] &= 0xFF ^ bit
+
+    def unpack(self, start: int, end: int) -> "np.ndarray":
+        """返回 [start, end) 行的布爾數組（新數組，可原地修改）"""
+        first = start >> 3
+        bits = np.unpackbits(
+            self._bits[first : (end + 7) >> 3], count=end - (first << 3)
+        )
+        mask: "np.ndarray" = bits[start - (first << 3) :].view(np.bool_)
+        return mask
+
+    def take(self, rows: "np.ndarray") -> "np.ndarray":
+        """返回給定行的布爾數組"""
+        flags: "np.ndarray" = self._bits[rows >> 3] & (0x80 >> (rows & 7))
+        return flags.astype(np.bool_)
+
+    def resized(self, capacity: int, rows: int) -> "Bitmap":
+        """返回保留前 rows 行的新容量位圖"""
+        return Bitmap.from_bools(self.unpack(0, rows), capacity)
+
+
+class ColumnarItemStore:
+    """列式商品存儲
+
+    - ID 存於 int64 數組，價格存於 float64 數組，可用性和存活標記存於位圖
+    - 名稱和描述存於 Python 列表
+    - 行按 ID 升序追加，ID 到行號的定位使用二分查找，無需額外字典
+    - 刪除只做墓碑標記，墓碑過半時整體壓縮
+
+    提供與 ``Dict[int, ItemRecord]`` 相同的常用接口，可直接替換
+    MemoryDatabase 的商品主存儲；讀取時按需物化為 ItemRecord。
+    """
+
+    initial_capacity = 1024
+
+    def __init__(self) -> None:
+        """初始化存儲"""
+        if np is None:
+            raise RuntimeError("列式存儲需要安裝 numpy: pip install numpy")
+        self.clear()
+
+    def clear(self) -> None:
+        """清空所有數據"""
+        capacity = self.initial_capacity
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._prices = np.zeros(capacity, dtype=np.float64)
+        self._available = Bitmap(capacity)
+        self._live = Bitmap(capacity)
+        self._names: List[Optional[str]] = []
+        self._descriptions: List[Optional[str]] = []
+        self._rows = 0  # 已使用的行數（含墓碑）
+        self._count = 0  # 存活行數
+
+    def load_columns(
+        self,
+        ids: List[int],
+        names: List[str],
+        descriptions: List[Optional[str]],
+        prices: List[float],
+        available: List[bool],
+    ) -> None:
+        """用按 ID 升序排列的列數據整體替換存儲（列順序與 ItemRecord 字段一致）"""
+        rows = len(ids)
+        capacity = max(self.initial_capacity, rows * 2)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._prices = np.zeros(capacity, dtype=np.float64)
+        self._ids[:rows] = ids
+        self._prices[:rows] = prices
+        self._available = Bitmap.from_bools(available, capacity)
+        self._live = Bitmap.from_bools(np.ones(rows, dtype=np.bool_), capacity)
+        self._names = list(names)
+        self._descriptions = list(descriptions)
+        self._rows = self._count = rows
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, item_id: int) -> bool:
+        return self._find(item_id) >= 0
+
+    @property
+    def nbytes(self) -> int:
+        """數值列佔用的字節數"""
+        return (
+            self._ids.nbytes
+            + self._prices.nbytes
+            + self._available.nbytes
+            + self._live.nbytes
+        )
+
+    # ===== 行定位與物化 =====
+
+    def _find(self, item_id: int) -> int:
+        """返回存活行的行號，不存在時返回 -1"""
+        row = int(np.searchsorted(self._ids[: self._rows], item_id))
+        if row < self._rows and self._ids[row] == item_id and self._live[row]:
+            return row
+        return -1
+
+    def _record(self, row: int) -> ItemRecord:
+        """將一行物化為商品記錄"""
+        return ItemRecord(
+            int(self._ids[row]),
+            self._names[row],  # type: ignore[arg-type]
+            self._descriptions[row],
+            float(self._prices[row]),
+            bool(self._available[row]),
+        )
+
+    def _records(self, rows: "np.ndarray") -> List[ItemRecord]:
+        """批量物化多行"""
+        names, descriptions = self._names, self._descriptions
+        return [
+            ItemRecord(item_id, names[row], descriptions[row], price, available)
+            for row, item_id, price, available in zip(
+                rows.tolist(),
+                self._ids[rows].tolist(),
+                self._prices[rows].tolist(),
+                self._available.take(rows).tolist(),
+            )
+        ]
+
+    # ===== 字典兼容接口 =====
+
+    def get(
+        self, item_id: int, default: Optional[ItemRecord] = None
+    ) -> Optional[ItemRecord]:
+        """根據 ID 獲取商品"""
+        row = self._find(item_id)
+        return self._record(row) if row >= 0 else default
+
+    def __getitem__(self, item_id: int) -> ItemRecord:
+        row = self._find(item_id)
+        if row < 0:
+            raise KeyError(item_id)
+        return self._record(row)
+
+    def __setitem__(self, item_id: int, record: ItemRecord) -> None:
+        """寫入商品：已存在時原地更新該行，否則在末尾追加
+
+        數值先轉換為列類型，轉換失敗時存儲保持不變。
+        """
+        price, available = float(record.price), bool(record.is_available)
+        row = self._find(item_id)
+        if row < 0:
+            if self._rows and item_id <= self._ids[self._rows - 1]:
+                raise ValueError(f"列式存儲要求 ID 遞增追加: {item_id}")
+            row = self._append_row(item_id)
+
+        self._prices[row] = price
+        self._available[row] = available
+        self._names[row] = record.name
+        self._descriptions[row] = record.description
+
+    def pop(
+        self, item_id: int, default: Optional[ItemRecord] = None
+    ) -> Optional[ItemRecord]:
+        """刪除並返回商品"""
+        row = self._find(item_id)
+        if row < 0:
+            return default
+
+        record = self._record(row)
+        self._live[row] = False
+        self._names[row] = self._descriptions[row] = None
+        self._count -= 1
+        if self._rows - self._count > max(self._count, self.initial_capacity):
+            self._compact()
+        return record
+
+    def values(self) -> List[ItemRecord]:
+        """按插入順序返回所有商品"""
+        return self._records(np.flatnonzero(self._live.unpack(0, self._rows)))
+
+    # ===== 向量化操作 =====
+
+    def _mask(
+        self,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        available_only: bool = False,
+        start: int = 0,
+        end: Optional[int] = None,
+    ) -> "np.ndarray":
+        """計算 [start, end) 行範圍內過濾條件的布爾掩碼"""
+        end = self._rows if end is None else end
+        rows = slice(start, end)
+        mask = self._live.unpack(start, end)
+        if available_only:
+            mask &= self._available.unpack(start, end)
+        if min_price is not None:
+            mask &= self._prices[rows] >= min_price
+        if max_price is not None:
+            mask &= self._prices[rows] <= max_price
+        return mask
+
+    def filter_ids(
+        self,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        available_only: bool = False,
+        after: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[int]:
+        """向量化過濾，返回按插入順序排列、ID 大於 after 的商品 ID
+
+        指定 limit 時從 after 所在行起分塊過濾，找夠 limit 個即停止，
+        代價與結果覆蓋的行範圍成正比，而不是與總行數成正比。
+        """
+        if limit is None:
+            ids = self._ids[: self._rows]
+            start = int(np.searchsorted(ids, after, side="right")) if after else 0
+            mask = self._mask(min_price, max_price, available_only, start)
+            matched: List[int] = ids[start:][mask].tolist()
+            return matched
+        candidates = self.iter_ids(
+            min_price, max_price, available_only, after, max(limit * 2, 256)
+        )
+        return list(islice(candidates, limit))
+
+    def iter_ids(
+        self,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        available_only: bool = False,
+        after: int = 0,
+        window: int = 256,
+    ) -> Iterator[int]:
+        """按插入順序逐個產出過濾後 ID 大於 after 的商品 ID
+
+        從 after 所在行起分塊向量化過濾，塊大小倍增；只消費前 k 個時代價
+        與其覆蓋的行範圍成正比。迭代期間存儲不能被修改（需在持有讀鎖時消費）。
+        """
+        ids = self._ids[: self._rows]
+        start = int(np.searchsorted(ids, after, side="right")) if after else 0
+        while start < len(ids):
+            end = min(start + window, len(ids))
+            mask = self._mask(min_price, max_price, available_only, start, end)
+            yield from ids[start:end][mask].tolist()
+            start = end
+            window *= 2
+
+    def rows(self, item_ids: Iterable[int]) -> List[ItemRecord]:
+        """按給定的升序 ID 批量獲取商品"""
+        ids = np.fromiter(item_ids, dtype=np.int64)
+        rows = np.searchsorted(self._ids[: self._rows], ids)
+        return self._records(rows)
+
+    def price_bounds(self) -> Optional[Tuple[float, float]]:
+        """向量化計算最低和最高價格"""
+        if not self._count:
+            return None
+        prices = self._prices[: self._rows][self._live.unpack(0, self._rows)]
+        return float(prices.min()), float(prices.max())
+
+    # ===== 內部維護 =====
+
+    def _append_row(self, item_id: int) -> int:
+        """追加一行，容量不足時倍增"""
+        if self._rows == len(self._ids):
+            self._resize(len(self._ids) * 2)
+        row = self._rows
+        self._ids[row] = item_id
+        self._live[row] = True
+        self._names.append(None)
+        self._descriptions.append(None)
+        self._rows += 1
+        self._count += 1
+        return row
+
+    def _resize(self, capacity: int) -> None:
+        """調整數組容量"""
+        for name in ("_ids", "_prices"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: self._rows] = old[: self._rows]
+            setattr(self, name, new)
+        self._available = self._available.resized(capacity, self._rows)
+        self._live = self._live.resized(capacity, self._rows)
+
+    def _compact(self) -> None:
+        """移除墓碑行，保持 ID 升序"""
+        live = np.flatnonzero(self._live.unpack(0, self._rows))
+        capacity = max(self.initial_capacity, len(live) * 2)
+        for name in ("_ids", "_prices"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: len(live)] = old[live]
+            setattr(self, name, new)
+        self._available = Bitmap.from_bools(self._available.take(live), capacity)
+        self._live = Bitmap.from_bools(np.ones(len(live), dtype=np.bool_), capacity)
+        rows = live.tolist()
+        self._names = [self._names[row] for row in rows]
+        self._descriptions = [self._descriptions[row] for row in rows]
+        self._rows = len(rows)
@@ -0,0 +1,392 @@
+"""
+內存索引結構
+為 MemoryDatabase 提供可增量維護的二級索引
+"""
+
+import itertools
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from .tokenizer import is_cjk, normalize, tokenize
+
+Entry = Tuple[float, int]
+# 延遲構建文本索引時按 ID 讀取最新記錄：返回 (ID, 名稱, 描述)，跳過已刪除的 ID
+TextFetch = Callable[[List[int]], Iterable[Tuple[int, str, Optional[str]]]]
+
+
+class SortedIndex:
+    """有序索引：按 (鍵, ID) 排序，支持 O(log n + k) 的範圍查詢
+
+    索引項分段存放在若干有序小列表中（類似 B+ 樹的葉子層），
+    插入和刪除只移動單個分段內的元素，避免大列表的 O(n) 搬移。
+    """
+
+    # 分段大小上限的一半，超過 2 倍時分裂
+    load = 512
+
+    def __init__(self) -> None:
+        """初始化索引"""
+        self._buckets: List[List[Entry]] = []
+        # 每個分段的最大項，用於二分定位分段
+        self._maxes: List[Entry] = []
+        self._size = 0
+        # 延遲構建：首次訪問時用 source 返回的有序索引項整體構建
+        self._source: Optional[Callable[[], List[Entry]]] = None
+        self._build_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        self._ensure_built()
+        return self._size
+
+    def defer(self, source: Callable[[], List[Entry]]) -> None:
+        """清空索引，延遲到首次訪問（包括寫入）時再從 source 構建
+
+        source 返回延遲時刻的全部有序索引項；此後的寫入都會先觸發構建，
+        因此構建結果加上後續寫入即為最新狀態。
+        """
+        self.clear()
+        self._source = source
+
+    def _ensure_built(self) -> None:
+        """若處於延遲狀態則立即構建（並發讀者只構建一次）"""
+        if self._source is None:
+            return
+        with self._build_lock:
+            if self._source is not None:
+                self.bulk_load(self._source())
+                self._source = None
+
+    def add(self, key: float, record_id: int) -> None:
+        """加入索引項（鍵無法比較時拋出 TypeError，索引保持不變）"""
+        self._ensure_built()
+        entry = (key, record_id)
+
+        if not self._buckets:
+            self._buckets.append([entry])
+            self._maxes.append(entry)
+            self._size += 1
+            return
+
+        position = bisect_left(self._maxes, entry)
+        if position == len(self._maxes):
+            # 大於所有已有項，放入最後一個分段
+            position -= 1
+            self._buckets[position].append(entry)
+            self._maxes[position] = entry
+        else:
+            insort(self._buckets[position], entry)
+        self._size += 1
+
+        bucket = self._buckets[position]
+        if len(bucket) > self.load * 2:
+            self._buckets.insert(position + 1, bucket[self.load :])
+            self._maxes.insert(position + 1, bucket[-1])
+            del bucket[self.load :]
+            self._maxes[position] = bucket[-1]
+
+    def remove(self, key: float, record_id: int) -> None:
+        """移除索引項"""
+        self._ensure_built()
+        entry = (key, record_id)
+        position = bisect_left(self._maxes, entry)
+        if position == len(self._maxes):
+            return
+
+        bucket = self._buckets[position]
+        index = bisect_left(bucket, entry)
+        if index == len(bucket) or bucket[index] != entry:
+            return
+
+        del bucket[index]
+        self._size -= 1
+        if not bucket:
+            del self._buckets[position]
+            del self._maxes[position]
+        elif index == len(bucket):
+            self._maxes[position] = bucket[-1]
+
+    def bulk_load(self, entries: List[Entry]) -> None:
+        """用已按 (鍵, ID) 排序的索引項整體替換索引（O(n)）"""
+        load = self.load
+        self._buckets = [entries[i : i + load] for i in range(0, len(entries), load)]
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        self._size = len(entries)
+
+    def first(self) -> Optional[Entry]:
+        """返回最小的索引項"""
+        self._ensure_built()
+        return self._buckets[0][0] if self._buckets else None
+
+    def last(self) -> Optional[Entry]:
+        """返回最大的索引項"""
+        self._ensure_built()
+        return self._maxes[-1] if self._maxes else None
+
+    def range(
+        self, low: Optional[float] = None, high: Optional[float] = None
+    ) -> List[int]:
+        """返回鍵落在 [low, high] 範圍內的 ID（按鍵排序）"""
+        self._ensure_built()
+        if not self._buckets:
+            return []
+
+        if low is None:
+            bucket_index, start = 0, 0
+        else:
+            bucket_index = bisect_left(self._maxes, (low,))
+            if bucket_index == len(self._buckets):
+                return []
+            start = bisect_left(self._buckets[bucket_index], (low,))
+
+        # (high, inf) 大於所有鍵等於 high 的項
+        upper = (float("inf"),) if high is None else (high, float("inf"))
+        result: List[int] = []
+        while bucket_index < len(self._buckets):
+            bucket = self._buckets[bucket_index]
+            if self._maxes[bucket_index] < upper:
+                result.extend(record_id for _, record_id in bucket[start:])
+            else:
+                end = bisect_right(bucket, upper)
+                result.extend(record_id for _, record_id in bucket[start:end])
+                break
+            bucket_index += 1
+            start = 0
+        return result
+
+    def iter_after(self, low: float) -> Iterator[int]:
+        """按鍵升序逐個返回鍵大於 low 的 ID
+
+        定位起點 O(log n)，之後每取一個 O(1)；只取前 k 個時總代價為
+        O(log n + k)。迭代期間索引不能被修改（需在持有讀鎖時消費）。
+        """
+        self._ensure_built()
+        # (low, inf) 大於所有鍵等於 low 的項
+        entry = (low, float("inf"))
+        bucket_index = bisect_right(self._maxes, entry)
+        if bucket_index == len(self._buckets):
+            return
+        start = bisect_right(self._buckets[bucket_index], entry)
+        for bucket in itertools.islice(self._buckets, bucket_index, None):
+            for _, record_id in itertools.islice(bucket, start, None):
+                yield record_id
+            start = 0
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._buckets.clear()
+        self._maxes.clear()
+        self._size = 0
+        self._source = None
+
+
+class NgramIndex:
+    """N-gram 倒排索引：支持不區分大小寫、中英混合的子串查詢
+
+    文本先經 ``normalize`` 歸一化（全形轉半形、小寫），再按字符類型切段：
+    拉丁文單詞切分為 n-gram，CJK 連續段切分為單字和相鄰二元組。
+    查詢時對查詢串的 gram 倒排列表求交集得到候選集，再對候選記錄做
+    子串校驗，結果與逐條 ``normalize(query) in normalize(text)`` 完全一致。
+    """
+
+    def __init__(self, n: int = 3) -> None:
+        """初始化索引"""
+        self.n = n
+        self._postings: Dict[str, Set[int]] = {}
+        # 每條記錄已歸一化的文本字段，用於校驗和更新時計算差異
+        self._texts: Dict[int, Tuple[str, ...]] = {}
+        # 延遲構建：_pending 中的 ID 按升序分批構建，_built_through 之前的
+        # 記錄已建索引；(_built_through, _deferred_through] 內記錄的寫入先
+        # 忽略，輪到該批時再通過 _fetch 讀取其最新內容
+        self._fetch: Optional[TextFetch] = None
+        self._pending: List[int] = []
+        self._position = 0
+        self._built_through = 0
+        self._deferred_through = 0
+        self._build_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        self.build()
+        return len(self._texts)
+
+    def defer(self, record_ids: List[int], fetch: TextFetch) -> None:
+        """清空索引，延遲構建 record_ids（升序）對應的記錄
+
+        可通過 :meth:`build` 分批構建；查詢時會先構建剩餘部分。
+        """
+        self.clear()
+        if not record_ids:
+            return
+        self._fetch = fetch
+        self._pending = record_ids
+        self._built_through = record_ids[0] - 1
+        self._deferred_through = record_ids[-1]
+
+    @property
+    def deferred(self) -> bool:
+        """是否仍有等待構建的記錄"""
+        return self._fetch is not None
+
+    def _is_deferred(self, record_id: int) -> bool:
+        """記錄是否尚待構建（其寫入可以忽略）"""
+        return (
+            self._fetch is not None
+            and self._built_through < record_id <= self._deferred_through
+        )
+
+    def build(self, limit: Optional[int] = None) -> bool:
+        """構建最多 limit 條延遲的記錄，返回是否已全部構建
+
+        調用方需持有阻止寫入的鎖（讀鎖即可），並發調用由內部鎖串行化。
+        """
+        if not self.deferred:
+            return True
+        with self._build_lock:
+            fetch = self._fetch
+            if fetch is None:
+                return True
+            start = self._position
+            end = len(self._pending) if limit is None else start + limit
+            batch = self._pending[start:end]
+            for record_id, name, description in fetch(batch):
+                self._insert(record_id, name, description)
+            self._position = end
+            if end < len(self._pending):
+                self._built_through = batch[-1]
+                return False
+            self._fetch = None
+            self._pending = []
+            self._position = 0
+            return True
+
+    def _word_grams(self, word: str) -> List[str]:
+        """切分單詞的 n-gram"""
+        n = self.n
+        return [word[i : i + n] for i in range(len(word) - n + 1)]
+
+    def _index_grams(self, text: str) -> Set[str]:
+        """切分已歸一化文本的索引 gram"""
+        grams: Set[str] = set()
+        for token in tokenize(text, normalized=True):
+            if is_cjk(token):
+                # 同時索引單字，使單字查詢也能命中
+                grams.add(token)
+                grams.update(token)
+            else:
+                grams.update(self._word_grams(token))
+        return grams
+
+    def _query_grams(self, query: str) -> Set[str]:
+        """切分已歸一化查詢串的 gram
+
+        查詢串首尾的詞元可能只是記錄中某個詞元的一部分，因此只使用
+        必然出現在匹配記錄中的 gram：CJK 二元組或單字，以及拉丁文
+        單詞的 n-gram（短於 n 的單詞不產生 gram）。
+        """
+        grams: Set[str] = set()
+        for token in tokenize(query, normalized=True):
+            if is_cjk(token):
+                grams.add(token)
+            else:
+                grams.update(self._word_grams(token))
+        return grams
+
+    def _record_grams(self, texts: Tuple[str, ...]) -> Set[str]:
+        """記錄所有字段的 gram（按字段分別切分，不跨字段）"""
+        grams: Set[str] = set()
+        for text in texts:
+            grams |= self._index_grams(text)
+        return grams
+
+    def add(self, record_id: int, *fields: Optional[str]) -> None:
+        """加入或更新記錄，只修改發生變化的 n-gram"""
+        if not self._is_deferred(record_id):
+            self._insert(record_id, *fields)
+
+    def _insert(self, record_id: int, *fields: Optional[str]) -> None:
+        """加入或更新記錄"""
+        texts = tuple(normalize(field) for field in fields if field)
+        old_texts = self._texts.get(record_id)
+        if old_texts == texts:
+            return
+
+        old_grams = self._record_grams(old_texts) if old_texts else set()
+        new_grams = self._record_grams(texts)
+        self._texts[record_id] = texts
+
+        for gram in old_grams - new_grams:
+            self._discard(gram, record_id)
+        for gram in new_grams - old_grams:
+            self._postings.setdefault(gram, set()).add(record_id)
+
+    def remove(self, record_id: int) -> None:
+        """移除記錄"""
+        if self._is_deferred(record_id):
+            return
+        texts = self._texts.pop(record_id, None)
+        if texts is None:
+            return
+        for gram in self._record_grams(texts):
+            self._discard(gram, record_id)
+
+    def _discard(self, gram: str, record_id: int) -> None:
+        """從倒排列表中移除記錄，列表為空時刪除該 n-gram"""
+        posting = self._postings.get(gram)
+        if posting is not None:
+            posting.discard(record_id)
+            if not posting:
+                del self._postings[gram]
+
+    def search(self, query: str, within: Optional[Iterable[int]] = None) -> Set[int]:
+        """返回任一字段包含查詢串（歸一化後比較）的記錄 ID
+
+        Args:
+            query: 查詢串
+            within: 可選的候選 ID 範圍（例如其他索引的結果）
+        """
+        self.build()
+        query = normalize(query)
+        grams = self._query_grams(query)
+        scope = set(within) if within is not None else None
+
+        if grams:
+            postings = []
+            for gram in grams:
+                posting = self._postings.get(gram)
+                if not posting:
+                    return set()
+                postings.append(posting)
+            postings.sort(key=len)
+            candidates = set(postings[0]) if scope is None else scope & postings[0]
+            for posting in postings[1:]:
+                candidates &= posting
+                if not candidates:
+                    return candidates
+        else:
+            # 查詢串不產生 gram（如過短），退化為掃描已緩存的歸一化文本
+            candidates = set(self._texts) if scope is None else scope
+
+        texts = self._texts
+        return {
+            record_id
+            for record_id in candidates
+            if any(query in text for text in texts[record_id])
+        }
+
+    def matcher(self, query: str) -> Callable[[int], bool]:
+        """返回逐條判斷記錄是否包含查詢串的函數（與 search 的校驗一致）
+
+        用於按其他順序（如 ID 順序）逐個檢查候選、只需要前幾個匹配的
+        場景，不必先求出全部匹配。調用期間索引不能被修改。
+        """
+        self.build()
+        query = normalize(query)
+        texts = self._texts
+        return lambda record_id: any(query in text for text in texts.get(record_id, ()))
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._postings.clear()
+        self._texts.clear()
+        self._fetch = None
+        self._pending = []
+        self._position = 0
@@ -0,0 +1,103 @@
+"""
+讀寫鎖
+允許多個讀者並發訪問，寫者獨佔訪問
+"""
+
+from contextlib import contextmanager
+from threading import Condition, Lock, local
+from typing import Iterator
+
+_state = local()
+
+
+class WouldBlock(Exception):
+    """非阻塞模式下獲取鎖需要等待"""
+
+
+@contextmanager
+def nonblocking() -> Iterator[None]:
+    """在當前線程進入非阻塞模式：任何需要等待的加鎖都拋出 WouldBlock
+
+    供事件循環線程內聯執行廉價讀取：鎖空閒時直接完成，被佔用時
+    由調用方改為交給線程池，事件循環本身永不在鎖上等待。
+    """
+    previous = getattr(_state, "nonblocking", False)
+    _state.nonblocking = True
+    try:
+        yield
+    finally:
+        _state.nonblocking = previous
+
+
+def check_nonblocking() -> None:
+    """非阻塞模式下拋出 WouldBlock（在即將等待之前調用）"""
+    if getattr(_state, "nonblocking", False):
+        raise WouldBlock
+
+
+class RWLock:
+    """寫者優先的讀寫鎖
+
+    - 多個讀者可同時持有讀鎖
+    - 寫者獨佔，等待所有讀者釋放後進入
+    - 有寫者等待時，新讀者會被阻塞，避免寫者飢餓
+    """
+
+    def __init__(self) -> None:
+        """初始化鎖"""
+        self._condition = Condition(Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self) -> None:
+        """獲取讀鎖"""
+        with self._condition:
+            while self._writer or self._waiting_writers:
+                check_nonblocking()
+                self._condition.wait()
+            self._readers += 1
+
+    def release_read(self) -> None:
+        """釋放讀鎖"""
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self) -> None:
+        """獲取寫鎖"""
+        with self._condition:
+            if self._writer or self._readers:
+                check_nonblocking()
+            self._waiting_writers += 1
+            try:
+                while self._writer or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self) -> None:
+        """釋放寫鎖"""
+        with self._condition:
+            self._writer = False
+            self._condition.notify_all()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """讀鎖上下文管理器"""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """寫鎖上下文管理器"""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -3,64 +3,848 @@
 提供內存中的數據存儲和操作功能
 """
 
-from typing import List, Dict, Any, Optional
-from threading import Lock
+import secrets
+import threading
+from contextlib import contextmanager
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 from ..models import Item, User
+from .columnar import ColumnarItemStore
+from .indexes import SortedIndex, NgramIndex
+from .locks import RWLock
+from .persistent import PersistentMap
+from .records import InvalidRecordError, ItemRecord, UserRecord
+from .snapshot import LazyRecordDict, Snapshot, SnapshotState
+from .tokenizer import normalize
+from .wal import WriteAheadLog
+from src.core import app_logger
+
+# 分頁搜索沿 ID 順序逐個校驗的候選數下限，超過仍未找夠一頁時改用索引
+SEARCH_SCAN_BUDGET = 4096
+
+
+class DuplicateKeyError(ValueError):
+    """唯一鍵衝突錯誤"""
+
+    def __init__(self, field: str, value: Any) -> None:
+        super().__init__(f"{field} 已存在: {value}")
+        self.field = field
+        self.value = value
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # 保證跨進程傳遞（pickle）後字段不丟失
+        return type(self), (self.field, self.value)
+
+
+class VersionConflictError(ValueError):
+    """條件寫入的版本不匹配（記錄已被修改）"""
+
+    def __init__(self, expected: int, actual: int) -> None:
+        super().__init__(f"版本不匹配: 期望 {expected}, 實際 {actual}")
+        self.expected = expected
+        self.actual = actual
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return type(self), (self.expected, self.actual)
+
+
+class ItemsVersion(NamedTuple):
+    """商品集合的不可變版本（MVCC 快照）"""
+
+    records: PersistentMap
+    available: int
+    price_sum: float
+    min_price: float
+    max_price: float
+
+
+EMPTY_ITEMS_VERSION = ItemsVersion(PersistentMap(), 0, 0.0, 0, 0)
+
+
+class SearchPlan(NamedTuple):
+    """一次搜索的執行方式（只在持有商品鎖期間有效）"""
+
+    # candidates(after)：按 ID 升序產出 ID 大於 after 的候選
+    candidates: Callable[[int], Iterator[int]]
+    # matches(id)：候選是否滿足全部條件
+    matches: Callable[[int], bool]
+    # indexed(after)：由索引求出 ID 大於 after 的全部匹配（升序）
+    indexed: Callable[[int], List[int]]
+
+
+def chunked(records: Iterable[ItemRecord], size: int) -> Iterator[List[ItemRecord]]:
+    """把記錄流切分為每塊最多 size 個的列表"""
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if chunk:
+            yield chunk
+        if len(chunk) < size:
+            return
+
+
+class ItemAggregates(NamedTuple):
+    """商品聚合值（無商品時最低和最高價格為 0）"""
+
+    total: int
+    available: int
+    price_sum: float
+    min_price: float
+    max_price: float
+
+
+def build_stats(items: ItemAggregates, total_users: int) -> Dict[str, Any]:
+    """由聚合值構建統計信息響應"""
+    avg_price = items.price_sum / items.total if items.total > 0 else 0
+
+    return {
+        "items": {
+            "total": items.total,
+            "available": items.available,
+            "unavailable": items.total - items.available,
+            "price_stats": {
+                "average": round(avg_price, 2),
+                "maximum": items.max_price,
+                "minimum": items.min_price,
+            },
+        },
+        "users": {"total": total_users},
+    }
+
+
+# 示例數據
+SAMPLE_ITEMS: List[Dict[str, Any]] = [
+    {
+        "id": 1,
+        "name": "iPhone 15",
+        "description": "最新款 iPhone",
+        "price": 32000.0,
+        "is_available": True,
+    },
+    {
+        "id": 2,
+        "name": "MacBook Pro",
+        "description": "專業筆記本電腦",
+        "price": 65000.0,
+        "is_available": True,
+    },
+    {
+        "id": 3,
+        "name": "AirPods Pro",
+        "description": "無線耳機",
+        "price": 8000.0,
+        "is_available": False,
+    },
+]
+
+SAMPLE_USERS: List[Dict[str, Any]] = [
+    {
+        "id": 1,
+        "username": "alice",
+        "email": "alice@example.com",
+        "full_name": "Alice Wang",
+    },
+    {
+        "id": 2,
+        "username": "bob",
+        "email": "bob@example.com",
+        "full_name": "Bob Chen",
+    },
+]
+
+
+# 商品主存儲：字典引擎或列式引擎
+ItemStore = Union[Dict[int, ItemRecord], ColumnarItemStore]
+ITEM_ENGINES = ("dict", "columnar")
+
+# 變更監聽器：接收（變更序號, 日誌條目）
+ChangeListener = Callable[[int, Dict[str, Any]], None]
+
+# 只做一次哈希查找的點查詢，異步接口在事件循環線程內聯執行
+INLINE_READS = frozenset(
+    {
+        "get_item_by_id",
+        "get_user_by_id",
+        "get_user_by_username",
+        "item_version",
+        "user_version",
+        "items_generation",
+        "users_generation",
+    }
+)
 
 
 class MemoryDatabase:
     """內存數據庫類"""
 
-    def __init__(self) -> None:
-        """初始化數據庫"""
-        self._items: List[Dict[str, Any]] = []
-        self._users: List[Dict[str, Any]] = []
-        self._next_item_id = 1
+    inline_reads = INLINE_READS
+
+    def __init__(
+        self,
+        mvcc: bool = False,
+        item_engine: str = "dict",
+        first_item_id: int = 1,
+        item_id_step: int = 1,
+    ) -> None:
+        """初始化數據庫
+
+        Args:
+            mvcc: 是否啟用 MVCC 模式。啟用後寫者在寫鎖內發佈結構共享的
+                不可變版本，商品讀取、搜索和統計直接讀取當前版本，不加鎖。
+            item_engine: 商品存儲引擎。``dict`` 為按 ID 索引的字典；
+                ``columnar`` 為列式數組存儲（需要 numpy），價格和可用性過濾
+                及價格極值統計改用向量化計算，不再維護價格有序索引。
+            first_item_id: 第一個商品 ID
+            item_id_step: 商品 ID 步長。分片引擎讓每個分片分配互不相交的
+                ID 序列（分片 k 為 k+1, k+1+N, ...），分片內 ID 仍然遞增。
+        """
+        if item_engine not in ITEM_ENGINES:
+            raise ValueError(f"未知的商品存儲引擎: {item_engine}")
+        self._columnar = item_engine == "columnar"
+
+        # 以 ID 為鍵的主存儲（dict 保留插入順序，查找、更新、刪除皆為 O(1)）
+        self._items: ItemStore = ColumnarItemStore() if self._columnar else {}
+        self._users: Dict[int, UserRecord] = {}
+        # 價格有序索引，用於範圍查詢（列式引擎使用向量化過濾代替）
+        self._price_index = None if self._columnar else SortedIndex()
+        # ID 有序索引，用於鍵集分頁定位起點（列式引擎的行本身按 ID 有序）
+        self._item_ids = None if self._columnar else SortedIndex()
+        self._user_ids = SortedIndex()
+        # 名稱和描述的 trigram 倒排索引，用於關鍵字查詢
+        self._text_index = NgramIndex()
+        # 隨寫入增量維護的聚合值，最小/最大價格直接取自價格索引兩端
+        self._available_items = 0
+        self._price_sum = 0.0
+        # 唯一二級索引：用戶名 -> ID，電子郵件（不區分大小寫）-> ID
+        self._users_by_username: Dict[str, int] = {}
+        self._users_by_email: Dict[str, int] = {}
+        self._first_item_id = first_item_id
+        self._item_id_step = item_id_step
+        self._next_item_id = first_item_id
         self._next_user_id = 1
-        self._lock = Lock()  # 線程安全
+        # 按集合分開的讀寫鎖；需同時持有時先取商品鎖再取用戶鎖
+        self._items_lock = RWLock()
+        self._users_lock = RWLock()
+        # MVCC 版本：由寫者整體替換引用，讀者取得引用後即為一致的時間點視圖
+        self._mvcc = mvcc
+        self._items_version = EMPTY_ITEMS_VERSION
+        self._users_version = PersistentMap()
+        # 預寫日誌，由 attach_wal 掛載
+        self._wal: Optional[WriteAheadLog] = None
+        # 延遲加載中的快照，全部物化後由 warm_up 關閉
+        self._snapshot: Optional[Snapshot] = None
+        # 變更序號和監聽器：每次寫入分配遞增序號並按序號順序通知監聽器
+        self._change_seq = 0
+        self._listeners: List[ChangeListener] = []
+        self._listeners_lock = threading.Lock()
+        # 記錄版本（最近一次寫入的變更序號）和集合代數（集合最近一次寫入的序號），
+        # 用於 ETag；版本紀元在進程內唯一，序號重新計數後舊的 ETag 不會誤匹配
+        self.version_epoch = secrets.token_hex(4)
+        self._item_versions: Dict[int, int] = {}
+        self._user_versions: Dict[int, int] = {}
+        self._items_generation = 0
+        self._users_generation = 0
+
+    # ===== 預寫日誌 =====
+
+    def attach_wal(self, wal: WriteAheadLog, after_lsn: int = 0) -> int:
+        """重放預寫日誌並在之後記錄所有寫入
+
+        Args:
+            wal: 預寫日誌
+            after_lsn: 只重放序號大於它的日誌（已加載快照的序號）
+
+        Returns:
+            重放的日誌條數
+        """
+        replayed = 0
+        with self._items_lock.write(), self._users_lock.write():
+            for entry in wal.replay(after_lsn):
+                try:
+                    self._apply_entry(entry)
+                except InvalidRecordError as e:
+                    # 無效的條目不會改變任何狀態，跳過它以免阻止重啟
+                    app_logger.warning(f"⚠️ 跳過無效的日誌條目: {e}")
+                    continue
+                replayed += 1
+            self._wal = wal
+        return replayed
+
+    def close_wal(self) -> None:
+        """刷出剩餘日誌並停止記錄"""
+        with self._items_lock.write(), self._users_lock.write():
+            wal, self._wal = self._wal, None
+        if wal is not None:
+            wal.close()
+
+    def compact_wal(self, lsn: int) -> None:
+        """刪除已被序號為 lsn 的快照覆蓋的日誌段"""
+        wal = self._wal
+        if wal is not None:
+            wal.drop_segments(lsn)
+
+    def close(self) -> None:
+        """關閉數據庫（刷出並關閉預寫日誌）"""
+        self.close_wal()
+
+    @contextmanager
+    def _log(self, op: str, **fields: Any) -> Iterator[int]:
+        """追加一條日誌並分配變更序號，在 with 塊內修改內存，退出時通知監聽器
+
+        產出日誌序號，未掛載日誌時為 0（需在持有寫鎖時使用）。先記日誌再
+        修改內存：追加失敗時本次寫入不會生效。記錄需在之前校驗（見
+        ``Record.validate``），日誌中只會出現能夠成功應用的條目。監聽器在
+        修改對讀者可見之後才收到變更：讀到序號的消費者再讀取數據，一定
+        能看到該變更。
+        """
+        entry = {"op": op, **fields}
+        with self._listeners_lock:
+            # 商品和用戶寫入持有不同的鎖，追加、序號分配、應用與通知需要
+            # 串行化，使變更序號與日誌順序一致；追加失敗時不分配序號也不通知
+            lsn = 0 if self._wal is None else self._wal.append(entry)
+            self._change_seq += 1
+            yield lsn
+            for listener in self._listeners:
+                listener(self._change_seq, entry)
+
+    def _wait_durable(self, lsn: int) -> None:
+        """等待日誌持久化（在釋放寫鎖後調用，讓並發寫入共享 fsync）"""
+        if lsn and self._wal is not None:
+            self._wal.wait(lsn)
+
+    def _apply_entry(self, entry: Dict[str, Any]) -> None:
+        """重放一條日誌（需在持有兩個寫鎖時調用）
+
+        Raises:
+            InvalidRecordError: 條目中的記錄無效，此時不修改任何狀態
+        """
+        op = entry["op"]
+        if op == "put_item":
+            item = ItemRecord.validate(entry["record"])
+            self._store_item(self._items.get(item.id), item)
+            self._next_item_id = max(self._next_item_id, item.id + self._item_id_step)
+        elif op == "delete_item":
+            removed_item = self._items.pop(entry["id"], None)
+            if removed_item is not None:
+                self._unindex_item(removed_item)
+        elif op == "put_user":
+            user = UserRecord.validate(entry["record"])
+            existing = self._users.get(user.id)
+            if existing is not None:
+                self._unindex_user(existing)
+            self._users[user.id] = user
+            self._index_user(user)
+            self._next_user_id = max(self._next_user_id, user.id + 1)
+        elif op == "delete_user":
+            removed_user = self._users.pop(entry["id"], None)
+            if removed_user is not None:
+                self._unindex_user(removed_user)
+        elif op == "clear":
+            self._clear()
+        else:
+            raise ValueError(f"未知的日誌操作: {op}")
+
+    # ===== 變更訂閱 =====
+
+    @property
+    def change_seq(self) -> int:
+        """最近一次寫入的變更序號"""
+        return self._change_seq
+
+    def listen(self, listener: ChangeListener) -> int:
+        """註冊變更監聽器（不捕獲狀態），返回註冊時刻的變更序號
+
+        監聽器恰好收到序號大於返回值的所有變更，在寫鎖內、變更已對讀者
+        可見之後被調用。
+        """
+        with self._listeners_lock:
+            self._listeners.append(listener)
+            return self._change_seq
+
+    @contextmanager
+    def changes_paused(self) -> Iterator[int]:
+        """暫停發佈變更，產出當前變更序號
+
+        期間的寫入在分配序號前等待，不會有進行中的監聽器調用。
+        """
+        with self._listeners_lock:
+            yield self._change_seq
+
+    def subscribe(self, listener: ChangeListener) -> SnapshotState:
+        """註冊變更監聽器，返回註冊時刻的一致狀態
+
+        狀態的 lsn 字段為對應的變更序號，監聽器恰好收到其後的所有變更。
+        監聽器在寫鎖內被調用，只應做入隊之類的輕量操作。
+        """
+        with self._items_lock.read(), self._users_lock.read():
+            with self._listeners_lock:
+                self._listeners.append(listener)
+            return SnapshotState(
+                self._change_seq,
+                self._next_item_id,
+                self._next_user_id,
+                list(self._items.values()),
+                list(self._users.values()),
+                (
+                    self.version_epoch,
+                    dict(self._item_versions),
+                    dict(self._user_versions),
+                ),
+                (self._items_generation, self._users_generation),
+            )
+
+    def unsubscribe(self, listener: ChangeListener) -> None:
+        """移除變更監聽器"""
+        with self._listeners_lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def restore(self, state: SnapshotState) -> None:
+        """用一致狀態整體替換所有數據（用於初始化副本）
+
+        變更序號與狀態對齊，附帶版本信息時沿用原數據庫的版本、集合代數和
+        版本紀元，使副本產生的 ETag 和緩存鍵與原數據庫一致。
+        """
+        with self._items_lock.write(), self._users_lock.write():
+            self._change_seq = state.lsn
+            self._clear()
+            for item in state.items:
+                self._items[item.id] = item
+                self._index_item(item)
+            for user in state.users:
+                self._users[user.id] = user
+                self._index_user(user)
+            self._next_item_id = state.next_item_id
+            self._next_user_id = state.next_user_id
+            if state.versions is not None:
+                epoch, item_versions, user_versions = state.versions
+                self.version_epoch = epoch
+                self._item_versions = dict(item_versions)
+                self._user_versions = dict(user_versions)
+            if state.generations is not None:
+                self._items_generation, self._users_generation = state.generations
+
+    def apply_entries(self, changes: Iterable[Tuple[int, Dict[str, Any]]]) -> None:
+        """在一次加鎖內按順序應用一批（變更序號, 日誌條目）（用於副本同步）
+
+        沿用原數據庫分配的變更序號，副本的記錄版本與原數據庫一致。
+        """
+        with self._items_lock.write(), self._users_lock.write():
+            for seq, entry in changes:
+                self._change_seq = seq
+                self._apply_entry(entry)
+
+    # ===== 版本 =====
+
+    def item_version(self, item_id: int) -> Optional[int]:
+        """商品的版本（最近一次寫入的變更序號），商品不存在時返回 None
+
+        版本在數據發佈之後更新：先讀版本再讀數據，讀到的數據不會舊於版本。
+        """
+        if self._mvcc:
+            if self._items_version.records.get(item_id) is None:
+                return None
+            return self._item_versions.get(item_id, 0)
+        with self._items_lock.read():
+            if self._items.get(item_id) is None:
+                return None
+            # 從快照或日誌恢復的記錄沒有單獨的版本，視為恢復時刻（0）的狀態
+            return self._item_versions.get(item_id, 0)
+
+    def user_version(self, user_id: int) -> Optional[int]:
+        """用戶的版本，用戶不存在時返回 None"""
+        if self._mvcc:
+            if self._users_version.get(user_id) is None:
+                return None
+            return self._user_versions.get(user_id, 0)
+        with self._users_lock.read():
+            if user_id not in self._users:
+                return None
+            return self._user_versions.get(user_id, 0)
+
+    def items_generation(self) -> int:
+        """商品集合的代數：任何商品寫入後遞增"""
+        return self._items_generation
+
+    def users_generation(self) -> int:
+        """用戶集合的代數：任何用戶寫入後遞增"""
+        return self._users_generation
+
+    # ===== 快照 =====
+
+    def capture_snapshot(self) -> SnapshotState:
+        """捕獲一致的完整狀態
+
+        記錄不可變，讀鎖內只複製引用，序列化可在鎖外進行。掛載了日誌時
+        同時歸檔當前日誌段，快照序號之後的寫入全部落在新的日誌文件中。
+        """
+        with self._items_lock.read(), self._users_lock.read():
+            lsn = self._wal.rotate() if self._wal is not None else 0
+            return SnapshotState(
+                lsn,
+                self._next_item_id,
+                self._next_user_id,
+                list(self._items.values()),
+                list(self._users.values()),
+            )
+
+    def load_snapshot(self, snapshot: Snapshot) -> None:
+        """用快照整體替換當前狀態，快照由數據庫接管並在 warm_up 完成後關閉
+
+        字典引擎延遲加載：商品字典先只存放 ID 到快照行號的映射，記錄在
+        首次訪問時從映射文件物化；價格索引在首次使用時由快照中已排序的
+        索引項構建；關鍵字索引由 warm_up 分批構建或在首次關鍵字搜索時構建。
+        列式引擎和 MVCC 模式需要完整數據，仍一次性解碼。
+        """
+        with self._items_lock.write(), self._users_lock.write():
+            self._clear()
+            # 整體替換狀態但不產生變更序號，換用新的版本紀元使舊 ETag 失效
+            self.version_epoch = secrets.token_hex(4)
+            item_ids = snapshot.item_ids()
+            if isinstance(self._items, ColumnarItemStore):
+                self._items.load_columns(*snapshot.item_columns())
+            elif self._mvcc:
+                self._items = dict(zip(item_ids, snapshot.items()))
+            else:
+                self._items = LazyRecordDict(item_ids, snapshot.item_record)
+            if self._price_index is not None:
+                self._price_index.defer(snapshot.price_entries)
+            if self._item_ids is not None:
+                self._item_ids.defer(lambda: [(i, i) for i in item_ids])
+            self._text_index.defer(item_ids, self._text_rows)
+            self._available_items = snapshot.available_items
+            self._price_sum = snapshot.price_sum
+
+            users = snapshot.users()
+            self._users = {user.id: user for user in users}
+            self._users_by_username = {user.username: user.id for user in users}
+            self._users_by_email = {
+                self._email_key(user.email): user.id for user in users
+            }
+            self._user_ids.bulk_load([(i, i) for i in sorted(self._users)])
+            self._next_item_id = snapshot.next_item_id
+            self._next_user_id = snapshot.next_user_id
+            self._snapshot = snapshot
+
+            if self._mvcc:
+                min_price, max_price = self._price_bounds()
+                self._items_version = ItemsVersion(
+                    PersistentMap.from_sorted(zip(item_ids, self._items.values())),
+                    self._available_items,
+                    self._price_sum,
+                    min_price,
+                    max_price,
+                )
+                self._users_version = PersistentMap.from_sorted(self._users.items())
+
+    def _text_rows(self, item_ids: List[int]) -> List[Tuple[int, str, Optional[str]]]:
+        """關鍵字索引的延遲構建來源（在持有商品鎖時被調用）"""
+        rows = []
+        for item_id in item_ids:
+            item = self._items.get(item_id)
+            if item is not None:
+                rows.append((item_id, item.name, item.description))
+        return rows
+
+    def warm_up(self, batch: int = 10_000) -> None:
+        """分批完成快照的延遲加載：物化記錄、構建價格和關鍵字索引
+
+        每批只短暫持有讀鎖，批次之間寫者可以進入。全部完成後關閉快照。
+        """
+        while True:
+            with self._items_lock.read():
+                if self._snapshot is None:
+                    return
+                if self._price_index is not None:
+                    self._price_index.first()
+                done = self._text_index.build(batch)
+                if isinstance(self._items, LazyRecordDict):
+                    done = self._items.materialize(batch) and done
+            if done:
+                break
+
+        with self._items_lock.write():
+            self._release_snapshot()
+
+    def _release_snapshot(self) -> None:
+        """關閉已不再被引用的快照（需在持有商品寫鎖時調用）"""
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
 
     # ===== 商品相關操作 =====
 
-    def get_all_items(self) -> List[Dict[str, Any]]:
-        """獲取所有商品"""
-        with self._lock:
-            return self._items.copy()
+    def _index_item(self, item: ItemRecord) -> None:
+        """將商品加入索引和聚合值（需在持有寫鎖時調用）"""
+        if self._price_index is not None:
+            self._price_index.add(item["price"], item["id"])
+        if self._item_ids is not None:
+            self._item_ids.add(item["id"], item["id"])
+        self._text_index.add(item["id"], item["name"], item.get("description"))
+        self._available_items += bool(item["is_available"])
+        self._price_sum += item["price"]
+        self._publish_item(item["id"])
 
-    def get_item_by_id(self, item_id: int) -> Optional[Dict[str, Any]]:
-        """根據 ID 獲取商品"""
-        with self._lock:
-            for item in self._items:
-                if item["id"] == item_id:
-                    return item.copy()
-            return None
+    def _unindex_item(self, item: ItemRecord) -> None:
+        """將商品從索引和聚合值移除（需在持有寫鎖時調用）"""
+        if self._price_index is not None:
+            self._price_index.remove(item["price"], item["id"])
+        if self._item_ids is not None:
+            self._item_ids.remove(item["id"], item["id"])
+        self._text_index.remove(item["id"])
+        self._available_items -= bool(item["is_available"])
+        self._price_sum -= item["price"]
+        if not self._items:
+            # 清空時重置累加值，避免浮點誤差殘留
+            self._price_sum = 0.0
+        self._publish_item(item["id"])
+
+    def _reindex_item(self, old: ItemRecord, new: ItemRecord) -> None:
+        """商品更新後同步索引和聚合值（需在持有寫鎖時調用）
+
+        可能失敗的索引更新在前，失敗時撤銷已完成的部分並重新拋出，
+        索引和聚合值不會停留在只更新了一半的狀態。
+        """
+        price_delta = new["price"] - old["price"]
+        price_index = self._price_index if price_delta else None
+        if price_index is not None:
+            price_index.remove(old["price"], old["id"])
+            try:
+                price_index.add(new["price"], new["id"])
+            except BaseException:
+                price_index.add(old["price"], old["id"])
+                raise
+        try:
+            self._text_index.add(new["id"], new["name"], new.get("description"))
+        except BaseException:
+            if price_index is not None:
+                price_index.remove(new["price"], new["id"])
+                price_index.add(old["price"], old["id"])
+            raise
+        self._price_sum += price_delta
+        self._available_items += bool(new["is_available"]) - bool(old["is_available"])
+        self._publish_item(new["id"])
+
+    def _store_item(self, existing: Optional[ItemRecord], item: ItemRecord) -> None:
+        """寫入商品記錄並同步索引，同步失敗時恢復原記錄（需在持有寫鎖時調用）"""
+        self._items[item.id] = item
+        if existing is None:
+            self._index_item(item)
+            return
+        try:
+            self._reindex_item(existing, item)
+        except BaseException:
+            self._items[item.id] = existing
+            raise
+
+    def _publish_item(self, item_id: int) -> None:
+        """更新商品版本和集合代數，MVCC 模式下先發佈包含該商品最新狀態的
+        新版本（需在持有寫鎖時調用）
+        """
+        item = self._items.get(item_id)
+        if self._mvcc:
+            records = self._items_version.records
+            if item is None:
+                records = records.delete(item_id)
+            else:
+                records = records.set(item_id, item)
 
-    def create_item(self, item_data: Dict[str, Any]) -> Dict[str, Any]:
+            min_price, max_price = self._price_bounds()
+            self._items_version = ItemsVersion(
+                records, self._available_items, self._price_sum, min_price, max_price
+            )
+
+        # 版本在發佈之後更新，無鎖讀者讀到新版本時一定能讀到新數據
+        if item is None:
+            self._item_versions.pop(item_id, None)
+        else:
+            self._item_versions[item_id] = self._change_seq
+        self._items_generation = self._change_seq
+
+    def _price_bounds(self) -> Tuple[float, float]:
+        """當前最低和最高價格，無商品時為 (0, 0)（需在持有鎖時調用）"""
+        if isinstance(self._items, ColumnarItemStore):
+            # 列式引擎：向量化求極值
+            return self._items.price_bounds() or (0, 0)
+        assert self._price_index is not None
+        lowest = self._price_index.first()
+        highest = self._price_index.last()
+        if lowest is None or highest is None:
+            return 0, 0
+        return lowest[0], highest[0]
+
+    def _items_after(
+        self, after: int, limit: Optional[int], available_only: bool = False
+    ) -> List[ItemRecord]:
+        """按 ID 升序返回 ID 大於 after 的前 limit 個商品（需在持有商品鎖時調用）
+
+        由 ID 索引（列式引擎為有序的行）定位起點，代價與頁大小成正比。
+        """
+        if isinstance(self._items, ColumnarItemStore):
+            item_ids = self._items.filter_ids(
+                available_only=available_only, after=after, limit=limit
+            )
+            return self._items.rows(item_ids)
+
+        items: Iterable[ItemRecord]
+        if not after and limit is None:
+            items = self._items.values()
+        else:
+            assert self._item_ids is not None
+            items = (self._items[i] for i in self._item_ids.iter_after(after))
+        if available_only:
+            items = (item for item in items if item["is_available"])
+        return list(islice(items, limit))
+
+    def get_all_items(
+        self, after: int = 0, limit: Optional[int] = None
+    ) -> List[ItemRecord]:
+        """獲取所有商品（按 ID 升序；可只取 ID 大於 after 的前 limit 個）"""
+        if self._mvcc:
+            records = self._items_version.records
+            if not after and limit is None:
+                return records.values()
+            return list(islice(records.values_from(after + 1), limit))
+        with self._items_lock.read():
+            return self._items_after(after, limit)
+
+    def get_item_by_id(self, item_id: int) -> Optional[ItemRecord]:
+        """根據 ID 獲取商品（記錄不可變，無需複製）"""
+        if self._mvcc:
+            item: Optional[ItemRecord] = self._items_version.records.get(item_id)
+            return item
+        with self._items_lock.read():
+            return self._items.get(item_id)
+
+    def _insert_item(self, item_data: Dict[str, Any]) -> Tuple[ItemRecord, int]:
+        """分配 ID 並寫入商品，返回記錄和日誌序號（需在持有寫鎖時調用）
+
+        Raises:
+            InvalidRecordError: 商品字段無效（不記日誌、不修改任何狀態）
+        """
+        item = ItemRecord.validate({**item_data, "id": self._next_item_id})
+        with self._log("put_item", record=item.to_dict()) as lsn:
+            self._next_item_id += self._item_id_step
+            self._store_item(None, item)
+        return item, lsn
+
+    def _replace_item(
+        self, existing: ItemRecord, item_data: Dict[str, Any]
+    ) -> Tuple[ItemRecord, int]:
+        """以新數據替換已有商品，返回記錄和日誌序號（需在持有寫鎖時調用）
+
+        Raises:
+            InvalidRecordError: 合併後的商品字段無效（不記日誌、不修改任何狀態）
+        """
+        item = ItemRecord.validate({**item_data, "id": existing.id})
+        with self._log("put_item", record=item.to_dict()) as lsn:
+            self._store_item(existing, item)
+        return item, lsn
+
+    def _remove_item(self, item_id: int) -> Tuple[Optional[ItemRecord], int]:
+        """刪除商品，返回被刪除的記錄和日誌序號（需在持有寫鎖時調用）"""
+        item = self._items.get(item_id)
+        if item is None:
+            return None, 0
+        with self._log("delete_item", id=item_id) as lsn:
+            self._items.pop(item_id)
+            self._unindex_item(item)
+        return item, lsn
+
+    def create_item(self, item_data: Dict[str, Any]) -> ItemRecord:
         """創建新商品"""
-        with self._lock:
-            item_data["id"] = self._next_item_id
-            self._next_item_id += 1
-            self._items.append(item_data.copy())
-            return item_data
+        with self._items_lock.write():
+            item, lsn = self._insert_item(item_data)
+        self._wait_durable(lsn)
+        return item
 
     def update_item(
-        self, item_id: int, item_data: Dict[str, Any]
-    ) -> Optional[Dict[str, Any]]:
-        """更新商品"""
-        with self._lock:
-            for i, item in enumerate(self._items):
-                if item["id"] == item_id:
-                    item_data["id"] = item_id
-                    self._items[i] = item_data.copy()
-                    return item_data
-            return None
-
-    def delete_item(self, item_id: int) -> Optional[Dict[str, Any]]:
+        self, item_id: int, item_data: Dict[str, Any], version: Optional[int] = None
+    ) -> Optional[ItemRecord]:
+        """更新商品
+
+        Args:
+            version: 提供時只在商品的當前版本與之相同時更新（樂觀併發控制）
+
+        Raises:
+            VersionConflictError: 商品的當前版本與 version 不同
+        """
+        with self._items_lock.write():
+            existing = self._items.get(item_id)
+            if existing is None:
+                return None
+            if version is not None:
+                current = self._item_versions.get(item_id, 0)
+                if current != version:
+                    raise VersionConflictError(version, current)
+            item, lsn = self._replace_item(existing, item_data)
+        self._wait_durable(lsn)
+        return item
+
+    def delete_item(self, item_id: int) -> Optional[ItemRecord]:
         """刪除商品"""
-        with self._lock:
-            for i, item in enumerate(self._items):
-                if item["id"] == item_id:
-                    return self._items.pop(i)
-            return None
+        with self._items_lock.write():
+            item, lsn = self._remove_item(item_id)
+        self._wait_durable(lsn)
+        return item
+
+    def create_items(self, items_data: List[Dict[str, Any]]) -> List[ItemRecord]:
+        """批量創建商品（整批只獲取一次寫鎖，等待一次日誌持久化）"""
+        items: List[ItemRecord] = []
+        lsn = 0
+        with self._items_lock.write():
+            for item_data in items_data:
+                item, lsn = self._insert_item(item_data)
+                items.append(item)
+        self._wait_durable(lsn)
+        return items
+
+    def update_items(
+        self, changes: List[Tuple[int, Dict[str, Any]]]
+    ) -> List[Optional[ItemRecord]]:
+        """批量部分更新商品（整批只獲取一次寫鎖）
+
+        Args:
+            changes: (商品 ID, 要修改的字段) 列表，字段與現有記錄合併
+
+        Returns:
+            與輸入一一對應的更新後記錄，商品不存在時為 None
+        """
+        items: List[Optional[ItemRecord]] = []
+        lsn = 0
+        with self._items_lock.write():
+            for item_id, fields in changes:
+                existing = self._items.get(item_id)
+                if existing is None:
+                    items.append(None)
+                    continue
+                item, lsn = self._replace_item(existing, {**existing, **fields})
+                items.append(item)
+        self._wait_durable(lsn)
+        return items
+
+    def delete_items(self, item_ids: List[int]) -> List[Optional[ItemRecord]]:
+        """批量刪除商品（整批只獲取一次寫鎖），不存在的商品對應 None"""
+        items: List[Optional[ItemRecord]] = []
+        lsn = 0
+        with self._items_lock.write():
+            for item_id in item_ids:
+                item, item_lsn = self._remove_item(item_id)
+                items.append(item)
+                lsn = max(lsn, item_lsn)
+        self._wait_durable(lsn)
+        return items
 
     def search_items(
         self,
@@ -68,185 +852,532 @@ class MemoryDatabase:
         min_price: Optional[float] = None,
         max_price: Optional[float] = None,
         available_only: bool = True,
-    ) -> List[Dict[str, Any]]:
-        """搜索商品"""
-        with self._lock:
-            filtered_items = self._items.copy()
+        after: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[ItemRecord]:
+        """搜索商品（按 ID 升序；可只取 ID 大於 after 的前 limit 個）
 
-            if available_only:
-                filtered_items = [
-                    item for item in filtered_items if item["is_available"]
-                ]
+        分頁時從 after 起沿 ID 順序逐個校驗條件，找夠一頁即停止，代價與
+        一頁覆蓋的 ID 範圍成正比而與匹配總數無關；條件選擇性高、逐個校驗
+        找不夠時改由價格和關鍵字索引求出剩餘匹配。不分頁時直接由索引求解。
+        """
+        if self._mvcc:
+            return self._search_version(
+                query, min_price, max_price, available_only, after, limit
+            )
+
+        with self._items_lock.read():
+            if not query and min_price is None and max_price is None:
+                return self._items_after(after, limit, available_only)
+            plan = self._search_plan(query, min_price, max_price, available_only)
+            if limit is None:
+                item_ids = plan.indexed(after)
+            else:
+                item_ids, stopped = self._scan_ids(plan, after, limit)
+                if stopped is not None:
+                    item_ids += plan.indexed(stopped)[: limit - len(item_ids)]
+            return self._item_rows(item_ids)
+
+    def iter_search_items(
+        self,
+        query: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        available_only: bool = True,
+        after: int = 0,
+        chunk_size: int = 1000,
+    ) -> Iterator[List[ItemRecord]]:
+        """逐塊產出搜索結果（按 ID 升序，每塊最多 chunk_size 個），用於流式輸出
+
+        整個搜索共用一個游標：每塊在讀鎖內從上一塊的末尾繼續沿 ID 順序校驗，
+        塊之間釋放鎖；匹配稀疏時由索引只求一次剩餘匹配的 ID，之後的塊按這些
+        ID 重新讀取記錄並校驗。與分頁相同，不會重複輸出，也不會遺漏整個過程
+        中一直匹配的記錄。MVCC 模式下整個迭代在開始時的版本上無鎖進行。
+        """
+        filters = (query, min_price, max_price, available_only)
+        if self._mvcc:
+            records = self._items_version.records.values_from(after + 1)
+            yield from chunked(self._filter_records(records, *filters), chunk_size)
+            return
+
+        # 逐個校驗超出預算後，由索引一次求出的剩餘匹配 ID
+        remaining: Optional[Iterator[int]] = None
+        while True:
+            with self._items_lock.read():
+                chunk: List[ItemRecord] = []
+                if remaining is None:
+                    plan = self._search_plan(*filters)
+                    item_ids, stopped = self._scan_ids(plan, after, chunk_size)
+                    chunk = self._item_rows(item_ids)
+                    if stopped is not None:
+                        remaining = iter(plan.indexed(stopped))
+                if remaining is not None:
+                    # 記錄可能在塊之間被修改或刪除，重新讀取並校驗
+                    items = self._items
+                    records = (items[i] for i in remaining if i in items)
+                    matched = self._filter_records(records, *filters)
+                    chunk += islice(matched, chunk_size - len(chunk))
+            if chunk:
+                yield chunk
+            if len(chunk) < chunk_size:
+                return
+            after = chunk[-1].id
+
+    def _search_plan(
+        self,
+        query: Optional[str],
+        min_price: Optional[float],
+        max_price: Optional[float],
+        available_only: bool,
+    ) -> SearchPlan:
+        """按存儲引擎構造搜索的執行方式（需在持有商品鎖時調用）"""
+        text_matches = self._text_index.matcher(query) if query else None
+
+        if isinstance(self._items, ColumnarItemStore):
+            # 列式引擎：價格和可用性向量化過濾，只需逐條校驗關鍵字
+            store = self._items
+
+            def candidates(after: int) -> Iterator[int]:
+                return store.iter_ids(min_price, max_price, available_only, after)
+
+            def indexed(after: int) -> List[int]:
+                item_ids = store.filter_ids(min_price, max_price, available_only, after)
+                if not query:
+                    return item_ids
+                return sorted(self._text_index.search(query, item_ids))
+
+            return SearchPlan(candidates, text_matches or (lambda _: True), indexed)
+
+        items, item_index = self._items, self._item_ids
+        assert item_index is not None
+
+        def matches(item_id: int) -> bool:
+            item = items[item_id]
+            if available_only and not item["is_available"]:
+                return False
+            if min_price is not None and item["price"] < min_price:
+                return False
+            if max_price is not None and item["price"] > max_price:
+                return False
+            return text_matches is None or text_matches(item_id)
 
+        def indexed_ids(after: int) -> List[int]:
+            item_ids: Optional[List[int]] = None
+            if min_price is not None or max_price is not None:
+                # 價格索引：O(log n + k)
+                assert self._price_index is not None
+                item_ids = self._price_index.range(min_price, max_price)
             if query:
-                filtered_items = [
-                    item
-                    for item in filtered_items
-                    if query.lower() in item["name"].lower()
-                    or (
-                        item.get("description")
-                        and query.lower() in item["description"].lower()
-                    )
-                ]
-
-            if min_price is not None:
-                filtered_items = [
-                    item for item in filtered_items if item["price"] >= min_price
-                ]
-
-            if max_price is not None:
-                filtered_items = [
-                    item for item in filtered_items if item["price"] <= max_price
-                ]
-
-            return filtered_items
+                # trigram 索引：倒排列表求交集後校驗
+                item_ids = list(self._text_index.search(query, item_ids))
+            if item_ids is None:
+                item_ids = list(item_index.iter_after(after))
+            else:
+                item_ids = sorted(item_id for item_id in item_ids if item_id > after)
+            if available_only:
+                item_ids = [i for i in item_ids if items[i]["is_available"]]
+            return item_ids
+
+        return SearchPlan(item_index.iter_after, matches, indexed_ids)
+
+    @staticmethod
+    def _scan_ids(
+        plan: SearchPlan, after: int, limit: int
+    ) -> Tuple[List[int], Optional[int]]:
+        """從 after 起逐個校驗候選，找夠 limit 個即停止（需在持有商品鎖時調用）
+
+        校驗了 SEARCH_SCAN_BUDGET 個（至少為 limit 的 8 倍）候選仍未找夠時
+        說明匹配稀疏，停止掃描並返回已校驗的最後一個 ID，其後的匹配應由
+        ``plan.indexed`` 求出；否則第二項為 None。
+        """
+        budget = max(limit * 8, SEARCH_SCAN_BUDGET)
+        result: List[int] = []
+        last = after
+        for scanned, item_id in enumerate(plan.candidates(after)):
+            if scanned == budget:
+                return result, last
+            last = item_id
+            if plan.matches(item_id):
+                result.append(item_id)
+                if len(result) == limit:
+                    break
+        return result, None
+
+    def _item_rows(self, item_ids: List[int]) -> List[ItemRecord]:
+        """按 ID 讀取商品（需在持有商品鎖時調用）"""
+        if isinstance(self._items, ColumnarItemStore):
+            return self._items.rows(item_ids)
+        items = self._items
+        return [items[item_id] for item_id in item_ids]
+
+    def _search_version(
+        self,
+        query: Optional[str],
+        min_price: Optional[float],
+        max_price: Optional[float],
+        available_only: bool,
+        after: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[ItemRecord]:
+        """在當前 MVCC 版本上無鎖掃描搜索
+
+        索引隨寫入原地更新，不屬於任何版本，因此這裡逐條過濾快照中的
+        記錄；掃描期間寫者不會被阻塞。分頁時從 after 之後開始掃描，
+        找夠 limit 個即停止。
+        """
+        records = self._items_version.records
+        matched = self._filter_records(
+            (
+                records.values()
+                if not after and limit is None
+                else records.values_from(after + 1)
+            ),
+            query,
+            min_price,
+            max_price,
+            available_only,
+        )
+        return list(islice(matched, limit))
+
+    @staticmethod
+    def _filter_records(
+        records: Iterable[ItemRecord],
+        query: Optional[str],
+        min_price: Optional[float],
+        max_price: Optional[float],
+        available_only: bool,
+    ) -> Iterator[ItemRecord]:
+        """逐條過濾商品記錄（匹配語義與索引查詢一致）"""
+        if available_only:
+            records = (item for item in records if item["is_available"])
+        if min_price is not None:
+            records = (item for item in records if item["price"] >= min_price)
+        if max_price is not None:
+            records = (item for item in records if item["price"] <= max_price)
+        if query:
+            query = normalize(query)
+            records = (
+                item
+                for item in records
+                if query in normalize(item["name"])
+                or (item.get("description") and query in normalize(item["description"]))
+            )
+        return iter(records)
 
     # ===== 用戶相關操作 =====
 
-    def get_all_users(self) -> List[Dict[str, Any]]:
-        """獲取所有用戶"""
-        with self._lock:
-            return self._users.copy()
+    def get_all_users(
+        self, after: int = 0, limit: Optional[int] = None
+    ) -> List[UserRecord]:
+        """獲取所有用戶（按 ID 升序；可只取 ID 大於 after 的前 limit 個）"""
+        if self._mvcc:
+            if not after and limit is None:
+                return self._users_version.values()
+            return list(islice(self._users_version.values_from(after + 1), limit))
+        with self._users_lock.read():
+            if not after and limit is None:
+                return list(self._users.values())
+            users = self._users
+            return [users[i] for i in islice(self._user_ids.iter_after(after), limit)]
 
-    def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
-        """根據 ID 獲取用戶"""
-        with self._lock:
-            for user in self._users:
-                if user["id"] == user_id:
-                    return user.copy()
-            return None
+    def get_user_by_id(self, user_id: int) -> Optional[UserRecord]:
+        """根據 ID 獲取用戶（記錄不可變，無需複製）"""
+        if self._mvcc:
+            user: Optional[UserRecord] = self._users_version.get(user_id)
+            return user
+        with self._users_lock.read():
+            return self._users.get(user_id)
 
-    def get_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+    def get_user_by_username(self, username: str) -> Optional[UserRecord]:
         """根據用戶名獲取用戶"""
-        with self._lock:
-            for user in self._users:
-                if user["username"] == username:
-                    return user.copy()
-            return None
-
-    def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
-        """創建新用戶"""
-        with self._lock:
-            user_data["id"] = self._next_user_id
+        with self._users_lock.read():
+            user_id = self._users_by_username.get(username)
+            if user_id is None:
+                return None
+            return self._users[user_id]
+
+    @staticmethod
+    def _email_key(email: str) -> str:
+        """電子郵件索引鍵（不區分大小寫）"""
+        return email.casefold()
+
+    def _check_user_unique(
+        self, user: UserRecord, user_id: Optional[int] = None
+    ) -> None:
+        """檢查用戶名和電子郵件的唯一性（需在持有寫鎖時調用）"""
+        owner = self._users_by_username.get(user.username)
+        if owner is not None and owner != user_id:
+            raise DuplicateKeyError("username", user.username)
+
+        owner = self._users_by_email.get(self._email_key(user.email))
+        if owner is not None and owner != user_id:
+            raise DuplicateKeyError("email", user.email)
+
+    def _index_user(self, user: UserRecord) -> None:
+        """將用戶加入二級索引"""
+        self._users_by_username[user["username"]] = user["id"]
+        self._users_by_email[self._email_key(user["email"])] = user["id"]
+        self._user_ids.add(user["id"], user["id"])
+        self._publish_user(user["id"])
+
+    def _unindex_user(self, user: UserRecord) -> None:
+        """將用戶從二級索引移除"""
+        del self._users_by_username[user["username"]]
+        del self._users_by_email[self._email_key(user["email"])]
+        self._user_ids.remove(user["id"], user["id"])
+        self._publish_user(user["id"])
+
+    def _publish_user(self, user_id: int) -> None:
+        """更新用戶版本和集合代數，MVCC 模式下先發佈包含該用戶最新狀態的
+        新版本（需在持有寫鎖時調用）
+        """
+        user = self._users.get(user_id)
+        if self._mvcc:
+            if user is None:
+                self._users_version = self._users_version.delete(user_id)
+            else:
+                self._users_version = self._users_version.set(user_id, user)
+
+        if user is None:
+            self._user_versions.pop(user_id, None)
+        else:
+            self._user_versions[user_id] = self._change_seq
+        self._users_generation = self._change_seq
+
+    def _insert_user(self, user_data: Dict[str, Any]) -> Tuple[UserRecord, int]:
+        """檢查唯一性後分配 ID 並寫入用戶（需在持有寫鎖時調用）
+
+        Raises:
+            DuplicateKeyError: 用戶名或電子郵件已存在
+            InvalidRecordError: 用戶字段無效
+        """
+        user = UserRecord.validate({**user_data, "id": self._next_user_id})
+        self._check_user_unique(user)
+        with self._log("put_user", record=user.to_dict()) as lsn:
             self._next_user_id += 1
-            self._users.append(user_data.copy())
-            return user_data
+            self._users[user.id] = user
+            self._index_user(user)
+        return user, lsn
+
+    def _replace_user(
+        self, existing: UserRecord, user_data: Dict[str, Any]
+    ) -> Tuple[UserRecord, int]:
+        """檢查唯一性後替換已有用戶（需在持有寫鎖時調用）
+
+        Raises:
+            DuplicateKeyError: 用戶名或電子郵件已被其他用戶使用
+            InvalidRecordError: 合併後的用戶字段無效
+        """
+        user = UserRecord.validate({**user_data, "id": existing.id})
+        self._check_user_unique(user, existing.id)
+        with self._log("put_user", record=user.to_dict()) as lsn:
+            self._unindex_user(existing)
+            self._users[user.id] = user
+            self._index_user(user)
+        return user, lsn
+
+    def _remove_user(self, user_id: int) -> Tuple[Optional[UserRecord], int]:
+        """刪除用戶，返回被刪除的記錄和日誌序號（需在持有寫鎖時調用）"""
+        if user_id not in self._users:
+            return None, 0
+        with self._log("delete_user", id=user_id) as lsn:
+            user = self._users.pop(user_id)
+            self._unindex_user(user)
+        return user, lsn
+
+    def create_user(self, user_data: Dict[str, Any]) -> UserRecord:
+        """創建新用戶
+
+        Raises:
+            DuplicateKeyError: 用戶名或電子郵件已存在
+        """
+        with self._users_lock.write():
+            user, lsn = self._insert_user(user_data)
+        self._wait_durable(lsn)
+        return user
 
     def update_user(
-        self, user_id: int, user_data: Dict[str, Any]
-    ) -> Optional[Dict[str, Any]]:
-        """更新用戶"""
-        with self._lock:
-            for i, user in enumerate(self._users):
-                if user["id"] == user_id:
-                    user_data["id"] = user_id
-                    self._users[i] = user_data.copy()
-                    return user_data
-            return None
-
-    def delete_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        self, user_id: int, user_data: Dict[str, Any], version: Optional[int] = None
+    ) -> Optional[UserRecord]:
+        """更新用戶
+
+        Args:
+            version: 提供時只在用戶的當前版本與之相同時更新（樂觀併發控制）
+
+        Raises:
+            DuplicateKeyError: 用戶名或電子郵件已被其他用戶使用
+            VersionConflictError: 用戶的當前版本與 version 不同
+        """
+        with self._users_lock.write():
+            existing = self._users.get(user_id)
+            if existing is None:
+                return None
+            if version is not None:
+                current = self._user_versions.get(user_id, 0)
+                if current != version:
+                    raise VersionConflictError(version, current)
+            user, lsn = self._replace_user(existing, user_data)
+        self._wait_durable(lsn)
+        return user
+
+    def delete_user(self, user_id: int) -> Optional[UserRecord]:
         """刪除用戶"""
-        with self._lock:
-            for i, user in enumerate(self._users):
-                if user["id"] == user_id:
-                    return self._users.pop(i)
-            return None
+        with self._users_lock.write():
+            user, lsn = self._remove_user(user_id)
+        self._wait_durable(lsn)
+        return user
+
+    def create_users(
+        self, users_data: List[Dict[str, Any]]
+    ) -> List[Union[UserRecord, DuplicateKeyError]]:
+        """批量創建用戶（整批只獲取一次寫鎖）
+
+        按順序逐條檢查唯一性，批次內部的重複同樣會被發現；衝突的條目
+        不寫入，其餘照常創建。
+
+        Returns:
+            與輸入一一對應的新記錄，唯一鍵衝突時為對應的 DuplicateKeyError
+        """
+        results: List[Union[UserRecord, DuplicateKeyError]] = []
+        lsn = 0
+        with self._users_lock.write():
+            for user_data in users_data:
+                try:
+                    user, lsn = self._insert_user(user_data)
+                except DuplicateKeyError as e:
+                    results.append(e)
+                else:
+                    results.append(user)
+        self._wait_durable(lsn)
+        return results
+
+    def update_users(
+        self, changes: List[Tuple[int, Dict[str, Any]]]
+    ) -> List[Union[UserRecord, DuplicateKeyError, None]]:
+        """批量部分更新用戶（整批只獲取一次寫鎖）
+
+        Args:
+            changes: (用戶 ID, 要修改的字段) 列表，字段與現有記錄合併
+
+        Returns:
+            與輸入一一對應的更新後記錄；用戶不存在時為 None，
+            唯一鍵衝突時為對應的 DuplicateKeyError
+        """
+        results: List[Union[UserRecord, DuplicateKeyError, None]] = []
+        lsn = 0
+        with self._users_lock.write():
+            for user_id, fields in changes:
+                existing = self._users.get(user_id)
+                if existing is None:
+                    results.append(None)
+                    continue
+                try:
+                    user, lsn = self._replace_user(existing, {**existing, **fields})
+                except DuplicateKeyError as e:
+                    results.append(e)
+                else:
+                    results.append(user)
+        self._wait_durable(lsn)
+        return results
+
+    def delete_users(self, user_ids: List[int]) -> List[Optional[UserRecord]]:
+        """批量刪除用戶（整批只獲取一次寫鎖），不存在的用戶對應 None"""
+        users: List[Optional[UserRecord]] = []
+        lsn = 0
+        with self._users_lock.write():
+            for user_id in user_ids:
+                user, user_lsn = self._remove_user(user_id)
+                users.append(user)
+                lsn = max(lsn, user_lsn)
+        self._wait_durable(lsn)
+        return users
 
     # ===== 統計相關操作 =====
 
-    def get_stats(self) -> Dict[str, Any]:
-        """獲取統計信息"""
-        with self._lock:
-            total_items = len(self._items)
-            available_items = len(
-                [item for item in self._items if item["is_available"]]
+    def _item_aggregates(self) -> ItemAggregates:
+        """當前商品聚合值（MVCC 模式讀取當前版本，否則需在持有商品鎖時調用）"""
+        if self._mvcc:
+            version = self._items_version
+            return ItemAggregates(
+                len(version.records),
+                version.available,
+                version.price_sum,
+                version.min_price,
+                version.max_price,
             )
-            total_users = len(self._users)
+        min_price, max_price = self._price_bounds()
+        return ItemAggregates(
+            len(self._items),
+            self._available_items,
+            self._price_sum,
+            min_price,
+            max_price,
+        )
 
-            if total_items > 0:
-                avg_price = sum(item["price"] for item in self._items) / total_items
-                max_price = max(item["price"] for item in self._items)
-                min_price = min(item["price"] for item in self._items)
-            else:
-                avg_price = max_price = min_price = 0
-
-            return {
-                "items": {
-                    "total": total_items,
-                    "available": available_items,
-                    "unavailable": total_items - available_items,
-                    "price_stats": {
-                        "average": round(avg_price, 2),
-                        "maximum": max_price,
-                        "minimum": min_price,
-                    },
-                },
-                "users": {"total": total_users},
-            }
+    def item_aggregates(self) -> ItemAggregates:
+        """獲取商品聚合值（O(1)）"""
+        if self._mvcc:
+            return self._item_aggregates()
+        with self._items_lock.read():
+            return self._item_aggregates()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """獲取統計信息（O(1)，只讀取增量維護的聚合值）"""
+        if self._mvcc:
+            items = self._item_aggregates()
+            total_users = len(self._users_version)
+        else:
+            with self._items_lock.read(), self._users_lock.read():
+                items = self._item_aggregates()
+                total_users = len(self._users)
+        return build_stats(items, total_users)
 
     # ===== 數據初始化 =====
 
     def populate_sample_data(self):
         """填充示例數據"""
-        with self._lock:
+        lsn = 0
+        with self._items_lock.write(), self._users_lock.write():
             # 檢查是否已有數據
             if len(self._items) > 0 or len(self._users) > 0:
                 return
 
-            # 添加示例商品
-            sample_items = [
-                {
-                    "id": 1,
-                    "name": "iPhone 15",
-                    "description": "最新款 iPhone",
-                    "price": 32000.0,
-                    "is_available": True,
-                },
-                {
-                    "id": 2,
-                    "name": "MacBook Pro",
-                    "description": "專業筆記本電腦",
-                    "price": 65000.0,
-                    "is_available": True,
-                },
-                {
-                    "id": 3,
-                    "name": "AirPods Pro",
-                    "description": "無線耳機",
-                    "price": 8000.0,
-                    "is_available": False,
-                },
-            ]
-
-            # 添加示例用戶
-            sample_users = [
-                {
-                    "id": 1,
-                    "username": "alice",
-                    "email": "alice@example.com",
-                    "full_name": "Alice Wang",
-                },
-                {
-                    "id": 2,
-                    "username": "bob",
-                    "email": "bob@example.com",
-                    "full_name": "Bob Chen",
-                },
-            ]
-
-            self._items.extend(sample_items)
-            self._users.extend(sample_users)
-            self._next_item_id = 4
-            self._next_user_id = 3
+            # 與 create_item 一樣由本庫的 ID 分配器編號（分片時按步長跳號）
+            for item_data in SAMPLE_ITEMS:
+                _, lsn = self._insert_item(item_data)
+            for user_data in SAMPLE_USERS:
+                _, lsn = self._insert_user(user_data)
+        self._wait_durable(lsn)
 
     def clear_all_data(self):
         """清空所有數據（用於測試）"""
-        with self._lock:
-            self._items.clear()
-            self._users.clear()
-            self._next_item_id = 1
-            self._next_user_id = 1
+        with self._items_lock.write(), self._users_lock.write():
+            with self._log("clear") as lsn:
+                self._clear()
+        self._wait_durable(lsn)
 
-
-# 創建全局數據庫實例
-db = MemoryDatabase()
+    def _clear(self) -> None:
+        """重置所有數據和索引（需在持有兩個寫鎖時調用）"""
+        self._release_snapshot()
+        if isinstance(self._items, LazyRecordDict):
+            self._items = {}
+        self._items.clear()
+        if self._price_index is not None:
+            self._price_index.clear()
+        if self._item_ids is not None:
+            self._item_ids.clear()
+        self._user_ids.clear()
+        self._text_index.clear()
+        self._available_items = 0
+        self._price_sum = 0.0
+        self._users.clear()
+        self._users_by_username.clear()
+        self._users_by_email.clear()
+        self._next_item_id = self._first_item_id
+        self._next_user_id = 1
+        self._items_version = EMPTY_ITEMS_VERSION
+        self._users_version = PersistentMap()
+        self._item_versions.clear()
+        self._user_versions.clear()
+        self._items_generation = self._change_seq
+        self._users_generation = self._change_seq
@@ -0,0 +1,155 @@
+"""
+持久化（不可變）數據結構
+為 MVCC 快照提供結構共享的整數鍵映射
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 每層 32 路分支
+_BITS = 5
+_WIDTH = 1 << _BITS
+_MASK = _WIDTH - 1
+
+Node = Tuple[Any, ...]
+_EMPTY_NODE: Node = (None,) * _WIDTH
+
+
+class PersistentMap:
+    """以非負整數為鍵的不可變映射（32 路基數樹）
+
+    每次修改只複製根到葉子路徑上的節點（O(log32 n)），其餘節點與舊版本
+    共享，因此舊版本在修改後仍然完整可用，可安全地被無鎖讀者持有。
+    按鍵升序遍歷；鍵為自增 ID 時即為插入順序。
+    """
+
+    __slots__ = ("_root", "_shift", "_count")
+
+    def __init__(
+        self, root: Optional[Node] = None, shift: int = 0, count: int = 0
+    ) -> None:
+        self._root = root
+        self._shift = shift
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, key: int) -> bool:
+        return self.get(key) is not None
+
+    @classmethod
+    def from_sorted(cls, pairs: Iterable[Tuple[int, Any]]) -> "PersistentMap":
+        """從按鍵升序排列的鍵值對批量構建（O(n)，逐層組裝節點）"""
+        nodes: Dict[int, List[Any]] = {}
+        count = 0
+        max_key = 0
+        for key, value in pairs:
+            children = nodes.get(key >> _BITS)
+            if children is None:
+                children = nodes[key >> _BITS] = [None] * _WIDTH
+            children[key & _MASK] = value
+            count += 1
+            max_key = key
+        if not count:
+            return cls()
+
+        shift = 0
+        while max_key >> (shift + _BITS):
+            parents: Dict[int, List[Any]] = {}
+            for prefix, children in nodes.items():
+                parent = parents.get(prefix >> _BITS)
+                if parent is None:
+                    parent = parents[prefix >> _BITS] = [None] * _WIDTH
+                parent[prefix & _MASK] = tuple(children)
+            nodes = parents
+            shift += _BITS
+        return cls(tuple(nodes[0]), shift, count)
+
+    def get(self, key: int) -> Any:
+        """獲取鍵對應的值，不存在時返回 None"""
+        if key < 0 or key >> (self._shift + _BITS):
+            return None
+        node = self._root
+        shift = self._shift
+        while node is not None:
+            node = node[(key >> shift) & _MASK]
+            if not shift:
+                return node
+            shift -= _BITS
+        return None
+
+    def set(self, key: int, value: Any) -> "PersistentMap":
+        """返回寫入鍵值後的新映射（值不能為 None）"""
+        root = self._root
+        shift = self._shift
+        # 鍵超出當前容量時增加樹高，舊根成為新根的第一個子節點
+        while key >> (shift + _BITS):
+            if root is not None:
+                root = (root,) + _EMPTY_NODE[1:]
+            shift += _BITS
+        count = self._count + (self.get(key) is None)
+        return PersistentMap(self._assoc(root, shift, key, value), shift, count)
+
+    def delete(self, key: int) -> "PersistentMap":
+        """返回刪除鍵後的新映射"""
+        if self.get(key) is None:
+            return self
+        root = self._assoc(self._root, self._shift, key, None)
+        return PersistentMap(root, self._shift, self._count - 1)
+
+    @classmethod
+    def _assoc(
+        cls, node: Optional[Node], shift: int, key: int, value: Any
+    ) -> Optional[Node]:
+        """沿路徑複製節點並寫入值；子樹變空時返回 None"""
+        children = list(node if node is not None else _EMPTY_NODE)
+        index = (key >> shift) & _MASK
+        if shift:
+            children[index] = cls._assoc(children[index], shift - _BITS, key, value)
+        else:
+            children[index] = value
+        if value is None and not any(child is not None for child in children):
+            return None
+        return tuple(children)
+
+    def values(self) -> List[Any]:
+        """按鍵升序返回所有值"""
+        result: List[Any] = []
+        if self._root is not None:
+            self._collect(self._root, self._shift, result)
+        return result
+
+    @classmethod
+    def _collect(cls, node: Node, shift: int, result: List[Any]) -> None:
+        """深度優先收集子樹中的值"""
+        if not shift:
+            result.extend(value for value in node if value is not None)
+            return
+        for child in node:
+            if child is not None:
+                cls._collect(child, shift - _BITS, result)
+
+    def values_from(self, key: int) -> Iterator[Any]:
+        """按鍵升序逐個返回鍵不小於 key 的值
+
+        沿 key 的路徑下降定位起點（O(log32 n)），之後按順序遍歷；
+        只取前 k 個時總代價為 O(log n + k)。
+        """
+        if self._root is not None and not max(key, 0) >> (self._shift + _BITS):
+            yield from self._iter_from(self._root, self._shift, max(key, 0))
+
+    @classmethod
+    def _iter_from(cls, node: Node, shift: int, key: int) -> Iterator[Any]:
+        """遍歷子樹中鍵不小於 key 的值（只有最左路徑受 key 限制）"""
+        start = (key >> shift) & _MASK
+        if not shift:
+            for value in node[start:]:
+                if value is not None:
+                    yield value
+            return
+        for index in range(start, _WIDTH):
+            child = node[index]
+            if child is not None:
+                yield from cls._iter_from(
+                    child, shift - _BITS, key if index == start else 0
+                )
@@ -0,0 +1,139 @@
+"""
+不可變記錄類型
+使用 __slots__ 緊湊存放商品和用戶行，創建後不可修改，可直接交給調用方而無需防禦性複製
+"""
+
+from collections.abc import Mapping
+from typing import Any, ClassVar, Dict, Iterator, Optional, Tuple, Type, TypeVar
+
+R = TypeVar("R", bound="Record")
+
+
+class InvalidRecordError(ValueError):
+    """記錄字段缺失、多餘或類型不符"""
+
+
+class Record(Mapping):
+    """不可變記錄基類
+
+    實現只讀 Mapping 接口，因此 ``record["name"]``、``dict(record)``、
+    ``{**record}`` 以及 FastAPI 的 JSON 編碼都可直接使用；
+    Pydantic 模型可通過 ``from_attributes`` 從屬性讀取。
+    """
+
+    __slots__: Tuple[str, ...] = ()
+    # 字段允許的類型，由 validate 校驗
+    field_types: ClassVar[Dict[str, Tuple[type, ...]]] = {}
+
+    @classmethod
+    def validate(cls: Type[R], fields: Mapping) -> R:
+        """由字段構建記錄並校驗字段類型（寫入存儲和重放日誌前調用）
+
+        Raises:
+            InvalidRecordError: 字段缺失、多餘或類型不符
+        """
+        try:
+            record = cls(**fields)
+        except TypeError as e:
+            raise InvalidRecordError(f"{cls.__name__} 字段無效: {e}") from e
+        for field, types in cls.field_types.items():
+            value = getattr(record, field)
+            # bool 是 int 的子類，只有明確允許時才接受
+            if not isinstance(value, types) or (
+                isinstance(value, bool) and bool not in types
+            ):
+                raise InvalidRecordError(
+                    f"{cls.__name__} 字段 {field} 的值無效: {value!r}"
+                )
+        return record
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} 是不可變記錄")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} 是不可變記錄")
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, field) for field in self.__slots__))
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{field}={getattr(self, field)!r}" for field in self)
+        return f"{type(self).__name__}({fields})"
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return type(self), tuple(getattr(self, field) for field in self.__slots__)
+
+    def to_dict(self) -> dict:
+        """轉換為普通字典"""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+class ItemRecord(Record):
+    """商品記錄"""
+
+    __slots__ = ("id", "name", "description", "price", "is_available")
+    field_types = {
+        "id": (int,),
+        "name": (str,),
+        "description": (str, type(None)),
+        "price": (int, float),
+        "is_available": (bool,),
+    }
+
+    id: int
+    name: str
+    description: Optional[str]
+    price: float
+    is_available: bool
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        description: Optional[str] = None,
+        price: float = 0.0,
+        is_available: bool = True,
+    ) -> None:
+        setter = object.__setattr__
+        setter(self, "id", id)
+        setter(self, "name", name)
+        setter(self, "description", description)
+        setter(self, "price", price)
+        setter(self, "is_available", is_available)
+
+
+class UserRecord(Record):
+    """用戶記錄"""
+
+    __slots__ = ("id", "username", "email", "full_name")
+    field_types = {
+        "id": (int,),
+        "username": (str,),
+        "email": (str,),
+        "full_name": (str, type(None)),
+    }
+
+    id: int
+    username: str
+    email: str
+    full_name: Optional[str]
+
+    def __init__(
+        self, id: int, username: str, email: str, full_name: Optional[str] = None
+    ) -> None:
+        setter = object.__setattr__
+        setter(self, "id", id)
+        setter(self, "username", username)
+        setter(self, "email", email)
+        setter(self, "full_name", full_name)
@@ -0,0 +1,65 @@
+"""
+數據恢復
+按配置加載最新快照並重放其後的預寫日誌，供單進程應用和數據擁有者進程共用
+"""
+
+import time
+from typing import Optional, Tuple
+from src.core import app_logger, settings
+from .memory_db import MemoryDatabase
+from .snapshot import Snapshot, SnapshotScheduler, SnapshotStore
+from .wal import WriteAheadLog
+
+
+def recover(database: MemoryDatabase) -> Tuple[bool, Optional[SnapshotScheduler]]:
+    """加載最新快照並重放其後的預寫日誌，之後的寫入記入日誌
+
+    Returns:
+        (是否恢復了任何數據, 配置了快照目錄時的快照調度器（尚未啟動）)
+    """
+    restored = False
+    after_lsn = 0
+    scheduler = None
+
+    try:
+        if settings.snapshot_dir:
+            store = SnapshotStore(settings.snapshot_dir)
+            path = store.latest()
+            if path is not None:
+                start = time.perf_counter()
+                snapshot = Snapshot(path)
+                database.load_snapshot(snapshot)
+                after_lsn = snapshot.lsn
+                restored = True
+                app_logger.info(
+                    f"📸 已加載快照 {path.name}: {snapshot.item_count} 商品, "
+                    f"{snapshot.user_count} 用戶, "
+                    f"耗時 {(time.perf_counter() - start) * 1000:.0f}ms"
+                )
+            scheduler = SnapshotScheduler(
+                database, store, settings.snapshot_interval_seconds
+            )
+
+        if settings.wal_path:
+            app_logger.info(f"📜 重放預寫日誌: {settings.wal_path}")
+            wal = WriteAheadLog(
+                settings.wal_path,
+                group_commit_window=settings.wal_group_commit_ms / 1000,
+            )
+            replayed = database.attach_wal(wal, after_lsn)
+            restored = restored or replayed > 0
+            app_logger.info(f"✅ 已重放 {replayed} 條日誌")
+
+    except Exception as e:
+        app_logger.error(f"❌ 數據恢復失敗: {e}")
+        raise
+
+    return restored, scheduler
+
+
+def shutdown(database: MemoryDatabase, scheduler: Optional[SnapshotScheduler]) -> None:
+    """停止定期快照並寫入最終快照，縮短下次啟動的日誌重放，然後關閉數據庫"""
+    if scheduler is not None:
+        scheduler.stop()
+        scheduler.snapshot_now()
+    database.close()
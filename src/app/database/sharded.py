@@ -0,0 +1,423 @@
+"""
+分片內存數據庫
+按商品 ID 哈希把商品分散到多個獨立的 MemoryDatabase 分片，
+點操作只訪問一個分片，搜索和統計並行分發到所有分片後合併
+"""
+
+import heapq
+import itertools
+import secrets
+from itertools import islice
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from operator import attrgetter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+from .memory_db import (
+    INLINE_READS,
+    SAMPLE_ITEMS,
+    SAMPLE_USERS,
+    ChangeListener,
+    DuplicateKeyError,
+    ItemAggregates,
+    MemoryDatabase,
+    build_stats,
+    chunked,
+)
+from .records import ItemRecord, UserRecord
+
+T = TypeVar("T")
+
+_by_id = attrgetter("id")
+
+
+class ShardedDatabase:
+    """分片內存數據庫
+
+    - 商品按 ``(id - 1) % N`` 分佈到 N 個分片，每個分片有獨立的鎖和索引，
+      不同分片上的寫入互不阻塞
+    - 分片 k 分配 ID 序列 k+1, k+1+N, ...，新商品輪流寫入各分片，
+      因此分片內 ID 遞增（列式引擎要求），全局 ID 互不衝突
+    - 搜索和全量讀取並行分發到所有分片，按 ID 歸併，結果順序與
+      單實例一致（ID 升序）
+    - 統計合併各分片的聚合值；各分片的聚合值各自一致，但不是跨分片的
+      同一時間點。字典引擎的聚合值為 O(1)，線程調度開銷遠大於計算本身，
+      因此依次讀取；列式引擎需要向量化求價格極值，才並行分發
+    - 用戶數量小且需要全局唯一約束，存放在單獨的一個實例中
+
+    接口與 MemoryDatabase 一致（不含預寫日誌和快照）。
+    """
+
+    inline_reads = INLINE_READS
+
+    def __init__(
+        self, shards: int = 4, mvcc: bool = False, item_engine: str = "dict"
+    ) -> None:
+        """初始化數據庫
+
+        Args:
+            shards: 分片數量
+            mvcc: 各分片是否啟用 MVCC 模式
+            item_engine: 各分片的商品存儲引擎
+        """
+        if shards < 1:
+            raise ValueError(f"分片數量必須為正數: {shards}")
+        self._shards = [
+            MemoryDatabase(
+                mvcc=mvcc,
+                item_engine=item_engine,
+                first_item_id=k + 1,
+                item_id_step=shards,
+            )
+            for k in range(shards)
+        ]
+        self._users = MemoryDatabase(mvcc=mvcc)
+        # 輪流選擇新商品寫入的分片（itertools.count 的 next 是原子的）
+        self._next_shard = itertools.count()
+        # 填充和清空需要跨所有分片原子完成
+        self._maintenance_lock = threading.Lock()
+        self._parallel_stats = item_engine == "columnar"
+        self._executor = (
+            ThreadPoolExecutor(max_workers=shards, thread_name_prefix="shard")
+            if shards > 1
+            else None
+        )
+        # 全局變更序號：各分片的序號互相獨立，由 _relay 從原子計數器重新編號；
+        # 監聽器元組整體替換，轉發時無需加鎖
+        self._next_seq = itertools.count(1)
+        self._listeners: Tuple[ChangeListener, ...] = ()
+        self._listen_lock = threading.Lock()
+        # 各分片的版本只在分片內有意義；商品只屬於一個分片，因此記錄版本直接
+        # 取自所在分片，集合代數為各分片代數之和（任一分片寫入後都會增大）
+        self.version_epoch = secrets.token_hex(4)
+
+    @property
+    def shard_count(self) -> int:
+        """分片數量"""
+        return len(self._shards)
+
+    def _shard(self, item_id: int) -> MemoryDatabase:
+        """商品所在的分片"""
+        return self._shards[(item_id - 1) % len(self._shards)]
+
+    def _scatter(
+        self, operation: Callable[[MemoryDatabase], T], parallel: bool = True
+    ) -> List[T]:
+        """在所有分片上執行操作（默認並行），按分片順序返回結果"""
+        if self._executor is None or not parallel:
+            return [operation(shard) for shard in self._shards]
+        return list(self._executor.map(operation, self._shards))
+
+    def _group(self, item_ids: Sequence[int]) -> List[List[int]]:
+        """按商品所在分片分組批量操作的下標，組內保持輸入順序"""
+        groups: List[List[int]] = [[] for _ in self._shards]
+        for position, item_id in enumerate(item_ids):
+            groups[(item_id - 1) % len(self._shards)].append(position)
+        return groups
+
+    def _bulk(
+        self,
+        groups: List[List[int]],
+        operation: Callable[[MemoryDatabase, List[int]], List[T]],
+    ) -> List[T]:
+        """在各分片上（並行）執行分組後的批量操作，結果按輸入下標還原
+
+        每個分片只獲取一次寫鎖；沒有分到條目的分片不會被訪問。
+        """
+        tasks = [(shard, group) for shard, group in zip(self._shards, groups) if group]
+        if self._executor is None or len(tasks) == 1:
+            outputs = [operation(shard, group) for shard, group in tasks]
+        else:
+            outputs = list(self._executor.map(lambda task: operation(*task), tasks))
+
+        results: List[Any] = [None] * sum(len(group) for _, group in tasks)
+        for (_, group), output in zip(tasks, outputs):
+            for position, result in zip(group, output):
+                results[position] = result
+        return results
+
+    @staticmethod
+    def _merge(
+        results: List[List[ItemRecord]], limit: Optional[int] = None
+    ) -> List[ItemRecord]:
+        """按 ID 歸併各分片的升序結果，分頁時只取前 limit 個"""
+        if len(results) == 1:
+            return results[0]
+        return list(islice(heapq.merge(*results, key=_by_id), limit))
+
+    def close(self) -> None:
+        """關閉所有分片和並行線程池"""
+        if self._executor is not None:
+            self._executor.shutdown()
+        for shard in self._shards:
+            shard.close()
+        self._users.close()
+
+    # ===== 變更訂閱 =====
+
+    @property
+    def change_seq(self) -> int:
+        """最近一次寫入的全局變更序號（首次註冊監聽器後開始計數）"""
+        with self._changes_paused() as seq:
+            return seq
+
+    @contextmanager
+    def _changes_paused(self) -> Iterator[int]:
+        """暫停所有分片發佈變更，產出最近分配的全局序號
+
+        每個分片在自己的變更發佈鎖內調用 _relay，持有全部這些鎖時沒有
+        進行中的轉發，計數器的下一個值減一即為最近分配的序號。
+        """
+        with ExitStack() as stack:
+            for database in [*self._shards, self._users]:
+                stack.enter_context(database.changes_paused())
+            seq = next(self._next_seq) - 1
+            self._next_seq = itertools.count(seq + 1)
+            yield seq
+
+    def listen(self, listener: ChangeListener) -> int:
+        """註冊變更監聽器，返回註冊時刻的全局變更序號
+
+        監聽器恰好收到序號大於返回值的所有變更，序號連續、不重複。同一
+        分片的變更保持原有順序；不同分片的寫入不經過全局鎖，其變更可能
+        以亂序到達監聽器（ChangeFeed 按序號重排後再發佈）。
+        """
+        with self._listen_lock:
+            if not self._listeners:
+                # 沒有監聽器時不轉發，寫入不產生任何額外開銷
+                for database in [*self._shards, self._users]:
+                    database.listen(self._relay)
+            with self._changes_paused() as seq:
+                self._listeners = (*self._listeners, listener)
+            return seq
+
+    def _relay(self, _: int, entry: Dict[str, Any]) -> None:
+        """為分片的變更分配全局序號並通知監聽器（在分片的變更發佈鎖內調用）
+
+        itertools.count 的 next 是原子的，不同分片的轉發互不等待。
+        """
+        seq = next(self._next_seq)
+        for listener in self._listeners:
+            listener(seq, entry)
+
+    # ===== 商品相關操作 =====
+
+    def get_all_items(
+        self, after: int = 0, limit: Optional[int] = None
+    ) -> List[ItemRecord]:
+        """獲取所有商品（每個分片最多取一頁，歸併後取前 limit 個）"""
+        return self._merge(
+            self._scatter(lambda shard: shard.get_all_items(after, limit)), limit
+        )
+
+    def get_item_by_id(self, item_id: int) -> Optional[ItemRecord]:
+        """根據 ID 獲取商品"""
+        return self._shard(item_id).get_item_by_id(item_id)
+
+    def create_item(self, item_data: Dict[str, Any]) -> ItemRecord:
+        """創建新商品"""
+        shard = self._shards[next(self._next_shard) % len(self._shards)]
+        return shard.create_item(item_data)
+
+    def update_item(
+        self, item_id: int, item_data: Dict[str, Any], version: Optional[int] = None
+    ) -> Optional[ItemRecord]:
+        """更新商品（提供 version 時為條件更新）"""
+        return self._shard(item_id).update_item(item_id, item_data, version)
+
+    def delete_item(self, item_id: int) -> Optional[ItemRecord]:
+        """刪除商品"""
+        return self._shard(item_id).delete_item(item_id)
+
+    def create_items(self, items_data: List[Dict[str, Any]]) -> List[ItemRecord]:
+        """批量創建商品（按輪轉順序分配分片，每個分片寫入一次）"""
+        groups: List[List[int]] = [[] for _ in self._shards]
+        for position in range(len(items_data)):
+            groups[next(self._next_shard) % len(self._shards)].append(position)
+        return self._bulk(
+            groups,
+            lambda shard, group: shard.create_items([items_data[i] for i in group]),
+        )
+
+    def update_items(
+        self, changes: List[Tuple[int, Dict[str, Any]]]
+    ) -> List[Optional[ItemRecord]]:
+        """批量部分更新商品（按分片分組，每個分片寫入一次）"""
+        return self._bulk(
+            self._group([item_id for item_id, _ in changes]),
+            lambda shard, group: shard.update_items([changes[i] for i in group]),
+        )
+
+    def delete_items(self, item_ids: List[int]) -> List[Optional[ItemRecord]]:
+        """批量刪除商品（按分片分組，每個分片寫入一次）"""
+        return self._bulk(
+            self._group(item_ids),
+            lambda shard, group: shard.delete_items([item_ids[i] for i in group]),
+        )
+
+    def search_items(
+        self,
+        query: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        available_only: bool = True,
+        after: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[ItemRecord]:
+        """搜索商品（各分片並行搜索後按 ID 歸併）"""
+        return self._merge(
+            self._scatter(
+                lambda shard: shard.search_items(
+                    query, min_price, max_price, available_only, after, limit
+                )
+            ),
+            limit,
+        )
+
+    def iter_search_items(
+        self,
+        query: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        available_only: bool = True,
+        after: int = 0,
+        chunk_size: int = 1000,
+    ) -> Iterator[List[ItemRecord]]:
+        """逐塊產出搜索結果（各分片各自逐塊迭代，按 ID 歸併後重新分塊）"""
+        streams = [
+            itertools.chain.from_iterable(
+                shard.iter_search_items(
+                    query, min_price, max_price, available_only, after, chunk_size
+                )
+            )
+            for shard in self._shards
+        ]
+        return chunked(heapq.merge(*streams, key=_by_id), chunk_size)
+
+    # ===== 用戶相關操作 =====
+
+    def get_all_users(
+        self, after: int = 0, limit: Optional[int] = None
+    ) -> List[UserRecord]:
+        """獲取所有用戶"""
+        return self._users.get_all_users(after, limit)
+
+    def get_user_by_id(self, user_id: int) -> Optional[UserRecord]:
+        """根據 ID 獲取用戶"""
+        return self._users.get_user_by_id(user_id)
+
+    def get_user_by_username(self, username: str) -> Optional[UserRecord]:
+        """根據用戶名獲取用戶"""
+        return self._users.get_user_by_username(username)
+
+    def create_user(self, user_data: Dict[str, Any]) -> UserRecord:
+        """創建新用戶
+
+        Raises:
+            DuplicateKeyError: 用戶名或電子郵件已存在
+        """
+        return self._users.create_user(user_data)
+
+    def update_user(
+        self, user_id: int, user_data: Dict[str, Any], version: Optional[int] = None
+    ) -> Optional[UserRecord]:
+        """更新用戶（提供 version 時為條件更新）
+
+        Raises:
+            DuplicateKeyError: 用戶名或電子郵件已被其他用戶使用
+            VersionConflictError: 用戶的當前版本與 version 不同
+        """
+        return self._users.update_user(user_id, user_data, version)
+
+    def delete_user(self, user_id: int) -> Optional[UserRecord]:
+        """刪除用戶"""
+        return self._users.delete_user(user_id)
+
+    def create_users(
+        self, users_data: List[Dict[str, Any]]
+    ) -> List[Union[UserRecord, DuplicateKeyError]]:
+        """批量創建用戶"""
+        return self._users.create_users(users_data)
+
+    def update_users(
+        self, changes: List[Tuple[int, Dict[str, Any]]]
+    ) -> List[Union[UserRecord, DuplicateKeyError, None]]:
+        """批量部分更新用戶"""
+        return self._users.update_users(changes)
+
+    def delete_users(self, user_ids: List[int]) -> List[Optional[UserRecord]]:
+        """批量刪除用戶"""
+        return self._users.delete_users(user_ids)
+
+    # ===== 版本 =====
+
+    def item_version(self, item_id: int) -> Optional[int]:
+        """商品的版本（所在分片內的變更序號）"""
+        return self._shard(item_id).item_version(item_id)
+
+    def user_version(self, user_id: int) -> Optional[int]:
+        """用戶的版本"""
+        return self._users.user_version(user_id)
+
+    def items_generation(self) -> int:
+        """商品集合的代數（各分片代數之和）
+
+        各分片的代數單調遞增，依次讀取得到的和只會隨時間增大，兩次讀到
+        相同的和說明期間沒有任何分片發生寫入。
+        """
+        return sum(shard.items_generation() for shard in self._shards)
+
+    def users_generation(self) -> int:
+        """用戶集合的代數"""
+        return self._users.users_generation()
+
+    # ===== 統計相關操作 =====
+
+    def get_stats(self) -> Dict[str, Any]:
+        """獲取統計信息（讀取各分片聚合值後合併）"""
+        aggregates = self._scatter(
+            MemoryDatabase.item_aggregates, parallel=self._parallel_stats
+        )
+        parts = [part for part in aggregates if part.total]
+        items = ItemAggregates(
+            sum(part.total for part in parts),
+            sum(part.available for part in parts),
+            sum(part.price_sum for part in parts),
+            min((part.min_price for part in parts), default=0),
+            max((part.max_price for part in parts), default=0),
+        )
+        return build_stats(items, self._users.get_stats()["users"]["total"])
+
+    # ===== 數據初始化 =====
+
+    def populate_sample_data(self) -> None:
+        """填充示例數據（所有分片和用戶都為空時）"""
+        with self._maintenance_lock:
+            if self.get_all_users() or any(
+                shard.item_aggregates().total for shard in self._shards
+            ):
+                return
+            # 示例 ID 從 1 連續編號，按輪轉順序寫入恰好得到相同的 ID
+            self._next_shard = itertools.count()
+            for item_data in SAMPLE_ITEMS:
+                self.create_item(item_data)
+            for user_data in SAMPLE_USERS:
+                self._users.create_user(user_data)
+
+    def clear_all_data(self) -> None:
+        """清空所有數據（用於測試）"""
+        with self._maintenance_lock:
+            self._scatter(MemoryDatabase.clear_all_data)
+            self._users.clear_all_data()
+            self._next_shard = itertools.count()
@@ -0,0 +1,608 @@
+"""
+共享存儲
+多進程部署（gunicorn 多 worker）時由一個數據擁有者進程持有唯一的數據副本，
+各 worker 經 Unix 套接字轉發寫入，並在本進程維護一份實時同步的只讀副本
+"""
+
+import multiprocessing
+import os
+import pickle
+import queue
+import signal
+import socket
+import threading
+import time
+from multiprocessing.connection import Client, Connection, Listener
+from multiprocessing.context import AuthenticationError
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+from src.core import app_logger, settings
+from .locks import check_nonblocking
+from .memory_db import INLINE_READS, ChangeListener, DuplicateKeyError, MemoryDatabase
+from .records import ItemRecord, UserRecord
+from .recovery import recover, shutdown
+
+# worker 轉發給數據擁有者的寫操作；讀取全部由本地副本完成
+WRITE_METHODS = frozenset(
+    {
+        "create_item",
+        "update_item",
+        "delete_item",
+        "create_items",
+        "update_items",
+        "delete_items",
+        "create_user",
+        "update_user",
+        "delete_user",
+        "create_users",
+        "update_users",
+        "delete_users",
+        "populate_sample_data",
+        "clear_all_data",
+    }
+)
+
+Batch = List[Tuple[int, Dict[str, Any]]]
+
+
+class SharedStoreServer:
+    """數據擁有者的 IPC 服務
+
+    每個連接由一個線程服務，支持四種消息：
+
+    - ``("call", 方法名, 參數)``：執行寫操作，回覆
+      ``("ok" | "error", 結果或異常, 當前變更序號)``
+    - ``("subscribe",)``：回覆一致狀態（含記錄版本），之後持續推送
+      ``[(變更序號, 日誌條目), ...]`` 批次
+    - ``("seq",)``：回覆當前變更序號
+    - ``("stats",)``：回覆服務統計
+    """
+
+    def __init__(
+        self,
+        database: MemoryDatabase,
+        address: str,
+        authkey: Optional[bytes] = None,
+    ) -> None:
+        """初始化服務
+
+        Args:
+            database: 擁有者持有的數據庫
+            address: Unix 套接字路徑
+            authkey: 連接認證密鑰
+        """
+        self.database = database
+        self.address = address
+        self.authkey = authkey
+        # 已執行的寫操作數，讀取不經過擁有者，可用於驗證讀取完全本地化
+        self.calls = 0
+        self._calls_lock = threading.Lock()
+        self._feeds: Set["queue.SimpleQueue[Optional[Batch]]"] = set()
+        self._listener: Optional[Listener] = None
+
+    def start(self) -> None:
+        """綁定套接字並在後台線程接受連接"""
+        if os.path.exists(self.address):
+            os.unlink(self.address)  # 上次異常退出遺留的套接字文件
+        self._listener = Listener(self.address, family="AF_UNIX", authkey=self.authkey)
+        threading.Thread(
+            target=self._accept_loop, name="shared-store-accept", daemon=True
+        ).start()
+
+    def close(self) -> None:
+        """停止接受連接並結束所有推送"""
+        if self._listener is not None:
+            self._listener.close()
+        for feed in list(self._feeds):
+            feed.put(None)
+
+    def _accept_loop(self) -> None:
+        """接受連接，每個連接一個服務線程"""
+        assert self._listener is not None
+        while True:
+            try:
+                connection = self._listener.accept()
+            except AuthenticationError as e:
+                app_logger.warning(f"⚠️ 共享存儲連接認證失敗: {e}")
+                continue
+            except OSError:
+                return  # 監聽已關閉
+            threading.Thread(
+                target=self._serve, args=(connection,), daemon=True
+            ).start()
+
+    def _serve(self, connection: Connection) -> None:
+        """處理一個連接上的請求，直到對端關閉"""
+        try:
+            while True:
+                message = connection.recv()
+                if message[0] == "call":
+                    connection.send(self._call(message[1], message[2]))
+                elif message[0] == "subscribe":
+                    self._feed(connection)
+                    return
+                elif message[0] == "seq":
+                    connection.send(self.database.change_seq)
+                elif message[0] == "stats":
+                    connection.send(
+                        {"calls": self.calls, "change_seq": self.database.change_seq}
+                    )
+                else:
+                    raise ValueError(f"未知的消息: {message[0]}")
+        except (EOFError, OSError):
+            pass  # worker 斷開
+        finally:
+            connection.close()
+
+    def _call(self, method: str, args: Tuple[Any, ...]) -> Tuple[str, Any, int]:
+        """執行一個寫操作"""
+        with self._calls_lock:
+            self.calls += 1
+        try:
+            if method not in WRITE_METHODS:
+                raise ValueError(f"不支持的共享存儲操作: {method}")
+            result = getattr(self.database, method)(*args)
+            status = "ok"
+        except Exception as e:
+            result, status = e, "error"
+            try:
+                pickle.dumps(e)
+            except Exception:
+                result = RuntimeError(repr(e))
+        # 回覆執行後的序號，worker 等副本追上它即可讀到本次寫入
+        return status, result, self.database.change_seq
+
+    def _feed(self, connection: Connection) -> None:
+        """發送一致狀態，之後按序號順序批量推送變更"""
+        feed: "queue.SimpleQueue[Optional[Batch]]" = queue.SimpleQueue()
+
+        def listener(seq: int, entry: Dict[str, Any]) -> None:
+            feed.put([(seq, entry)])
+
+        state = self.database.subscribe(listener)
+        self._feeds.add(feed)
+        try:
+            connection.send(state)
+            while True:
+                batch = feed.get()
+                if batch is None:
+                    return
+                # 合併已積壓的變更，一次發送
+                while True:
+                    try:
+                        more = feed.get_nowait()
+                    except queue.Empty:
+                        break
+                    if more is None:
+                        connection.send(batch)
+                        return
+                    batch.extend(more)
+                connection.send(batch)
+        finally:
+            self.database.unsubscribe(listener)
+            self._feeds.discard(feed)
+
+
+class SharedStoreClient:
+    """共享存儲客戶端（每個 worker 一個）
+
+    - 寫入轉發給數據擁有者執行，返回前等待本地副本應用到該寫入，
+      因此同一 worker 內總能讀到自己的寫入
+    - 讀取直接在本地副本上執行，各 worker 的讀取並行於多個 CPU 核心
+    - 其他 worker 的寫入由推送線程異步應用，通常在亞毫秒內可見；
+      需要讀到所有已確認寫入時先調用 ``sync()``
+
+    首次使用時才連接擁有者，因此可以在 gunicorn 主進程 fork 之前創建。
+    """
+
+    inline_reads = INLINE_READS
+
+    def __init__(
+        self,
+        address: str,
+        authkey: Optional[bytes] = None,
+        timeout: float = 10.0,
+        mvcc: bool = False,
+        item_engine: str = "dict",
+    ) -> None:
+        """初始化客戶端
+
+        Args:
+            address: 擁有者的 Unix 套接字路徑
+            authkey: 連接認證密鑰
+            timeout: 等待副本追上寫入的最長秒數
+            mvcc: 本地副本是否啟用 MVCC
+            item_engine: 本地副本的商品存儲引擎
+        """
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self._replica = MemoryDatabase(mvcc=mvcc, item_engine=item_engine)
+        self._connect_lock = threading.Lock()
+        self._connected = False
+        self._closed = False
+        self._applied = 0
+        self._applied_changed = threading.Condition()
+        self._listeners: List[ChangeListener] = []
+        self._pool: "queue.SimpleQueue[Connection]" = queue.SimpleQueue()
+        self._feed: Optional[Connection] = None
+
+    # ===== 連接管理 =====
+
+    def _connect(self) -> Connection:
+        """建立一條到擁有者的連接"""
+        return Client(self.address, family="AF_UNIX", authkey=self.authkey)
+
+    def _ensure_connected(self) -> None:
+        """首次使用時訂閱變更並加載一致狀態"""
+        if self._connected:
+            return
+        check_nonblocking()
+        with self._connect_lock:
+            if not self._connected:
+                self._subscribe()
+
+    def _subscribe(self) -> None:
+        """訂閱變更並加載一致狀態（持有連接鎖時調用）"""
+        if self._closed:
+            raise ConnectionError("共享存儲客戶端已關閉")
+        feed = self._connect()
+        feed.send(("subscribe",))
+        state = feed.recv()
+        self._replica.restore(state)
+        self._applied = state.lsn
+        self._feed = feed
+        threading.Thread(
+            target=self._follow, args=(feed,), name="shared-store-feed", daemon=True
+        ).start()
+        self._connected = True
+        app_logger.info(
+            f"🔗 已連接共享存儲: {len(state.items)} 商品, {len(state.users)} 用戶"
+        )
+
+    def _follow(self, feed: Connection) -> None:
+        """持續接收變更批次並應用到本地副本"""
+        try:
+            while True:
+                batch: Batch = feed.recv()
+                self._replica.apply_entries(batch)
+                with self._applied_changed:
+                    self._applied = batch[-1][0]
+                    for seq, entry in batch:
+                        for listener in self._listeners:
+                            listener(seq, entry)
+                    self._applied_changed.notify_all()
+        except (EOFError, OSError):
+            if not self._closed:
+                app_logger.error("❌ 與數據擁有者進程的連接已斷開")
+        feed.close()
+        with self._applied_changed:
+            self._closed = True
+            self._applied_changed.notify_all()
+
+    def _wait_applied(self, seq: int) -> None:
+        """等待本地副本應用到指定變更序號"""
+        with self._applied_changed:
+            caught_up = self._applied_changed.wait_for(
+                lambda: self._applied >= seq or self._closed, self.timeout
+            )
+            if self._applied >= seq:
+                return
+        if not caught_up:
+            raise TimeoutError(f"等待共享存儲副本同步超時: 序號 {seq}")
+        raise ConnectionError("與數據擁有者進程的連接已斷開")
+
+    def _request(self, message: Tuple[Any, ...]) -> Any:
+        """在連接池中的一條連接上完成一次請求"""
+        self._ensure_connected()
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            connection = self._connect()
+        try:
+            connection.send(message)
+            reply = connection.recv()
+        except BaseException:
+            connection.close()
+            raise
+        self._pool.put(connection)
+        return reply
+
+    def _call(self, method: str, *args: Any) -> Any:
+        """轉發一個寫操作，等本地副本可讀到其結果後返回"""
+        status, result, seq = self._request(("call", method, args))
+        self._wait_applied(seq)
+        if status == "error":
+            raise result
+        return result
+
+    def listen(self, listener: ChangeListener) -> int:
+        """註冊變更監聽器，返回本地副本當前已應用的變更序號
+
+        變更沿用擁有者分配的序號，在副本應用之後由推送線程按序調用監聽器，
+        因此各 worker 的序號一致，監聽器收到變更時本地讀取已能看到它。
+        會連接擁有者，需要在 fork 之後調用。
+        """
+        self._ensure_connected()
+        with self._applied_changed:
+            self._listeners.append(listener)
+            return self._applied
+
+    def sync(self) -> None:
+        """等待本地副本追上擁有者當前的全部寫入"""
+        self._wait_applied(self._request(("seq",)))
+
+    def owner_stats(self) -> Dict[str, int]:
+        """數據擁有者的服務統計：已執行的寫操作數和當前變更序號"""
+        stats: Dict[str, int] = self._request(("stats",))
+        return stats
+
+    def close(self) -> None:
+        """關閉所有連接"""
+        self._closed = True
+        if self._feed is not None and not self._feed.closed:
+            # 推送線程正阻塞在讀取上：關閉套接字的讀寫使其收到 EOF 後自行關閉連接
+            with socket.socket(fileno=os.dup(self._feed.fileno())) as sock:
+                sock.shutdown(socket.SHUT_RDWR)
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    # ===== 讀取：本地副本 =====
+
+    def get_all_items(
+        self, after: int = 0, limit: Optional[int] = None
+    ) -> List[ItemRecord]:
+        """獲取所有商品"""
+        self._ensure_connected()
+        return self._replica.get_all_items(after, limit)
+
+    def get_item_by_id(self, item_id: int) -> Optional[ItemRecord]:
+        """根據 ID 獲取商品"""
+        self._ensure_connected()
+        return self._replica.get_item_by_id(item_id)
+
+    def search_items(
+        self,
+        query: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        available_only: bool = True,
+        after: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[ItemRecord]:
+        """搜索商品"""
+        self._ensure_connected()
+        return self._replica.search_items(
+            query, min_price, max_price, available_only, after, limit
+        )
+
+    def iter_search_items(
+        self,
+        query: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        available_only: bool = True,
+        after: int = 0,
+        chunk_size: int = 1000,
+    ) -> Iterator[List[ItemRecord]]:
+        """逐塊產出搜索結果"""
+        self._ensure_connected()
+        return self._replica.iter_search_items(
+            query, min_price, max_price, available_only, after, chunk_size
+        )
+
+    def get_all_users(
+        self, after: int = 0, limit: Optional[int] = None
+    ) -> List[UserRecord]:
+        """獲取所有用戶"""
+        self._ensure_connected()
+        return self._replica.get_all_users(after, limit)
+
+    def get_user_by_id(self, user_id: int) -> Optional[UserRecord]:
+        """根據 ID 獲取用戶"""
+        self._ensure_connected()
+        return self._replica.get_user_by_id(user_id)
+
+    def get_user_by_username(self, username: str) -> Optional[UserRecord]:
+        """根據用戶名獲取用戶"""
+        self._ensure_connected()
+        return self._replica.get_user_by_username(username)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """獲取統計信息"""
+        self._ensure_connected()
+        return self._replica.get_stats()
+
+    # 副本沿用擁有者的版本紀元和變更序號，各 worker 產生的記錄版本一致
+
+    @property
+    def version_epoch(self) -> str:
+        """版本紀元（與擁有者相同）"""
+        self._ensure_connected()
+        return self._replica.version_epoch
+
+    def item_version(self, item_id: int) -> Optional[int]:
+        """商品的版本"""
+        self._ensure_connected()
+        return self._replica.item_version(item_id)
+
+    def user_version(self, user_id: int) -> Optional[int]:
+        """用戶的版本"""
+        self._ensure_connected()
+        return self._replica.user_version(user_id)
+
+    def items_generation(self) -> int:
+        """商品集合的代數"""
+        self._ensure_connected()
+        return self._replica.items_generation()
+
+    def users_generation(self) -> int:
+        """用戶集合的代數"""
+        self._ensure_connected()
+        return self._replica.users_generation()
+
+    # ===== 寫入：轉發給擁有者 =====
+
+    def create_item(self, item_data: Dict[str, Any]) -> ItemRecord:
+        """創建新商品"""
+        result: ItemRecord = self._call("create_item", item_data)
+        return result
+
+    def update_item(
+        self, item_id: int, item_data: Dict[str, Any], version: Optional[int] = None
+    ) -> Optional[ItemRecord]:
+        """更新商品（提供 version 時由擁有者做條件更新）"""
+        result: Optional[ItemRecord] = self._call(
+            "update_item", item_id, item_data, version
+        )
+        return result
+
+    def delete_item(self, item_id: int) -> Optional[ItemRecord]:
+        """刪除商品"""
+        result: Optional[ItemRecord] = self._call("delete_item", item_id)
+        return result
+
+    def create_items(self, items_data: List[Dict[str, Any]]) -> List[ItemRecord]:
+        """批量創建商品（整批一次往返）"""
+        result: List[ItemRecord] = self._call("create_items", items_data)
+        return result
+
+    def update_items(
+        self, changes: List[Tuple[int, Dict[str, Any]]]
+    ) -> List[Optional[ItemRecord]]:
+        """批量部分更新商品"""
+        result: List[Optional[ItemRecord]] = self._call("update_items", changes)
+        return result
+
+    def delete_items(self, item_ids: List[int]) -> List[Optional[ItemRecord]]:
+        """批量刪除商品"""
+        result: List[Optional[ItemRecord]] = self._call("delete_items", item_ids)
+        return result
+
+    def create_user(self, user_data: Dict[str, Any]) -> UserRecord:
+        """創建新用戶
+
+        Raises:
+            DuplicateKeyError: 用戶名或電子郵件已存在
+        """
+        result: UserRecord = self._call("create_user", user_data)
+        return result
+
+    def update_user(
+        self, user_id: int, user_data: Dict[str, Any], version: Optional[int] = None
+    ) -> Optional[UserRecord]:
+        """更新用戶（提供 version 時由擁有者做條件更新）
+
+        Raises:
+            DuplicateKeyError: 用戶名或電子郵件已被其他用戶使用
+            VersionConflictError: 用戶的當前版本與 version 不同
+        """
+        result: Optional[UserRecord] = self._call(
+            "update_user", user_id, user_data, version
+        )
+        return result
+
+    def delete_user(self, user_id: int) -> Optional[UserRecord]:
+        """刪除用戶"""
+        result: Optional[UserRecord] = self._call("delete_user", user_id)
+        return result
+
+    def create_users(
+        self, users_data: List[Dict[str, Any]]
+    ) -> List[Union[UserRecord, DuplicateKeyError]]:
+        """批量創建用戶（衝突以 DuplicateKeyError 條目返回）"""
+        result: List[Union[UserRecord, DuplicateKeyError]] = self._call(
+            "create_users", users_data
+        )
+        return result
+
+    def update_users(
+        self, changes: List[Tuple[int, Dict[str, Any]]]
+    ) -> List[Union[UserRecord, DuplicateKeyError, None]]:
+        """批量部分更新用戶"""
+        result: List[Union[UserRecord, DuplicateKeyError, None]] = self._call(
+            "update_users", changes
+        )
+        return result
+
+    def delete_users(self, user_ids: List[int]) -> List[Optional[UserRecord]]:
+        """批量刪除用戶"""
+        result: List[Optional[UserRecord]] = self._call("delete_users", user_ids)
+        return result
+
+    def populate_sample_data(self) -> None:
+        """填充示例數據（由擁有者判斷是否為空）"""
+        self._call("populate_sample_data")
+
+    def clear_all_data(self) -> None:
+        """清空所有數據（用於測試）"""
+        self._call("clear_all_data")
+
+
+# ===== 數據擁有者進程 =====
+
+
+def serve(address: str, authkey: Optional[bytes] = None) -> None:
+    """數據擁有者進程入口
+
+    按配置恢復數據（快照和預寫日誌），沒有數據時填充示例數據，然後提供
+    服務；收到 SIGTERM 後寫入最終快照並退出。
+    """
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+
+    database = MemoryDatabase(
+        mvcc=settings.mvcc_enabled, item_engine=settings.item_engine
+    )
+    restored, scheduler = recover(database)
+    if not restored and settings.populate_sample_data:
+        database.populate_sample_data()
+    if scheduler is not None:
+        scheduler.start()
+    threading.Thread(target=database.warm_up, name="warm-up", daemon=True).start()
+
+    server = SharedStoreServer(database, address, authkey)
+    server.start()
+    app_logger.info(f"🗄️ 數據擁有者進程已就緒: {address} (PID {os.getpid()})")
+    try:
+        stopping.wait()
+    finally:
+        server.close()
+        shutdown(database, scheduler)
+        app_logger.info("🗄️ 數據擁有者進程已退出")
+
+
+def start_owner(
+    address: str, authkey: Optional[bytes] = None, timeout: float = 30.0
+) -> multiprocessing.process.BaseProcess:
+    """啟動數據擁有者進程，並等待其開始接受連接"""
+    if os.path.exists(address):
+        os.unlink(address)
+    os.makedirs(os.path.dirname(os.path.abspath(address)), exist_ok=True)
+    process = multiprocessing.get_context("spawn").Process(
+        target=serve, args=(address, authkey), name="shared-store-owner"
+    )
+    process.start()
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            Client(address, family="AF_UNIX", authkey=authkey).close()
+            return process
+        except (FileNotFoundError, ConnectionRefusedError):
+            if not process.is_alive() or time.monotonic() > deadline:
+                process.terminate()
+                raise RuntimeError("數據擁有者進程啟動失敗")
+            time.sleep(0.05)
+
+
+def stop_owner(
+    process: multiprocessing.process.BaseProcess, timeout: float = 30.0
+) -> None:
+    """通知數據擁有者進程退出並等待其寫完最終快照"""
+    process.terminate()
+    process.join(timeout)
+    if process.is_alive():
+        process.kill()
@@ -0,0 +1,434 @@
+"""
+二進制快照
+將 MemoryDatabase 的完整狀態寫成緊湊的列式二進制文件，啟動時通過 mmap 映射加載
+"""
+
+import mmap
+import os
+import struct
+import threading
+from array import array
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
+
+from src.core import app_logger
+from .records import ItemRecord, UserRecord
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .memory_db import MemoryDatabase
+
+MAGIC = b"MDBSNAP1"
+# 魔數、日誌序號、下一個商品 ID、下一個用戶 ID、商品數、用戶數、可用商品數、價格總和
+_HEADER = struct.Struct("<8sQqqqqqd")
+_LENGTH = struct.Struct("<Q")
+
+# 分段順序
+_ITEM_IDS, _ITEM_PRICES, _ITEM_FLAGS, _ITEM_OFFSETS, _ITEM_TEXT = range(5)
+_PRICE_KEYS, _PRICE_IDS = 5, 6
+_USER_IDS, _USER_FLAGS, _USER_OFFSETS, _USER_TEXT = 7, 8, 9, 10
+_SECTION_COUNT = 11
+
+# 標記位
+_AVAILABLE = 1
+_HAS_DESCRIPTION = 2
+_HAS_FULL_NAME = 1
+
+
+class SnapshotState(NamedTuple):
+    """某個日誌序號時刻的數據庫狀態（記錄不可變，只持有引用）"""
+
+    lsn: int
+    next_item_id: int
+    next_user_id: int
+    items: List[ItemRecord]
+    users: List[UserRecord]
+    # 訂閱時附帶的版本信息（版本紀元, 商品版本, 用戶版本），快照不保存
+    versions: Optional[Tuple[str, Dict[int, int], Dict[int, int]]] = None
+    # 訂閱時附帶的集合代數（商品代數, 用戶代數），快照不保存
+    generations: Optional[Tuple[int, int]] = None
+
+
+def _encode_texts(texts: List[str]) -> Tuple[bytes, bytes]:
+    """把字符串拼接為 UTF-8 文本塊，返回（字節偏移數組, 文本塊）"""
+    encoded = [text.encode("utf-8") for text in texts]
+    offsets = array("Q", [0])
+    position = 0
+    for data in encoded:
+        position += len(data)
+        offsets.append(position)
+    return offsets.tobytes(), b"".join(encoded)
+
+
+def _decode_texts(offsets: memoryview, blob: memoryview) -> List[str]:
+    """按字節偏移切分並解碼文本塊"""
+    data = bytes(blob)
+    bounds = offsets.tolist()
+    return [data[start:end].decode("utf-8") for start, end in zip(bounds, bounds[1:])]
+
+
+def write_snapshot(path: Union[str, Path], state: SnapshotState) -> None:
+    """將狀態寫入快照文件（先寫臨時文件，fsync 後原子替換）"""
+    path = Path(path)
+    items, users = state.items, state.users
+
+    item_texts: List[str] = []
+    for item in items:
+        item_texts.append(item.name)
+        item_texts.append(item.description or "")
+    item_offsets, item_blob = _encode_texts(item_texts)
+
+    user_texts: List[str] = []
+    for user in users:
+        user_texts.extend((user.username, user.email, user.full_name or ""))
+    user_offsets, user_blob = _encode_texts(user_texts)
+
+    # 價格索引按 (價格, ID) 排序後保存，加載時無需再排序
+    by_price = sorted((item.price, item.id) for item in items)
+
+    sections = [
+        array("q", [item.id for item in items]).tobytes(),
+        array("d", [item.price for item in items]).tobytes(),
+        bytes(
+            (_AVAILABLE if item.is_available else 0)
+            | (_HAS_DESCRIPTION if item.description is not None else 0)
+            for item in items
+        ),
+        item_offsets,
+        item_blob,
+        array("d", [price for price, _ in by_price]).tobytes(),
+        array("q", [item_id for _, item_id in by_price]).tobytes(),
+        array("q", [user.id for user in users]).tobytes(),
+        bytes(_HAS_FULL_NAME if user.full_name is not None else 0 for user in users),
+        user_offsets,
+        user_blob,
+    ]
+
+    available = sum(1 for item in items if item.is_available)
+    price_sum = sum(item.price for item in items)
+    temporary = path.with_name(path.name + ".tmp")
+    with open(temporary, "wb") as snapshot_file:
+        snapshot_file.write(
+            _HEADER.pack(
+                MAGIC,
+                state.lsn,
+                state.next_item_id,
+                state.next_user_id,
+                len(items),
+                len(users),
+                available,
+                price_sum,
+            )
+        )
+        for section in sections:
+            snapshot_file.write(_LENGTH.pack(len(section)))
+            snapshot_file.write(section)
+            # 對齊到 8 字節，便於按數值類型直接映射
+            snapshot_file.write(b"\0" * (-len(section) % 8))
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(temporary, path)
+    directory = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+class Snapshot:
+    """mmap 映射的快照文件
+
+    打開時只解析文件頭和分段邊界，各列在被訪問時才從映射中解碼，
+    未訪問的頁面不會被讀入內存；單條商品可用 :meth:`item_record`
+    按行號直接物化。
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        """映射快照文件"""
+        self.path = Path(path)
+        with open(self.path, "rb") as snapshot_file:
+            self._mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self._views: List[memoryview] = []
+
+        (
+            magic,
+            self.lsn,
+            self.next_item_id,
+            self.next_user_id,
+            self.item_count,
+            self.user_count,
+            self.available_items,
+            self.price_sum,
+        ) = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"不是有效的快照文件: {self.path}")
+
+        self._sections: List[Tuple[int, int]] = []
+        position = _HEADER.size
+        for _ in range(_SECTION_COUNT):
+            (length,) = _LENGTH.unpack_from(self._mmap, position)
+            start = position + _LENGTH.size
+            self._sections.append((start, start + length))
+            position = start + length + (-length % 8)
+
+        self._item_ids = self._section(_ITEM_IDS, "q")
+        self._item_prices = self._section(_ITEM_PRICES, "d")
+        self._item_flags = self._section(_ITEM_FLAGS)
+        self._item_offsets = self._section(_ITEM_OFFSETS, "Q")
+        self._item_text = self._section(_ITEM_TEXT)
+
+    def _section(
+        self, index: int, typecode: Literal["B", "d", "q", "Q"] = "B"
+    ) -> "memoryview[Any]":
+        """分段的零拷貝視圖（關閉時統一釋放）"""
+        start, end = self._sections[index]
+        view: "memoryview[Any]" = self._view[start:end].cast(typecode)
+        self._views.append(view)
+        return view
+
+    def item_ids(self) -> List[int]:
+        """按升序排列的商品 ID"""
+        return self._item_ids.tolist()
+
+    def item_record(self, row: int) -> ItemRecord:
+        """按行號物化單條商品記錄"""
+        offsets, text = self._item_offsets, self._item_text
+        start, middle, end = offsets[2 * row : 2 * row + 3]
+        flag = self._item_flags[row]
+        return ItemRecord(
+            self._item_ids[row],
+            str(text[start:middle], "utf-8"),
+            str(text[middle:end], "utf-8") if flag & _HAS_DESCRIPTION else None,
+            self._item_prices[row],
+            bool(flag & _AVAILABLE),
+        )
+
+    def item_columns(
+        self,
+    ) -> Tuple[List[int], List[str], List[Optional[str]], List[float], List[bool]]:
+        """商品各列，順序與 ItemRecord 字段一致：(ID, 名稱, 描述, 價格, 是否可用)"""
+        flags = self._item_flags.tolist()
+        texts = _decode_texts(self._item_offsets, self._item_text)
+        descriptions = [
+            text if flag & _HAS_DESCRIPTION else None
+            for text, flag in zip(texts[1::2], flags)
+        ]
+        return (
+            self._item_ids.tolist(),
+            texts[0::2],
+            descriptions,
+            # 價格分段按 "d" 解釋，tolist 得到的是浮點數
+            cast(List[float], self._item_prices.tolist()),
+            [bool(flag & _AVAILABLE) for flag in flags],
+        )
+
+    def items(self) -> List[ItemRecord]:
+        """按 ID 升序物化所有商品記錄"""
+        return list(map(ItemRecord, *self.item_columns()))
+
+    def price_entries(self) -> List[Tuple[float, int]]:
+        """按 (價格, ID) 排序的價格索引項"""
+        return list(
+            zip(
+                self._section(_PRICE_KEYS, "d").tolist(),
+                self._section(_PRICE_IDS, "q").tolist(),
+            )
+        )
+
+    def users(self) -> List[UserRecord]:
+        """按 ID 升序物化所有用戶記錄"""
+        flags = self._section(_USER_FLAGS).tolist()
+        texts = _decode_texts(
+            self._section(_USER_OFFSETS, "Q"), self._section(_USER_TEXT)
+        )
+        full_names = [
+            text if flag & _HAS_FULL_NAME else None
+            for text, flag in zip(texts[2::3], flags)
+        ]
+        return list(
+            map(
+                UserRecord,
+                self._section(_USER_IDS, "q").tolist(),
+                texts[0::3],
+                texts[1::3],
+                full_names,
+            )
+        )
+
+    def close(self) -> None:
+        """解除映射"""
+        for view in self._views:
+            view.release()
+        self._views.clear()
+        self._view.release()
+        self._mmap.close()
+
+
+class LazyRecordDict(dict):
+    """按需物化的記錄字典
+
+    加載快照時值先存放快照中的行號，首次訪問時物化為記錄並原地替換，
+    因此加載只需構建 ID 到行號的字典。覆蓋了 MemoryDatabase 使用的
+    讀取接口；鍵順序即快照中的 ID 升序，與插入順序一致。
+    """
+
+    def __init__(self, ids: List[int], materialize: Callable[[int], Any]) -> None:
+        """初始化字典"""
+        super().__init__(zip(ids, range(len(ids))))
+        self._materialize: Optional[Callable[[int], Any]] = materialize
+        self._pending = ids
+        self._position = 0
+
+    @property
+    def lazy(self) -> bool:
+        """是否仍有未物化的記錄"""
+        return self._materialize is not None
+
+    def _resolve(self, key: int, value: Any) -> Any:
+        """物化行號並替換字典中的值"""
+        if type(value) is not int:
+            return value
+        materialize = self._materialize
+        if materialize is None:
+            # 並發的 materialize 已完成全部替換
+            return dict.__getitem__(self, key)
+        value = materialize(value)
+        dict.__setitem__(self, key, value)
+        return value
+
+    def __getitem__(self, key: int) -> Any:
+        return self._resolve(key, dict.__getitem__(self, key))
+
+    def get(self, key: int, default: Any = None) -> Any:
+        value = dict.get(self, key, default)
+        return value if value is default else self._resolve(key, value)
+
+    def pop(self, key: int, *default: Any) -> Any:
+        value = dict.pop(self, key, *default)
+        if type(value) is int and self._materialize is not None:
+            value = self._materialize(value)
+        return value
+
+    def values(self) -> Any:
+        self.materialize()
+        return dict.values(self)
+
+    def items(self) -> Any:
+        self.materialize()
+        return dict.items(self)
+
+    def materialize(self, limit: Optional[int] = None) -> bool:
+        """按 ID 順序物化最多 limit 條尚未訪問的記錄，返回是否已全部物化"""
+        materialize = self._materialize
+        if materialize is None:
+            return True
+        start = self._position
+        end = len(self._pending) if limit is None else start + limit
+        for key in self._pending[start:end]:
+            value = dict.get(self, key)
+            if type(value) is int:
+                dict.__setitem__(self, key, materialize(value))
+        self._position = end
+        if end < len(self._pending):
+            return False
+        # 全部物化後不再引用快照
+        self._materialize = None
+        self._pending = []
+        return True
+
+    def clear(self) -> None:
+        dict.clear(self)
+        self._materialize = None
+        self._pending = []
+
+
+class SnapshotStore:
+    """快照目錄：按日誌序號命名快照文件，只保留最新的若干份"""
+
+    def __init__(self, directory: Union[str, Path], keep: int = 2) -> None:
+        """初始化快照目錄"""
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.keep = keep
+
+    def paths(self) -> List[Path]:
+        """按日誌序號升序返回所有快照文件"""
+        return sorted(self.directory.glob("snapshot-*.bin"))
+
+    def latest(self) -> Optional[Path]:
+        """最新的快照文件"""
+        paths = self.paths()
+        return paths[-1] if paths else None
+
+    def save(self, state: SnapshotState) -> Path:
+        """寫入快照並刪除多餘的舊快照"""
+        path = self.directory / f"snapshot-{state.lsn:020d}.bin"
+        write_snapshot(path, state)
+        for old in self.paths()[: -self.keep]:
+            old.unlink(missing_ok=True)
+        return path
+
+
+class SnapshotScheduler:
+    """後台定期快照
+
+    捕獲狀態時只在讀鎖內複製記錄引用，序列化和寫盤在後台線程中進行，
+    不持有數據庫鎖；快照寫入後刪除已被覆蓋的日誌段。
+    """
+
+    def __init__(
+        self, database: "MemoryDatabase", store: SnapshotStore, interval: float
+    ) -> None:
+        """初始化調度器"""
+        self.database = database
+        self.store = store
+        self.interval = interval
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """啟動後台線程"""
+        self._thread = threading.Thread(
+            target=self._run, name="snapshot-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止後台線程"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def snapshot_now(self) -> Path:
+        """立即寫入一份快照"""
+        with self._lock:
+            state = self.database.capture_snapshot()
+            path = self.store.save(state)
+            self.database.compact_wal(state.lsn)
+        app_logger.info(
+            f"📸 快照已寫入: {path.name} "
+            f"({len(state.items)} 商品, {len(state.users)} 用戶)"
+        )
+        return path
+
+    def _run(self) -> None:
+        """定期寫入快照"""
+        while not self._stop.wait(self.interval):
+            try:
+                self.snapshot_now()
+            except Exception as e:
+                app_logger.error(f"❌ 快照寫入失敗: {e}")
@@ -0,0 +1,480 @@
+"""
+SQLite 數據庫
+以本地磁盤文件存放商品和用戶，數據量可超過內存，讀取延遲穩定
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from .memory_db import (
+    SAMPLE_ITEMS,
+    SAMPLE_USERS,
+    DuplicateKeyError,
+    ItemAggregates,
+    build_stats,
+)
+from .records import ItemRecord, UserRecord
+from .tokenizer import normalize
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT,
+    price REAL NOT NULL,
+    is_available INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_items_price ON items (price);
+CREATE INDEX IF NOT EXISTS idx_items_is_available ON items (is_available);
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    email TEXT NOT NULL,
+    email_key TEXT NOT NULL,
+    full_name TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username ON users (username);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email_key ON users (email_key);
+"""
+
+# SQL 語句均為常量字符串，由連接的語句緩存復用已編譯的預處理語句
+ITEM_COLUMNS = "id, name, description, price, is_available"
+USER_COLUMNS = "id, username, email, full_name"
+SELECT_ITEMS = f"SELECT {ITEM_COLUMNS} FROM items WHERE id > ? ORDER BY id LIMIT ?"
+SELECT_ITEM = f"SELECT {ITEM_COLUMNS} FROM items WHERE id = ?"
+INSERT_ITEM = (
+    "INSERT INTO items (id, name, description, price, is_available) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+UPDATE_ITEM = (
+    "UPDATE items SET name = ?, description = ?, price = ?, is_available = ? "
+    "WHERE id = ?"
+)
+DELETE_ITEM = "DELETE FROM items WHERE id = ?"
+SELECT_USERS = f"SELECT {USER_COLUMNS} FROM users WHERE id > ? ORDER BY id LIMIT ?"
+SELECT_USER = f"SELECT {USER_COLUMNS} FROM users WHERE id = ?"
+SELECT_USER_BY_USERNAME = f"SELECT {USER_COLUMNS} FROM users WHERE username = ?"
+INSERT_USER = (
+    "INSERT INTO users (id, username, email, email_key, full_name) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+UPDATE_USER = (
+    "UPDATE users SET username = ?, email = ?, email_key = ?, full_name = ? "
+    "WHERE id = ?"
+)
+DELETE_USER = "DELETE FROM users WHERE id = ?"
+ITEM_STATS = (
+    "SELECT count(*), total(is_available), total(price), min(price), max(price) "
+    "FROM items"
+)
+COUNT_USERS = "SELECT count(*) FROM users"
+
+# 搜索條件片段：組合方式有限，每種組合對應一條固定的 SQL
+SEARCH_AFTER = "id > ?"
+SEARCH_AVAILABLE = "is_available = 1"
+SEARCH_MIN_PRICE = "price >= ?"
+SEARCH_MAX_PRICE = "price <= ?"
+SEARCH_QUERY = "(instr(normalize(name), ?) > 0 OR instr(normalize(description), ?) > 0)"
+
+Row = Tuple[Any, ...]
+
+
+def _normalize(text: Optional[str]) -> Optional[str]:
+    """註冊到 SQLite 的歸一化函數，與內存索引的匹配語義一致"""
+    return None if text is None else normalize(text)
+
+
+def _item(row: Row) -> ItemRecord:
+    """將查詢結果行轉換為商品記錄"""
+    item_id, name, description, price, is_available = row
+    return ItemRecord(item_id, name, description, price, bool(is_available))
+
+
+def _user(row: Row) -> UserRecord:
+    """將查詢結果行轉換為用戶記錄"""
+    return UserRecord(*row)
+
+
+class SQLiteDatabase:
+    """SQLite 數據庫
+
+    - WAL 日誌模式：讀者不阻塞寫者，寫者也不阻塞讀者
+    - 讀連接池：併發讀取各自使用獨立連接
+    - 單個寫連接，由鎖串行化所有寫事務
+    - ``price``、``is_available`` 和 ``username`` 建有索引
+
+    接口與 MemoryDatabase 一致，返回相同的不可變記錄類型。
+    """
+
+    def __init__(
+        self, path: Union[str, Path], pool_size: int = 4, statement_cache: int = 128
+    ) -> None:
+        """初始化數據庫
+
+        Args:
+            path: 數據庫文件路徑，父目錄不存在時自動創建
+            pool_size: 讀連接池大小
+            statement_cache: 每個連接緩存的預處理語句數量
+        """
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._statement_cache = statement_cache
+
+        self._writer = self._connect()
+        self._writer.executescript(SCHEMA)
+        self._write_lock = threading.Lock()
+
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._connections = [self._writer]
+        for _ in range(pool_size):
+            connection = self._connect()
+            self._connections.append(connection)
+            self._readers.put(connection)
+
+    def _connect(self) -> sqlite3.Connection:
+        """創建一個配置好的連接"""
+        connection = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=self._statement_cache,
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        connection.create_function("normalize", 1, _normalize, deterministic=True)
+        return connection
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """從連接池借出讀連接"""
+        connection = self._readers.get()
+        try:
+            yield connection
+        finally:
+            self._readers.put(connection)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """在寫連接上執行寫事務"""
+        with self._write_lock:
+            self._writer.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._writer
+            except BaseException:
+                self._writer.execute("ROLLBACK")
+                raise
+            self._writer.execute("COMMIT")
+
+    def close(self) -> None:
+        """關閉所有連接"""
+        for connection in self._connections:
+            connection.close()
+
+    # ===== 商品相關操作 =====
+
+    def get_all_items(
+        self, after: int = 0, limit: Optional[int] = None
+    ) -> List[ItemRecord]:
+        """獲取所有商品（主鍵範圍掃描分頁，LIMIT -1 表示不限）"""
+        params = (after, -1 if limit is None else limit)
+        with self._reader() as connection:
+            return [_item(row) for row in connection.execute(SELECT_ITEMS, params)]
+
+    def get_item_by_id(self, item_id: int) -> Optional[ItemRecord]:
+        """根據 ID 獲取商品"""
+        with self._reader() as connection:
+            row = connection.execute(SELECT_ITEM, (item_id,)).fetchone()
+        return _item(row) if row else None
+
+    @staticmethod
+    def _item_row(item_id: Optional[int], item_data: Dict[str, Any]) -> Row:
+        """按 INSERT_ITEM 的參數順序排列商品字段"""
+        return (
+            item_id,
+            item_data["name"],
+            item_data.get("description"),
+            item_data["price"],
+            int(item_data.get("is_available", True)),
+        )
+
+    def create_item(self, item_data: Dict[str, Any]) -> ItemRecord:
+        """創建新商品"""
+        row = self._item_row(None, item_data)
+        with self._transaction() as connection:
+            item_id = connection.execute(INSERT_ITEM, row).lastrowid
+        return _item((item_id, *row[1:]))
+
+    def update_item(
+        self, item_id: int, item_data: Dict[str, Any]
+    ) -> Optional[ItemRecord]:
+        """更新商品"""
+        row = self._item_row(item_id, item_data)
+        with self._transaction() as connection:
+            if not connection.execute(UPDATE_ITEM, (*row[1:], item_id)).rowcount:
+                return None
+        return _item(row)
+
+    def delete_item(self, item_id: int) -> Optional[ItemRecord]:
+        """刪除商品"""
+        with self._transaction() as connection:
+            row = connection.execute(SELECT_ITEM, (item_id,)).fetchone()
+            if row is None:
+                return None
+            connection.execute(DELETE_ITEM, (item_id,))
+        return _item(row)
+
+    def create_items(self, items_data: List[Dict[str, Any]]) -> List[ItemRecord]:
+        """批量創建商品（一個寫事務）"""
+        rows = [self._item_row(None, item_data) for item_data in items_data]
+        with self._transaction() as connection:
+            item_ids = [connection.execute(INSERT_ITEM, row).lastrowid for row in rows]
+        return [_item((item_id, *row[1:])) for item_id, row in zip(item_ids, rows)]
+
+    def update_items(
+        self, changes: List[Tuple[int, Dict[str, Any]]]
+    ) -> List[Optional[ItemRecord]]:
+        """批量部分更新商品（一個寫事務，字段與現有記錄合併）"""
+        items: List[Optional[ItemRecord]] = []
+        with self._transaction() as connection:
+            for item_id, fields in changes:
+                row = connection.execute(SELECT_ITEM, (item_id,)).fetchone()
+                if row is None:
+                    items.append(None)
+                    continue
+                item = _item(row)
+                row = self._item_row(item_id, {**item, **fields})
+                connection.execute(UPDATE_ITEM, (*row[1:], item_id))
+                items.append(_item(row))
+        return items
+
+    def delete_items(self, item_ids: List[int]) -> List[Optional[ItemRecord]]:
+        """批量刪除商品（一個寫事務）"""
+        items: List[Optional[ItemRecord]] = []
+        with self._transaction() as connection:
+            for item_id in item_ids:
+                row = connection.execute(SELECT_ITEM, (item_id,)).fetchone()
+                if row is not None:
+                    connection.execute(DELETE_ITEM, (item_id,))
+                items.append(_item(row) if row else None)
+        return items
+
+    def search_items(
+        self,
+        query: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        available_only: bool = True,
+        after: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[ItemRecord]:
+        """搜索商品（價格範圍和可用性由索引過濾，關鍵字匹配歸一化後的子串）"""
+        conditions: List[str] = []
+        params: List[Any] = []
+        if after:
+            conditions.append(SEARCH_AFTER)
+            params.append(after)
+        if available_only:
+            conditions.append(SEARCH_AVAILABLE)
+        if min_price is not None:
+            conditions.append(SEARCH_MIN_PRICE)
+            params.append(min_price)
+        if max_price is not None:
+            conditions.append(SEARCH_MAX_PRICE)
+            params.append(max_price)
+        if query:
+            conditions.append(SEARCH_QUERY)
+            params.extend([normalize(query)] * 2)
+
+        sql = f"SELECT {ITEM_COLUMNS} FROM items"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._reader() as connection:
+            return [_item(row) for row in connection.execute(sql, params)]
+
+    # ===== 用戶相關操作 =====
+
+    def get_all_users(
+        self, after: int = 0, limit: Optional[int] = None
+    ) -> List[UserRecord]:
+        """獲取所有用戶"""
+        params = (after, -1 if limit is None else limit)
+        with self._reader() as connection:
+            return [_user(row) for row in connection.execute(SELECT_USERS, params)]
+
+    def get_user_by_id(self, user_id: int) -> Optional[UserRecord]:
+        """根據 ID 獲取用戶"""
+        with self._reader() as connection:
+            row = connection.execute(SELECT_USER, (user_id,)).fetchone()
+        return _user(row) if row else None
+
+    def get_user_by_username(self, username: str) -> Optional[UserRecord]:
+        """根據用戶名獲取用戶"""
+        with self._reader() as connection:
+            row = connection.execute(SELECT_USER_BY_USERNAME, (username,)).fetchone()
+        return _user(row) if row else None
+
+    @staticmethod
+    def _user_row(user_id: Optional[int], user_data: Dict[str, Any]) -> Row:
+        """按 INSERT_USER 的參數順序排列用戶字段"""
+        return (
+            user_id,
+            user_data["username"],
+            user_data["email"],
+            user_data["email"].casefold(),
+            user_data.get("full_name"),
+        )
+
+    @staticmethod
+    def _duplicate_key(error: sqlite3.IntegrityError, row: Row) -> DuplicateKeyError:
+        """將唯一約束錯誤轉換為 DuplicateKeyError"""
+        if "users.username" in str(error):
+            return DuplicateKeyError("username", row[1])
+        return DuplicateKeyError("email", row[2])
+
+    def create_user(self, user_data: Dict[str, Any]) -> UserRecord:
+        """創建新用戶
+
+        Raises:
+            DuplicateKeyError: 用戶名或電子郵件已存在
+        """
+        row = self._user_row(None, user_data)
+        try:
+            with self._transaction() as connection:
+                user_id = connection.execute(INSERT_USER, row).lastrowid
+        except sqlite3.IntegrityError as e:
+            raise self._duplicate_key(e, row) from e
+        return _user((user_id, row[1], row[2], row[4]))
+
+    def update_user(
+        self, user_id: int, user_data: Dict[str, Any]
+    ) -> Optional[UserRecord]:
+        """更新用戶
+
+        Raises:
+            DuplicateKeyError: 用戶名或電子郵件已被其他用戶使用
+        """
+        row = self._user_row(user_id, user_data)
+        try:
+            with self._transaction() as connection:
+                if not connection.execute(UPDATE_USER, (*row[1:], user_id)).rowcount:
+                    return None
+        except sqlite3.IntegrityError as e:
+            raise self._duplicate_key(e, row) from e
+        return _user((user_id, row[1], row[2], row[4]))
+
+    def delete_user(self, user_id: int) -> Optional[UserRecord]:
+        """刪除用戶"""
+        with self._transaction() as connection:
+            row = connection.execute(SELECT_USER, (user_id,)).fetchone()
+            if row is None:
+                return None
+            connection.execute(DELETE_USER, (user_id,))
+        return _user(row)
+
+    def create_users(
+        self, users_data: List[Dict[str, Any]]
+    ) -> List[Union[UserRecord, DuplicateKeyError]]:
+        """批量創建用戶（一個寫事務）
+
+        唯一約束失敗只中止當前語句，不影響事務中的其他條目。
+        """
+        results: List[Union[UserRecord, DuplicateKeyError]] = []
+        with self._transaction() as connection:
+            for user_data in users_data:
+                row = self._user_row(None, user_data)
+                try:
+                    user_id = connection.execute(INSERT_USER, row).lastrowid
+                except sqlite3.IntegrityError as e:
+                    results.append(self._duplicate_key(e, row))
+                else:
+                    results.append(_user((user_id, row[1], row[2], row[4])))
+        return results
+
+    def update_users(
+        self, changes: List[Tuple[int, Dict[str, Any]]]
+    ) -> List[Union[UserRecord, DuplicateKeyError, None]]:
+        """批量部分更新用戶（一個寫事務，字段與現有記錄合併）"""
+        results: List[Union[UserRecord, DuplicateKeyError, None]] = []
+        with self._transaction() as connection:
+            for user_id, fields in changes:
+                row = connection.execute(SELECT_USER, (user_id,)).fetchone()
+                if row is None:
+                    results.append(None)
+                    continue
+                row = self._user_row(user_id, {**_user(row), **fields})
+                try:
+                    connection.execute(UPDATE_USER, (*row[1:], user_id))
+                except sqlite3.IntegrityError as e:
+                    results.append(self._duplicate_key(e, row))
+                else:
+                    results.append(_user((user_id, row[1], row[2], row[4])))
+        return results
+
+    def delete_users(self, user_ids: List[int]) -> List[Optional[UserRecord]]:
+        """批量刪除用戶（一個寫事務）"""
+        users: List[Optional[UserRecord]] = []
+        with self._transaction() as connection:
+            for user_id in user_ids:
+                row = connection.execute(SELECT_USER, (user_id,)).fetchone()
+                if row is not None:
+                    connection.execute(DELETE_USER, (user_id,))
+                users.append(_user(row) if row else None)
+        return users
+
+    # ===== 統計相關操作 =====
+
+    def get_stats(self) -> Dict[str, Any]:
+        """獲取統計信息（一個讀事務內完成，結果自洽）"""
+        with self._reader() as connection:
+            connection.execute("BEGIN")
+            try:
+                total_items, available, price_sum, lowest, highest = connection.execute(
+                    ITEM_STATS
+                ).fetchone()
+                (total_users,) = connection.execute(COUNT_USERS).fetchone()
+            finally:
+                connection.execute("COMMIT")
+
+        items = ItemAggregates(
+            total_items,
+            int(available),
+            price_sum,
+            lowest if lowest is not None else 0,
+            highest if highest is not None else 0,
+        )
+        return build_stats(items, total_users)
+
+    # ===== 數據初始化 =====
+
+    def populate_sample_data(self) -> None:
+        """填充示例數據（僅在兩個表都為空時）"""
+        with self._transaction() as connection:
+            if connection.execute("SELECT 1 FROM items LIMIT 1").fetchone():
+                return
+            if connection.execute("SELECT 1 FROM users LIMIT 1").fetchone():
+                return
+            connection.executemany(
+                INSERT_ITEM,
+                [self._item_row(item["id"], item) for item in SAMPLE_ITEMS],
+            )
+            connection.executemany(
+                INSERT_USER,
+                [self._user_row(user["id"], user) for user in SAMPLE_USERS],
+            )
+
+    def clear_all_data(self) -> None:
+        """清空所有數據並重置 ID 序列（用於測試）"""
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM items")
+            connection.execute("DELETE FROM users")
+            connection.execute(
+                "DELETE FROM sqlite_sequence WHERE name IN ('items', 'users')"
+            )
@@ -0,0 +1,157 @@
+"""
+存儲接口
+定義服務層依賴的存儲協議，並根據配置創建全局存儲實例
+"""
+
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+    Union,
+    runtime_checkable,
+)
+from src.core import settings
+from .async_storage import AsyncStorage
+from .changes import ChangeFeed
+from .memory_db import DuplicateKeyError, MemoryDatabase
+from .shared import SharedStoreClient
+from .sharded import ShardedDatabase
+from .records import ItemRecord, UserRecord
+from .sqlite_db import SQLiteDatabase
+
+STORAGE_BACKENDS = ("memory", "sqlite", "shared")
+
+
+@runtime_checkable
+class Storage(Protocol):
+    """存儲協議
+
+    商品和用戶均以不可變記錄返回；用戶名或電子郵件衝突時拋出
+    DuplicateKeyError；更新或刪除不存在的記錄時返回 None。
+
+    批量操作（``*_items`` / ``*_users``）整批在一次寫入中完成，返回與輸入
+    一一對應的結果列表：不存在的記錄為 None，唯一鍵衝突為 DuplicateKeyError
+    實例（不拋出），其餘條目照常生效。批量更新只需提供要修改的字段。
+
+    列表和搜索結果按 ID 升序；``after`` / ``limit`` 做鍵集分頁，只返回
+    ID 大於 after 的前 limit 條，代價與頁大小而不是集合大小成正比。
+
+    可選能力（SQLite 不提供）：``listen`` 訂閱變更；``item_version`` /
+    ``user_version`` 給出記錄版本，``items_generation`` / ``users_generation``
+    給出集合代數，``version_epoch`` 為其紀元；``update_item`` /
+    ``update_user`` 接受 ``version`` 做條件更新，版本不符時拋出
+    VersionConflictError；``iter_search_items`` 逐塊產出搜索結果，整個
+    搜索共用一個游標，不必每塊重新分頁搜索。
+    """
+
+    # ===== 商品 =====
+
+    def get_all_items(
+        self, after: int = 0, limit: Optional[int] = None
+    ) -> List[ItemRecord]: ...
+
+    def get_item_by_id(self, item_id: int) -> Optional[ItemRecord]: ...
+
+    def create_item(self, item_data: Dict[str, Any]) -> ItemRecord: ...
+
+    def update_item(
+        self, item_id: int, item_data: Dict[str, Any]
+    ) -> Optional[ItemRecord]: ...
+
+    def delete_item(self, item_id: int) -> Optional[ItemRecord]: ...
+
+    def create_items(self, items_data: List[Dict[str, Any]]) -> List[ItemRecord]: ...
+
+    def update_items(
+        self, changes: List[Tuple[int, Dict[str, Any]]]
+    ) -> List[Optional[ItemRecord]]: ...
+
+    def delete_items(self, item_ids: List[int]) -> List[Optional[ItemRecord]]: ...
+
+    def search_items(
+        self,
+        query: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        available_only: bool = True,
+        after: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[ItemRecord]: ...
+
+    # ===== 用戶 =====
+
+    def get_all_users(
+        self, after: int = 0, limit: Optional[int] = None
+    ) -> List[UserRecord]: ...
+
+    def get_user_by_id(self, user_id: int) -> Optional[UserRecord]: ...
+
+    def get_user_by_username(self, username: str) -> Optional[UserRecord]: ...
+
+    def create_user(self, user_data: Dict[str, Any]) -> UserRecord: ...
+
+    def update_user(
+        self, user_id: int, user_data: Dict[str, Any]
+    ) -> Optional[UserRecord]: ...
+
+    def delete_user(self, user_id: int) -> Optional[UserRecord]: ...
+
+    def create_users(
+        self, users_data: List[Dict[str, Any]]
+    ) -> List[Union[UserRecord, DuplicateKeyError]]: ...
+
+    def update_users(
+        self, changes: List[Tuple[int, Dict[str, Any]]]
+    ) -> List[Union[UserRecord, DuplicateKeyError, None]]: ...
+
+    def delete_users(self, user_ids: List[int]) -> List[Optional[UserRecord]]: ...
+
+    # ===== 統計與維護 =====
+
+    def get_stats(self) -> Dict[str, Any]: ...
+
+    def populate_sample_data(self) -> None: ...
+
+    def clear_all_data(self) -> None: ...
+
+    def close(self) -> None: ...
+
+
+def create_storage() -> Storage:
+    """根據配置創建存儲實例"""
+    if settings.storage_backend == "sqlite":
+        return SQLiteDatabase(settings.sqlite_path, pool_size=settings.sqlite_pool_size)
+    if settings.storage_backend == "shared":
+        authkey = settings.shared_store_authkey
+        return SharedStoreClient(
+            settings.shared_store_address,
+            authkey.encode() if authkey else None,
+            mvcc=settings.mvcc_enabled,
+            item_engine=settings.item_engine,
+        )
+    if settings.storage_backend != "memory":
+        raise ValueError(f"未知的存儲後端: {settings.storage_backend}")
+    if settings.item_shards > 1:
+        return ShardedDatabase(
+            settings.item_shards,
+            mvcc=settings.mvcc_enabled,
+            item_engine=settings.item_engine,
+        )
+    return MemoryDatabase(mvcc=settings.mvcc_enabled, item_engine=settings.item_engine)
+
+
+# 創建全局存儲實例及其異步接口
+db: Storage = create_storage()
+async_db = AsyncStorage(
+    db,
+    max_workers=settings.storage_workers,
+    write_workers=settings.storage_write_workers,
+)
+
+# 變更訂閱緩衝區；共享存儲客戶端掛載時需要連接擁有者，在 worker 啟動時掛載
+change_feed = ChangeFeed(settings.change_feed_size)
+if not isinstance(db, SharedStoreClient):
+    change_feed.attach(db)
@@ -0,0 +1,51 @@
+"""
+文本分詞
+為搜索索引提供中日韓（CJK）與拉丁文混合文本的歸一化和分詞
+"""
+
+import re
+import unicodedata
+from typing import List
+
+# 中日韓字符範圍：假名、CJK 統一表意文字（含擴展 A）、兼容表意文字、諺文音節
+_CJK_RANGES = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+
+# CJK 連續段，或不含 CJK 的單詞字符連續段；其餘字符視為分隔符
+_RUN_PATTERN = re.compile(rf"(?P<cjk>[{_CJK_RANGES}]+)|(?P<word>[^\W{_CJK_RANGES}]+)")
+_CJK_PATTERN = re.compile(rf"[{_CJK_RANGES}]")
+
+
+def normalize(text: str) -> str:
+    """歸一化文本：NFKC（全形轉半形等）後轉小寫
+
+    索引和查詢使用同一函數，保證全形與半形字符的匹配結果一致。
+    """
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def is_cjk(token: str) -> bool:
+    """判斷詞元是否為 CJK 詞元"""
+    return _CJK_PATTERN.match(token) is not None
+
+
+def tokenize(text: str, normalized: bool = False) -> List[str]:
+    """分詞：CJK 連續段輸出相鄰字符二元組，拉丁文連續段輸出單詞
+
+    Args:
+        text: 待分詞文本
+        normalized: 文本是否已經過 ``normalize``
+
+    >>> tokenize("最新款 iPhone 15")
+    ['最新', '新款', 'iphone', '15']
+    """
+    if not normalized:
+        text = normalize(text)
+
+    tokens: List[str] = []
+    for match in _RUN_PATTERN.finditer(text):
+        run = match.group()
+        if match.lastgroup == "cjk" and len(run) > 1:
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
@@ -0,0 +1,263 @@
+"""
+預寫日誌（WAL）
+以追加方式記錄數據庫的每次寫入，支持組提交和啟動時重放
+"""
+
+import json
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+
+class WriteAheadLog:
+    """追加寫入的預寫日誌
+
+    每條日誌為一行 ``<crc32> <json>``，JSON 中帶有遞增的日誌序號 ``lsn``。
+
+    - ``group_commit_window > 0``：組提交。寫入只追加到內存緩衝區，
+      後台線程在第一條待刷寫入到達後等待一個窗口，再把窗口內積累的
+      所有寫入一次寫盤並 fsync，調用方通過 :meth:`wait` 等待持久化。
+    - ``group_commit_window == 0``：每次追加都在調用線程內立即寫盤並
+      fsync，即逐條持久化。
+
+    打開後必須先調用 :meth:`replay` 讀完已有日誌，才能繼續追加；
+    重放時尾部不完整或校驗失敗的記錄（崩潰時的殘缺寫入）會被截斷。
+
+    寫快照時調用 :meth:`rotate` 把當前文件歸檔為日誌段
+    ``<path>.<最後序號>``，快照落盤後再用 :meth:`drop_segments`
+    刪除已被快照覆蓋的段。
+    """
+
+    def __init__(
+        self, path: Union[str, Path], group_commit_window: float = 0.002
+    ) -> None:
+        """初始化日誌
+
+        Args:
+            path: 日誌文件路徑，不存在時創建
+            group_commit_window: 組提交窗口（秒），0 表示每次寫入都 fsync
+        """
+        if group_commit_window < 0:
+            raise ValueError("組提交窗口不能為負數")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.group_commit_window = group_commit_window
+        self.syncs = 0  # 已執行的 fsync 次數
+
+        self._file = open(self.path, "ab")
+        # 保護緩衝區和序號；寫盤由 _io_lock 串行化，保證按序號順序落盤
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._pending = threading.Condition(self._lock)
+        self._durable = threading.Condition(self._lock)
+        self._buffer: List[bytes] = []
+        self._last_lsn = 0
+        self._durable_lsn = 0
+        self._replayed = False
+        self._closed = False
+        self._closing = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._flusher: Optional[threading.Thread] = None
+
+    @property
+    def last_lsn(self) -> int:
+        """最後一條已追加日誌的序號"""
+        return self._last_lsn
+
+    # ===== 日誌段 =====
+
+    def segments(self) -> List[Tuple[int, Path]]:
+        """按序號升序返回已歸檔的日誌段（段內最後序號, 路徑）"""
+        prefix = self.path.name + "."
+        found = []
+        for segment in self.path.parent.glob(prefix + "*"):
+            suffix = segment.name[len(prefix) :]
+            if suffix.isdigit():
+                found.append((int(suffix), segment))
+        return sorted(found)
+
+    def rotate(self) -> int:
+        """把當前日誌文件歸檔為日誌段，返回歸檔時的最後序號
+
+        調用方在持有數據寫鎖或讀鎖時調用，返回的序號即與內存狀態
+        對應的日誌位置；當前文件為空時不歸檔。
+        """
+        with self._io_lock:
+            self._write_buffer()
+            with self._lock:
+                lsn = self._last_lsn
+            if self._file.tell():
+                self._file.close()
+                self.path.rename(self.path.with_name(f"{self.path.name}.{lsn:020d}"))
+                self._file = open(self.path, "ab")
+                self._fsync()
+        return lsn
+
+    def drop_segments(self, lsn: int) -> None:
+        """刪除最後序號不大於 lsn 的日誌段"""
+        for last_lsn, segment in self.segments():
+            if last_lsn <= lsn:
+                segment.unlink(missing_ok=True)
+
+    # ===== 重放 =====
+
+    def replay(self, after_lsn: int = 0) -> Iterator[Dict[str, Any]]:
+        """按順序產出序號大於 after_lsn 的日誌記錄
+
+        依次讀取歸檔段和當前文件，結束後截斷當前文件的殘缺尾部並允許追加。
+        """
+        if self._replayed:
+            raise RuntimeError("日誌已經重放過")
+
+        for last_lsn, segment in self.segments():
+            if last_lsn <= after_lsn:
+                continue
+            for entry, _ in self._read(segment):
+                self._last_lsn = entry["lsn"]
+                if entry["lsn"] > after_lsn:
+                    yield entry
+
+        valid_bytes = 0
+        for entry, size in self._read(self.path):
+            valid_bytes += size
+            self._last_lsn = entry["lsn"]
+            if entry["lsn"] > after_lsn:
+                yield entry
+
+        if valid_bytes < self.path.stat().st_size:
+            self._file.truncate(valid_bytes)
+            self._fsync()
+        # 快照之後的段可能已被刪除，序號不能回退到快照之前
+        self._last_lsn = max(self._last_lsn, after_lsn)
+        self._durable_lsn = self._last_lsn
+        self._replayed = True
+        if self.group_commit_window > 0:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="wal-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    @classmethod
+    def _read(cls, path: Path) -> Iterator[Tuple[Dict[str, Any], int]]:
+        """逐條讀取日誌文件，遇到殘缺記錄時停止，產出（記錄, 字節數）"""
+        with open(path, "rb") as log_file:
+            for line in log_file:
+                entry = cls._decode(line)
+                if entry is None:
+                    return
+                yield entry, len(line)
+
+    @staticmethod
+    def _decode(line: bytes) -> Optional[Dict[str, Any]]:
+        """解析一行日誌，殘缺或校驗失敗時返回 None"""
+        if not line.endswith(b"\n"):
+            return None
+        checksum, _, payload = line[:-1].partition(b" ")
+        try:
+            if int(checksum, 16) != zlib.crc32(payload):
+                return None
+            entry: Dict[str, Any] = json.loads(payload)
+            return entry
+        except ValueError:
+            return None
+
+    # ===== 追加與持久化 =====
+
+    def append(self, entry: Dict[str, Any]) -> int:
+        """追加一條日誌並返回其序號
+
+        組提交模式下只寫入緩衝區，需再調用 :meth:`wait` 等待持久化；
+        逐條模式下返回時已經 fsync。調用方應在持有對應數據的寫鎖時
+        追加，使日誌順序與內存中的應用順序一致。
+        """
+        with self._lock:
+            if not self._replayed:
+                raise RuntimeError("追加前必須先重放日誌")
+            if self._closed:
+                raise RuntimeError("日誌已關閉")
+            if self._error is not None:
+                raise RuntimeError("預寫日誌寫入失敗") from self._error
+            self._last_lsn += 1
+            lsn = self._last_lsn
+            payload = json.dumps(
+                {"lsn": lsn, **entry}, ensure_ascii=False, separators=(",", ":")
+            ).encode("utf-8")
+            self._buffer.append(b"%08x %s\n" % (zlib.crc32(payload), payload))
+            self._pending.notify()
+
+        if not self.group_commit_window:
+            self._sync()
+        return lsn
+
+    def wait(self, lsn: int) -> None:
+        """阻塞直到序號不大於 lsn 的日誌全部持久化"""
+        with self._lock:
+            while self._durable_lsn < lsn:
+                if self._error is not None:
+                    raise RuntimeError("預寫日誌寫入失敗") from self._error
+                if self._closed:
+                    raise RuntimeError("日誌已關閉")
+                self._durable.wait()
+
+    def _sync(self) -> None:
+        """把緩衝區中的日誌寫盤並 fsync"""
+        with self._io_lock:
+            self._write_buffer()
+
+    def _write_buffer(self) -> None:
+        """寫出緩衝區並 fsync（需在持有 _io_lock 時調用）"""
+        with self._lock:
+            if not self._buffer:
+                return
+            data = b"".join(self._buffer)
+            self._buffer.clear()
+            lsn = self._last_lsn
+        try:
+            self._file.write(data)
+            self._fsync()
+        except OSError as e:
+            with self._lock:
+                self._error = e
+                self._durable.notify_all()
+            raise
+        with self._lock:
+            self._durable_lsn = lsn
+            self._durable.notify_all()
+
+    def _fsync(self) -> None:
+        """刷新文件緩衝區並 fsync"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.syncs += 1
+
+    def _flush_loop(self) -> None:
+        """組提交後台線程"""
+        while True:
+            with self._lock:
+                while not self._buffer and not self._closed:
+                    self._pending.wait()
+                if not self._buffer:
+                    return
+            # 等待一個窗口，讓並發到達的寫入共享同一次 fsync；關閉時立即刷出
+            self._closing.wait(self.group_commit_window)
+            try:
+                self._sync()
+            except OSError:
+                return
+
+    def close(self) -> None:
+        """刷出剩餘日誌並關閉文件"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._closing.set()
+            self._pending.notify_all()
+        if self._flusher is not None:
+            self._flusher.join()
+        self._sync()
+        with self._lock:
+            self._durable.notify_all()
+        self._file.close()
@@ -5,9 +5,10 @@ FastAPI 主應用文件
 
 import threading
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import requests
 from fastapi import FastAPI
+from fastapi.exceptions import RequestValidationError
 
 # 導入配置和日誌
 from src.core import (
@@ -20,13 +21,23 @@ from src.core import (
 )
 
 # 導入路由
-from .routers import items_router, users_router, stats_router
+from .routers import items_router, users_router, stats_router, changes_router
 
 # 導入中間件
 from .utils import LoggingMiddleware
 
 # 導入數據庫
-from .database.memory_db import db
+from .database import (
+    MemoryDatabase,
+    ShardedDatabase,
+    SharedStoreClient,
+    async_db,
+    change_feed,
+    db,
+)
+from .database.recovery import recover, shutdown as shutdown_storage
+from .database.snapshot import SnapshotScheduler
+from .services.bulk import validation_error_handler
 
 # 驗證配置
 try:
@@ -50,10 +61,14 @@ app = FastAPI(
 # 添加中間件
 app.add_middleware(LoggingMiddleware)
 
+# 超出條數上限的批量請求不回顯請求體
+app.add_exception_handler(RequestValidationError, validation_error_handler)
+
 # 註冊路由
 app.include_router(items_router)
 app.include_router(users_router)
 app.include_router(stats_router)
+app.include_router(changes_router)
 
 
 # 根路由
@@ -71,11 +86,43 @@ async def read_root() -> Dict[str, Any]:
             "用戶管理",
             "搜索功能",
             "統計信息",
+            "變更訂閱",
             "自動 API 文檔",
         ],
     }
 
 
+# 後台快照調度器（配置了快照目錄時創建）
+snapshot_scheduler: Optional[SnapshotScheduler] = None
+
+
+def recover_data() -> bool:
+    """恢復數據，返回是否已有數據（有數據時不再填充示例數據）"""
+    global snapshot_scheduler
+    if isinstance(db, SharedStoreClient):
+        # 數據由數據擁有者進程恢復和填充，worker 只同步副本
+        app_logger.info(f"🔗 使用共享存儲: {settings.shared_store_address}")
+        # 在 worker 進程內連接擁有者並開始記錄變更
+        change_feed.attach(db)
+        return True
+    if isinstance(db, ShardedDatabase):
+        # 分片引擎不支持快照和日誌（配置驗證已保證未啟用）
+        app_logger.info(f"🧩 使用 {db.shard_count} 個商品分片")
+        return False
+    if not isinstance(db, MemoryDatabase):
+        # 磁盤存儲後端自身持久化，無需快照和日誌恢復
+        app_logger.info(f"💾 使用 {settings.storage_backend} 存儲後端")
+        return False
+
+    # 加載最新快照並重放其後的預寫日誌
+    restored, snapshot_scheduler = recover(db)
+    if snapshot_scheduler is not None:
+        snapshot_scheduler.start()
+    # 後台分批完成快照的延遲加載，不阻塞啟動
+    threading.Thread(target=db.warm_up, name="warm-up", daemon=True).start()
+    return restored
+
+
 def populate_sample_data() -> None:
     """填充示例數據"""
     if not settings.populate_sample_data:
@@ -197,8 +244,9 @@ async def startup_event() -> None:
     if settings.debug:
         print_config()
 
-    # 填充示例數據
-    populate_sample_data()
+    # 從快照和預寫日誌恢復；都沒有數據時才填充示例數據
+    if not recover_data():
+        populate_sample_data()
 
     # 啟動自動測試（如果啟用）
     if settings.enable_auto_test:
@@ -222,3 +270,8 @@ async def shutdown_event() -> None:
     app_logger.info(
         f"📊 最終統計: {stats['items']['total']} 個商品, {stats['users']['total']} 個用戶"
     )
+    async_db.shutdown()
+    if isinstance(db, MemoryDatabase):
+        shutdown_storage(db, snapshot_scheduler)
+    else:
+        db.close()
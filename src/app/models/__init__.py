@@ -3,7 +3,25 @@
 包含所有 Pydantic 數據模型
 """
 
-from .item import Item, ItemCreate, ItemUpdate
-from .user import User, UserCreate, UserUpdate
+from .bulk import BulkDelete, BulkResponse, BulkResult, ImportResponse, ImportRowError
+from .changes import Change, ChangesResponse
+from .item import Item, ItemBulkUpdate, ItemCreate, ItemUpdate
+from .user import User, UserBulkUpdate, UserCreate, UserUpdate
 
-__all__ = ["Item", "ItemCreate", "ItemUpdate", "User", "UserCreate", "UserUpdate"]
+__all__ = [
+    "BulkDelete",
+    "BulkResponse",
+    "BulkResult",
+    "Change",
+    "ChangesResponse",
+    "ImportResponse",
+    "ImportRowError",
+    "Item",
+    "ItemBulkUpdate",
+    "ItemCreate",
+    "ItemUpdate",
+    "User",
+    "UserBulkUpdate",
+    "UserCreate",
+    "UserUpdate",
+]
@@ -0,0 +1,93 @@
+"""
+批量操作數據模型
+定義批量刪除請求、逐條結果和文件導入的響應模型
+"""
+
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from src.core import settings
+
+# 批量請求的最大條數：按列表長度在逐條校驗之前拒絕超出的請求
+BULK_MAX_SIZE = settings.bulk_max_size
+
+
+class BulkDelete(BaseModel):
+    """批量刪除請求"""
+
+    ids: List[int] = Field(
+        ...,
+        description="要刪除的 ID 列表",
+        min_length=1,
+        max_length=BULK_MAX_SIZE,
+    )
+
+
+class BulkResult(BaseModel):
+    """批量操作中單條的結果"""
+
+    index: int = Field(..., description="條目在請求中的位置")
+    id: Optional[int] = Field(None, description="記錄 ID（創建失敗時為空）")
+    status: int = Field(..., description="與單條接口一致的 HTTP 狀態碼")
+    detail: Optional[str] = Field(None, description="失敗原因")
+
+
+class BulkResponse(BaseModel):
+    """批量操作響應：部分條目失敗時其餘條目照常生效"""
+
+    total: int = Field(..., description="請求條數")
+    succeeded: int = Field(..., description="成功條數")
+    failed: int = Field(..., description="失敗條數")
+    results: List[BulkResult] = Field(..., description="與請求一一對應的結果")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "total": 2,
+                "succeeded": 1,
+                "failed": 1,
+                "results": [
+                    {"index": 0, "id": 4, "status": 200, "detail": None},
+                    {"index": 1, "id": 999, "status": 404, "detail": "商品未找到"},
+                ],
+            }
+        }
+
+
+class ImportRowError(BaseModel):
+    """導入文件中無效的一行"""
+
+    line: int = Field(..., description="記錄在文件中的起始行號（從 1 開始）")
+    detail: str = Field(..., description="失敗原因")
+
+
+class ImportResponse(BaseModel):
+    """文件導入結果：無效行被跳過，其餘行按批寫入"""
+
+    format: str = Field(..., description="文件格式（ndjson 或 csv）")
+    total: int = Field(..., description="數據行數（不含空行和 CSV 表頭）")
+    imported: int = Field(..., description="成功導入的商品數")
+    failed: int = Field(..., description="無效行數")
+    errors: List[ImportRowError] = Field(
+        ..., description="無效行的詳情（最多 IMPORT_MAX_ERRORS 條）"
+    )
+    first_id: Optional[int] = Field(None, description="導入的第一個商品 ID")
+    last_id: Optional[int] = Field(None, description="導入的最後一個商品 ID")
+    seconds: float = Field(..., description="導入耗時（秒）")
+    rows_per_second: float = Field(..., description="每秒處理的行數")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "format": "csv",
+                "total": 3,
+                "imported": 2,
+                "failed": 1,
+                "errors": [
+                    {"line": 3, "detail": "price: Input should be greater than 0"}
+                ],
+                "first_id": 4,
+                "last_id": 5,
+                "seconds": 0.01,
+                "rows_per_second": 300.0,
+            }
+        }
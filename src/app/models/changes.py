@@ -0,0 +1,64 @@
+"""
+變更訂閱數據模型
+定義變更條目和增量拉取響應的模型
+"""
+
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+
+class Change(BaseModel):
+    """一次寫入產生的變更"""
+
+    seq: int = Field(..., description="變更序號，連續遞增")
+    op: str = Field(
+        ...,
+        description="操作：put_item / put_user（創建或更新，帶完整記錄）、"
+        "delete_item / delete_user（帶 ID）、clear（清空所有數據）",
+    )
+    id: Optional[int] = Field(None, description="被刪除記錄的 ID")
+    record: Optional[Dict[str, Any]] = Field(None, description="寫入後的完整記錄")
+
+
+class ChangesResponse(BaseModel):
+    """增量拉取變更的響應"""
+
+    epoch: str = Field(
+        ...,
+        description="變更序號的紀元，服務重啟後改變；下次請求時與 next 一起帶回",
+    )
+    since: int = Field(..., description="請求的起點序號")
+    latest: int = Field(..., description="當前最新的變更序號")
+    reset: bool = Field(
+        ...,
+        description="起點已不在緩衝區內（落後太多）或紀元不同（服務已重啟），"
+        "需要全量重新同步後從 latest 繼續",
+    )
+    changes: List[Change] = Field(..., description="序號大於 since 的變更（升序）")
+    next: int = Field(..., description="下次請求使用的 since")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "epoch": "5f3a9c1e",
+                "since": 41,
+                "latest": 43,
+                "reset": False,
+                "changes": [
+                    {
+                        "seq": 42,
+                        "op": "put_item",
+                        "id": None,
+                        "record": {
+                            "id": 7,
+                            "name": "iPad Air",
+                            "description": None,
+                            "price": 18900.0,
+                            "is_available": True,
+                        },
+                    },
+                    {"seq": 43, "op": "delete_item", "id": 3, "record": None},
+                ],
+                "next": 43,
+            }
+        }
@@ -5,6 +5,7 @@
 
 from typing import Optional
 from pydantic import BaseModel, Field
+from .update import PartialUpdate
 
 
 class ItemBase(BaseModel):
@@ -22,9 +23,11 @@ class ItemCreate(ItemBase):
     pass
 
 
-class ItemUpdate(BaseModel):
+class ItemUpdate(PartialUpdate):
     """更新商品模型"""
 
+    required_fields = ("name", "price", "is_available")
+
     name: Optional[str] = Field(
         None, description="商品名稱", min_length=1, max_length=100
     )
@@ -33,6 +36,12 @@ class ItemUpdate(BaseModel):
     is_available: Optional[bool] = Field(None, description="是否可用")
 
 
+class ItemBulkUpdate(ItemUpdate):
+    """批量更新中的一條：商品 ID 加要更新的字段"""
+
+    id: int = Field(..., description="商品 ID")
+
+
 class Item(ItemBase):
     """商品完整模型（包含 ID）"""
 
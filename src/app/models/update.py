@@ -0,0 +1,26 @@
+"""
+部分更新數據模型
+定義部分更新模型的共用基類
+"""
+
+from typing import ClassVar, List, Tuple
+from pydantic import BaseModel
+
+
+class PartialUpdate(BaseModel):
+    """部分更新模型基類：未提供的字段保持不變
+
+    字段都是可選的，以便只提交要修改的部分；但完整模型中的必填字段
+    不能被顯式設為 null，否則合併後的記錄不再符合完整模型。
+    """
+
+    # 完整模型中不可為空的字段
+    required_fields: ClassVar[Tuple[str, ...]] = ()
+
+    def null_fields(self) -> List[str]:
+        """顯式設為 null 的必填字段"""
+        return [
+            field
+            for field in self.required_fields
+            if field in self.model_fields_set and getattr(self, field) is None
+        ]
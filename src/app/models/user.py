@@ -5,6 +5,7 @@
 
 from typing import Optional
 from pydantic import BaseModel, Field, EmailStr
+from .update import PartialUpdate
 
 
 class UserBase(BaseModel):
@@ -21,9 +22,11 @@ class UserCreate(UserBase):
     pass
 
 
-class UserUpdate(BaseModel):
+class UserUpdate(PartialUpdate):
     """更新用戶模型"""
 
+    required_fields = ("username", "email")
+
     username: Optional[str] = Field(
         None, description="用戶名", min_length=3, max_length=50
     )
@@ -31,6 +34,12 @@ class UserUpdate(BaseModel):
     full_name: Optional[str] = Field(None, description="全名", max_length=100)
 
 
+class UserBulkUpdate(UserUpdate):
+    """批量更新中的一條：用戶 ID 加要更新的字段"""
+
+    id: int = Field(..., description="用戶 ID")
+
+
 class User(UserBase):
     """用戶完整模型（包含 ID）"""
 
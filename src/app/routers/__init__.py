@@ -6,5 +6,6 @@
 from .items import router as items_router
 from .users import router as users_router
 from .stats import router as stats_router
+from .changes import router as changes_router
 
-__all__ = ["items_router", "users_router", "stats_router"]
+__all__ = ["items_router", "users_router", "stats_router", "changes_router"]
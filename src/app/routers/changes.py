@@ -0,0 +1,71 @@
+"""
+變更訂閱路由
+處理變更數據捕獲（CDC）相關的 API 端點
+"""
+
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+from ..models import ChangesResponse
+from ..services import ChangeService
+
+router = APIRouter(
+    prefix="/changes",
+    tags=["變更訂閱"],
+    responses={501: {"description": "存儲後端不支持變更訂閱"}},
+)
+
+
+@router.get("/", response_model=ChangesResponse, summary="增量拉取變更")
+async def get_changes(
+    since: Optional[int] = Query(None, description="上次處理到的變更序號", ge=0),
+    limit: Optional[int] = Query(None, description="最多返回的變更條數", ge=1),
+    wait: float = Query(0, description="沒有新變更時最多等待的秒數", ge=0, le=30),
+    epoch: Optional[str] = Query(None, description="since 所屬的紀元"),
+) -> Dict[str, Any]:
+    """
+    增量拉取商品和用戶的變更
+
+    - 每次寫入分配一個連續遞增的序號；**since** 為上次處理到的序號，
+      下次請求使用響應中的 `next`，並把響應中的 `epoch` 作為 **epoch** 帶回
+    - 序號只在同一紀元內有效，服務重啟後紀元改變，從頭編號
+    - 不帶 **since** 時只返回當前序號 `latest`，不返回變更
+    - **wait**: 長輪詢，沒有新變更時最多等待的秒數
+    - 服務只保留最近 `CHANGE_FEED_SIZE` 條變更。`reset` 為 true 時，說明
+      since 已不在緩衝區內（落後太多）或 epoch 與當前紀元不同（服務已重啟）。
+      此時先記下 `epoch` 和 `latest`，再用 `GET /items/`、`GET /users/`
+      全量同步，之後從 `latest` 繼續。變更都是整條記錄的寫入或刪除，
+      重複應用是安全的。
+    """
+    return await ChangeService.get_changes(since, limit, wait, epoch)
+
+
+@router.get(
+    "/stream",
+    summary="推送變更（SSE）",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def stream_changes(
+    since: Optional[int] = Query(None, description="上次處理到的變更序號", ge=0),
+    epoch: Optional[str] = Query(None, description="since 所屬的紀元"),
+    last_event_id: Optional[str] = Header(None),
+) -> StreamingResponse:
+    """
+    以 Server-Sent Events 持續推送變更
+
+    - 每條變更為一個 `change` 事件，事件 id 為 `紀元:序號`，data 為 JSON
+      格式的變更內容
+    - 斷線重連時瀏覽器自動帶回 `Last-Event-ID`，從斷點繼續；不帶
+      **since** 和 `Last-Event-ID` 時從當前開始推送
+    - 需要全量重新同步（落後太多或紀元不同）時發送 `reset` 事件
+      （data 中為 `epoch` 和 `latest`）後結束
+    - 空閒時定期發送心跳註釋行
+    """
+    if since is None and last_event_id is not None:
+        since, epoch = ChangeService.parse_event_id(last_event_id)
+    return StreamingResponse(
+        ChangeService.stream_changes(since, epoch),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
@@ -3,38 +3,166 @@
 處理商品相關的 API 端點
 """
 
-from typing import List, Optional
-from fastapi import APIRouter, Query
-from ..models import Item, ItemCreate, ItemUpdate
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import APIRouter, Body, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from ..models import (
+    BulkDelete,
+    BulkResponse,
+    ImportResponse,
+    Item,
+    ItemBulkUpdate,
+    ItemCreate,
+    ItemUpdate,
+)
+from ..database.records import ItemRecord
+from ..models.bulk import BULK_MAX_SIZE
 from ..services import ItemService
+from ..services.conditional import CONDITIONAL_RESPONSES, conditional_get
+from ..services.conditional import item_etag, items_etag
+from ..services.fast_json import ITEM_FIELDS, dump_records, json_response
+from ..services.fast_json import render_records
+from ..services.item_import import detect_format
+from ..services.pagination import NEXT_CURSOR_HEADER, parse_page
+from ..services.response_cache import cached_json
+from ..services.singleflight import coalesce
+from ..services.streaming import NDJSON_MEDIA_TYPE, NDJSON_RESPONSES, wants_ndjson
 
 router = APIRouter(
     prefix="/items", tags=["商品管理"], responses={404: {"description": "商品未找到"}}
 )
 
 
-@router.get("/", response_model=List[Item], summary="獲取所有商品")
-async def get_all_items():
+@router.get(
+    "/",
+    response_model=List[Item],
+    summary="獲取所有商品",
+    responses={**NDJSON_RESPONSES, **CONDITIONAL_RESPONSES},
+)
+async def get_all_items(
+    response: Response,
+    limit: Optional[int] = Query(None, description="每頁條數", ge=1),
+    after: Optional[str] = Query(
+        None, description="分頁游標（上一頁的 X-Next-Cursor）"
+    ),
+    stream: bool = Query(False, description="以 NDJSON 流式返回"),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+) -> Response:
     """
-    獲取所有商品列表
+    獲取所有商品列表（按 ID 升序）
+
+    - 不帶參數時返回所有商品
+    - **limit** / **after**: 鍵集分頁，還有下一頁時響應頭 `X-Next-Cursor`
+      給出下一頁的游標；翻頁期間的新增和刪除不會導致重複或遺漏
+    - **stream** 或 `Accept: application/x-ndjson`: 以 NDJSON 逐行流式返回，
+      服務端按塊讀取，內存佔用與商品總數無關；此時 **limit** 為總條數上限
+    - 非流式響應帶 `ETag`（任一商品變更後改變），`If-None-Match` 匹配時返回 304；
+      同時到達的相同請求只讀取和編碼一次
+    """
+    if wants_ndjson(accept, stream):
+        return StreamingResponse(
+            ItemService.stream_items(limit, after), media_type=NDJSON_MEDIA_TYPE
+        )
+    etag = await items_etag()
+    conditional_get(response, if_none_match, etag)
+
+    async def page() -> Tuple[bytes, Optional[str]]:
+        items, next_cursor = await ItemService.get_all_items(limit, after)
+        return render_records(items, ITEM_FIELDS), next_cursor
+
+    body, next_cursor = await coalesce(("items", *parse_page(limit, after)), etag, page)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return json_response(response, body)
+
+
+# 批量路由需在 /{item_id} 之前聲明，否則 "bulk" 會被當作商品 ID 解析
 
-    返回系統中所有商品的詳細信息
+
+@router.post("/bulk", response_model=BulkResponse, summary="批量創建商品")
+async def bulk_create_items(
+    items: List[ItemCreate] = Body(..., max_length=BULK_MAX_SIZE),
+) -> Dict[str, Any]:
+    """
+    批量創建商品
+
+    - 請求體為商品列表，整批校驗，任一條無效時返回 422 並指出位置
+    - 最多 BULK_MAX_SIZE 條，超出時在逐條校驗之前返回 422
+    - 整批在一次寫入中完成，結果按請求順序返回新商品 ID
     """
-    return ItemService.get_all_items()
+    return await ItemService.bulk_create_items(items)
 
 
-@router.get("/{item_id}", response_model=Item, summary="獲取特定商品")
-async def get_item(item_id: int):
+@router.patch("/bulk", response_model=BulkResponse, summary="批量更新商品")
+async def bulk_update_items(
+    items: List[ItemBulkUpdate] = Body(..., max_length=BULK_MAX_SIZE),
+) -> Dict[str, Any]:
+    """
+    批量更新商品
+
+    - 每條包含商品 **id** 和要更新的字段，最多 BULK_MAX_SIZE 條
+    - 不存在的商品在結果中記為 404，其餘條目照常更新
+    """
+    return await ItemService.bulk_update_items(items)
+
+
+@router.delete("/bulk", response_model=BulkResponse, summary="批量刪除商品")
+async def bulk_delete_items(request: BulkDelete) -> Dict[str, Any]:
+    """
+    批量刪除商品
+
+    - **ids**: 要刪除的商品 ID 列表
+    - 不存在的商品在結果中記為 404，其餘條目照常刪除
+    """
+    return await ItemService.bulk_delete_items(request.ids)
+
+
+@router.post("/import", response_model=ImportResponse, summary="從文件導入商品")
+async def import_items(
+    request: Request,
+    format: Optional[str] = Query(
+        None,
+        description="文件格式，默認根據 Content-Type 判斷",
+        pattern="^(ndjson|csv)$",
+    ),
+) -> Dict[str, Any]:
+    """
+    從 NDJSON 或 CSV 文件導入商品
+
+    - 請求體為文件原始內容（`Content-Type: application/x-ndjson` 或 `text/csv`，
+      也可用 **format** 指定），例如
+      `curl --data-binary @items.csv -H "Content-Type: text/csv" .../items/import`
+    - NDJSON 每行一個商品對象；CSV 第一行為列名（name, description, price,
+      is_available），空值表示使用默認值；缺少表頭或表頭缺少 name、price 時返回 400
+    - 邊接收邊解析，按批校驗並寫入，不會把整個文件讀入內存
+    - 無效行被跳過，響應中給出其行號和原因；已寫入的批次不會回滾
+    """
+    file_format = detect_format(format, request.headers.get("content-type"))
+    return await ItemService.import_items(request.stream(), file_format)
+
+
+@router.get(
+    "/{item_id}",
+    response_model=Item,
+    summary="獲取特定商品",
+    responses=CONDITIONAL_RESPONSES,
+)
+async def get_item(
+    item_id: int, response: Response, if_none_match: Optional[str] = Header(None)
+) -> ItemRecord:
     """
     根據 ID 獲取特定商品
 
     - **item_id**: 商品的唯一標識符
+    - 響應帶 `ETag`，`If-None-Match` 匹配時返回 304
     """
-    return ItemService.get_item_by_id(item_id)
+    conditional_get(response, if_none_match, await item_etag(item_id))
+    return await ItemService.get_item_by_id(item_id)
 
 
 @router.post("/", response_model=Item, summary="創建新商品", status_code=201)
-async def create_item(item: ItemCreate):
+async def create_item(item: ItemCreate) -> ItemRecord:
     """
     創建新商品
 
@@ -43,37 +171,50 @@ async def create_item(item: ItemCreate):
     - **price**: 商品價格（必填，必須大於 0）
     - **is_available**: 是否可用（默認為 true）
     """
-    return ItemService.create_item(item)
+    return await ItemService.create_item(item)
 
 
-@router.put("/{item_id}", response_model=Item, summary="更新商品")
-async def update_item(item_id: int, item: ItemUpdate):
+@router.put(
+    "/{item_id}",
+    response_model=Item,
+    summary="更新商品",
+    responses={412: {"description": "If-Match 與商品當前的 ETag 不匹配"}},
+)
+async def update_item(
+    item_id: int, item: ItemUpdate, if_match: Optional[str] = Header(None)
+) -> Optional[ItemRecord]:
     """
     更新商品信息
 
     - **item_id**: 要更新的商品 ID
     - 只需提供要更新的字段
+    - 帶 `If-Match`（商品的 ETag）時為條件更新：期間商品已被修改則返回 412
     """
-    return ItemService.update_item(item_id, item)
+    return await ItemService.update_item(item_id, item, if_match)
 
 
 @router.delete("/{item_id}", summary="刪除商品")
-async def delete_item(item_id: int):
+async def delete_item(item_id: int) -> Dict[str, str]:
     """
     刪除商品
 
     - **item_id**: 要刪除的商品 ID
     """
-    return ItemService.delete_item(item_id)
+    return await ItemService.delete_item(item_id)
 
 
-@router.get("/search/", summary="搜索商品")
+@router.get("/search/", summary="搜索商品", responses=NDJSON_RESPONSES)
 async def search_items(
+    response: Response,
     q: Optional[str] = Query(None, description="搜索關鍵字"),
     min_price: Optional[float] = Query(None, description="最低價格", ge=0),
     max_price: Optional[float] = Query(None, description="最高價格", ge=0),
     available_only: bool = Query(True, description="只顯示可用商品"),
-):
+    limit: Optional[int] = Query(None, description="每頁條數", ge=1),
+    after: Optional[str] = Query(None, description="分頁游標（上一頁的 next_cursor）"),
+    stream: bool = Query(False, description="以 NDJSON 流式返回匹配的商品"),
+    accept: Optional[str] = Header(None),
+) -> Response:
     """
     搜索商品
 
@@ -82,7 +223,31 @@ async def search_items(
     - **min_price**: 最低價格篩選
     - **max_price**: 最高價格篩選
     - **available_only**: 是否只顯示可用商品
+    - **limit** / **after**: 鍵集分頁，響應中的 `next_cursor` 為下一頁游標
+    - **stream** 或 `Accept: application/x-ndjson`: 以 NDJSON 逐行流式返回
+      匹配的商品（不含查詢條件和計數）；此時 **limit** 為總條數上限
+
+    非流式結果按查詢條件緩存，任一商品變更後失效；同時到達的相同搜索只執行一次
     """
-    return ItemService.search_items(
-        query=q, min_price=min_price, max_price=max_price, available_only=available_only
-    )
+    if wants_ndjson(accept, stream):
+        return StreamingResponse(
+            ItemService.stream_search_items(
+                q, min_price, max_price, available_only, limit, after
+            ),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+    # 分頁參數按解析後的值做鍵：等價的游標和被截斷的 limit 共用緩存條目
+    key = ("search", q, min_price, max_price, available_only, *parse_page(limit, after))
+
+    async def search() -> Dict[str, Any]:
+        result = await ItemService.search_items(
+            query=q,
+            min_price=min_price,
+            max_price=max_price,
+            available_only=available_only,
+            limit=limit,
+            after=after,
+        )
+        return {**result, "results": dump_records(result["results"], ITEM_FIELDS)}
+
+    return await cached_json(response, key, await items_etag(), search)
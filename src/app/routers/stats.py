@@ -3,26 +3,41 @@
 處理統計相關的 API 端點
 """
 
-from fastapi import APIRouter, HTTPException
-from ..database.memory_db import db
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Header, HTTPException, Response
+from ..database import async_db
+from ..services.conditional import CONDITIONAL_RESPONSES, conditional_get, stats_etag
+from ..services.response_cache import cached_json, response_cache
+from ..services.singleflight import reads
 from src.core import app_logger
 
 router = APIRouter(prefix="/stats", tags=["統計信息"])
 
 
-@router.get("/", summary="獲取統計信息")
-async def get_stats():
+@router.get("/", summary="獲取統計信息", responses=CONDITIONAL_RESPONSES)
+async def get_stats(
+    response: Response, if_none_match: Optional[str] = Header(None)
+) -> Response:
     """
     獲取系統統計信息
 
     返回以下統計數據：
     - 商品統計：總數、可用數量、價格統計
     - 用戶統計：總數
+
+    響應帶 `ETag`，商品和用戶都未變更時 `If-None-Match` 匹配返回 304；
+    統計結果會被緩存，直到商品或用戶發生變更；同時到達的請求只計算一次
     """
     app_logger.debug("獲取統計信息")
+    etag = await stats_etag()
+    conditional_get(response, if_none_match, etag)
+    return await cached_json(response, ("stats",), etag, _load_stats)
+
 
+async def _load_stats() -> Dict[str, Any]:
+    """從存儲計算統計信息"""
     try:
-        stats = db.get_stats()
+        stats = await async_db.get_stats()
         app_logger.info("統計信息獲取成功")
         return stats
 
@@ -31,8 +46,23 @@ async def get_stats():
         raise HTTPException(status_code=500, detail="獲取統計信息時發生錯誤")
 
 
+@router.get("/cache", summary="響應緩存統計")
+async def get_cache_stats() -> Dict[str, Any]:
+    """
+    獲取搜索和統計響應緩存及讀請求合併的運行情況
+
+    - **hits** / **misses**: 命中和未命中次數
+    - **evictions**: 因超出條目數或字節數上限被淘汰的條目數
+    - **invalidations**: 因數據變更而失效的條目數
+    - **entries** / **bytes**: 當前緩存的條目數和響應體總字節數
+    - **coalescing**: 讀請求合併的實際執行次數（executions）、共享進行中
+      結果的請求數（shared）和進行中的調用數（in_flight）
+    """
+    return {**response_cache.stats(), "coalescing": reads.stats()}
+
+
 @router.get("/health", summary="健康檢查")
-async def health_check():
+async def health_check() -> Dict[str, Any]:
     """
     API 健康檢查
 
@@ -3,38 +3,151 @@
 處理用戶相關的 API 端點
 """
 
-from typing import List
-from fastapi import APIRouter
-from ..models import User, UserCreate, UserUpdate
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Body, Header, Query, Response
+from fastapi.responses import StreamingResponse
+from ..models import (
+    BulkDelete,
+    BulkResponse,
+    User,
+    UserBulkUpdate,
+    UserCreate,
+    UserUpdate,
+)
+from ..database.records import UserRecord
+from ..models.bulk import BULK_MAX_SIZE
 from ..services import UserService
+from ..services.conditional import CONDITIONAL_RESPONSES, conditional_get
+from ..services.conditional import user_etag, users_etag
+from ..services.fast_json import USER_FIELDS, json_response, render_records
+from ..services.pagination import NEXT_CURSOR_HEADER
+from ..services.streaming import NDJSON_MEDIA_TYPE, NDJSON_RESPONSES, wants_ndjson
 
 router = APIRouter(
     prefix="/users", tags=["用戶管理"], responses={404: {"description": "用戶未找到"}}
 )
 
 
-@router.get("/", response_model=List[User], summary="獲取所有用戶")
-async def get_all_users():
+@router.get(
+    "/",
+    response_model=List[User],
+    summary="獲取所有用戶",
+    responses={**NDJSON_RESPONSES, **CONDITIONAL_RESPONSES},
+)
+async def get_all_users(
+    response: Response,
+    limit: Optional[int] = Query(None, description="每頁條數", ge=1),
+    after: Optional[str] = Query(
+        None, description="分頁游標（上一頁的 X-Next-Cursor）"
+    ),
+    stream: bool = Query(False, description="以 NDJSON 流式返回"),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+) -> Response:
+    """
+    獲取所有用戶列表（按 ID 升序）
+
+    - 不帶參數時返回所有用戶
+    - **limit** / **after**: 鍵集分頁，還有下一頁時響應頭 `X-Next-Cursor`
+      給出下一頁的游標
+    - **stream** 或 `Accept: application/x-ndjson`: 以 NDJSON 逐行流式返回，
+      服務端按塊讀取，內存佔用與用戶總數無關；此時 **limit** 為總條數上限
+    - 非流式響應帶 `ETag`（任一用戶變更後改變），`If-None-Match` 匹配時返回 304
+    """
+    if wants_ndjson(accept, stream):
+        return StreamingResponse(
+            UserService.stream_users(limit, after), media_type=NDJSON_MEDIA_TYPE
+        )
+    conditional_get(response, if_none_match, await users_etag())
+    users, next_cursor = await UserService.get_all_users(limit, after)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return json_response(response, render_records(users, USER_FIELDS))
+
+
+@router.get(
+    "/by-username/{username}",
+    response_model=User,
+    summary="根據用戶名獲取用戶",
+    responses=CONDITIONAL_RESPONSES,
+)
+async def get_user_by_username(
+    username: str, response: Response, if_none_match: Optional[str] = Header(None)
+) -> UserRecord:
+    """
+    根據用戶名獲取特定用戶
+
+    - **username**: 用戶名（精確匹配，使用唯一索引查找）
+    - 響應帶 `ETag`（用戶名可能被改給其他用戶，因此隨任一用戶變更而改變），
+      `If-None-Match` 匹配時返回 304
+    """
+    conditional_get(response, if_none_match, await users_etag())
+    return await UserService.get_user_by_username(username)
+
+
+# 批量路由需在 /{user_id} 之前聲明，否則 "bulk" 會被當作用戶 ID 解析
+
+
+@router.post("/bulk", response_model=BulkResponse, summary="批量創建用戶")
+async def bulk_create_users(
+    users: List[UserCreate] = Body(..., max_length=BULK_MAX_SIZE),
+) -> Dict[str, Any]:
     """
-    獲取所有用戶列表
+    批量創建用戶
 
-    返回系統中所有用戶的詳細信息
+    - 請求體為用戶列表，整批校驗，任一條無效時返回 422 並指出位置
+    - 最多 BULK_MAX_SIZE 條，超出時在逐條校驗之前返回 422
+    - 用戶名或電子郵件與已有用戶或同批前面的條目重複時記為 400，
+      其餘條目照常創建
     """
-    return UserService.get_all_users()
+    return await UserService.bulk_create_users(users)
 
 
-@router.get("/{user_id}", response_model=User, summary="獲取特定用戶")
-async def get_user(user_id: int):
+@router.patch("/bulk", response_model=BulkResponse, summary="批量更新用戶")
+async def bulk_update_users(
+    users: List[UserBulkUpdate] = Body(..., max_length=BULK_MAX_SIZE),
+) -> Dict[str, Any]:
+    """
+    批量更新用戶
+
+    - 每條包含用戶 **id** 和要更新的字段，最多 BULK_MAX_SIZE 條
+    - 不存在的用戶記為 404，唯一鍵衝突記為 400，其餘條目照常更新
+    """
+    return await UserService.bulk_update_users(users)
+
+
+@router.delete("/bulk", response_model=BulkResponse, summary="批量刪除用戶")
+async def bulk_delete_users(request: BulkDelete) -> Dict[str, Any]:
+    """
+    批量刪除用戶
+
+    - **ids**: 要刪除的用戶 ID 列表
+    - 不存在的用戶在結果中記為 404，其餘條目照常刪除
+    """
+    return await UserService.bulk_delete_users(request.ids)
+
+
+@router.get(
+    "/{user_id}",
+    response_model=User,
+    summary="獲取特定用戶",
+    responses=CONDITIONAL_RESPONSES,
+)
+async def get_user(
+    user_id: int, response: Response, if_none_match: Optional[str] = Header(None)
+) -> UserRecord:
     """
     根據 ID 獲取特定用戶
 
     - **user_id**: 用戶的唯一標識符
+    - 響應帶 `ETag`，`If-None-Match` 匹配時返回 304
     """
-    return UserService.get_user_by_id(user_id)
+    conditional_get(response, if_none_match, await user_etag(user_id))
+    return await UserService.get_user_by_id(user_id)
 
 
 @router.post("/", response_model=User, summary="創建新用戶", status_code=201)
-async def create_user(user: UserCreate):
+async def create_user(user: UserCreate) -> UserRecord:
     """
     創建新用戶
 
@@ -42,26 +155,34 @@ async def create_user(user: UserCreate):
     - **email**: 電子郵件（必填）
     - **full_name**: 全名（可選，最多 100 字符）
     """
-    return UserService.create_user(user)
+    return await UserService.create_user(user)
 
 
-@router.put("/{user_id}", response_model=User, summary="更新用戶")
-async def update_user(user_id: int, user: UserUpdate):
+@router.put(
+    "/{user_id}",
+    response_model=User,
+    summary="更新用戶",
+    responses={412: {"description": "If-Match 與用戶當前的 ETag 不匹配"}},
+)
+async def update_user(
+    user_id: int, user: UserUpdate, if_match: Optional[str] = Header(None)
+) -> Optional[UserRecord]:
     """
     更新用戶信息
 
     - **user_id**: 要更新的用戶 ID
     - 只需提供要更新的字段
     - 用戶名必須保持唯一性
+    - 帶 `If-Match`（用戶的 ETag）時為條件更新：期間用戶已被修改則返回 412
     """
-    return UserService.update_user(user_id, user)
+    return await UserService.update_user(user_id, user, if_match)
 
 
 @router.delete("/{user_id}", summary="刪除用戶")
-async def delete_user(user_id: int):
+async def delete_user(user_id: int) -> Dict[str, str]:
     """
     刪除用戶
 
     - **user_id**: 要刪除的用戶 ID
     """
-    return UserService.delete_user(user_id)
+    return await UserService.delete_user(user_id)
@@ -3,7 +3,8 @@
 包含所有業務邏輯處理
 """
 
+from .change_service import ChangeService
 from .item_service import ItemService
 from .user_service import UserService
 
-__all__ = ["ItemService", "UserService"]
+__all__ = ["ChangeService", "ItemService", "UserService"]
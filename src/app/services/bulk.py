@@ -0,0 +1,101 @@
+"""
+批量操作輔助函數
+匯總批量操作的逐條結果；條數上限由請求模型在校驗時檢查
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from ..models.update import PartialUpdate
+
+
+async def validation_error_handler(request: Request, exc: Exception) -> JSONResponse:
+    """請求校驗失敗時返回 422（與 FastAPI 默認處理一致）
+
+    超出條數上限（too_long）的錯誤不回顯輸入：超限的批量請求體可能有
+    數十萬條，原樣回顯會讓拒絕請求比處理它還慢。
+    """
+    assert isinstance(exc, RequestValidationError)
+    errors = [
+        (
+            {key: value for key, value in error.items() if key != "input"}
+            if error["type"] == "too_long"
+            else error
+        )
+        for error in exc.errors()
+    ]
+    return JSONResponse(status_code=422, content={"detail": jsonable_encoder(errors)})
+
+
+def bulk_result(
+    index: int, record_id: Optional[int], status: int, detail: Optional[str] = None
+) -> Dict[str, Any]:
+    """單條結果"""
+    return {"index": index, "id": record_id, "status": status, "detail": detail}
+
+
+def found_results(
+    ids: Sequence[int], records: Sequence[Any], not_found: str
+) -> List[Dict[str, Any]]:
+    """按 ID 操作的逐條結果：記錄存在為 200，不存在（None）為 404"""
+    return [
+        (
+            bulk_result(index, record_id, 200)
+            if record is not None
+            else bulk_result(index, record_id, 404, not_found)
+        )
+        for index, (record_id, record) in enumerate(zip(ids, records))
+    ]
+
+
+def null_fields_detail(fields: List[str]) -> str:
+    """清空必填字段時的錯誤信息"""
+    return f"字段不能為空: {', '.join(fields)}"
+
+
+def split_updates(
+    entries: Sequence[PartialUpdate],
+) -> Tuple[List[int], List[Tuple[int, Dict[str, Any]]], List[Dict[str, Any]]]:
+    """拆分批量部分更新：清空必填字段的條目直接記為 422，不交給存儲
+
+    Returns:
+        可寫入條目在請求中的位置、對應的 (ID, 要修改的字段)，以及被拒絕
+        條目的結果
+    """
+    positions: List[int] = []
+    changes: List[Tuple[int, Dict[str, Any]]] = []
+    rejected: List[Dict[str, Any]] = []
+    for index, entry in enumerate(entries):
+        record_id: int = getattr(entry, "id")
+        null_fields = entry.null_fields()
+        if null_fields:
+            detail = null_fields_detail(null_fields)
+            rejected.append(bulk_result(index, record_id, 422, detail))
+        else:
+            positions.append(index)
+            changes.append((record_id, entry.dict(exclude_unset=True, exclude={"id"})))
+    return positions, changes, rejected
+
+
+def merge_results(
+    positions: List[int],
+    results: List[Dict[str, Any]],
+    rejected: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """把寫入條目的結果放回其在請求中的位置，與被拒絕的條目合併"""
+    for position, result in zip(positions, results):
+        result["index"] = position
+    return sorted(results + rejected, key=lambda result: result["index"])
+
+
+def bulk_response(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """匯總逐條結果（狀態碼 >= 400 的條目記為失敗）"""
+    failed = sum(1 for result in results if result["status"] >= 400)
+    return {
+        "total": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "results": results,
+    }
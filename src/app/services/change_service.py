@@ -0,0 +1,120 @@
+"""
+變更訂閱業務邏輯服務
+提供增量拉取（支持長輪詢）和 SSE 推送兩種跟隨方式
+"""
+
+import json
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from fastapi import HTTPException
+from ..database import ChangeFeed, change_feed
+from ..utils.helpers import validate_pagination
+from src.core import app_logger, settings
+
+
+class ChangeService:
+    """變更訂閱服務類"""
+
+    @staticmethod
+    def _feed() -> ChangeFeed:
+        """當前存儲的變更緩衝區
+
+        Raises:
+            HTTPException: 存儲後端不支持變更訂閱（501）
+        """
+        if not change_feed.attached:
+            raise HTTPException(
+                status_code=501,
+                detail=f"存儲後端 {settings.storage_backend} 不支持變更訂閱",
+            )
+        return change_feed
+
+    @staticmethod
+    async def get_changes(
+        since: Optional[int] = None,
+        limit: Optional[int] = None,
+        wait: float = 0,
+        epoch: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """獲取序號大於 since 的變更（不提供 since 時只返回當前序號）
+
+        沒有新變更且 wait > 0 時最多等待 wait 秒（長輪詢）。epoch 為 since
+        所屬的紀元，與當前紀元不同時要求全量重新同步。
+        """
+        feed = ChangeService._feed()
+        if since is None:
+            since = feed.latest
+        size = validate_pagination(
+            size=limit or settings.page_default_size, max_size=settings.page_max_size
+        )["size"]
+
+        changes, reset = feed.since(since, size, epoch)
+        if not changes and not reset and wait > 0:
+            await feed.wait(since, wait)
+            changes, reset = feed.since(since, size, epoch)
+
+        if reset:
+            app_logger.warning(
+                f"變更訂閱需要全量重新同步: since={since}, epoch={epoch}"
+            )
+            next_seq = feed.latest
+        else:
+            next_seq = changes[-1]["seq"] if changes else since
+        app_logger.debug(f"返回 {len(changes)} 條變更: since={since}")
+        return {
+            "epoch": feed.epoch,
+            "since": since,
+            "latest": feed.latest,
+            "reset": reset,
+            "changes": changes,
+            "next": next_seq,
+        }
+
+    @staticmethod
+    def stream_changes(
+        since: Optional[int] = None, epoch: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """以 SSE 持續推送序號大於 since 的變更（不提供 since 時從當前開始）"""
+        feed = ChangeService._feed()
+        start = feed.latest if since is None else since
+        app_logger.info(f"開始推送變更: since={start}, epoch={epoch}")
+        return _sse_changes(feed, start, epoch)
+
+    @staticmethod
+    def parse_event_id(event_id: str) -> Tuple[int, Optional[str]]:
+        """解析 SSE 事件 id（``紀元:序號``，只有序號時紀元為 None）
+
+        Raises:
+            HTTPException: 事件 id 格式無效（400）
+        """
+        epoch, _, seq = event_id.rpartition(":")
+        if not seq.isdigit():
+            raise HTTPException(status_code=400, detail="無效的 Last-Event-ID")
+        return int(seq), epoch or None
+
+
+async def _sse_changes(
+    feed: ChangeFeed, since: int, epoch: Optional[str] = None
+) -> AsyncIterator[str]:
+    """SSE 事件流：change 事件的 id 為 ``紀元:序號``，斷線重連時由瀏覽器
+    通過 Last-Event-ID 帶回；需要全量重新同步時發送 reset 事件後結束
+    """
+    while True:
+        changes, reset = feed.since(since, settings.page_max_size, epoch)
+        if reset:
+            app_logger.warning(
+                f"變更推送需要全量重新同步: since={since}, epoch={epoch}"
+            )
+            data = json.dumps({"epoch": feed.epoch, "latest": feed.latest})
+            yield f"event: reset\ndata: {data}\n\n"
+            return
+        epoch = feed.epoch
+        if changes:
+            yield "".join(
+                f"id: {epoch}:{change['seq']}\nevent: change\n"
+                f"data: {json.dumps(change, ensure_ascii=False)}\n\n"
+                for change in changes
+            )
+            since = changes[-1]["seq"]
+        elif not await feed.wait(since, settings.change_feed_heartbeat):
+            # 註釋行作為心跳，避免代理關閉空閒連接
+            yield ": keep-alive\n\n"
@@ -0,0 +1,103 @@
+"""
+條件請求
+由存儲的記錄版本和集合代數生成強 ETag，處理 If-None-Match（304）和
+If-Match（412）。後端不提供版本時不生成 ETag。
+"""
+
+from typing import Any, Dict, Optional, Union
+from fastapi import HTTPException, Response
+from ..database import async_db
+
+CONDITIONAL_RESPONSES: Dict[Union[int, str], Dict[str, Any]] = {
+    304: {"description": "If-None-Match 匹配，資源未修改"}
+}
+
+# ETag 先於數據讀取：數據只可能比 ETag 新，下次請求時 ETag 不同而重新返回，
+# 反之則可能把舊數據誤判為未修改
+
+
+def _etag(*parts: object) -> str:
+    """由版本紀元和版本號組成強 ETag"""
+    return '"' + "-".join(map(str, (async_db.version_epoch, *parts))) + '"'
+
+
+def _matches(header: str, etag: str, weak: bool) -> bool:
+    """條件請求頭（``*`` 或逗號分隔的 ETag 列表）是否包含 etag
+
+    weak 為 True 時使用弱比較（忽略 ``W/`` 前綴），用於 If-None-Match。
+    """
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if weak and tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+async def item_etag(item_id: int) -> Optional[str]:
+    """商品的 ETag，商品不存在時為 None"""
+    if not async_db.versioned:
+        return None
+    version = await async_db.item_version(item_id)
+    return None if version is None else _etag(version)
+
+
+async def user_etag(user_id: int) -> Optional[str]:
+    """用戶的 ETag，用戶不存在時為 None"""
+    if not async_db.versioned:
+        return None
+    version = await async_db.user_version(user_id)
+    return None if version is None else _etag(version)
+
+
+async def items_etag() -> Optional[str]:
+    """商品集合（列表）的 ETag"""
+    if not async_db.versioned:
+        return None
+    return _etag("i", await async_db.items_generation())
+
+
+async def users_etag() -> Optional[str]:
+    """用戶集合（列表和按用戶名查詢）的 ETag"""
+    if not async_db.versioned:
+        return None
+    return _etag("u", await async_db.users_generation())
+
+
+async def stats_etag() -> Optional[str]:
+    """統計信息的 ETag（取決於商品和用戶兩個集合）"""
+    if not async_db.versioned:
+        return None
+    items = await async_db.items_generation()
+    return _etag("s", items, await async_db.users_generation())
+
+
+def conditional_get(
+    response: Response, if_none_match: Optional[str], etag: Optional[str]
+) -> None:
+    """設置 ETag 響應頭；If-None-Match 匹配時拋出 304，跳過讀取和序列化"""
+    if etag is None:
+        return
+    if if_none_match is not None and _matches(if_none_match, etag, weak=True):
+        raise HTTPException(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+
+def if_match_version(if_match: str, version: Optional[int]) -> Optional[int]:
+    """檢查 If-Match，返回條件寫入使用的版本（``*`` 時為 None，不限版本）
+
+    Args:
+        if_match: If-Match 請求頭
+        version: 記錄的當前版本（需在讀取記錄之前獲取）
+
+    Raises:
+        HTTPException: 不匹配，或後端不提供版本（412）
+    """
+    if if_match.strip() == "*":
+        return None
+    if version is not None and _matches(if_match, _etag(version), weak=False):
+        return version
+    raise HTTPException(status_code=412, detail="資源已被修改，請重新獲取後再更新")
@@ -0,0 +1,81 @@
+"""
+快速 JSON 編碼
+存儲返回的記錄已在寫入時校驗過且不可變：列表和搜索響應按響應模型的字段
+順序直接把記錄編碼為 JSON 響應體，跳過按 response_model 逐條重新校驗和
+jsonable_encoder 的遞歸轉換，只保留對必填字段非空的廉價檢查
+"""
+
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Tuple, Type, get_args
+from fastapi import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+from ..database.records import InvalidRecordError, ItemRecord, Record, UserRecord
+from ..models import Item, User
+
+JSON_MEDIA_TYPE = "application/json"
+
+# 響應模型的字段順序，與經 response_model 序列化時的輸出一致
+ITEM_FIELDS: Tuple[str, ...] = tuple(Item.model_fields)
+USER_FIELDS: Tuple[str, ...] = tuple(User.model_fields)
+
+_RECORD_FIELDS = {ItemRecord: ITEM_FIELDS, UserRecord: USER_FIELDS}
+
+
+def _required_fields(model: Type[BaseModel]) -> Tuple[str, ...]:
+    """響應模型中不可為空的字段"""
+    return tuple(
+        name
+        for name, field in model.model_fields.items()
+        if type(None) not in get_args(field.annotation)
+    )
+
+
+# 響應字段 -> 其中不可為空的字段
+_REQUIRED_FIELDS = {
+    ITEM_FIELDS: _required_fields(Item),
+    USER_FIELDS: _required_fields(User),
+}
+
+
+def dump_records(
+    records: Iterable[Record], fields: Tuple[str, ...]
+) -> List[Dict[str, Any]]:
+    """按響應模型的字段順序把記錄轉換為字典
+
+    不重新校驗類型，但檢查必填字段非空：響應不會違反文檔中的模型定義。
+
+    Raises:
+        InvalidRecordError: 記錄的必填字段為空
+    """
+    rows = [{field: getattr(record, field) for field in fields} for record in records]
+    for field in _REQUIRED_FIELDS.get(fields, ()):
+        if None in map(itemgetter(field), rows):
+            raise InvalidRecordError(f"存儲中的記錄缺少必填字段: {field}")
+    return rows
+
+
+def _fallback(value: Any) -> Any:
+    """編碼器不認識的值：零散的記錄按其響應模型的字段順序轉換"""
+    if isinstance(value, Record):
+        fields = _RECORD_FIELDS.get(type(value), value.__slots__)
+        return {field: getattr(value, field) for field in fields}
+    raise TypeError(f"無法編碼為 JSON 的類型: {type(value).__name__}")
+
+
+def render_json(content: Any) -> bytes:
+    """把返回值編碼為 JSON 響應體（與 FastAPI 默認輸出一致的緊湊 UTF-8）
+
+    記錄列表應先經 ``dump_records`` 轉換：逐條走回退函數要慢數倍。
+    """
+    return to_json(content, fallback=_fallback)
+
+
+def render_records(records: Iterable[Record], fields: Tuple[str, ...]) -> bytes:
+    """把記錄列表編碼為 JSON 數組"""
+    return to_json(dump_records(records, fields))
+
+
+def json_response(response: Response, body: bytes) -> Response:
+    """用已編碼的響應體構造響應，並帶上路由注入的響應頭（如 ETag、游標）"""
+    return Response(body, media_type=JSON_MEDIA_TYPE, headers=dict(response.headers))
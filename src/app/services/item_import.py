@@ -0,0 +1,249 @@
+"""
+商品文件導入
+把上傳的 NDJSON / CSV 字節流增量切分為行並解析為待校驗的商品數據，
+內存中只保留當前接收的數據塊和未完成的一行
+"""
+
+import csv
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+from fastapi import HTTPException
+from pydantic import TypeAdapter, ValidationError
+from ..models import ItemCreate
+from src.core import settings
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+# 解析結果：(起始行號, 商品數據) 或 (起始行號, 錯誤原因)
+Row = Tuple[int, Union[Dict[str, Any], str]]
+
+_ITEMS = TypeAdapter(List[ItemCreate])
+
+# CSV 表頭必須包含的列（商品的必填字段）
+_REQUIRED_COLUMNS = [
+    name for name, field in ItemCreate.model_fields.items() if field.is_required()
+]
+
+_BOM = b"\xef\xbb\xbf"
+
+
+def detect_format(format: Optional[str], content_type: Optional[str]) -> str:
+    """確定上傳文件格式：優先使用 format 參數，其次根據 Content-Type
+
+    Raises:
+        HTTPException: 無法識別的格式（415）
+    """
+    if format is not None:
+        return format
+    content_type = (content_type or "").lower()
+    if "csv" in content_type:
+        return "csv"
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return "ndjson"
+    raise HTTPException(
+        status_code=415,
+        detail="無法識別的文件格式，請使用 format=ndjson|csv 或對應的 Content-Type",
+    )
+
+
+async def read_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[bytes]]:
+    """把字節流切分為完整的行，每收到一塊數據輸出其中已完整的行"""
+    pending = b""
+    first = True
+    async for chunk in chunks:
+        if first and chunk:
+            chunk = chunk[len(_BOM) :] if chunk.startswith(_BOM) else chunk
+            first = False
+        *lines, pending = (pending + chunk).split(b"\n")
+        if lines:
+            yield lines
+    if pending:
+        yield [pending]
+
+
+def _decode(line: bytes) -> Optional[str]:
+    """解碼一行，去掉行尾的 \\r；不是有效 UTF-8 時返回 None"""
+    try:
+        return line.decode().rstrip("\r")
+    except UnicodeDecodeError:
+        return None
+
+
+class NdjsonParser:
+    """NDJSON 解析器：每個非空行是一個 JSON 對象"""
+
+    def __init__(self) -> None:
+        self.line = 0
+
+    def feed(self, lines: List[bytes]) -> List[Row]:
+        """解析一組完整的行"""
+        rows: List[Row] = []
+        for raw in lines:
+            self.line += 1
+            text = _decode(raw)
+            if text is None:
+                rows.append((self.line, "不是有效的 UTF-8 文本"))
+            elif text.strip():
+                try:
+                    rows.append((self.line, json.loads(text)))
+                except json.JSONDecodeError as e:
+                    rows.append((self.line, f"JSON 格式錯誤: {e.msg}"))
+        return rows
+
+    def finish(self) -> List[Row]:
+        """輸入結束"""
+        return []
+
+
+class CsvParser:
+    """CSV 解析器：第一行為列名，空值表示使用字段默認值
+
+    引號內可以包含換行：引號數為奇數的行與後續行合併為一條記錄。
+    第一條記錄不是包含所有必填列的表頭時拒絕整個文件（此時尚未寫入任何數據）。
+    """
+
+    def __init__(self) -> None:
+        self.line = 0
+        self._header: Optional[List[str]] = None
+        self._record: List[str] = []
+        self._start = 0
+        self._quotes = 0
+
+    def feed(self, lines: List[bytes]) -> List[Row]:
+        """解析一組完整的行"""
+        records: List[Tuple[int, str]] = []
+        errors: List[Row] = []
+        for raw in lines:
+            self.line += 1
+            text = _decode(raw)
+            if text is None:
+                errors.append((self.line, "不是有效的 UTF-8 文本"))
+                continue
+            if not self._record:
+                self._start = self.line
+            self._record.append(text)
+            self._quotes += text.count('"')
+            if self._quotes % 2 == 0:
+                records.append((self._start, "\n".join(self._record)))
+                self._record, self._quotes = [], 0
+        return sorted(errors + self._parse(records), key=lambda row: row[0])
+
+    def finish(self) -> List[Row]:
+        """輸入結束：未閉合的引號記為錯誤"""
+        if not self._record:
+            return []
+        self._record = []
+        return [(self._start, "CSV 引號未閉合")]
+
+    def _parse(self, records: List[Tuple[int, str]]) -> List[Row]:
+        """把完整的記錄解析為以列名為鍵的字典"""
+        if self._header is None:
+            if not records:
+                return []
+            self._header = self._parse_header(*records.pop(0))
+        header = self._header
+        rows: List[Row] = []
+        reader = csv.reader(text for _, text in records)
+        for (line, _), values in zip(records, reader):
+            if not values:
+                continue
+            if len(values) != len(header):
+                rows.append((line, f"列數 {len(values)} 與表頭 {len(header)} 不一致"))
+                continue
+            rows.append((line, {k: v for k, v in zip(header, values) if v != ""}))
+        return rows
+
+    @staticmethod
+    def _parse_header(line: int, text: str) -> List[str]:
+        """解析表頭行
+
+        Raises:
+            HTTPException: 缺少表頭或表頭缺少必填列（400）
+        """
+        header = [name.strip() for name in next(csv.reader([text]), [])]
+        missing = [name for name in _REQUIRED_COLUMNS if name not in header]
+        if missing:
+            raise HTTPException(
+                status_code=400,
+                detail=f"第 {line} 行不是有效的 CSV 表頭，缺少列: {', '.join(missing)}",
+            )
+        return header
+
+
+def make_parser(format: str) -> Union[NdjsonParser, CsvParser]:
+    """創建對應格式的解析器"""
+    return CsvParser() if format == "csv" else NdjsonParser()
+
+
+def validate_rows(
+    rows: List[Dict[str, Any]],
+) -> Tuple[List[ItemCreate], Dict[int, str]]:
+    """整批校驗商品數據，返回有效的商品和 {下標: 錯誤原因}
+
+    全部有效時只需一次校驗；有無效條目時按錯誤位置剔除後再校驗一次。
+    """
+    try:
+        return _ITEMS.validate_python(rows), {}
+    except ValidationError as e:
+        errors: Dict[int, str] = {}
+        for error in e.errors():
+            index, *field = error["loc"]
+            detail = error["msg"]
+            if field:
+                detail = f"{'.'.join(map(str, field))}: {detail}"
+            errors.setdefault(int(index), detail)
+        valid = [row for index, row in enumerate(rows) if index not in errors]
+        return _ITEMS.validate_python(valid), errors
+
+
+class ImportProgress:
+    """導入過程的計數、無效行詳情和耗時"""
+
+    def __init__(self, format: str) -> None:
+        self.format = format
+        self.total = 0
+        self.imported = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.failed = 0
+        self.first_id: Optional[int] = None
+        self.last_id: Optional[int] = None
+        self._start = time.perf_counter()
+
+    @property
+    def seconds(self) -> float:
+        """已用時間（秒）"""
+        return time.perf_counter() - self._start
+
+    @property
+    def rows_per_second(self) -> float:
+        """每秒處理的行數"""
+        seconds = self.seconds
+        return self.total / seconds if seconds > 0 else 0.0
+
+    def fail(self, line: int, detail: str) -> None:
+        """記錄一個無效行（只保留前 IMPORT_MAX_ERRORS 條詳情）"""
+        self.failed += 1
+        if len(self.errors) < settings.import_max_errors:
+            self.errors.append({"line": line, "detail": detail})
+
+    def record(self, ids: List[int]) -> None:
+        """記錄一批成功寫入的商品 ID"""
+        if ids:
+            self.imported += len(ids)
+            self.first_id = self.first_id or ids[0]
+            self.last_id = ids[-1]
+
+    def summary(self) -> Dict[str, Any]:
+        """導入結果"""
+        return {
+            "format": self.format,
+            "total": self.total,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "first_id": self.first_id,
+            "last_id": self.last_id,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
@@ -3,29 +3,57 @@
 處理商品相關的業務邏輯
 """
 
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from fastapi import HTTPException
-from ..models import Item, ItemCreate, ItemUpdate
-from ..database.memory_db import db
-from src.core import app_logger
+from ..models import ItemBulkUpdate, ItemCreate, ItemUpdate
+from ..database import VersionConflictError, async_db
+from ..database.records import ItemRecord
+from .bulk import (
+    bulk_response,
+    bulk_result,
+    found_results,
+    merge_results,
+    null_fields_detail,
+    split_updates,
+)
+from .conditional import if_match_version
+from .item_import import ImportProgress, Row, make_parser, read_lines, validate_rows
+from .pagination import parse_cursor, parse_page, split_page
+from .streaming import ndjson_chunks, ndjson_records
+from src.core import app_logger, settings
 
 
 class ItemService:
     """商品服務類"""
 
     @staticmethod
-    def get_all_items() -> List[Dict[str, Any]]:
-        """獲取所有商品"""
-        app_logger.debug("獲取所有商品")
-        items = db.get_all_items()
+    async def get_all_items(
+        limit: Optional[int] = None, after: Optional[str] = None
+    ) -> Tuple[List[ItemRecord], Optional[str]]:
+        """獲取所有商品（提供 limit 或 after 時分頁），返回商品和下一頁游標"""
+        app_logger.debug(f"獲取所有商品: limit={limit}, after={after}")
+        after_id, size = parse_page(limit, after)
+        # 多取一條用於判斷是否還有下一頁
+        items = await async_db.get_all_items(after_id, size and size + 1)
+        items, next_cursor = split_page(items, size)
         app_logger.info(f"返回 {len(items)} 個商品")
-        return items
+        return items, next_cursor
 
     @staticmethod
-    def get_item_by_id(item_id: int) -> Dict[str, Any]:
+    def stream_items(
+        limit: Optional[int] = None, after: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """以 NDJSON 逐塊輸出商品（limit 為總條數上限，None 表示全部）"""
+        app_logger.debug(f"流式獲取商品: limit={limit}, after={after}")
+        return ndjson_records(
+            async_db.get_all_items, "商品", parse_cursor(after), limit
+        )
+
+    @staticmethod
+    async def get_item_by_id(item_id: int) -> ItemRecord:
         """根據 ID 獲取商品"""
         app_logger.debug(f"獲取商品: ID={item_id}")
-        item = db.get_item_by_id(item_id)
+        item = await async_db.get_item_by_id(item_id)
         if not item:
             app_logger.warning(f"商品未找到: ID={item_id}")
             raise HTTPException(status_code=404, detail="商品未找到")
@@ -34,13 +62,13 @@ class ItemService:
         return item
 
     @staticmethod
-    def create_item(item_data: ItemCreate) -> Dict[str, Any]:
+    async def create_item(item_data: ItemCreate) -> ItemRecord:
         """創建新商品"""
         app_logger.info(f"創建新商品: {item_data.name}")
 
         try:
             item_dict = item_data.dict()
-            created_item = db.create_item(item_dict)
+            created_item = await async_db.create_item(item_dict)
 
             app_logger.info(
                 f"商品創建成功: ID={created_item['id']}, 名稱={item_data.name}"
@@ -52,16 +80,33 @@ class ItemService:
             raise HTTPException(status_code=500, detail="創建商品時發生錯誤")
 
     @staticmethod
-    def update_item(item_id: int, item_data: ItemUpdate) -> Optional[Dict[str, Any]]:
-        """更新商品"""
+    async def update_item(
+        item_id: int, item_data: ItemUpdate, if_match: Optional[str] = None
+    ) -> Optional[ItemRecord]:
+        """更新商品（提供 If-Match 時為樂觀併發控制的條件更新）"""
         app_logger.info(f"更新商品: ID={item_id}")
 
+        # 必填字段不能被清空，在觸及存儲之前拒絕
+        null_fields = item_data.null_fields()
+        if null_fields:
+            app_logger.warning(f"更新商品時清空必填字段: ID={item_id}, {null_fields}")
+            raise HTTPException(status_code=422, detail=null_fields_detail(null_fields))
+
+        # 條件更新先讀版本再讀記錄：寫入時版本未變，合併的基礎就是該版本
+        current = None
+        if if_match is not None and async_db.versioned:
+            current = await async_db.item_version(item_id)
+
         # 檢查商品是否存在
-        existing_item = db.get_item_by_id(item_id)
+        existing_item = await async_db.get_item_by_id(item_id)
         if not existing_item:
             app_logger.warning(f"要更新的商品未找到: ID={item_id}")
             raise HTTPException(status_code=404, detail="商品未找到")
 
+        version = None
+        if if_match is not None:
+            version = if_match_version(if_match, current)
+
         try:
             # 只更新提供的字段
             update_data = item_data.dict(exclude_unset=True)
@@ -69,21 +114,27 @@ class ItemService:
             # 合併現有數據和更新數據
             updated_data = {**existing_item, **update_data}
 
-            updated_item = db.update_item(item_id, updated_data)
+            updated_item = await async_db.update_item(item_id, updated_data, version)
 
             app_logger.info(f"商品更新成功: ID={item_id}")
             return updated_item
 
+        except VersionConflictError as e:
+            app_logger.warning(f"商品已被修改: ID={item_id}, {e}")
+            raise HTTPException(
+                status_code=412, detail="資源已被修改，請重新獲取後再更新"
+            )
+
         except Exception as e:
             app_logger.error(f"更新商品失敗: {e}")
             raise HTTPException(status_code=500, detail="更新商品時發生錯誤")
 
     @staticmethod
-    def delete_item(item_id: int) -> Dict[str, str]:
+    async def delete_item(item_id: int) -> Dict[str, str]:
         """刪除商品"""
         app_logger.info(f"刪除商品: ID={item_id}")
 
-        deleted_item = db.delete_item(item_id)
+        deleted_item = await async_db.delete_item(item_id)
         if not deleted_item:
             app_logger.warning(f"要刪除的商品未找到: ID={item_id}")
             raise HTTPException(status_code=404, detail="商品未找到")
@@ -92,24 +143,149 @@ class ItemService:
         return {"message": f"商品 '{deleted_item['name']}' 已成功刪除"}
 
     @staticmethod
-    def search_items(
+    async def bulk_create_items(items_data: List[ItemCreate]) -> Dict[str, Any]:
+        """批量創建商品（請求體已整批校驗，整批一次寫入）"""
+        app_logger.info(f"批量創建商品: {len(items_data)} 條")
+
+        try:
+            items = await async_db.create_items([item.dict() for item in items_data])
+        except Exception as e:
+            app_logger.error(f"批量創建商品失敗: {e}")
+            raise HTTPException(status_code=500, detail="批量創建商品時發生錯誤")
+
+        response = bulk_response(
+            [bulk_result(index, item.id, 201) for index, item in enumerate(items)]
+        )
+        app_logger.info(f"批量創建商品完成: 成功 {response['succeeded']} 條")
+        return response
+
+    @staticmethod
+    async def bulk_update_items(items_data: List[ItemBulkUpdate]) -> Dict[str, Any]:
+        """批量更新商品（只更新提供的字段）
+
+        不存在的商品記為 404，清空必填字段的條目記為 422，其餘照常更新。
+        """
+        app_logger.info(f"批量更新商品: {len(items_data)} 條")
+
+        positions, changes, rejected = split_updates(items_data)
+        try:
+            items = await async_db.update_items(changes) if changes else []
+        except Exception as e:
+            app_logger.error(f"批量更新商品失敗: {e}")
+            raise HTTPException(status_code=500, detail="批量更新商品時發生錯誤")
+
+        item_ids = [item_id for item_id, _ in changes]
+        results = found_results(item_ids, items, "商品未找到")
+        response = bulk_response(merge_results(positions, results, rejected))
+        app_logger.info(
+            f"批量更新商品完成: 成功 {response['succeeded']} 條, "
+            f"失敗 {response['failed']} 條"
+        )
+        return response
+
+    @staticmethod
+    async def bulk_delete_items(item_ids: List[int]) -> Dict[str, Any]:
+        """批量刪除商品（不存在的商品記為 404）"""
+        app_logger.info(f"批量刪除商品: {len(item_ids)} 條")
+
+        try:
+            items = await async_db.delete_items(item_ids)
+        except Exception as e:
+            app_logger.error(f"批量刪除商品失敗: {e}")
+            raise HTTPException(status_code=500, detail="批量刪除商品時發生錯誤")
+
+        response = bulk_response(found_results(item_ids, items, "商品未找到"))
+        app_logger.info(
+            f"批量刪除商品完成: 成功 {response['succeeded']} 條, "
+            f"失敗 {response['failed']} 條"
+        )
+        return response
+
+    @staticmethod
+    async def import_items(chunks: AsyncIterator[bytes], format: str) -> Dict[str, Any]:
+        """從 NDJSON / CSV 字節流增量導入商品
+
+        邊接收邊解析，每 IMPORT_BATCH_SIZE 行整批校驗並寫入一次，內存佔用只與
+        批次大小有關。無效行被跳過並在結果中列出；已寫入的批次不會因後續的
+        錯誤回滾。
+        """
+        app_logger.info(f"開始導入商品: 格式={format}")
+        progress = ImportProgress(format)
+        parser = make_parser(format)
+        size = settings.import_batch_size
+        pending: List[Row] = []
+
+        async for lines in read_lines(chunks):
+            pending.extend(parser.feed(lines))
+            while len(pending) >= size:
+                await ItemService._import_batch(pending[:size], progress)
+                pending = pending[size:]
+        pending.extend(parser.finish())
+        await ItemService._import_batch(pending, progress)
+
+        app_logger.info(
+            f"導入商品完成: {progress.total} 行, 成功 {progress.imported} 條, "
+            f"失敗 {progress.failed} 條, {progress.rows_per_second:,.0f} 行/秒"
+        )
+        return progress.summary()
+
+    @staticmethod
+    async def _import_batch(rows: List[Row], progress: ImportProgress) -> None:
+        """校驗並寫入一批解析後的行"""
+        if not rows:
+            return
+        progress.total += len(rows)
+        lines, data, failures = [], [], []
+        for line, row in rows:
+            if isinstance(row, str):
+                failures.append((line, row))
+            else:
+                lines.append(line)
+                data.append(row)
+
+        items, errors = validate_rows(data)
+        failures.extend((lines[index], detail) for index, detail in errors.items())
+        for line, detail in sorted(failures):
+            progress.fail(line, detail)
+
+        if not items:
+            return
+        try:
+            created = await async_db.create_items([item.dict() for item in items])
+        except Exception as e:
+            app_logger.error(f"導入商品失敗: 已導入 {progress.imported} 條, {e}")
+            raise HTTPException(status_code=500, detail="導入商品時發生錯誤")
+        progress.record([item.id for item in created])
+        app_logger.info(
+            f"導入進度: {progress.total} 行, 成功 {progress.imported} 條, "
+            f"失敗 {progress.failed} 條, {progress.rows_per_second:,.0f} 行/秒"
+        )
+
+    @staticmethod
+    async def search_items(
         query: Optional[str] = None,
         min_price: Optional[float] = None,
         max_price: Optional[float] = None,
         available_only: bool = True,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """搜索商品"""
+        """搜索商品（提供 limit 或 after 時分頁）"""
         app_logger.debug(
             f"搜索商品: query={query}, min_price={min_price}, max_price={max_price}"
         )
+        after_id, size = parse_page(limit, after)
 
         try:
-            filtered_items = db.search_items(
+            filtered_items = await async_db.search_items(
                 query=query,
                 min_price=min_price,
                 max_price=max_price,
                 available_only=available_only,
+                after=after_id,
+                limit=size and size + 1,
             )
+            filtered_items, next_cursor = split_page(filtered_items, size)
 
             result = {
                 "query": query,
@@ -120,6 +296,7 @@ class ItemService:
                 },
                 "results": filtered_items,
                 "count": len(filtered_items),
+                "next_cursor": next_cursor,
             }
 
             app_logger.info(f"搜索完成: 找到 {len(filtered_items)} 個商品")
@@ -128,3 +305,26 @@ class ItemService:
         except Exception as e:
             app_logger.error(f"搜索商品失敗: {e}")
             raise HTTPException(status_code=500, detail="搜索商品時發生錯誤")
+
+    @staticmethod
+    def stream_search_items(
+        query: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        available_only: bool = True,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+    ) -> AsyncIterator[bytes]:
+        """以 NDJSON 逐塊輸出搜索結果（只輸出匹配的商品，不含查詢條件和計數）"""
+        app_logger.debug(
+            f"流式搜索商品: query={query}, min_price={min_price}, max_price={max_price}"
+        )
+
+        # 整個搜索共用一個迭代器，而不是每塊重新分頁搜索
+        chunk_size = settings.stream_chunk_size
+        if limit is not None:
+            chunk_size = min(chunk_size, limit)
+        chunks = async_db.iter_search_items(
+            query, min_price, max_price, available_only, parse_cursor(after), chunk_size
+        )
+        return ndjson_chunks(chunks, "匹配商品", limit)
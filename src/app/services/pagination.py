@@ -0,0 +1,55 @@
+"""
+鍵集分頁輔助函數
+解析 limit / after 參數並生成下一頁游標
+"""
+
+from typing import List, Optional, Tuple, TypeVar
+from fastapi import HTTPException
+from ..database.records import Record
+from ..utils.helpers import decode_cursor, encode_cursor, validate_pagination
+from src.core import app_logger, settings
+
+T = TypeVar("T", bound=Record)
+
+# 列表接口通過響應頭返回下一頁游標，響應體保持為記錄列表
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def parse_page(limit: Optional[int], after: Optional[str]) -> Tuple[int, Optional[int]]:
+    """解析分頁參數，返回 (游標指向的 ID, 頁大小)
+
+    兩者都未提供時不分頁（頁大小為 None），返回完整結果；只提供游標時
+    使用默認頁大小，超過上限的 limit 被截斷。
+
+    Raises:
+        HTTPException: 游標無效（400）
+    """
+    if limit is None and after is None:
+        return 0, None
+    size = validate_pagination(
+        size=limit or settings.page_default_size, max_size=settings.page_max_size
+    )["size"]
+    return parse_cursor(after), size
+
+
+def parse_cursor(after: Optional[str]) -> int:
+    """解析分頁游標，未提供時為 0（從頭開始）
+
+    Raises:
+        HTTPException: 游標無效（400）
+    """
+    if after is None:
+        return 0
+    try:
+        return decode_cursor(after)
+    except ValueError as e:
+        app_logger.warning(str(e))
+        raise HTTPException(status_code=400, detail="無效的分頁游標")
+
+
+def split_page(records: List[T], limit: Optional[int]) -> Tuple[List[T], Optional[str]]:
+    """從多取一條的查詢結果中切出一頁，還有下一頁時同時返回其游標"""
+    if limit is None or len(records) <= limit:
+        return records, None
+    page = records[:limit]
+    return page, encode_cursor(page[-1]["id"])
@@ -0,0 +1,126 @@
+"""
+響應緩存
+按規範化的查詢參數緩存編碼後的 JSON 響應體，以集合代數（即集合的 ETag）
+判斷是否過期：任何寫入都會改變代數，使受影響的緩存條目精確失效
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from fastapi import Response
+from src.core import settings
+from .fast_json import json_response, render_json
+from .singleflight import coalesce
+
+
+class ResponseCache:
+    """條目數和字節數雙重限制的 LRU 緩存
+
+    每個鍵只保留一個條目，與生成它時的代數一起存放；讀取時代數不同即為
+    過期，由重新計算的結果原地替換，不會在緩存中留下舊版本。
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        """初始化緩存
+
+        Args:
+            max_entries: 最多緩存的條目數，0 表示不緩存
+            max_bytes: 緩存的響應體總字節數上限，超過上限的單個響應不緩存
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[str, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, generation: str) -> Optional[bytes]:
+        """查找與 generation 對應的響應體，未命中或已過期時返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == generation:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key)
+                self.invalidations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, generation: str, body: bytes) -> None:
+        """緩存響應體，按最近最少使用的順序淘汰超出限制的條目"""
+        if self.max_entries <= 0 or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (generation, body)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        """移除條目（需持有鎖）"""
+        _, body = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def clear(self) -> None:
+        """清空緩存和計數器"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self) -> Dict[str, int]:
+        """緩存統計：命中、未命中、淘汰和過期失效次數，以及當前佔用"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+
+response_cache = ResponseCache(
+    settings.response_cache_entries, settings.response_cache_bytes
+)
+
+
+async def cached_json(
+    response: Response,
+    key: Hashable,
+    generation: Optional[str],
+    compute: Callable[[], Awaitable[Any]],
+) -> Response:
+    """返回緩存的 JSON 響應，未命中時調用 compute 計算並緩存
+
+    同時未命中的相同請求合併為一次計算和編碼。
+
+    Args:
+        response: 路由注入的響應，其響應頭（如 ETag）複製到返回的響應上
+        key: 規範化的請求參數
+        generation: 結果所依賴集合的 ETag，需在 compute 讀取數據之前獲取；
+            後端不提供版本（None）時不緩存
+        compute: 計算響應內容（可直接編碼為 JSON 的值，見 ``render_json``）
+    """
+
+    async def render() -> bytes:
+        body = render_json(await compute())
+        if generation is not None:
+            response_cache.put(key, generation, body)
+        return body
+
+    body = None if generation is None else response_cache.get(key, generation)
+    if body is None:
+        body = await coalesce(key, generation, render)
+    return json_response(response, body)
@@ -0,0 +1,75 @@
+"""
+讀請求合併（singleflight）
+同一時刻到達的相同讀取只執行一次，其餘請求等待並共享其結果
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+from src.core import settings
+
+T = TypeVar("T")
+
+
+class Singleflight:
+    """併發相同調用的合併器
+
+    - 以鍵標識調用：鍵相同且前一次調用尚未完成時，後到者直接等待其結果，
+      不再重複執行；完成後鍵即釋放，之後的調用重新執行
+    - 計算在獨立的任務中執行：發起它的請求被取消（如客戶端斷開）不會
+      影響正在等待的其他請求
+    - 按事件循環分開登記，任務只在創建它的循環中被等待
+    """
+
+    def __init__(self) -> None:
+        """初始化"""
+        self._calls: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Task] = {}
+        self.executions = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, compute: Callable[[], Awaitable[T]]) -> T:
+        """執行 compute，或等待進行中的同鍵調用並返回其結果（包括異常）"""
+        call_key = (asyncio.get_running_loop(), key)
+        task = self._calls.get(call_key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._calls[call_key] = task
+            task.add_done_callback(lambda done: self._finish(call_key, done))
+            self.executions += 1
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, call_key: Tuple[Any, Hashable], task: asyncio.Task) -> None:
+        """釋放鍵；所有等待者都已取消時取走異常，避免未取回異常的警告"""
+        if self._calls.get(call_key) is task:
+            del self._calls[call_key]
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """合併統計：實際執行次數、共享結果的請求數和進行中的調用數"""
+        return {
+            "executions": self.executions,
+            "shared": self.shared,
+            "in_flight": len(self._calls),
+        }
+
+
+reads = Singleflight()
+
+
+async def coalesce(
+    key: Hashable, generation: Optional[str], compute: Callable[[], Awaitable[T]]
+) -> T:
+    """合併併發的相同讀取
+
+    Args:
+        key: 規範化的請求參數
+        generation: 結果所依賴集合的 ETag，需在讀取數據之前獲取。只合併
+            同一代數的調用，寫入之後到達的請求不會拿到寫入之前開始的結果；
+            後端不提供版本（None）時不合併
+        compute: 執行讀取
+    """
+    if generation is None or not settings.read_coalescing:
+        return await compute()
+    return await reads.do((key, generation), compute)
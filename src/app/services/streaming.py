@@ -0,0 +1,79 @@
+"""
+NDJSON 流式響應
+按鍵集分頁逐塊從存儲讀取記錄並編碼為 NDJSON，內存佔用只與分塊大小有關
+"""
+
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Union
+from src.core import app_logger, settings
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# OpenAPI 文檔中聲明的流式響應類型
+NDJSON_RESPONSES: Dict[Union[int, str], Dict[str, Any]] = {
+    200: {
+        "content": {NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}}},
+        "description": "請求 `?stream=true` 或 `Accept: application/x-ndjson` 時"
+        "以 NDJSON 逐行返回記錄",
+    }
+}
+
+# fetch(after, limit)：返回 ID 大於 after 的前 limit 條記錄
+Fetch = Callable[[int, int], Awaitable[List[Any]]]
+
+
+def wants_ndjson(accept: Optional[str], stream: bool) -> bool:
+    """請求是否要求 NDJSON 流式響應"""
+    return stream or (accept is not None and NDJSON_MEDIA_TYPE in accept)
+
+
+def ndjson_records(
+    fetch: Fetch, name: str, after: int = 0, limit: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """逐塊分頁讀取記錄並輸出 NDJSON（每行一條記錄）
+
+    每塊是一次獨立的分頁讀取，寫入可以在塊之間進行；與分頁相同，流中
+    不會出現重複記錄，也不會遺漏整個過程中一直存在的記錄。
+
+    Args:
+        fetch: 分頁讀取函數
+        name: 記錄名稱（用於日誌）
+        after: 從該 ID 之後開始
+        limit: 最多輸出的條數，None 表示不限
+    """
+    return ndjson_chunks(pages(fetch, after, limit), name)
+
+
+async def pages(
+    fetch: Fetch, after: int = 0, limit: Optional[int] = None
+) -> AsyncIterator[List[Any]]:
+    """按鍵集分頁逐塊讀取記錄，每塊最多 stream_chunk_size 條"""
+    sent = 0
+    while limit is None or sent < limit:
+        size = settings.stream_chunk_size
+        if limit is not None:
+            size = min(size, limit - sent)
+        records = await fetch(after, size)
+        if records:
+            yield records
+            sent += len(records)
+            after = records[-1]["id"]
+        if len(records) < size:
+            break
+
+
+async def ndjson_chunks(
+    chunks: AsyncIterator[List[Any]], name: str, limit: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """把逐塊讀取的記錄編碼為 NDJSON 輸出（limit 為總條數上限）"""
+    sent = 0
+    async for records in chunks:
+        if limit is not None:
+            records = records[: limit - sent]
+        if records:
+            lines = [json.dumps(r.to_dict(), ensure_ascii=False) for r in records]
+            yield ("\n".join(lines) + "\n").encode()
+            sent += len(records)
+        if limit is not None and sent >= limit:
+            break
+    app_logger.info(f"流式返回 {sent} 個{name}")
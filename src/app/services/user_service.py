@@ -3,29 +3,60 @@
 處理用戶相關的業務邏輯
 """
 
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from fastapi import HTTPException
-from ..models import User, UserCreate, UserUpdate
-from ..database.memory_db import db
+from ..models import UserBulkUpdate, UserCreate, UserUpdate
+from ..database import async_db, DuplicateKeyError, VersionConflictError
+from ..database.records import UserRecord
+from .bulk import (
+    bulk_response,
+    bulk_result,
+    found_results,
+    merge_results,
+    null_fields_detail,
+    split_updates,
+)
+from .conditional import if_match_version
+from .pagination import parse_cursor, parse_page, split_page
+from .streaming import ndjson_records
 from src.core import app_logger
 
 
+# 唯一鍵衝突時返回的錯誤信息
+DUPLICATE_DETAILS = {"username": "用戶名已存在", "email": "電子郵件已存在"}
+
+
 class UserService:
     """用戶服務類"""
 
     @staticmethod
-    def get_all_users() -> List[Dict[str, Any]]:
-        """獲取所有用戶"""
-        app_logger.debug("獲取所有用戶")
-        users = db.get_all_users()
+    async def get_all_users(
+        limit: Optional[int] = None, after: Optional[str] = None
+    ) -> Tuple[List[UserRecord], Optional[str]]:
+        """獲取所有用戶（提供 limit 或 after 時分頁），返回用戶和下一頁游標"""
+        app_logger.debug(f"獲取所有用戶: limit={limit}, after={after}")
+        after_id, size = parse_page(limit, after)
+        # 多取一條用於判斷是否還有下一頁
+        users = await async_db.get_all_users(after_id, size and size + 1)
+        users, next_cursor = split_page(users, size)
         app_logger.info(f"返回 {len(users)} 個用戶")
-        return users
+        return users, next_cursor
 
     @staticmethod
-    def get_user_by_id(user_id: int) -> Dict[str, Any]:
+    def stream_users(
+        limit: Optional[int] = None, after: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """以 NDJSON 逐塊輸出用戶（limit 為總條數上限，None 表示全部）"""
+        app_logger.debug(f"流式獲取用戶: limit={limit}, after={after}")
+        return ndjson_records(
+            async_db.get_all_users, "用戶", parse_cursor(after), limit
+        )
+
+    @staticmethod
+    async def get_user_by_id(user_id: int) -> UserRecord:
         """根據 ID 獲取用戶"""
         app_logger.debug(f"獲取用戶: ID={user_id}")
-        user = db.get_user_by_id(user_id)
+        user = await async_db.get_user_by_id(user_id)
         if not user:
             app_logger.warning(f"用戶未找到: ID={user_id}")
             raise HTTPException(status_code=404, detail="用戶未找到")
@@ -34,46 +65,67 @@ class UserService:
         return user
 
     @staticmethod
-    def create_user(user_data: UserCreate) -> Dict[str, Any]:
+    async def get_user_by_username(username: str) -> UserRecord:
+        """根據用戶名獲取用戶"""
+        app_logger.debug(f"獲取用戶: 用戶名={username}")
+        user = await async_db.get_user_by_username(username)
+        if not user:
+            app_logger.warning(f"用戶未找到: 用戶名={username}")
+            raise HTTPException(status_code=404, detail="用戶未找到")
+
+        app_logger.info(f"找到用戶: ID={user['id']}")
+        return user
+
+    @staticmethod
+    async def create_user(user_data: UserCreate) -> UserRecord:
         """創建新用戶"""
         app_logger.info(f"創建新用戶: {user_data.username}")
 
-        # 檢查用戶名是否已存在
-        existing_user = db.get_user_by_username(user_data.username)
-        if existing_user:
-            app_logger.warning(f"用戶名已存在: {user_data.username}")
-            raise HTTPException(status_code=400, detail="用戶名已存在")
-
         try:
             user_dict = user_data.dict()
-            created_user = db.create_user(user_dict)
+            # 唯一性檢查與寫入在數據庫內原子完成
+            created_user = await async_db.create_user(user_dict)
 
             app_logger.info(
                 f"用戶創建成功: ID={created_user['id']}, 用戶名={user_data.username}"
             )
             return created_user
 
+        except DuplicateKeyError as e:
+            app_logger.warning(f"唯一鍵衝突: {e}")
+            raise HTTPException(status_code=400, detail=DUPLICATE_DETAILS[e.field])
+
         except Exception as e:
             app_logger.error(f"創建用戶失敗: {e}")
             raise HTTPException(status_code=500, detail="創建用戶時發生錯誤")
 
     @staticmethod
-    def update_user(user_id: int, user_data: UserUpdate) -> Optional[Dict[str, Any]]:
-        """更新用戶"""
+    async def update_user(
+        user_id: int, user_data: UserUpdate, if_match: Optional[str] = None
+    ) -> Optional[UserRecord]:
+        """更新用戶（提供 If-Match 時為樂觀併發控制的條件更新）"""
         app_logger.info(f"更新用戶: ID={user_id}")
 
+        # 必填字段不能被清空，在觸及存儲之前拒絕
+        null_fields = user_data.null_fields()
+        if null_fields:
+            app_logger.warning(f"更新用戶時清空必填字段: ID={user_id}, {null_fields}")
+            raise HTTPException(status_code=422, detail=null_fields_detail(null_fields))
+
+        # 條件更新先讀版本再讀記錄：寫入時版本未變，合併的基礎就是該版本
+        current = None
+        if if_match is not None and async_db.versioned:
+            current = await async_db.user_version(user_id)
+
         # 檢查用戶是否存在
-        existing_user = db.get_user_by_id(user_id)
+        existing_user = await async_db.get_user_by_id(user_id)
         if not existing_user:
             app_logger.warning(f"要更新的用戶未找到: ID={user_id}")
             raise HTTPException(status_code=404, detail="用戶未找到")
 
-        # 如果要更新用戶名，檢查是否與其他用戶衝突
-        if user_data.username and user_data.username != existing_user["username"]:
-            conflicting_user = db.get_user_by_username(user_data.username)
-            if conflicting_user and conflicting_user["id"] != user_id:
-                app_logger.warning(f"用戶名已被其他用戶使用: {user_data.username}")
-                raise HTTPException(status_code=400, detail="用戶名已存在")
+        version = None
+        if if_match is not None:
+            version = if_match_version(if_match, current)
 
         try:
             # 只更新提供的字段
@@ -82,24 +134,115 @@ class UserService:
             # 合併現有數據和更新數據
             updated_data = {**existing_user, **update_data}
 
-            updated_user = db.update_user(user_id, updated_data)
+            # 用戶名和電子郵件的唯一性在數據庫內原子檢查
+            updated_user = await async_db.update_user(user_id, updated_data, version)
+            if not updated_user:
+                app_logger.warning(f"要更新的用戶未找到: ID={user_id}")
+                raise HTTPException(status_code=404, detail="用戶未找到")
 
             app_logger.info(f"用戶更新成功: ID={user_id}")
             return updated_user
 
+        except DuplicateKeyError as e:
+            app_logger.warning(f"唯一鍵衝突: {e}")
+            raise HTTPException(status_code=400, detail=DUPLICATE_DETAILS[e.field])
+
+        except VersionConflictError as e:
+            app_logger.warning(f"用戶已被修改: ID={user_id}, {e}")
+            raise HTTPException(
+                status_code=412, detail="資源已被修改，請重新獲取後再更新"
+            )
+
+        except HTTPException:
+            raise
+
         except Exception as e:
             app_logger.error(f"更新用戶失敗: {e}")
             raise HTTPException(status_code=500, detail="更新用戶時發生錯誤")
 
     @staticmethod
-    def delete_user(user_id: int) -> Dict[str, str]:
+    async def delete_user(user_id: int) -> Dict[str, str]:
         """刪除用戶"""
         app_logger.info(f"刪除用戶: ID={user_id}")
 
-        deleted_user = db.delete_user(user_id)
+        deleted_user = await async_db.delete_user(user_id)
         if not deleted_user:
             app_logger.warning(f"要刪除的用戶未找到: ID={user_id}")
             raise HTTPException(status_code=404, detail="用戶未找到")
 
         app_logger.info(f"用戶刪除成功: {deleted_user['username']}")
         return {"message": f"用戶 '{deleted_user['username']}' 已成功刪除"}
+
+    @staticmethod
+    def _bulk_results(
+        user_ids: List[Optional[int]], results: List[Any], status: int
+    ) -> List[Dict[str, Any]]:
+        """批量寫入的逐條結果：唯一鍵衝突為 400，用戶不存在為 404"""
+        entries = []
+        for index, (user_id, result) in enumerate(zip(user_ids, results)):
+            if isinstance(result, DuplicateKeyError):
+                detail = DUPLICATE_DETAILS[result.field]
+                entries.append(bulk_result(index, user_id, 400, detail))
+            elif result is None:
+                entries.append(bulk_result(index, user_id, 404, "用戶未找到"))
+            else:
+                entries.append(bulk_result(index, result.id, status))
+        return entries
+
+    @staticmethod
+    async def bulk_create_users(users_data: List[UserCreate]) -> Dict[str, Any]:
+        """批量創建用戶（唯一鍵衝突的條目記為 400，其餘照常創建）"""
+        app_logger.info(f"批量創建用戶: {len(users_data)} 條")
+
+        try:
+            results = await async_db.create_users([user.dict() for user in users_data])
+        except Exception as e:
+            app_logger.error(f"批量創建用戶失敗: {e}")
+            raise HTTPException(status_code=500, detail="批量創建用戶時發生錯誤")
+
+        user_ids: List[Optional[int]] = [None] * len(results)
+        response = bulk_response(UserService._bulk_results(user_ids, results, 201))
+        app_logger.info(
+            f"批量創建用戶完成: 成功 {response['succeeded']} 條, "
+            f"失敗 {response['failed']} 條"
+        )
+        return response
+
+    @staticmethod
+    async def bulk_update_users(users_data: List[UserBulkUpdate]) -> Dict[str, Any]:
+        """批量更新用戶（只更新提供的字段，清空必填字段的條目記為 422）"""
+        app_logger.info(f"批量更新用戶: {len(users_data)} 條")
+
+        positions, changes, rejected = split_updates(users_data)
+        try:
+            results = await async_db.update_users(changes) if changes else []
+        except Exception as e:
+            app_logger.error(f"批量更新用戶失敗: {e}")
+            raise HTTPException(status_code=500, detail="批量更新用戶時發生錯誤")
+
+        user_ids: List[Optional[int]] = [user_id for user_id, _ in changes]
+        entries = UserService._bulk_results(user_ids, results, 200)
+        response = bulk_response(merge_results(positions, entries, rejected))
+        app_logger.info(
+            f"批量更新用戶完成: 成功 {response['succeeded']} 條, "
+            f"失敗 {response['failed']} 條"
+        )
+        return response
+
+    @staticmethod
+    async def bulk_delete_users(user_ids: List[int]) -> Dict[str, Any]:
+        """批量刪除用戶（不存在的用戶記為 404）"""
+        app_logger.info(f"批量刪除用戶: {len(user_ids)} 條")
+
+        try:
+            users = await async_db.delete_users(user_ids)
+        except Exception as e:
+            app_logger.error(f"批量刪除用戶失敗: {e}")
+            raise HTTPException(status_code=500, detail="批量刪除用戶時發生錯誤")
+
+        response = bulk_response(found_results(user_ids, users, "用戶未找到"))
+        app_logger.info(
+            f"批量刪除用戶完成: 成功 {response['succeeded']} 條, "
+            f"失敗 {response['failed']} 條"
+        )
+        return response
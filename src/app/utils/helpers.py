@@ -3,6 +3,8 @@
 提供通用的輔助功能
 """
 
+import base64
+import binascii
 import time
 from typing import Any, Dict
 from src.core import app_logger
@@ -49,6 +51,27 @@ def validate_pagination(
     return {"page": page, "size": size, "offset": offset}
 
 
+def encode_cursor(record_id: int) -> str:
+    """將最後一條記錄的 ID 編碼為不透明的分頁游標"""
+    return base64.urlsafe_b64encode(f"id:{record_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """解析分頁游標，返回其指向的記錄 ID
+
+    Raises:
+        ValueError: 游標格式無效
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(f"無效的分頁游標: {cursor}") from e
+    prefix, _, value = raw.partition(":")
+    if prefix != "id" or not value.isdigit():
+        raise ValueError(f"無效的分頁游標: {cursor}")
+    return int(value)
+
+
 def log_function_execution(func_name: str, duration: float, success: bool = True):
     """記錄函數執行日誌"""
     status = "成功" if success else "失敗"
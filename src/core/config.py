@@ -38,11 +38,44 @@ class Settings(BaseSettings):
 
     # 數據配置
     populate_sample_data: Annotated[bool, Field(alias="POPULATE_SAMPLE_DATA")] = True
+    storage_backend: Annotated[str, Field(alias="STORAGE_BACKEND")] = "memory"
+    sqlite_path: Annotated[str, Field(alias="SQLITE_PATH")] = "data/app.db"
+    sqlite_pool_size: Annotated[int, Field(alias="SQLITE_POOL_SIZE")] = 4
+    storage_workers: Annotated[int, Field(alias="STORAGE_WORKERS")] = 4
+    storage_write_workers: Annotated[int, Field(alias="STORAGE_WRITE_WORKERS")] = 16
+    shared_store_address: Annotated[str, Field(alias="SHARED_STORE_ADDRESS")] = (
+        "data/store.sock"
+    )
+    shared_store_authkey: Annotated[
+        Optional[str], Field(alias="SHARED_STORE_AUTHKEY")
+    ] = None
+    mvcc_enabled: Annotated[bool, Field(alias="MVCC_ENABLED")] = False
+    item_engine: Annotated[str, Field(alias="ITEM_ENGINE")] = "dict"
+    item_shards: Annotated[int, Field(alias="ITEM_SHARDS")] = 1
+    wal_path: Annotated[Optional[str], Field(alias="WAL_PATH")] = None
+    wal_group_commit_ms: Annotated[float, Field(alias="WAL_GROUP_COMMIT_MS")] = 2.0
+    snapshot_dir: Annotated[Optional[str], Field(alias="SNAPSHOT_DIR")] = None
+    snapshot_interval_seconds: Annotated[
+        int, Field(alias="SNAPSHOT_INTERVAL_SECONDS")
+    ] = 300
 
     # API 配置
     api_prefix: Annotated[str, Field(alias="API_PREFIX")] = ""
     docs_url: Annotated[str, Field(alias="DOCS_URL")] = "/docs"
     redoc_url: Annotated[str, Field(alias="REDOC_URL")] = "/redoc"
+    bulk_max_size: Annotated[int, Field(alias="BULK_MAX_SIZE")] = 100_000
+    page_default_size: Annotated[int, Field(alias="PAGE_DEFAULT_SIZE")] = 100
+    page_max_size: Annotated[int, Field(alias="PAGE_MAX_SIZE")] = 1000
+    stream_chunk_size: Annotated[int, Field(alias="STREAM_CHUNK_SIZE")] = 1000
+    import_batch_size: Annotated[int, Field(alias="IMPORT_BATCH_SIZE")] = 5000
+    import_max_errors: Annotated[int, Field(alias="IMPORT_MAX_ERRORS")] = 100
+    change_feed_size: Annotated[int, Field(alias="CHANGE_FEED_SIZE")] = 10000
+    change_feed_heartbeat: Annotated[float, Field(alias="CHANGE_FEED_HEARTBEAT")] = 15.0
+    response_cache_entries: Annotated[int, Field(alias="RESPONSE_CACHE_ENTRIES")] = 1024
+    response_cache_bytes: Annotated[int, Field(alias="RESPONSE_CACHE_BYTES")] = (
+        64 * 1024 * 1024
+    )
+    read_coalescing: Annotated[bool, Field(alias="READ_COALESCING")] = True
 
     # 開發模式配置
     debug: Annotated[bool, Field(alias="DEBUG")] = False
@@ -88,6 +121,62 @@ def validate_config() -> bool:
     if settings.log_level not in ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]:
         errors.append(f"日誌級別無效: {settings.log_level}")
 
+    if settings.storage_backend not in ["memory", "sqlite", "shared"]:
+        errors.append(f"存儲後端無效: {settings.storage_backend}")
+
+    if settings.sqlite_pool_size <= 0:
+        errors.append(f"SQLite 讀連接池大小必須為正數: {settings.sqlite_pool_size}")
+
+    if settings.storage_workers <= 0:
+        errors.append(f"存儲線程池大小必須為正數: {settings.storage_workers}")
+
+    if settings.storage_write_workers <= 0:
+        errors.append(f"寫入線程池大小必須為正數: {settings.storage_write_workers}")
+
+    if settings.item_engine not in ["dict", "columnar"]:
+        errors.append(f"商品存儲引擎無效: {settings.item_engine}")
+
+    if settings.item_shards < 1:
+        errors.append(f"商品分片數量必須為正數: {settings.item_shards}")
+    elif settings.item_shards > 1 and (settings.wal_path or settings.snapshot_dir):
+        errors.append("商品分片引擎暫不支持預寫日誌和快照")
+
+    if settings.wal_group_commit_ms < 0:
+        errors.append(f"組提交窗口不能為負數: {settings.wal_group_commit_ms}")
+
+    if settings.snapshot_interval_seconds <= 0:
+        errors.append(f"快照間隔必須為正數: {settings.snapshot_interval_seconds}")
+
+    if settings.bulk_max_size <= 0:
+        errors.append(f"批量操作條數上限必須為正數: {settings.bulk_max_size}")
+
+    if not (0 < settings.page_default_size <= settings.page_max_size):
+        errors.append(
+            f"默認分頁大小必須在 1-{settings.page_max_size} 範圍內: "
+            f"{settings.page_default_size}"
+        )
+
+    if settings.stream_chunk_size <= 0:
+        errors.append(f"流式響應分塊大小必須為正數: {settings.stream_chunk_size}")
+
+    if settings.import_batch_size <= 0:
+        errors.append(f"導入批次大小必須為正數: {settings.import_batch_size}")
+
+    if settings.import_max_errors < 0:
+        errors.append(f"導入錯誤詳情條數不能為負數: {settings.import_max_errors}")
+
+    if settings.change_feed_size <= 0:
+        errors.append(f"變更緩衝區大小必須為正數: {settings.change_feed_size}")
+
+    if settings.change_feed_heartbeat <= 0:
+        errors.append(f"變更推送心跳間隔必須為正數: {settings.change_feed_heartbeat}")
+
+    if settings.response_cache_entries < 0:
+        errors.append(f"響應緩存條目數不能為負數: {settings.response_cache_entries}")
+
+    if settings.response_cache_bytes < 0:
+        errors.append(f"響應緩存字節數不能為負數: {settings.response_cache_bytes}")
+
     if settings.test_delay < 0:
         errors.append(f"測試延遲時間不能為負數: {settings.test_delay}")
 
@@ -13,7 +13,7 @@ sys.path.insert(0, str(project_root))
 import pytest
 from fastapi.testclient import TestClient
 from src.app.main import app
-from src.app.database.memory_db import db
+from src.app.database import db
 
 
 @pytest.fixture
@@ -0,0 +1,142 @@
+"""
+異步存儲接口測試
+"""
+
+import asyncio
+import threading
+import time
+from typing import List
+import httpx
+import pytest
+from src.app.database import AsyncStorage, MemoryDatabase, db
+from src.app.database.locks import RWLock, WouldBlock, nonblocking
+from src.app.main import app
+
+
+def test_nonblocking_mode_raises_instead_of_waiting():
+    """測試非阻塞模式下鎖被佔用時拋出 WouldBlock，空閒時正常加鎖"""
+    lock = RWLock()
+    with nonblocking():
+        with lock.read():
+            pass
+    with lock.write():
+        with nonblocking(), pytest.raises(WouldBlock):
+            lock.acquire_read()
+    with lock.read():
+        with nonblocking(), pytest.raises(WouldBlock):
+            lock.acquire_write()
+    # 退出非阻塞模式後恢復正常等待
+    with lock.read():
+        pass
+
+
+def test_inline_read_falls_back_to_executor_when_locked():
+    """測試寫者持鎖時內聯讀取改由線程池完成，事件循環不被阻塞"""
+    database = MemoryDatabase()
+    database.populate_sample_data()
+    storage = AsyncStorage(database, max_workers=1)
+
+    async def run() -> int:
+        assert (await storage.get_item_by_id(1)).id == 1
+        ticks = 0
+        with database._items_lock.write():
+            read = asyncio.ensure_future(storage.get_item_by_id(1))
+            for _ in range(10):
+                await asyncio.sleep(0.005)
+                ticks += 1
+            assert not read.done()
+        assert (await read).id == 1
+        return ticks
+
+    try:
+        assert asyncio.run(run()) == 10
+    finally:
+        storage.shutdown()
+
+
+def test_durability_wait_does_not_occupy_read_workers(monkeypatch):
+    """測試寫入等待日誌持久化期間，讀取線程池仍可執行搜索"""
+    database = MemoryDatabase()
+    database.populate_sample_data()
+    storage = AsyncStorage(database, max_workers=1, write_workers=2)
+    # 模擬遲遲未完成的組提交
+    durable, waiting = threading.Event(), []
+
+    def wait_durable(lsn: int) -> None:
+        waiting.append(lsn)
+        durable.wait(5)
+
+    monkeypatch.setattr(database, "_wait_durable", wait_durable)
+
+    async def run() -> None:
+        writes = [
+            asyncio.ensure_future(
+                storage.create_item({"name": "待持久化", "price": 1.0})
+            )
+            for _ in range(2)
+        ]
+        while len(waiting) < 2:
+            await asyncio.sleep(0.001)
+        results = await asyncio.wait_for(storage.search_items(query="待持久化"), 1)
+        assert len(results) == 2
+        assert not any(write.done() for write in writes)
+        durable.set()
+        await asyncio.gather(*writes)
+
+    try:
+        asyncio.run(run())
+    finally:
+        durable.set()
+        storage.shutdown()
+
+
+async def _health_latency(client: httpx.AsyncClient, calls: int) -> List[float]:
+    """依次請求健康檢查，返回每次的延遲（秒）"""
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        response = await client.get("/stats/health")
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200
+    return latencies
+
+
+def test_health_latency_flat_during_large_search(clean_db, monkeypatch):
+    """測試大搜索執行期間健康檢查的延遲與空閒時持平"""
+    for i in range(20_000):
+        db.create_item({"name": f"商品 {i}", "price": float(i % 500 + 1)})
+
+    # 搜索在數據庫中完成掃描後停在閘門處，保證健康檢查與其重疊
+    started, release = threading.Event(), threading.Event()
+    search_items = db.search_items
+
+    def large_search(**kwargs):
+        results = search_items(**kwargs)
+        started.set()
+        release.wait(5)
+        return results
+
+    monkeypatch.setattr(db, "search_items", large_search)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            idle = await _health_latency(client, 20)
+            search = asyncio.ensure_future(
+                client.get("/items/search/", params={"available_only": "false"})
+            )
+            while not started.is_set():
+                await asyncio.sleep(0.001)
+            busy = await _health_latency(client, 20)
+            running = not search.done()
+            release.set()
+            response = await search
+        return idle, busy, running, response
+
+    idle, busy, running, response = asyncio.run(run())
+
+    assert running
+    assert response.json()["count"] == 20_000
+    assert max(busy) < max(idle) * 10 + 0.05
@@ -0,0 +1,265 @@
+"""
+批量接口測試
+"""
+
+import time
+import pytest
+from fastapi.testclient import TestClient
+from src.app.database import (
+    DuplicateKeyError,
+    MemoryDatabase,
+    ShardedDatabase,
+    SharedStoreClient,
+    SharedStoreServer,
+    SQLiteDatabase,
+)
+from src.app.models.bulk import BULK_MAX_SIZE
+
+
+def make_items(count: int) -> list:
+    """生成批量創建的商品數據"""
+    return [
+        {"name": f"商品 {i}", "price": float(i % 50 + 1), "is_available": i % 3 != 0}
+        for i in range(count)
+    ]
+
+
+def test_bulk_create_items(client: TestClient, clean_db):
+    """測試批量創建商品按請求順序返回新 ID"""
+    response = client.post("/items/bulk", json=make_items(5))
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["total"], data["succeeded"], data["failed"]) == (5, 5, 0)
+    assert [r["id"] for r in data["results"]] == [1, 2, 3, 4, 5]
+    assert {r["status"] for r in data["results"]} == {201}
+    assert client.get("/items/3").json()["name"] == "商品 2"
+
+
+def test_bulk_create_validates_whole_batch(client: TestClient, clean_db):
+    """測試任一條無效時整批被拒絕且不寫入，錯誤指出位置"""
+    items = make_items(3)
+    items[1]["price"] = -1
+    response = client.post("/items/bulk", json=items)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][:2] == ["body", 1]
+    assert client.get("/items/").json() == []
+
+
+def test_bulk_update_and_delete_report_partial_failures(client: TestClient, clean_db):
+    """測試不存在的 ID 記為 404，其餘條目照常生效"""
+    client.post("/items/bulk", json=make_items(3))
+
+    response = client.patch(
+        "/items/bulk",
+        json=[
+            {"id": 1, "price": 9.5},
+            {"id": 99, "name": "無"},
+            {"id": 3, "name": "新"},
+        ],
+    )
+    data = response.json()
+    assert (data["succeeded"], data["failed"]) == (2, 1)
+    assert [r["status"] for r in data["results"]] == [200, 404, 200]
+    assert data["results"][1] == {
+        "index": 1,
+        "id": 99,
+        "status": 404,
+        "detail": "商品未找到",
+    }
+    item = client.get("/items/1").json()
+    assert (item["name"], item["price"]) == ("商品 0", 9.5)
+    assert client.get("/items/3").json()["name"] == "新"
+
+    # 不會被 /{item_id} 路由當作 ID 解析
+    response = client.request("DELETE", "/items/bulk", json={"ids": [2, 2, 7]})
+    assert [r["status"] for r in response.json()["results"]] == [200, 404, 404]
+    assert [item["id"] for item in client.get("/items/").json()] == [1, 3]
+
+
+def test_bulk_update_rejects_null_required_fields(
+    client: TestClient, clean_db, sample_user
+):
+    """測試清空必填字段的條目逐條記為 422 且不寫入，其餘條目照常生效"""
+    client.post("/items/bulk", json=make_items(3))
+    client.post("/users/", json=sample_user)
+    items = client.get("/items/").json()
+
+    changes = [
+        {"id": 2, "name": None},
+        {"id": 99, "price": 1.0},
+        {"id": 3, "description": None, "price": 7.5},
+        {"id": 1, "price": None, "is_available": None},
+    ]
+    data = client.patch("/items/bulk", json=changes).json()
+    assert [r["index"] for r in data["results"]] == [0, 1, 2, 3]
+    assert [r["status"] for r in data["results"]] == [422, 404, 200, 422]
+    assert data["results"][0] == {
+        "index": 0,
+        "id": 2,
+        "status": 422,
+        "detail": "字段不能為空: name",
+    }
+    assert data["results"][3]["detail"] == "字段不能為空: price, is_available"
+    listed = client.get("/items/").json()
+    assert listed[:2] == items[:2]
+    assert (listed[2]["description"], listed[2]["price"]) == (None, 7.5)
+    assert client.get("/items/search/", params={"q": "商品 1"}).json()["count"] == 1
+
+    changes = [{"id": 1, "email": None}, {"id": 1, "full_name": None}]
+    data = client.patch("/users/bulk", json=changes).json()
+    assert [r["status"] for r in data["results"]] == [422, 200]
+    user = client.get("/users/1").json()
+    assert (user["email"], user["full_name"]) == (sample_user["email"], None)
+    response = client.put("/users/1", json={"username": None})
+    assert response.status_code == 422
+    assert client.get("/users/1").json()["username"] == sample_user["username"]
+
+
+def test_bulk_users_report_duplicates(client: TestClient, clean_db, sample_user):
+    """測試用戶唯一鍵衝突（包括同批內重複）逐條記為 400"""
+    client.post("/users/", json=sample_user)
+    users = [
+        {"username": "bob", "email": "bob@example.com"},
+        {"username": sample_user["username"], "email": "other@example.com"},
+        {"username": "bobby", "email": "BOB@example.com"},
+        {"username": "carol", "email": "carol@example.com"},
+    ]
+    data = client.post("/users/bulk", json=users).json()
+    assert [r["status"] for r in data["results"]] == [201, 400, 400, 201]
+    assert [r["detail"] for r in data["results"]][1:3] == [
+        "用戶名已存在",
+        "電子郵件已存在",
+    ]
+
+    changes = [{"id": 2, "username": "carol"}, {"id": 3, "full_name": "C"}]
+    data = client.patch("/users/bulk", json=changes).json()
+    assert [r["status"] for r in data["results"]] == [400, 200]
+    assert client.get("/users/3").json()["full_name"] == "C"
+
+    data = client.request("DELETE", "/users/bulk", json={"ids": [1, 9]}).json()
+    assert [r["status"] for r in data["results"]] == [200, 404]
+
+
+def test_bulk_rejects_oversized_batch(client: TestClient, clean_db):
+    """測試超過條數上限的批次按列表長度返回 422，不寫入任何條目"""
+    body = b"[" + b",".join([b'{"name":"x","price":1}'] * (BULK_MAX_SIZE + 1)) + b"]"
+    response = client.post(
+        "/items/bulk", content=body, headers={"Content-Type": "application/json"}
+    )
+    assert response.status_code == 422
+    # 超限的請求體不回顯
+    assert [error["type"] for error in response.json()["detail"]] == ["too_long"]
+    assert "input" not in response.json()["detail"][0]
+    assert client.get("/items/").json() == []
+
+    ids = list(range(1, BULK_MAX_SIZE + 2))
+    response = client.request("DELETE", "/users/bulk", json={"ids": ids})
+    assert response.status_code == 422
+
+
+@pytest.fixture(
+    params=["memory", "mvcc", "columnar", "sharded", "sqlite", "shared"],
+)
+def storage(request, tmp_path):
+    """各種存儲後端"""
+    if request.param == "sqlite":
+        database = SQLiteDatabase(tmp_path / "bulk.db")
+    elif request.param == "sharded":
+        database = ShardedDatabase(3)
+    elif request.param == "shared":
+        server = SharedStoreServer(MemoryDatabase(), str(tmp_path / "s.sock"), b"k")
+        server.start()
+        request.addfinalizer(server.close)
+        database = SharedStoreClient(server.address, server.authkey)
+    else:
+        options = {"mvcc": {"mvcc": True}, "columnar": {"item_engine": "columnar"}}
+        database = MemoryDatabase(**options.get(request.param, {}))
+    yield database
+    database.close()
+
+
+def test_bulk_matches_single_operations(storage):
+    """測試批量操作的結果與逐條操作一致"""
+    reference = MemoryDatabase()
+    data = make_items(20)
+    assert storage.create_items(data) == [reference.create_item(d) for d in data]
+
+    changes = [(2, {"price": 7.0}), (50, {"name": "無"}), (7, {"name": "新"})]
+    expected = [
+        (
+            reference.update_item(
+                item_id, {**reference.get_item_by_id(item_id), **fields}
+            )
+            if reference.get_item_by_id(item_id)
+            else None
+        )
+        for item_id, fields in changes
+    ]
+    assert storage.update_items(changes) == expected
+    assert storage.delete_items([4, 4, 11, 60]) == [
+        reference.delete_item(item_id) for item_id in [4, 4, 11, 60]
+    ]
+    assert storage.get_all_items() == reference.get_all_items()
+    assert storage.get_stats() == reference.get_stats()
+    assert storage.search_items(query="商品 1") == reference.search_items(
+        query="商品 1"
+    )
+
+    users = storage.create_users(
+        [
+            {"username": "bob", "email": "bob@example.com"},
+            {"username": "bob", "email": "b2@example.com"},
+            {"username": "eve", "email": "eve@example.com"},
+        ]
+    )
+    assert [getattr(user, "id", None) for user in users] == [1, None, 2]
+    assert isinstance(users[1], DuplicateKeyError) and users[1].field == "username"
+
+    results = storage.update_users(
+        [(2, {"email": "BOB@example.com"}), (2, {"full_name": "Eve"}), (9, {})]
+    )
+    assert isinstance(results[0], DuplicateKeyError) and results[0].field == "email"
+    assert results[1].full_name == "Eve" and results[2] is None
+    deleted = storage.delete_users([1, 1])
+    assert deleted[0].username == "bob" and deleted[1] is None
+    assert [user.username for user in storage.get_all_users()] == ["eve"]
+
+
+def test_bulk_takes_write_lock_once():
+    """測試整批寫入只獲取一次寫鎖"""
+    database = MemoryDatabase()
+    acquired = []
+
+    def count_writes(lock) -> None:
+        original = lock.acquire_write
+
+        def acquire_write() -> None:
+            acquired.append(lock)
+            original()
+
+        lock.acquire_write = acquire_write
+
+    count_writes(database._items_lock)
+    count_writes(database._users_lock)
+
+    items = database.create_items(make_items(1000))
+    database.update_items([(item.id, {"price": 2.0}) for item in items])
+    database.delete_items([item.id for item in items])
+    database.create_users(
+        [{"username": f"user{i}", "email": f"u{i}@example.com"} for i in range(100)]
+    )
+    assert len(acquired) == 4
+
+
+@pytest.mark.slow
+def test_bulk_load_100k_items(client: TestClient, clean_db):
+    """測試通過接口在數秒內載入 10 萬個商品"""
+    items = make_items(100_000)
+    start = time.perf_counter()
+    response = client.post("/items/bulk", json=items)
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200
+    assert response.json()["succeeded"] == 100_000
+    assert client.get("/stats/").json()["items"]["total"] == 100_000
+    print(f"\n批量載入 10 萬個商品: {elapsed:.2f} 秒")
+    assert elapsed < 30
@@ -0,0 +1,279 @@
+"""
+變更訂閱測試
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from src.app.database import (
+    ChangeFeed,
+    MemoryDatabase,
+    ShardedDatabase,
+    SharedStoreClient,
+    SharedStoreServer,
+    SQLiteDatabase,
+    change_feed,
+)
+from src.app.services.change_service import _sse_changes
+
+requires_feed = pytest.mark.skipif(
+    not change_feed.attached, reason="當前存儲後端不支持變更訂閱"
+)
+
+
+def apply(mirror: dict, change: dict) -> None:
+    """把一條變更應用到下游副本 {(集合, ID): 記錄}"""
+    op = change["op"]
+    if op == "clear":
+        mirror.clear()
+    elif op.startswith("put_"):
+        mirror[(op[4:], change["record"]["id"])] = change["record"]
+    else:
+        mirror.pop((op[7:], change["id"]), None)
+
+
+@requires_feed
+def test_follow_changes_reproduces_state(client: TestClient, clean_db, sample_user):
+    """測試按 next 逐頁跟隨變更即可重建與全量讀取一致的副本"""
+    start = client.get("/changes/").json()["latest"]
+    client.post(
+        "/items/bulk", json=[{"name": f"商品 {i}", "price": 1} for i in range(5)]
+    )
+    client.put("/items/2", json={"price": 9.5})
+    client.delete("/items/4")
+    client.post("/users/", json=sample_user)
+    client.put("/users/1", json={"full_name": "New Name"})
+
+    mirror, since, seqs = {}, start, []
+    while True:
+        data = client.get("/changes/", params={"since": since, "limit": 3}).json()
+        assert not data["reset"] and len(data["changes"]) <= 3
+        for change in data["changes"]:
+            seqs.append(change["seq"])
+            apply(mirror, change)
+        if data["next"] == since:
+            break
+        since = data["next"]
+
+    assert seqs == list(range(start + 1, start + 10))
+    assert data["latest"] == seqs[-1]
+    items = {("item", item["id"]): item for item in client.get("/items/").json()}
+    users = {("user", user["id"]): user for user in client.get("/users/").json()}
+    assert mirror == {**items, **users}
+
+
+def test_fallen_behind_consumer_must_resync():
+    """測試落後超過緩衝區或序號超前時要求全量重新同步"""
+    database = MemoryDatabase()
+    feed = ChangeFeed(5)
+    assert feed.attach(database)
+    database.create_items([{"name": f"商品 {i}", "price": 1} for i in range(8)])
+
+    assert feed.since(0, 100) == ([], True)
+    assert feed.since(2, 100) == ([], True)
+    changes, reset = feed.since(3, 100)
+    assert not reset and [change["seq"] for change in changes] == [4, 5, 6, 7, 8]
+    assert feed.since(8, 100) == ([], False)
+    assert feed.since(9, 100) == ([], True)
+
+
+def test_restarted_service_resets_by_epoch():
+    """測試序號來自重啟前的進程時，即使數值仍在範圍內也要求重新同步"""
+    before, after = MemoryDatabase(), MemoryDatabase()
+    old_feed, feed = ChangeFeed(100), ChangeFeed(100)
+    old_feed.attach(before)
+    feed.attach(after)
+    before.create_item({"name": "重啟前", "price": 1})
+    after.create_items([{"name": f"重啟後 {i}", "price": 1} for i in range(3)])
+    assert feed.epoch == after.version_epoch != old_feed.epoch
+
+    assert feed.since(1, 100, old_feed.epoch) == ([], True)
+    changes, reset = feed.since(1, 100, feed.epoch)
+    assert not reset and [change["seq"] for change in changes] == [2, 3]
+
+
+def test_resync_sees_published_change():
+    """測試變更發佈時已對讀者可見：按重置協議取最新序號再全量讀取不會漏掉變更"""
+    database = MemoryDatabase(mvcc=True)
+    feed = ChangeFeed(100)
+    feed.attach(database)
+    missed = []
+
+    def resync(seq: int, entry: dict) -> None:
+        # 在訂閱流收到變更的時刻重新同步（MVCC 讀取不加鎖，可在監聽器內進行）
+        assert feed.latest == seq
+        snapshot = {
+            **{("item", item.id): item.to_dict() for item in database.get_all_items()},
+            **{("user", user.id): user.to_dict() for user in database.get_all_users()},
+        }
+        mirror = dict(snapshot)
+        apply(mirror, {"seq": seq, **entry})
+        if mirror != snapshot:
+            missed.append(seq)
+
+    database.listen(resync)
+    database.create_items([{"name": f"商品 {i}", "price": 1} for i in range(3)])
+    database.update_item(2, {"name": "改名", "price": 2.0})
+    database.delete_item(3)
+    user = database.create_user({"username": "carol", "email": "c@example.com"})
+    database.update_user(user.id, {"username": "carol2", "email": "c@example.com"})
+    database.delete_user(user.id)
+    database.clear_all_data()
+
+    assert feed.latest == 9
+    assert missed == []
+
+
+@requires_feed
+def test_long_poll_wakes_on_write(client: TestClient, clean_db):
+    """測試長輪詢在有新寫入時立即返回，超時時返回空結果"""
+    latest = client.get("/changes/").json()["latest"]
+    timer = threading.Timer(
+        0.1, lambda: client.post("/items/", json={"name": "新", "price": 1})
+    )
+    timer.start()
+    start = time.perf_counter()
+    data = client.get("/changes/", params={"since": latest, "wait": 5}).json()
+    assert time.perf_counter() - start < 2
+    assert [change["op"] for change in data["changes"]] == ["put_item"]
+
+    data = client.get("/changes/", params={"since": data["next"], "wait": 0.05}).json()
+    assert data["changes"] == []
+
+
+def test_sse_pushes_changes_and_heartbeats(monkeypatch):
+    """測試 SSE 推送變更事件（id 為序號），空閒時發送心跳"""
+    monkeypatch.setattr("src.core.settings.change_feed_heartbeat", 0.05)
+    database = MemoryDatabase()
+    feed = ChangeFeed(100)
+    feed.attach(database)
+    database.create_item({"name": "舊", "price": 1})
+
+    async def consume() -> list:
+        events = []
+        stream = _sse_changes(feed, 1)
+        writer = threading.Timer(0.1, lambda: database.delete_item(1))
+        writer.start()
+        async for event in stream:
+            events.append(event)
+            if "delete_item" in event:
+                break
+        await stream.aclose()
+        return events
+
+    events = asyncio.run(consume())
+    assert events[0] == ": keep-alive\n\n"
+    assert events[-1].startswith(f"id: {feed.epoch}:2\nevent: change\ndata: {{")
+
+
+@requires_feed
+def test_sse_reset_event(client: TestClient):
+    """測試 SSE 起點超前或紀元不同時發送 reset 事件後結束"""
+    data = client.get("/changes/").json()
+    epoch, latest = data["epoch"], data["latest"]
+    reset = f'event: reset\ndata: {{"epoch": "{epoch}", "latest": {latest}}}\n\n'
+    for event_id in (str(latest + 100), f"{epoch}:{latest + 100}", f"old:{latest}"):
+        response = client.get("/changes/stream", headers={"Last-Event-ID": event_id})
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text == reset
+    response = client.get("/changes/stream", headers={"Last-Event-ID": "old:x"})
+    assert response.status_code == 400
+
+
+@requires_feed
+def test_stale_epoch_resets(client: TestClient, clean_db):
+    """測試帶回的紀元與當前不同時要求全量重新同步"""
+    epoch = client.get("/changes/").json()["epoch"]
+    client.post("/items/", json={"name": "新", "price": 1})
+    since = client.get("/changes/").json()["latest"] - 1
+
+    data = client.get("/changes/", params={"since": since, "epoch": epoch}).json()
+    assert not data["reset"] and len(data["changes"]) == 1
+    data = client.get("/changes/", params={"since": since, "epoch": "old"}).json()
+    assert data["reset"] and data["changes"] == []
+    assert (data["epoch"], data["next"]) == (epoch, data["latest"])
+
+
+def test_sharded_and_shared_sequences(tmp_path):
+    """測試分片引擎分配連續的全局序號，共享存儲各 worker 的序號一致"""
+    sharded = ShardedDatabase(3)
+    feed = ChangeFeed(100)
+    feed.attach(sharded)
+    sharded.create_items([{"name": f"商品 {i}", "price": 1} for i in range(7)])
+    sharded.create_user({"username": "bob", "email": "b@example.com"})
+    changes, _ = feed.since(0, 100)
+    assert [change["seq"] for change in changes] == list(range(1, 9))
+    assert {change["record"]["id"] for change in changes[:7]} == set(range(1, 8))
+    sharded.close()
+
+    server = SharedStoreServer(MemoryDatabase(), str(tmp_path / "c.sock"), b"k")
+    server.start()
+    workers = [SharedStoreClient(server.address, server.authkey) for _ in range(2)]
+    try:
+        workers[0].create_item({"name": "前", "price": 1})
+        feeds = [ChangeFeed(100) for _ in workers]
+        for feed, worker in zip(feeds, workers):
+            feed.attach(worker)
+        workers[1].create_item({"name": "後", "price": 2})
+        workers[0].delete_item(1)
+        for worker in workers:
+            worker.sync()
+        expected = [(2, "put_item"), (3, "delete_item")]
+        assert feeds[0].epoch == feeds[1].epoch == server.database.version_epoch
+        for feed in feeds:
+            changes, reset = feed.since(1, 100)
+            assert not reset
+            assert [(change["seq"], change["op"]) for change in changes] == expected
+    finally:
+        for worker in workers:
+            worker.close()
+        server.close()
+
+
+def test_sharded_relay_does_not_serialize_shards():
+    """測試分片的變更轉發互不等待，亂序到達的變更由緩衝區重排後發佈"""
+    sharded = ShardedDatabase(2)
+    entered, release = threading.Event(), threading.Event()
+
+    def slow(seq: int, entry: dict) -> None:
+        if seq == 1:
+            entered.set()
+            release.wait(5)
+
+    # 先於緩衝區註冊：序號 1 的變更在到達緩衝區之前被阻塞
+    sharded.listen(slow)
+    feed = ChangeFeed(100)
+    feed.attach(sharded)
+    writer = threading.Thread(
+        target=sharded.create_item, args=({"name": "慢", "price": 1},)
+    )
+    writer.start()
+    assert entered.wait(5)
+    try:
+        # 另一個分片的寫入不等待分片 1 的轉發
+        assert sharded.create_item({"name": "快", "price": 1}).id == 2
+        assert feed.latest == 0
+    finally:
+        release.set()
+        writer.join()
+
+    changes, _ = feed.since(0, 100)
+    assert [(change["seq"], change["record"]["id"]) for change in changes] == [
+        (1, 1),
+        (2, 2),
+    ]
+    assert sharded.change_seq == feed.latest == 2
+    sharded.close()
+
+
+def test_unsupported_backend(client: TestClient, tmp_path, monkeypatch):
+    """測試不支持變更訂閱的存儲後端返回 501"""
+    database = SQLiteDatabase(tmp_path / "changes.db")
+    assert not ChangeFeed(10).attach(database)
+    database.close()
+
+    monkeypatch.setattr(change_feed, "_attached", False)
+    assert client.get("/changes/").status_code == 501
+    assert client.get("/changes/stream").status_code == 501
@@ -0,0 +1,204 @@
+"""
+ETag 與條件請求測試
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from src.app.database import (
+    MemoryDatabase,
+    ShardedDatabase,
+    SharedStoreClient,
+    SharedStoreServer,
+    VersionConflictError,
+    async_db,
+)
+
+requires_versions = pytest.mark.skipif(
+    not async_db.versioned, reason="當前存儲後端不提供記錄版本"
+)
+
+
+@requires_versions
+def test_get_returns_etag_and_304(client: TestClient, clean_db, sample_item):
+    """測試讀取帶 ETag，匹配時返回無響應體的 304，寫入後 ETag 改變"""
+    client.post("/items/", json=sample_item)
+    client.post("/items/", json=sample_item)
+    for path in ["/items/1", "/items/", "/stats/"]:
+        response = client.get(path)
+        etag = response.headers["ETag"]
+        assert response.status_code == 200 and etag.startswith('"')
+
+        response = client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b"" and response.headers["ETag"] == etag
+        weak = client.get(path, headers={"If-None-Match": f'"x", W/{etag}'})
+        assert weak.status_code == 304
+
+    item_etag = client.get("/items/1").headers["ETag"]
+    list_etag = client.get("/items/").headers["ETag"]
+    client.put("/items/2", json={"price": 5.0})
+    # 其他商品的變更不影響單條 ETag，但會改變列表 ETag
+    response = client.get("/items/1", headers={"If-None-Match": item_etag})
+    assert response.status_code == 304
+    response = client.get("/items/", headers={"If-None-Match": list_etag})
+    assert response.status_code == 200 and response.headers["ETag"] != list_etag
+
+    client.put("/items/1", json={"price": 6.0})
+    response = client.get("/items/1", headers={"If-None-Match": item_etag})
+    assert response.status_code == 200 and response.json()["price"] == 6.0
+
+
+@requires_versions
+def test_user_etags(client: TestClient, clean_db, sample_user):
+    """測試用戶、用戶列表和按用戶名查詢的 ETag"""
+    client.post("/users/", json=sample_user)
+    for path in ["/users/1", "/users/", "/users/by-username/testuser"]:
+        etag = client.get(path).headers["ETag"]
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+        client.put("/users/1", json={"full_name": path})
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 200
+
+
+@requires_versions
+def test_not_modified_skips_read(
+    client: TestClient, clean_db, sample_item, monkeypatch
+):
+    """測試 304 不讀取集合數據"""
+    client.post("/items/", json=sample_item)
+    etags = {path: client.get(path).headers["ETag"] for path in ["/items/", "/stats/"]}
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("304 不應讀取數據")
+
+    monkeypatch.setattr(async_db, "get_all_items", fail)
+    monkeypatch.setattr(async_db, "get_stats", fail)
+    for path, etag in etags.items():
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+
+@requires_versions
+def test_if_match_update(client: TestClient, clean_db, sample_item, sample_user):
+    """測試 If-Match 條件更新：匹配時生效，過期的 ETag 返回 412"""
+    client.post("/items/", json=sample_item)
+    etag = client.get("/items/1").headers["ETag"]
+
+    response = client.put("/items/1", json={"price": 1.0}, headers={"If-Match": etag})
+    assert response.status_code == 200 and response.json()["price"] == 1.0
+    response = client.put("/items/1", json={"price": 2.0}, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert client.get("/items/1").json()["price"] == 1.0
+
+    response = client.put("/items/1", json={"price": 3.0}, headers={"If-Match": "*"})
+    assert response.status_code == 200
+    assert client.put("/items/9", json={}, headers={"If-Match": "*"}).status_code == 404
+
+    client.post("/users/", json=sample_user)
+    etag = client.get("/users/1").headers["ETag"]
+    headers = {"If-Match": f'"stale", {etag}'}
+    response = client.put("/users/1", json={"full_name": "A"}, headers=headers)
+    assert response.status_code == 200
+    response = client.put("/users/1", json={"full_name": "B"}, headers=headers)
+    assert response.status_code == 412
+    assert client.get("/users/1").json()["full_name"] == "A"
+
+
+@requires_versions
+def test_lost_update_between_read_and_write(
+    client: TestClient, clean_db, sample_item, monkeypatch
+):
+    """測試校驗 If-Match 之後、寫入之前記錄被修改時仍返回 412"""
+    client.post("/items/", json=sample_item)
+    etag = client.get("/items/1").headers["ETag"]
+    get_item = async_db.get_item_by_id
+
+    async def racing_get(item_id):
+        # 在服務讀取記錄時插入一次併發寫入
+        record = await get_item(item_id)
+        async_db.storage.update_item(item_id, {**record, "name": "搶先寫入"})
+        return record
+
+    monkeypatch.setattr(async_db, "get_item_by_id", racing_get)
+    response = client.put("/items/1", json={"price": 7.0}, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert client.get("/items/1").json()["name"] == "搶先寫入"
+
+
+@pytest.fixture(params=["memory", "mvcc", "columnar", "sharded", "shared"])
+def storage(request, tmp_path):
+    """提供版本的各種存儲後端"""
+    if request.param == "sharded":
+        database = ShardedDatabase(3)
+    elif request.param == "shared":
+        server = SharedStoreServer(MemoryDatabase(), str(tmp_path / "v.sock"), b"k")
+        server.start()
+        request.addfinalizer(server.close)
+        database = SharedStoreClient(server.address, server.authkey)
+    else:
+        options = {"mvcc": {"mvcc": True}, "columnar": {"item_engine": "columnar"}}
+        database = MemoryDatabase(**options.get(request.param, {}))
+    yield database
+    database.close()
+
+
+def test_versions_follow_writes(storage):
+    """測試各後端的記錄版本、集合代數和條件寫入語義一致"""
+    items = storage.create_items([{"name": f"商品 {i}", "price": 1} for i in range(4)])
+    user = storage.create_user({"username": "ann", "email": "a@example.com"})
+    assert storage.item_version(999) is None and storage.user_version(999) is None
+
+    versions = [storage.item_version(item.id) for item in items]
+    generation = storage.items_generation()
+    users_generation = storage.users_generation()
+    assert None not in versions
+
+    storage.update_item(items[0].id, {**items[0], "price": 2})
+    assert storage.item_version(items[0].id) != versions[0]
+    assert storage.item_version(items[1].id) == versions[1]
+    assert storage.items_generation() != generation
+    assert storage.users_generation() == users_generation
+
+    version = storage.item_version(items[1].id)
+    with pytest.raises(VersionConflictError):
+        storage.update_item(items[1].id, {**items[1], "price": 3}, versions[0] - 1)
+    assert storage.get_item_by_id(items[1].id).price == 1
+    updated = storage.update_item(items[1].id, {**items[1], "price": 3}, version)
+    assert updated.price == 3
+
+    generation = storage.items_generation()
+    storage.delete_item(items[2].id)
+    assert storage.item_version(items[2].id) is None
+    assert storage.items_generation() != generation
+
+    version = storage.user_version(user.id)
+    storage.update_user(user.id, {**user, "full_name": "Ann"}, version)
+    with pytest.raises(VersionConflictError):
+        storage.update_user(user.id, {**user, "full_name": "Bob"}, version)
+    assert storage.users_generation() != users_generation
+
+
+def test_shared_workers_agree_on_versions(tmp_path):
+    """測試共享存儲的各工作進程生成相同的版本（ETag 在進程間通用）"""
+    server = SharedStoreServer(MemoryDatabase(), str(tmp_path / "w.sock"), b"k")
+    server.start()
+    first = SharedStoreClient(server.address, server.authkey)
+    second = SharedStoreClient(server.address, server.authkey)
+    try:
+        item = first.create_item({"name": "商品", "price": 1})
+        second.sync()
+        assert first.version_epoch == second.version_epoch
+        assert first.item_version(item.id) == second.item_version(item.id)
+        assert first.items_generation() == second.items_generation()
+
+        version = second.item_version(item.id)
+        second.update_item(item.id, {**item, "price": 2}, version)
+        with pytest.raises(VersionConflictError):
+            first.update_item(item.id, {**item, "price": 3}, version)
+    finally:
+        first.close()
+        second.close()
+        server.close()
+
+
+def test_epoch_changes_on_restart():
+    """測試新實例使用新的版本紀元，重啟前的 ETag 不會被誤判為匹配"""
+    assert MemoryDatabase().version_epoch != MemoryDatabase().version_epoch
@@ -0,0 +1,85 @@
+"""
+快速 JSON 編碼測試
+"""
+
+from typing import List
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from src.app.database import InvalidRecordError
+from src.app.database.records import ItemRecord, UserRecord
+from src.app.models import Item, User
+from src.app.services.fast_json import (
+    ITEM_FIELDS,
+    USER_FIELDS,
+    render_json,
+    render_records,
+)
+
+ITEMS = [
+    ItemRecord(1, '商品 "引號"', None, 1.0, True),
+    ItemRecord(2, "Ｗｉｄｅ\n換行", "描述 \\ 反斜杠", 1234567.89, False),
+    ItemRecord(3, "emoji 🎉", "", 0.1 + 0.2, True),
+]
+USERS = [
+    UserRecord(1, "alice", "a@example.com", None),
+    UserRecord(2, "ボブさん", "b@b.io", "B"),
+]
+
+
+def response_model_body(model, records) -> bytes:
+    """FastAPI 經 response_model 校驗後的默認序列化結果"""
+    adapter = TypeAdapter(List[model])
+    validated = adapter.validate_python(records, from_attributes=True)
+    return JSONResponse(jsonable_encoder(adapter.dump_python(validated))).body
+
+
+def test_records_encoded_like_response_model():
+    """測試快速編碼與按響應模型校驗後序列化的輸出逐字節相同"""
+    assert render_records(ITEMS, ITEM_FIELDS) == response_model_body(Item, ITEMS)
+    assert render_records(USERS, USER_FIELDS) == response_model_body(User, USERS)
+    assert render_records([], ITEM_FIELDS) == b"[]"
+
+
+def test_render_json_fallback():
+    """測試零散的記錄按模型字段順序編碼，無法編碼的值報錯"""
+    body = render_json({"item": ITEMS[0], "count": 1, "next": None})
+    assert body == b'{"item":' + response_model_body(Item, ITEMS[:1])[1:-1] + (
+        b',"count":1,"next":null}'
+    )
+    with pytest.raises(Exception):
+        render_json({"value": object()})
+
+
+def test_records_missing_required_fields_are_not_served():
+    """測試必填字段為空的記錄不會被編碼為違反響應模型的 JSON"""
+    broken = ItemRecord(4, None, None, 1.0, True)  # type: ignore[arg-type]
+    with pytest.raises(InvalidRecordError):
+        render_records(ITEMS + [broken], ITEM_FIELDS)
+    with pytest.raises(InvalidRecordError):
+        render_records([UserRecord(3, "carol", None, None)], USER_FIELDS)
+    # 可為空的字段照常輸出 null
+    assert b'"description":null' in render_records(ITEMS[:1], ITEM_FIELDS)
+
+
+def test_list_and_search_responses(client: TestClient, clean_db, sample_user):
+    """測試列表和搜索響應的內容、字段順序和響應頭"""
+    items = [{"name": f"商品 {i}", "price": i + 0.5} for i in range(5)]
+    client.post("/items/bulk", json=items)
+    client.post("/users/", json=sample_user)
+
+    response = client.get("/items/", params={"limit": 2})
+    assert response.headers["content-type"] == "application/json"
+    assert "X-Next-Cursor" in response.headers
+    assert list(response.json()[0]) == list(ITEM_FIELDS)
+    assert [item["price"] for item in response.json()] == [0.5, 1.5]
+
+    results = client.get("/items/search/", params={"q": "商品"}).json()["results"]
+    assert len(results) == 5 and list(results[0]) == list(ITEM_FIELDS)
+    assert results == client.get("/items/").json()
+
+    users = client.get("/users/").json()
+    assert users == [{**sample_user, "id": 1}]
+    assert list(users[0]) == list(USER_FIELDS)
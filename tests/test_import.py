@@ -0,0 +1,132 @@
+"""
+商品文件導入測試
+"""
+
+import asyncio
+import json
+import time
+import pytest
+from fastapi.testclient import TestClient
+from src.app.database import async_db
+from src.app.services import ItemService
+
+CSV_HEADER = "name,description,price,is_available\n"
+CSV_ROWS = (
+    '"Widget, large","多行\n描述",9.5,true\n'
+    "Bad,,-1,\n"
+    "Short,1\n"
+    "\n"
+    "Plain,,3,0\n"
+)
+CSV_FILE = CSV_HEADER + CSV_ROWS
+
+
+def make_ndjson(count: int) -> bytes:
+    """生成 NDJSON 商品文件"""
+    lines = (
+        json.dumps(
+            {"name": f"商品 {i}", "price": i % 40 + 1, "is_available": i % 2 == 0}
+        )
+        for i in range(count)
+    )
+    return ("\n".join(lines) + "\n").encode()
+
+
+def test_import_csv(client: TestClient, clean_db):
+    """測試 CSV 導入：引號內的逗號和換行、空值默認、無效行的行號"""
+    response = client.post(
+        "/items/import", content=CSV_FILE.encode(), headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["format"], data["total"], data["imported"], data["failed"]) == (
+        "csv",
+        4,
+        2,
+        2,
+    )
+    assert [error["line"] for error in data["errors"]] == [4, 5]
+    assert data["errors"][0]["detail"].startswith("price")
+    assert (data["first_id"], data["last_id"]) == (1, 2)
+
+    items = client.get("/items/").json()
+    assert (items[0]["name"], items[0]["description"]) == (
+        "Widget, large",
+        "多行\n描述",
+    )
+    assert (items[1]["description"], items[1]["is_available"]) == (None, False)
+
+
+def test_import_ndjson(client: TestClient, clean_db):
+    """測試 NDJSON 導入：BOM、空行、JSON 錯誤和校驗錯誤"""
+    body = (
+        b'\xef\xbb\xbf{"name": "a", "price": 1}\n\n{"name": "b"}\nnot json\n'
+        b'{"name": "c", "price": 2, "is_available": false}'
+    )
+    response = client.post("/items/import", params={"format": "ndjson"}, content=body)
+    data = response.json()
+    assert (data["total"], data["imported"], data["failed"]) == (4, 2, 2)
+    assert [error["line"] for error in data["errors"]] == [3, 4]
+    assert [item["name"] for item in client.get("/items/").json()] == ["a", "c"]
+
+
+def test_import_rejects_unknown_format(client: TestClient, clean_db):
+    """測試無法識別格式時返回 415，format 參數非法時返回 422"""
+    headers = {"Content-Type": "text/plain"}
+    response = client.post("/items/import", content=b"{}", headers=headers)
+    assert response.status_code == 415
+    assert client.post("/items/import", params={"format": "xml"}).status_code == 422
+
+
+@pytest.mark.parametrize(
+    "body",
+    [CSV_ROWS, "\n" + CSV_FILE, "名稱,價格\n商品,1\n"],
+    ids=["no-header", "blank-first-line", "missing-columns"],
+)
+def test_import_csv_without_header(client: TestClient, clean_db, body):
+    """測試第一行不是包含必填列的表頭時返回 400，且不導入任何數據"""
+    response = client.post(
+        "/items/import", content=body.encode(), headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 400
+    assert "CSV 表頭" in response.json()["detail"]
+    assert client.get("/items/").json() == []
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 64])
+def test_import_parses_incrementally(clean_db, monkeypatch, chunk_size):
+    """測試任意切分的字節流與整體上傳結果一致，並按批寫入"""
+    monkeypatch.setattr("src.core.settings.import_batch_size", 4)
+    monkeypatch.setattr("src.core.settings.import_max_errors", 1)
+    batches = []
+    create_items = async_db.create_items
+
+    async def record_batches(items):
+        batches.append(len(items))
+        return await create_items(items)
+
+    monkeypatch.setattr(async_db, "create_items", record_batches)
+    body = (CSV_HEADER + CSV_ROWS * 3).encode()
+
+    async def chunks():
+        for start in range(0, len(body), chunk_size):
+            yield body[start : start + chunk_size]
+
+    data = asyncio.run(ItemService.import_items(chunks(), "csv"))
+    assert (data["total"], data["imported"], data["failed"]) == (12, 6, 6)
+    assert len(data["errors"]) == 1
+    assert sum(batches) == 6 and all(size <= 4 for size in batches)
+
+
+@pytest.mark.slow
+def test_import_100k_rows(client: TestClient, clean_db):
+    """測試在數秒內導入 10 萬行 NDJSON"""
+    body = make_ndjson(100_000)
+    start = time.perf_counter()
+    response = client.post(
+        "/items/import", content=body, headers={"Content-Type": "application/x-ndjson"}
+    )
+    elapsed = time.perf_counter() - start
+    assert response.json()["imported"] == 100_000
+    print(f"\n導入 10 萬行: {elapsed:.2f} 秒, {100_000 / elapsed:,.0f} 行/秒")
+    assert elapsed < 30
@@ -62,6 +62,24 @@ def test_update_item(client: TestClient, clean_db, sample_item):
     assert data["price"] == 200.0
 
 
+@pytest.mark.parametrize("field", ["name", "price", "is_available"])
+def test_update_item_rejects_null_required_field(
+    client: TestClient, clean_db, sample_item, field
+):
+    """測試更新時把必填字段設為 null 被拒絕，商品、統計和搜索不受影響"""
+    item = client.post("/items/", json=sample_item).json()
+    stats = client.get("/stats/").json()
+
+    response = client.put(f"/items/{item['id']}", json={field: None})
+    assert response.status_code == 422
+    assert field in response.json()["detail"]
+
+    assert client.get(f"/items/{item['id']}").json() == item
+    assert client.get("/stats/").json() == stats
+    search = client.get("/items/search/", params={"min_price": 1}).json()
+    assert search["results"] == [item]
+
+
 def test_delete_item(client: TestClient, clean_db, sample_item):
     """測試刪除商品"""
     # 先創建商品
@@ -140,3 +158,22 @@ def test_create_item_validation(client: TestClient, clean_db):
     # 測試空名稱
     response = client.post("/items/", json={"name": "", "price": 100})
     assert response.status_code == 422
+
+
+def test_search_items_chinese_and_fullwidth(client: TestClient, clean_db):
+    """測試中文關鍵字與全形字符搜索"""
+    items = [
+        {"name": "iPhone 15", "description": "蘋果手機", "price": 30000.0},
+        {"name": "iPad", "description": "蘋果平板", "price": 20000.0},
+    ]
+    for item in items:
+        client.post("/items/", json=item)
+
+    response = client.get("/items/search/?q=手機")
+    assert [item["name"] for item in response.json()["results"]] == ["iPhone 15"]
+
+    response = client.get("/items/search/?q=蘋果")
+    assert response.json()["count"] == 2
+
+    response = client.get("/items/search/?q=ＩＰＨＯＮＥ")
+    assert [item["name"] for item in response.json()["results"]] == ["iPhone 15"]
@@ -0,0 +1,482 @@
+"""
+內存數據庫測試
+直接測試 MemoryDatabase 的存儲與索引行為
+"""
+
+import random
+import threading
+import time
+import unicodedata
+
+import pytest
+from src.app.database import MemoryDatabase, DuplicateKeyError
+from src.app.database.columnar import Bitmap
+from src.app.database.indexes import SortedIndex
+from src.app.database.locks import RWLock
+from src.app.database.persistent import PersistentMap
+from src.app.database.records import ItemRecord
+from src.app.database.tokenizer import tokenize
+
+
+def make_item(index: int) -> dict:
+    """生成測試商品數據"""
+    return {
+        "name": f"商品 {index}",
+        "description": f"描述 {index}",
+        "price": float(index % 1000 + 1),
+        "is_available": index % 2 == 0,
+    }
+
+
+def fill_items(database: MemoryDatabase, count: int) -> None:
+    """批量填充商品"""
+    for i in range(count):
+        database.create_item(make_item(i))
+
+
+def test_get_all_items_keeps_insertion_order():
+    """測試刪除和更新後仍保持插入順序"""
+    database = MemoryDatabase()
+    fill_items(database, 5)
+
+    database.delete_item(2)
+    database.update_item(4, {**make_item(4), "name": "已更新"})
+    database.create_item(make_item(5))
+
+    items = database.get_all_items()
+    assert [item["id"] for item in items] == [1, 3, 4, 5, 6]
+    assert items[2]["name"] == "已更新"
+
+
+def test_point_operations_on_missing_ids():
+    """測試不存在 ID 的查詢、更新和刪除"""
+    database = MemoryDatabase()
+    fill_items(database, 3)
+
+    assert database.get_item_by_id(99) is None
+    assert database.update_item(99, make_item(99)) is None
+    assert database.delete_item(99) is None
+    assert database.get_user_by_id(1) is None
+    assert database.delete_user(1) is None
+
+
+def test_concurrent_signups_are_unique():
+    """測試並發註冊同一用戶名時只有一個成功"""
+    database = MemoryDatabase()
+    barrier = threading.Barrier(8)
+    results = []
+
+    def signup(index: int) -> None:
+        barrier.wait()
+        try:
+            database.create_user({"username": "alice", "email": f"a{index}@x.com"})
+            results.append(True)
+        except DuplicateKeyError:
+            results.append(False)
+
+    threads = [threading.Thread(target=signup, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 1
+    assert len(database.get_all_users()) == 1
+
+
+def test_user_indexes_follow_updates_and_deletes():
+    """測試用戶名和電子郵件索引隨更新和刪除同步"""
+    database = MemoryDatabase()
+    user = database.create_user({"username": "alice", "email": "Alice@X.com"})
+
+    with pytest.raises(DuplicateKeyError):
+        database.create_user({"username": "bob", "email": "alice@x.com"})
+
+    database.update_user(user["id"], {"username": "alice2", "email": "a2@x.com"})
+    assert database.get_user_by_username("alice") is None
+    assert database.get_user_by_username("alice2")["id"] == user["id"]
+
+    database.delete_user(user["id"])
+    assert database.get_user_by_username("alice2") is None
+    database.create_user({"username": "alice2", "email": "a2@x.com"})
+
+
+def test_price_range_search_matches_scan():
+    """測試價格索引範圍查詢與全表掃描結果一致（含更新和刪除）"""
+    rng = random.Random(42)
+    database = MemoryDatabase()
+    fill_items(database, 300)
+    for item_id in rng.sample(range(1, 301), 50):
+        new_price = float(rng.randint(1, 50))
+        database.update_item(item_id, {**make_item(item_id), "price": new_price})
+    for item_id in rng.sample(range(1, 301), 50):
+        database.delete_item(item_id)
+
+    for _ in range(50):
+        low, high = sorted(rng.uniform(0, 1100) for _ in range(2))
+        expected = [
+            item
+            for item in database.get_all_items()
+            if item["is_available"] and low <= item["price"] <= high
+        ]
+        assert database.search_items(min_price=low, max_price=high) == expected
+        assert database.search_items(min_price=low, available_only=False) == [
+            item for item in database.get_all_items() if item["price"] >= low
+        ]
+
+
+def fold(text: str) -> str:
+    """參考實現使用的歸一化：NFKC 後轉小寫"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def reference_search(items: list, query: str) -> list:
+    """關鍵字查詢的參考實現（逐條歸一化後做子串匹配）"""
+    return [
+        item
+        for item in items
+        if fold(query) in fold(item["name"])
+        or (item.get("description") and fold(query) in fold(item["description"]))
+    ]
+
+
+def test_text_search_matches_reference_property():
+    """性質測試：n-gram 索引查詢與逐條子串匹配結果完全一致"""
+    rng = random.Random(7)
+    alphabet = "aAbBcC xyZ-1１ＡｂＣ手機蘋果專業"
+
+    def random_text(max_length: int) -> str:
+        return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length)))
+
+    def random_item() -> dict:
+        return {
+            "name": random_text(12) or "a",
+            "description": rng.choice([None, "", random_text(20)]),
+            "price": 1.0,
+            "is_available": True,
+        }
+
+    database = MemoryDatabase()
+    for _ in range(200):
+        database.create_item(random_item())
+
+    for round_index in range(300):
+        # 隨機穿插更新和刪除，驗證索引的增量維護
+        if round_index % 10 == 0:
+            item_ids = [item["id"] for item in database.get_all_items()]
+            database.update_item(rng.choice(item_ids), random_item())
+            database.delete_item(rng.choice(item_ids))
+            database.create_item(random_item())
+
+        items = database.get_all_items()
+        source = rng.choice(items)
+        text = rng.choice([source["name"], source["description"] or ""])
+        start = rng.randint(0, len(text))
+        query = text[start : start + rng.randint(1, 6)]
+        query = "".join(c.swapcase() if rng.random() < 0.3 else c for c in query)
+        query = rng.choice([query, random_text(5)])
+        if not query:
+            continue
+
+        expected = reference_search(items, query)
+        assert database.search_items(query=query, available_only=False) == expected
+
+
+def test_tokenize_mixed_cjk_and_latin():
+    """測試中英混合文本的分詞和全形歸一化"""
+    assert tokenize("最新款 iPhone 15") == ["最新", "新款", "iphone", "15"]
+    assert tokenize("ｉＰｈｏｎｅ１５") == tokenize("iPhone15") == ["iphone15"]
+    assert tokenize("無線耳機, AirPods!") == ["無線", "線耳", "耳機", "airpods"]
+    assert tokenize("機") == ["機"]
+
+
+def test_cjk_search_uses_index():
+    """測試中文和全形查詢由索引命中，而非全表掃描"""
+    database = MemoryDatabase()
+    database.populate_sample_data()
+
+    class NoScanDict(dict):
+        def __iter__(self):
+            raise AssertionError("查詢退化為全表掃描")
+
+    index = database._text_index
+    index._texts = NoScanDict(index._texts)
+
+    assert [i["id"] for i in database.search_items(query="筆記本")] == [2]
+    assert [i["id"] for i in database.search_items(query="ｉＰｈｏｎｅ")] == [1]
+    assert database.search_items(query="耳", available_only=False)[0]["id"] == 3
+
+
+def test_stats_follow_writes():
+    """測試增量聚合值與全量計算一致（含價格和可用性更新、刪除）"""
+    rng = random.Random(3)
+    database = MemoryDatabase()
+    fill_items(database, 200)
+    for item_id in rng.sample(range(1, 201), 60):
+        database.update_item(
+            item_id,
+            {
+                **make_item(item_id),
+                "price": float(rng.randint(1, 5000)),
+                "is_available": rng.random() < 0.5,
+            },
+        )
+    for item_id in rng.sample(range(1, 201), 80):
+        database.delete_item(item_id)
+
+    items = database.get_all_items()
+    prices = [item["price"] for item in items]
+    stats = database.get_stats()["items"]
+    assert stats["total"] == len(items)
+    assert stats["available"] == sum(item["is_available"] for item in items)
+    assert stats["price_stats"] == {
+        "average": round(sum(prices) / len(prices), 2),
+        "maximum": max(prices),
+        "minimum": min(prices),
+    }
+
+    for item in items:
+        database.delete_item(item["id"])
+    assert database.get_stats()["items"]["price_stats"] == {
+        "average": 0,
+        "maximum": 0,
+        "minimum": 0,
+    }
+
+
+def test_failed_reindex_rolls_back(monkeypatch):
+    """測試更新在同步索引時失敗，記錄、索引和聚合值都保持原狀"""
+    index = SortedIndex()
+    index.add(1.0, 1)
+    with pytest.raises(TypeError):
+        index.add(1j, 2)
+    assert len(index) == 1 and index.range() == [1]
+
+    database = MemoryDatabase()
+    database.populate_sample_data()
+    item = database.get_item_by_id(1)
+    stats = database.get_stats()
+
+    def broken_add(*args):
+        raise RuntimeError("索引失敗")
+
+    monkeypatch.setattr(database._text_index, "add", broken_add)
+    with pytest.raises(RuntimeError):
+        database.update_item(1, {**item, "name": "改名", "price": 1.0})
+    monkeypatch.undo()
+
+    assert database.get_item_by_id(1) == item
+    assert database.get_stats() == stats
+    assert database.search_items(min_price=30000) == database.get_all_items()[:2]
+    assert database.search_items(max_price=1.0) == []
+    assert database.search_items(query="iphone") == [item]
+
+
+def test_rwlock_allows_concurrent_readers():
+    """測試讀鎖可被多個線程同時持有"""
+    lock = RWLock()
+    barrier = threading.Barrier(3, timeout=2)
+
+    def reader() -> None:
+        with lock.read():
+            barrier.wait()  # 三個讀者必須同時持有讀鎖才能通過
+
+    threads = [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not barrier.broken
+
+
+def test_rwlock_prefers_waiting_writer():
+    """測試有寫者等待時新讀者被阻塞，寫者不會飢餓"""
+    lock = RWLock()
+    order = []
+    lock.acquire_read()
+
+    def write() -> None:
+        with lock.write():
+            order.append("w")
+
+    def read() -> None:
+        with lock.read():
+            order.append("r")
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while not lock._waiting_writers:
+        time.sleep(0.001)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    time.sleep(0.05)
+    assert order == []  # 寫者等待期間，新讀者不能插隊
+
+    lock.release_read()
+    writer.join(timeout=2)
+    reader.join(timeout=2)
+    assert order == ["w", "r"]
+
+
+def test_persistent_map_keeps_old_versions():
+    """測試持久化映射修改後舊版本保持不變"""
+    rng = random.Random(5)
+    current = PersistentMap()
+    expected = {}
+    history = []
+    for step in range(3000):
+        key = rng.randint(0, 2000)
+        if rng.random() < 0.6:
+            current = current.set(key, step)
+            expected[key] = step
+        else:
+            current = current.delete(key)
+            expected.pop(key, None)
+        if step % 300 == 0:
+            history.append((current, dict(expected)))
+
+    for version, snapshot in history + [(current, expected)]:
+        assert len(version) == len(snapshot)
+        assert version.values() == [snapshot[key] for key in sorted(snapshot)]
+        assert all(version.get(key) == value for key, value in snapshot.items())
+
+
+def test_records_are_immutable_mappings():
+    """測試記錄不可修改，且可像字典一樣讀取和解包"""
+    database = MemoryDatabase()
+    created = database.create_item(make_item(10))
+    record = database.get_item_by_id(created.id)
+
+    assert record is created
+    assert isinstance(record, ItemRecord)
+    with pytest.raises(AttributeError):
+        record.price = 1.0
+    with pytest.raises(AttributeError):
+        record.extra = 1
+    assert record["price"] == record.price
+    assert dict(record) == {"id": created.id, **make_item(10)}
+    assert {**record, "price": 1.0}["price"] == 1.0
+
+    database.update_item(created.id, {**record, "price": 1.0})
+    assert record.price == make_item(10)["price"]
+    assert database.get_item_by_id(created.id).price == 1.0
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"mvcc": True},
+        {"item_engine": "columnar"},
+        {"mvcc": True, "item_engine": "columnar"},
+    ],
+)
+def test_storage_modes_match_default(options):
+    """測試 MVCC 模式和列式引擎的讀取結果與默認模式一致"""
+    rng = random.Random(11)
+    locked, mvcc = MemoryDatabase(), MemoryDatabase(**options)
+    for database in (locked, mvcc):
+        database.populate_sample_data()
+        fill_items(database, 3000)
+        for item_id in random.Random(1).sample(range(1, 3004), 300):
+            database.update_item(item_id, make_item(item_id * 7))
+        # 刪除過半以觸發列式存儲的墓碑壓縮
+        for item_id in random.Random(2).sample(range(1, 3004), 2000):
+            database.delete_item(item_id)
+        database.delete_user(1)
+
+    assert mvcc.get_all_items() == locked.get_all_items()
+    assert mvcc.get_all_users() == locked.get_all_users()
+    assert mvcc.get_stats() == locked.get_stats()
+    assert mvcc.get_item_by_id(2) == locked.get_item_by_id(2)
+    for _ in range(30):
+        kwargs = {
+            "query": rng.choice([None, "商品 1", "描述", "ｉＰｈｏｎｅ", "電腦"]),
+            "min_price": rng.choice([None, 100.0]),
+            "max_price": rng.choice([None, 700.0]),
+            "available_only": rng.random() < 0.5,
+        }
+        assert mvcc.search_items(**kwargs) == locked.search_items(**kwargs)
+
+
+def test_bitmap_matches_bool_array():
+    """測試位圖的單行讀寫、按範圍解包和按行取值與布爾數組一致"""
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(5)
+    expected = rng.random(1000) < 0.5
+    bitmap = Bitmap.from_bools(expected[:900], 1000)
+    for row in rng.integers(0, 1000, 300).tolist():
+        bitmap[row] = expected[row] = not expected[row]
+    expected[900:] = [bitmap[row] for row in range(900, 1000)]
+
+    assert [bitmap[row] for row in range(1000)] == expected.tolist()
+    for start, end in [(0, 1000), (3, 3), (5, 13), (8, 16), (997, 1000)]:
+        assert bitmap.unpack(start, end).tolist() == expected[start:end].tolist()
+    rows = np.array([0, 7, 8, 9, 511, 999])
+    assert bitmap.take(rows).tolist() == expected[rows].tolist()
+    assert bitmap.resized(2000, 1000).unpack(0, 2000).tolist() == [
+        *expected.tolist(),
+        *[False] * 1000,
+    ]
+    assert bitmap.nbytes == 125
+
+
+def test_mvcc_readers_see_point_in_time_view():
+    """測試讀者持有的版本不受之後寫入影響，且讀取不需要鎖"""
+    database = MemoryDatabase(mvcc=True)
+    fill_items(database, 10)
+    version = database._items_version
+
+    database.delete_item(1)
+    database.update_item(2, {**make_item(2), "name": "已更新"})
+    database.create_item(make_item(11))
+
+    assert len(version.records) == 10
+    assert version.records.get(1)["name"] == "商品 0"
+    assert version.records.get(2)["name"] == "商品 1"
+
+    # 寫者持有寫鎖期間，讀取仍可完成
+    with database._items_lock.write():
+        assert len(database.get_all_items()) == 10
+        assert database.get_stats()["items"]["total"] == 10
+
+
+def _per_op_latency(size: int, ops: int = 500) -> float:
+    """測量單條記錄操作（查詢、更新、刪除）的平均耗時"""
+    database = MemoryDatabase()
+    fill_items(database, size)
+    ids = random.Random(size).sample(range(1, size + 1), ops)
+
+    start = time.perf_counter()
+    for item_id in ids:
+        database.get_item_by_id(item_id)
+        database.update_item(item_id, make_item(item_id))
+        database.delete_item(item_id)
+    return (time.perf_counter() - start) / ops
+
+
+@pytest.mark.slow
+def test_point_operation_latency_is_flat():
+    """測試單條記錄操作的耗時不隨數據量增長（1k → 1M）"""
+    small = min(_per_op_latency(1_000) for _ in range(3))
+    large = _per_op_latency(1_000_000)
+
+    # O(1) 操作在 1000 倍數據量下應基本持平（預留緩存與噪聲餘量）
+    assert large < small * 5
+
+
+@pytest.mark.slow
+def test_stats_latency_is_flat():
+    """測試統計查詢耗時不隨數據量增長"""
+
+    def stats_latency(size: int, calls: int = 1000) -> float:
+        database = MemoryDatabase()
+        fill_items(database, size)
+        start = time.perf_counter()
+        for _ in range(calls):
+            database.get_stats()
+        return (time.perf_counter() - start) / calls
+
+    small = min(stats_latency(10) for _ in range(3))
+    large = stats_latency(200_000)
+    assert large < small * 5
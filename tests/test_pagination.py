@@ -0,0 +1,249 @@
+"""
+鍵集分頁測試
+"""
+
+import time
+import pytest
+from fastapi.testclient import TestClient
+from src.app.database import (
+    MemoryDatabase,
+    ShardedDatabase,
+    SharedStoreClient,
+    SharedStoreServer,
+    SQLiteDatabase,
+    memory_db,
+)
+from src.app.database.indexes import NgramIndex, SortedIndex
+
+
+def make_items(count: int) -> list:
+    """生成商品數據"""
+    return [
+        {
+            "name": f"商品 {i}",
+            "description": "配件" if i % 4 == 0 else None,
+            "price": float(i % 30 + 1),
+            "is_available": i % 3 != 0,
+        }
+        for i in range(count)
+    ]
+
+
+def walk(fetch, limit: int) -> list:
+    """用 fetch(after, limit) 逐頁取完，返回拼接結果"""
+    records, after = [], 0
+    while True:
+        page = fetch(after, limit)
+        assert len(page) <= limit
+        records.extend(page)
+        if len(page) < limit:
+            return records
+        after = page[-1].id
+
+
+@pytest.fixture(params=["memory", "mvcc", "columnar", "sharded", "sqlite", "shared"])
+def storage(request, tmp_path):
+    """填充了數據（含刪除留下的空洞）的各種存儲後端"""
+    if request.param == "sqlite":
+        database = SQLiteDatabase(tmp_path / "page.db")
+    elif request.param == "sharded":
+        database = ShardedDatabase(3)
+    elif request.param == "shared":
+        server = SharedStoreServer(MemoryDatabase(), str(tmp_path / "p.sock"), b"k")
+        server.start()
+        request.addfinalizer(server.close)
+        database = SharedStoreClient(server.address, server.authkey)
+    else:
+        options = {"mvcc": {"mvcc": True}, "columnar": {"item_engine": "columnar"}}
+        database = MemoryDatabase(**options.get(request.param, {}))
+    database.create_items(make_items(300))
+    database.delete_items(list(range(5, 300, 7)))
+    for i in range(12):
+        database.create_user({"username": f"user{i}", "email": f"u{i}@example.com"})
+    database.delete_users([3, 4])
+    yield database
+    database.close()
+
+
+QUERIES = [
+    {},
+    {"available_only": False},
+    {"query": "商品 1"},
+    {"query": "配件", "available_only": False},
+    {"min_price": 5.0, "max_price": 12.0},
+    {"query": "商品", "min_price": 20.0},
+]
+
+
+@pytest.mark.parametrize("limit", [1, 7, 100, 1000])
+def test_pages_concatenate_to_full_results(storage, limit):
+    """測試逐頁讀取的拼接結果與一次讀取完全一致"""
+    assert walk(storage.get_all_items, limit) == storage.get_all_items()
+    assert walk(storage.get_all_users, limit) == storage.get_all_users()
+    for kwargs in QUERIES:
+        pages = walk(
+            lambda after, size: storage.search_items(**kwargs, after=after, limit=size),
+            limit,
+        )
+        assert pages == storage.search_items(**kwargs)
+
+
+@pytest.mark.parametrize("options", [{}, {"item_engine": "columnar"}])
+def test_broad_search_pages_skip_full_match_sets(options, monkeypatch):
+    """測試匹配很多的分頁搜索沿 ID 順序取一頁，不求出全部匹配"""
+    database = MemoryDatabase(**options)
+    database.create_items(make_items(3000))
+    expected = database.search_items(query="商品", min_price=5.0)
+
+    def full_match_set(*args, **kwargs):
+        raise AssertionError("分頁搜索不應求出全部匹配")
+
+    monkeypatch.setattr(SortedIndex, "range", full_match_set)
+    monkeypatch.setattr(NgramIndex, "search", full_match_set)
+    page = database.search_items(query="商品", min_price=5.0, after=1000, limit=20)
+    assert page == [item for item in expected if item.id > 1000][:20]
+
+
+@pytest.mark.parametrize("options", [{}, {"item_engine": "columnar"}])
+def test_sparse_search_pages_fall_back_to_indexes(options, monkeypatch):
+    """測試逐個校驗超出預算時改用索引，拼接結果不變"""
+    monkeypatch.setattr(memory_db, "SEARCH_SCAN_BUDGET", 1)
+    database = MemoryDatabase(**options)
+    database.create_items(make_items(300))
+    for kwargs in QUERIES:
+        pages = walk(
+            lambda after, size: database.search_items(
+                **kwargs, after=after, limit=size
+            ),
+            3,
+        )
+        assert pages == database.search_items(**kwargs)
+
+
+@pytest.mark.parametrize("budget", [1, 4096])
+def test_search_iterator_matches_full_results(storage, budget, monkeypatch):
+    """測試逐塊迭代的搜索結果與一次搜索一致（含改用索引的稀疏匹配）"""
+    if not hasattr(storage, "iter_search_items"):
+        pytest.skip("後端不提供搜索迭代器")
+    monkeypatch.setattr(memory_db, "SEARCH_SCAN_BUDGET", budget)
+    for kwargs in QUERIES:
+        chunks = list(storage.iter_search_items(**kwargs, chunk_size=7))
+        assert all(0 < len(chunk) <= 7 for chunk in chunks)
+        records = [item for chunk in chunks for item in chunk]
+        assert records == storage.search_items(**kwargs)
+        after = storage.search_items(**kwargs)[3].id
+        chunks = storage.iter_search_items(**kwargs, after=after, chunk_size=7)
+        assert [item for chunk in chunks for item in chunk] == storage.search_items(
+            **kwargs, after=after
+        )
+
+
+@pytest.mark.parametrize("options", [{}, {"item_engine": "columnar"}])
+def test_search_iterator_sees_writes_between_chunks(options):
+    """測試塊之間的寫入：刪除和不再匹配的商品不再輸出，其餘記錄不重複不遺漏"""
+    database = MemoryDatabase(**options)
+    database.create_items(make_items(300))
+    # 「商品 2」匹配 ID 3、21-30、201-300：第三塊越過空洞時改由索引求剩餘匹配
+    chunks = database.iter_search_items(query="商品 2", chunk_size=5)
+    head = [item for _, chunk in zip(range(3), chunks) for item in chunk]
+    assert head[-1].id > 200
+    deleted, changed = database.search_items(query="商品 2", after=head[-1].id)[1:3]
+    database.delete_item(deleted.id)
+    database.update_item(changed.id, {**changed, "name": "已改名"})
+    rest = [item for chunk in chunks for item in chunk]
+
+    seen = [item.id for item in head + rest]
+    assert seen == [item.id for item in database.search_items(query="商品 2")]
+    assert deleted.id not in seen and changed.id not in seen
+
+
+def test_pages_stay_stable_under_concurrent_writes(client: TestClient, clean_db):
+    """測試翻頁期間插入和刪除不會導致已存在記錄重複或遺漏"""
+    client.post("/items/bulk", json=make_items(50))
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 10, **({"after": cursor} if cursor else {})}
+        response = client.get("/items/", params=params)
+        assert response.status_code == 200
+        seen.extend(item["id"] for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        pages += 1
+        # 每翻一頁：刪除一條已讀和一條未讀的商品，並新增一條
+        client.delete(f"/items/{seen[0]}")
+        client.delete(f"/items/{50 - pages}")
+        client.post("/items/", json=make_items(1)[0])
+
+    assert len(seen) == len(set(seen))
+    assert seen == sorted(seen)
+    deleted_unread = {50 - p for p in range(1, pages + 1)}
+    assert set(range(1, 51)) - deleted_unread <= set(seen)
+
+
+def test_list_endpoints_pagination(client: TestClient, clean_db, monkeypatch):
+    """測試分頁參數、游標響應頭、默認頁大小和上限截斷"""
+    client.post("/items/bulk", json=make_items(25))
+
+    response = client.get("/items/")
+    assert len(response.json()) == 25
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get("/items/", params={"limit": 10})
+    assert [item["id"] for item in response.json()] == list(range(1, 11))
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get("/items/", params={"limit": 15, "after": cursor})
+    assert [item["id"] for item in response.json()] == list(range(11, 26))
+    assert "X-Next-Cursor" not in response.headers
+
+    monkeypatch.setattr("src.core.settings.page_default_size", 4)
+    monkeypatch.setattr("src.core.settings.page_max_size", 8)
+    assert len(client.get("/items/", params={"after": cursor}).json()) == 4
+    assert len(client.get("/items/", params={"limit": 100}).json()) == 8
+
+    assert client.get("/items/", params={"after": "bogus"}).status_code == 400
+    assert client.get("/users/", params={"after": "bogus"}).status_code == 400
+    assert client.get("/items/", params={"limit": 0}).status_code == 422
+
+    client.post("/users/bulk", json=[{"username": "bob", "email": "b@example.com"}])
+    response = client.get("/users/", params={"limit": 1})
+    assert [user["username"] for user in response.json()] == ["bob"]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_search_pagination(client: TestClient, clean_db):
+    """測試搜索結果分頁通過 next_cursor 翻頁"""
+    client.post("/items/bulk", json=make_items(40))
+    full = client.get("/items/search/", params={"q": "商品"}).json()
+    assert full["next_cursor"] is None
+
+    results, cursor = [], None
+    while True:
+        params = {"q": "商品", "limit": 6, **({"after": cursor} if cursor else {})}
+        data = client.get("/items/search/", params=params).json()
+        assert data["count"] == len(data["results"]) <= 6
+        results.extend(data["results"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    assert results == full["results"]
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("options", [{}, {"mvcc": True}, {"item_engine": "columnar"}])
+def test_page_latency_is_flat(options):
+    """測試取一頁的耗時與集合大小無關（1k → 200k）"""
+
+    def page_latency(size: int, calls: int = 300) -> float:
+        database = MemoryDatabase(**options)
+        database.create_items(make_items(size))
+        start = time.perf_counter()
+        for i in range(calls):
+            after = (i * 7919) % size
+            database.get_all_items(after=after, limit=50)
+            database.search_items(after=after, limit=50)
+        return (time.perf_counter() - start) / calls
+
+    small = min(page_latency(1_000) for _ in range(3))
+    large = page_latency(200_000)
+    assert large < small * 5
@@ -0,0 +1,99 @@
+"""
+響應緩存測試
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from src.app.database import async_db
+from src.app.services.response_cache import ResponseCache, response_cache
+
+requires_cache = pytest.mark.skipif(
+    not async_db.versioned or response_cache.max_entries == 0,
+    reason="響應緩存已關閉，或當前存儲後端不提供記錄版本",
+)
+
+
+def test_lru_bounded_by_entries_and_bytes():
+    """測試按最近最少使用淘汰，條目數和字節數都不超過上限"""
+    cache = ResponseCache(max_entries=3, max_bytes=10)
+    for key in "abc":
+        cache.put(key, "g1", b"xx")
+    assert cache.get("a", "g1") == b"xx"
+    cache.put("d", "g1", b"xx")
+    assert cache.get("b", "g1") is None
+    assert [cache.get(key, "g1") for key in "acd"] == [b"xx"] * 3
+
+    cache.put("e", "g1", b"x" * 8)
+    stats = cache.stats()
+    assert stats["bytes"] <= 10 and stats["entries"] == 2
+    assert cache.get("e", "g1") is not None and cache.get("d", "g1") is not None
+    assert stats["evictions"] == 3
+
+    cache.put("big", "g1", b"x" * 11)
+    assert cache.get("big", "g1") is None
+    assert cache.stats()["entries"] == 2
+
+
+def test_stale_generation_is_replaced():
+    """測試代數改變後舊條目失效並被原地替換"""
+    cache = ResponseCache(max_entries=10, max_bytes=100)
+    cache.put("k", "g1", b"old")
+    assert cache.get("k", "g2") is None
+    cache.put("k", "g2", b"new!")
+    assert cache.get("k", "g1") is None
+    cache.put("k", "g2", b"new!")
+    assert cache.get("k", "g2") == b"new!"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (1, 2, 2)
+    assert (stats["entries"], stats["bytes"]) == (1, 4)
+
+    disabled = ResponseCache(max_entries=0, max_bytes=100)
+    disabled.put("k", "g1", b"x")
+    assert disabled.get("k", "g1") is None
+
+
+@requires_cache
+def test_search_served_from_cache_until_write(
+    client: TestClient, clean_db, sample_item, monkeypatch
+):
+    """測試重複搜索命中緩存不訪問存儲，寫入後重新計算"""
+    client.post("/items/", json=sample_item)
+    params = {"q": "測試", "min_price": 10}
+    first = client.get("/items/search/", params=params)
+    calls = []
+    search = async_db.search_items
+
+    async def counting_search(**kwargs):
+        calls.append(kwargs)
+        return await search(**kwargs)
+
+    monkeypatch.setattr(async_db, "search_items", counting_search)
+    before = response_cache.stats()
+    second = client.get("/items/search/", params={"q": "測試", "min_price": "10.0"})
+    assert second.content == first.content and not calls
+    assert second.headers["content-type"] == "application/json"
+    assert response_cache.stats()["hits"] == before["hits"] + 1
+
+    client.post("/items/", json={**sample_item, "price": 300.0})
+    third = client.get("/items/search/", params=params)
+    assert len(calls) == 1 and third.json()["count"] == 2
+
+    client.get("/items/search/", params={**params, "available_only": False})
+    assert len(calls) == 2
+
+
+@requires_cache
+def test_stats_cached_and_invalidated(client: TestClient, clean_db, sample_user):
+    """測試統計結果在用戶變更後失效，緩存計數可通過接口查看"""
+    assert client.get("/stats/").json()["users"]["total"] == 0
+    before = client.get("/stats/cache").json()
+    client.get("/stats/")
+    client.post("/users/", json=sample_user)
+    response = client.get("/stats/")
+    assert response.json()["users"]["total"] == 1 and "ETag" in response.headers
+
+    after = client.get("/stats/cache").json()
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"] + 1
+    assert after["invalidations"] == before["invalidations"] + 1
+    assert 0 < after["bytes"] <= after["max_bytes"]
@@ -0,0 +1,129 @@
+"""
+分片內存數據庫測試
+"""
+
+import random
+import threading
+import pytest
+from src.app.database import DuplicateKeyError, MemoryDatabase, ShardedDatabase
+
+QUERIES = [
+    {},
+    {"available_only": False},
+    {"query": "商品 1"},
+    {"query": "電腦", "available_only": False},
+    {"min_price": 20.0, "max_price": 60.0},
+    {"query": "商品", "min_price": 50.0, "available_only": False},
+]
+
+
+def apply_writes(database) -> None:
+    """對單實例和分片實例執行同一組確定性的寫入"""
+    rng = random.Random(7)
+    database.populate_sample_data()
+    for i in range(400):
+        database.create_item(
+            {
+                "name": f"商品 {i}",
+                "description": "電腦配件" if i % 9 == 0 else None,
+                "price": float(rng.randint(1, 100)),
+                "is_available": i % 3 != 0,
+            }
+        )
+    for item_id in range(5, 400, 7):
+        database.delete_item(item_id)
+    for item_id in range(6, 400, 11):
+        database.update_item(item_id, {"name": f"更新 {item_id}", "price": 42.0})
+    database.create_user({"username": "carol", "email": "carol@example.com"})
+
+
+@pytest.mark.parametrize("shards", [1, 3, 4])
+@pytest.mark.parametrize("options", [{}, {"mvcc": True}])
+def test_matches_single_instance(shards, options):
+    """測試分片結果（內容和 ID 升序）與單實例一致"""
+    single = MemoryDatabase(**options)
+    sharded = ShardedDatabase(shards, **options)
+    apply_writes(single)
+    apply_writes(sharded)
+
+    assert sharded.get_all_items() == single.get_all_items()
+    assert sharded.get_stats() == single.get_stats()
+    for kwargs in QUERIES:
+        assert sharded.search_items(**kwargs) == single.search_items(**kwargs)
+    assert sharded.get_item_by_id(6) == single.get_item_by_id(6)
+    assert sharded.get_item_by_id(5) is None
+    assert sharded.get_user_by_username("carol") is not None
+    sharded.close()
+
+
+def test_point_operations_touch_one_shard():
+    """測試點操作只訪問商品所在的分片"""
+    database = ShardedDatabase(4)
+    items = [
+        database.create_item({"name": f"商品 {i}", "price": 1.0}) for i in range(8)
+    ]
+    assert [item.id for item in items] == list(range(1, 9))
+    for k, shard in enumerate(database._shards):
+        assert [item.id for item in shard.get_all_items()] == [k + 1, k + 5]
+
+    target = database._shards[2]
+    for shard in database._shards:
+        if shard is not target:
+            shard._items_lock.acquire_write()  # 其他分片被佔用也不影響
+    try:
+        assert database.get_item_by_id(7).name == "商品 6"
+        assert database.update_item(3, {"name": "新", "price": 2.0}).name == "新"
+        assert database.delete_item(7) is not None
+    finally:
+        for shard in database._shards:
+            if shard is not target:
+                shard._items_lock.release_write()
+    database.close()
+
+
+def test_concurrent_writes_across_shards():
+    """測試多線程寫入分片後 ID 唯一且全部可讀"""
+    database = ShardedDatabase(4, item_engine="columnar")
+
+    def write(index: int) -> None:
+        for i in range(250):
+            item = database.create_item({"name": f"{index}-{i}", "price": float(i)})
+            assert database.get_item_by_id(item.id) == item
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    items = database.get_all_items()
+    assert len(items) == 2000
+    assert [item.id for item in items] == sorted({item.id for item in items})
+    assert database.get_stats()["items"]["total"] == 2000
+    database.close()
+
+
+def test_users_and_maintenance():
+    """測試用戶唯一約束、示例數據和清空"""
+    database = ShardedDatabase(2)
+    database.populate_sample_data()
+    assert [item.id for item in database.get_all_items()] == [1, 2, 3]
+    database.populate_sample_data()
+    assert database.get_stats()["items"]["total"] == 3
+    with pytest.raises(DuplicateKeyError):
+        database.create_user({"username": "alice", "email": "x@example.com"})
+
+    database.clear_all_data()
+    assert database.get_all_items() == database.get_all_users() == []
+    assert database.get_stats()["items"]["price_stats"]["minimum"] == 0
+    assert database.create_item({"name": "新", "price": 1.0}).id == 1
+    database.close()
+
+
+def test_shard_sample_data_uses_shard_ids():
+    """測試單個分片的示例數據按該分片的 ID 序列編號"""
+    shard = MemoryDatabase(first_item_id=2, item_id_step=4)
+    shard.populate_sample_data()
+    assert [item.id for item in shard.get_all_items()] == [2, 6, 10]
+    assert shard.create_item({"name": "新", "price": 1.0}).id == 14
+    assert shard.create_user({"username": "dave", "email": "d@example.com"}).id == 3
@@ -0,0 +1,217 @@
+"""
+共享存儲測試
+"""
+
+import multiprocessing
+import threading
+import time
+from typing import Any, Dict
+import pytest
+from src.app.database import (
+    DuplicateKeyError,
+    MemoryDatabase,
+    SharedStoreClient,
+    SharedStoreServer,
+)
+from src.app.database.shared import start_owner, stop_owner
+
+
+@pytest.fixture
+def server(tmp_path):
+    """在本進程線程中運行的數據擁有者服務"""
+    database = MemoryDatabase()
+    database.populate_sample_data()
+    server = SharedStoreServer(database, str(tmp_path / "store.sock"), b"secret")
+    server.start()
+    yield server
+    server.close()
+
+
+def connect(server: SharedStoreServer) -> SharedStoreClient:
+    """創建一個模擬 worker 的客戶端"""
+    return SharedStoreClient(server.address, server.authkey)
+
+
+def state(database: Any) -> tuple:
+    """存儲的可比較狀態"""
+    return (
+        database.get_all_items(),
+        database.get_all_users(),
+        database.get_stats(),
+        database.search_items(query="商品", min_price=10.0),
+    )
+
+
+def test_workers_converge_to_owner_state(server):
+    """測試多個 worker 併發寫入後各自的副本與擁有者一致"""
+    workers = [connect(server) for _ in range(3)]
+
+    def write(index: int) -> None:
+        worker = workers[index]
+        for i in range(100):
+            item = worker.create_item({"name": f"商品 {index}-{i}", "price": i + 1.0})
+            # 同一 worker 內讀到自己的寫入
+            assert worker.get_item_by_id(item.id) == item
+            if i % 10 == 0:
+                worker.update_item(item.id, {"name": "更新", "price": 5.0})
+            if i % 25 == 0:
+                worker.delete_item(item.id)
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    expected = state(server.database)
+    for worker in workers:
+        worker.sync()
+        assert state(worker) == expected
+        worker.close()
+    assert len(expected[0]) == 3 + 300 - 12
+
+
+def test_late_worker_and_clear(server):
+    """測試後加入的 worker 加載一致狀態，清空操作同步到所有副本"""
+    first = connect(server)
+    first.create_user({"username": "carol", "email": "carol@example.com"})
+    second = connect(server)
+    assert second.get_user_by_username("carol") is not None
+
+    second.clear_all_data()
+    first.sync()
+    assert first.get_all_items() == first.get_all_users() == []
+    assert first.create_item({"name": "新", "price": 1.0}).id == 1
+    for worker in (first, second):
+        worker.close()
+
+
+def test_late_worker_copies_owner_generations(server):
+    """測試後加入的 worker 沿用擁有者的集合代數，ETag 和緩存鍵與擁有者一致"""
+    first = connect(server)
+    first.create_user({"username": "carol", "email": "carol@example.com"})
+    first.create_item({"name": "商品", "price": 1.0})
+    owner = server.database
+    assert owner.items_generation() != owner.users_generation()
+
+    second = connect(server)
+    for worker in (first, second):
+        worker.sync()
+        assert worker.items_generation() == owner.items_generation()
+        assert worker.users_generation() == owner.users_generation()
+        assert worker.version_epoch == owner.version_epoch
+        worker.close()
+
+
+def test_errors_cross_process_boundary(server):
+    """測試唯一鍵衝突以原類型返回，不存在的記錄返回 None"""
+    worker = connect(server)
+    with pytest.raises(DuplicateKeyError) as exc_info:
+        worker.create_user({"username": "alice", "email": "new@example.com"})
+    assert exc_info.value.field == "username"
+    assert worker.update_item(999, {"name": "x", "price": 1.0}) is None
+    assert worker.delete_user(999) is None
+    worker.close()
+
+
+def test_reads_never_reach_owner(server):
+    """測試讀取全部在本地副本完成，擁有者只處理寫入"""
+    worker = connect(server)
+    worker.create_item({"name": "商品", "price": 20.0})
+    calls = worker.owner_stats()["calls"]
+    for _ in range(100):
+        worker.get_all_items()
+        worker.search_items(query="商品")
+        worker.get_item_by_id(1)
+        worker.get_stats()
+    assert worker.owner_stats()["calls"] == calls
+    worker.close()
+
+
+def test_rejects_wrong_authkey(server):
+    """測試認證密鑰不匹配的連接被拒絕"""
+    worker = SharedStoreClient(server.address, b"wrong")
+    with pytest.raises(multiprocessing.AuthenticationError):
+        worker.get_all_items()
+
+
+def _worker_process(
+    address: str, authkey: bytes, index: int, writes: int, seconds: float, results
+) -> None:
+    """模擬一個 gunicorn worker：寫入一批商品，然後在本地副本上持續讀取"""
+    worker = SharedStoreClient(address, authkey)
+    start = time.perf_counter()
+    for i in range(writes):
+        worker.create_item({"name": f"worker {index} 商品 {i}", "price": i + 1.0})
+    write_seconds = time.perf_counter() - start
+
+    reads = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        worker.get_item_by_id(reads % writes + 1)
+        worker.search_items(query="商品", min_price=10.0, max_price=20.0)
+        reads += 2
+
+    worker.sync()
+    items = worker.get_all_items()
+    results.put(
+        {
+            "index": index,
+            "writes_per_second": writes / write_seconds,
+            "reads_per_second": reads / seconds,
+            "state": [(item.id, item.name) for item in items],
+        }
+    )
+    worker.close()
+
+
+@pytest.mark.slow
+def test_multi_process_consistency_and_throughput(tmp_path, monkeypatch):
+    """測試多個 worker 進程寫入後看到相同的數據，讀取不經過擁有者"""
+    for name in ("WAL_PATH", "SNAPSHOT_DIR"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("POPULATE_SAMPLE_DATA", "false")
+    address, authkey = str(tmp_path / "store.sock"), b"secret"
+    workers, writes, seconds = 4, 200, 1.0
+
+    owner = start_owner(address, authkey)
+    try:
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=_worker_process,
+                args=(address, authkey, i, writes, seconds, results),
+            )
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        reports: Dict[int, Dict[str, Any]] = {}
+        for _ in processes:
+            report = results.get(timeout=60)
+            reports[report["index"]] = report
+        for process in processes:
+            process.join(10)
+
+        client = SharedStoreClient(address, authkey)
+        client.sync()
+        owner_state = [(item.id, item.name) for item in client.get_all_items()]
+        owner_calls = client.owner_stats()["calls"]
+        client.close()
+    finally:
+        stop_owner(owner)
+
+    assert len(owner_state) == workers * writes
+    assert len({item_id for item_id, _ in owner_state}) == workers * writes
+    for report in reports.values():
+        assert report["state"] == owner_state
+    # 擁有者只執行了寫入，所有讀取都在各 worker 的本地副本完成
+    assert owner_calls == workers * writes
+
+    total_reads = sum(report["reads_per_second"] for report in reports.values())
+    total_writes = sum(report["writes_per_second"] for report in reports.values())
+    print(
+        f"\n{workers} 個 worker: 讀取 {total_reads:,.0f} 次/秒, "
+        f"寫入 {total_writes:,.0f} 次/秒"
+    )
@@ -0,0 +1,160 @@
+"""
+讀請求合併測試
+"""
+
+import asyncio
+import time
+from typing import Tuple
+import httpx
+import pytest
+from src.app.database import MemoryDatabase, async_db
+from src.app.database.locks import RWLock
+from src.app.main import app
+from src.app.services.response_cache import response_cache
+from src.app.services.singleflight import Singleflight
+
+
+def test_concurrent_calls_share_one_execution():
+    """測試同鍵的併發調用只執行一次，完成後鍵被釋放"""
+    flight = Singleflight()
+    calls = []
+
+    async def compute(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return [value]
+
+    async def run():
+        results = await asyncio.gather(
+            *(flight.do("a", lambda: compute("a")) for _ in range(10)),
+            flight.do("b", lambda: compute("b")),
+        )
+        again = await flight.do("a", lambda: compute("a2"))
+        return results, again
+
+    results, again = asyncio.run(run())
+    assert results[:10] == [["a"]] * 10 and results[0] is results[9]
+    assert results[10] == ["b"] and again == ["a2"]
+    assert calls == ["a", "b", "a2"]
+    assert flight.stats() == {"executions": 3, "shared": 9, "in_flight": 0}
+
+
+def test_failure_and_cancellation_are_isolated():
+    """測試異常傳給所有等待者，發起者被取消不影響其他等待者"""
+    flight = Singleflight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        failures = await asyncio.gather(
+            flight.do("x", fail), flight.do("x", fail), return_exceptions=True
+        )
+        leader = asyncio.ensure_future(flight.do("y", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("y", slow))
+        await asyncio.sleep(0.005)
+        leader.cancel()
+        return failures, await follower, leader.cancelled()
+
+    failures, result, cancelled = asyncio.run(run())
+    assert [type(error) for error in failures] == [ValueError, ValueError]
+    assert result == "done" and cancelled
+
+
+def make_items(count: int) -> list:
+    """生成商品數據"""
+    return [
+        {"name": f"商品 {i}", "price": float(i % 500 + 1), "is_available": i % 3 != 0}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def herd_storage(monkeypatch):
+    """把異步存儲換成填充了數據的非 MVCC 內存數據庫（讀取需要加讀鎖）
+
+    同時關閉響應緩存，只觀察請求合併的效果。
+    """
+    database = MemoryDatabase()
+    monkeypatch.setattr(async_db, "storage", database)
+    monkeypatch.setattr(response_cache, "max_entries", 0)
+    yield database
+    database.close()
+
+
+def thundering_herd(requests: int, paths: list) -> Tuple[int, float]:
+    """每個路徑同時發出 requests 個相同請求，返回讀鎖獲取次數和 CPU 時間"""
+    acquisitions = 0
+    acquire_read = RWLock.acquire_read
+
+    def counting_acquire(lock):
+        nonlocal acquisitions
+        acquisitions += 1
+        acquire_read(lock)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            responses = await asyncio.gather(
+                *(client.get(path) for path in paths for _ in range(requests))
+            )
+        assert all(response.status_code == 200 for response in responses)
+        assert len({response.content for response in responses[:requests]}) == 1
+
+    RWLock.acquire_read = counting_acquire
+    try:
+        cpu = time.process_time()
+        asyncio.run(run())
+        return acquisitions, time.process_time() - cpu
+    finally:
+        RWLock.acquire_read = acquire_read
+
+
+PATHS = ["/items/search/?q=商品 1&available_only=false", "/items/?limit=500"]
+
+
+def test_herd_reads_storage_once(herd_storage, monkeypatch):
+    """測試同時到達的相同請求只讀取一次存儲（掃描耗時 50ms 時）"""
+    herd_storage.create_items(make_items(2_000))
+    search_items, get_all_items = herd_storage.search_items, herd_storage.get_all_items
+
+    def slow(read):
+        def scan(*args, **kwargs):
+            time.sleep(0.05)
+            return read(*args, **kwargs)
+
+        return scan
+
+    monkeypatch.setattr(herd_storage, "search_items", slow(search_items))
+    monkeypatch.setattr(herd_storage, "get_all_items", slow(get_all_items))
+
+    monkeypatch.setattr("src.core.settings.read_coalescing", False)
+    separate, _ = thundering_herd(20, PATHS)
+    monkeypatch.setattr("src.core.settings.read_coalescing", True)
+    coalesced, _ = thundering_herd(20, PATHS)
+
+    assert separate == 40
+    assert coalesced <= 4
+
+
+@pytest.mark.slow
+def test_herd_cpu_drops(herd_storage, monkeypatch):
+    """測試雷群負載下合併請求顯著降低 CPU 時間"""
+    herd_storage.create_items(make_items(100_000))
+    paths = ["/items/search/?q=商品&min_price=10&max_price=30", "/stats/"]
+
+    monkeypatch.setattr("src.core.settings.read_coalescing", False)
+    separate_locks, separate_cpu = thundering_herd(50, paths)
+    monkeypatch.setattr("src.core.settings.read_coalescing", True)
+    coalesced_locks, coalesced_cpu = thundering_herd(50, paths)
+
+    assert coalesced_locks * 5 < separate_locks
+    assert coalesced_cpu * 2 < separate_cpu
@@ -0,0 +1,154 @@
+"""
+快照測試
+"""
+
+import pytest
+from src.app.database import MemoryDatabase
+from src.app.database.snapshot import (
+    Snapshot,
+    SnapshotScheduler,
+    SnapshotStore,
+    write_snapshot,
+)
+from src.app.database.wal import WriteAheadLog
+
+
+def build(database: MemoryDatabase) -> None:
+    """寫入一批包含更新、刪除和空字段的數據"""
+    database.populate_sample_data()
+    for i in range(500):
+        database.create_item(
+            {
+                "name": f"商品 {i} ｉＰｈｏｎｅ" if i % 7 == 0 else f"商品 {i}",
+                "description": None if i % 3 == 0 else f"描述 {i}",
+                "price": float(i % 97 + 1),
+                "is_available": i % 2 == 0,
+            }
+        )
+    for item_id in range(10, 300, 4):
+        database.delete_item(item_id)
+    database.update_item(5, {"name": "電腦", "price": 42.0})
+    database.create_user({"username": "carol", "email": "Carol@example.com"})
+    database.delete_user(2)
+
+
+def state(database: MemoryDatabase) -> tuple:
+    """數據庫的可比較狀態"""
+    return (
+        database.get_all_items(),
+        database.get_all_users(),
+        database.get_stats(),
+        database.search_items(min_price=10.0, max_price=20.0),
+        database.search_items(query="iphone", available_only=False),
+        database.search_items(query="電腦", available_only=False),
+    )
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"mvcc": True},
+        {"item_engine": "columnar"},
+        {"item_engine": "columnar", "mvcc": True},
+    ],
+)
+def test_snapshot_round_trip(tmp_path, options):
+    """測試快照加載後的數據、索引和 ID 分配與原數據庫一致"""
+    original = MemoryDatabase(**options)
+    build(original)
+    path = tmp_path / "snapshot.bin"
+    write_snapshot(path, original.capture_snapshot())
+
+    restored = MemoryDatabase(**options)
+    restored.load_snapshot(Snapshot(path))
+
+    assert state(restored) == state(original)
+    assert restored.get_user_by_username("carol") is not None
+    with pytest.raises(ValueError):
+        restored.create_user({"username": "dave", "email": "carol@EXAMPLE.com"})
+    assert restored.create_item({"name": "新", "price": 1.0}).id == 504
+
+
+def test_writes_before_deferred_index_build(tmp_path):
+    """測試關鍵字索引延遲構建期間的寫入在構建後可被搜索到"""
+    original = MemoryDatabase()
+    build(original)
+    path = tmp_path / "snapshot.bin"
+    write_snapshot(path, original.capture_snapshot())
+
+    restored = MemoryDatabase()
+    restored.load_snapshot(Snapshot(path))
+    assert restored._text_index.deferred
+    restored.update_item(5, {"name": "平板", "price": 42.0})
+    restored.create_item({"name": "新電腦", "price": 1.0})
+
+    names = [item.name for item in restored.search_items(query="電腦")]
+    assert names == ["MacBook Pro", "新電腦"]
+    assert not restored._text_index.deferred
+    assert restored.search_items(query="平板")[0].id == 5
+
+
+def test_warm_up_in_batches_with_interleaved_writes(tmp_path):
+    """測試分批預熱期間穿插寫入，預熱完成後狀態與直接寫入的數據庫一致"""
+    original = MemoryDatabase()
+    build(original)
+    path = tmp_path / "snapshot.bin"
+    write_snapshot(path, original.capture_snapshot())
+
+    restored = MemoryDatabase()
+    restored.load_snapshot(Snapshot(path))
+    for database in (original, restored):
+        database.update_item(3, {"name": "早期更新", "price": 7.0})
+    # 預熱前 100 條後，在已構建和未構建的區間內各寫入一次
+    with restored._items_lock.read():
+        restored._text_index.build(100)
+        restored._items.materialize(100)
+    for database in (original, restored):
+        database.update_item(50, {"name": "已構建區間", "price": 8.0})
+        database.update_item(400, {"name": "未構建區間", "price": 9.0})
+        database.delete_item(401)
+        database.create_item({"name": "預熱期間新增", "price": 10.0})
+    restored.warm_up(batch=64)
+
+    assert restored._snapshot is None
+    assert not restored._text_index.deferred
+    assert state(restored) == state(original)
+    for query in ("早期", "已構建", "未構建", "預熱期間", "商品 39"):
+        assert restored.search_items(query=query) == original.search_items(query=query)
+
+
+def test_snapshot_plus_wal_tail(tmp_path):
+    """測試加載快照後只重放快照之後的日誌，並刪除已覆蓋的日誌段"""
+    wal_path = tmp_path / "wal.log"
+    store = SnapshotStore(tmp_path / "snapshots")
+    database = MemoryDatabase()
+    database.attach_wal(WriteAheadLog(wal_path, group_commit_window=0))
+    build(database)
+    scheduler = SnapshotScheduler(database, store, interval=3600)
+    scheduler.snapshot_now()
+    database.create_item({"name": "快照之後", "price": 3.0})
+    database.delete_item(5)
+    scheduler.snapshot_now()
+    database.update_item(1, {"name": "最後更新", "price": 1.0})
+    expected = state(database)
+    database.close_wal()
+
+    assert len(store.paths()) == 2
+    wal = WriteAheadLog(wal_path, group_commit_window=0)
+    assert wal.segments() == []
+
+    restored = MemoryDatabase()
+    snapshot = Snapshot(store.latest())
+    restored.load_snapshot(snapshot)
+    assert restored.attach_wal(wal, snapshot.lsn) == 1
+    assert state(restored) == expected
+    assert wal.last_lsn > snapshot.lsn
+
+
+def test_invalid_snapshot_file(tmp_path):
+    """測試拒絕非快照文件"""
+    path = tmp_path / "snapshot.bin"
+    path.write_bytes(b"\0" * 128)
+    with pytest.raises(ValueError):
+        Snapshot(path)
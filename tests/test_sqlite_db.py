@@ -0,0 +1,147 @@
+"""
+SQLite 數據庫測試
+"""
+
+import threading
+import pytest
+from src.app.database import (
+    DuplicateKeyError,
+    MemoryDatabase,
+    SQLiteDatabase,
+    Storage,
+)
+from src.app.database.sqlite_db import SEARCH_AVAILABLE, SEARCH_MIN_PRICE
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """臨時文件上的 SQLite 數據庫"""
+    database = SQLiteDatabase(tmp_path / "app.db", pool_size=2)
+    yield database
+    database.close()
+
+
+def apply_writes(database: Storage) -> None:
+    """對任一存儲後端執行同一組寫入"""
+    database.populate_sample_data()
+    database.create_item({"name": "ｉＰａｄ Air", "price": 18900.0})
+    database.create_item(
+        {
+            "name": "鍵盤",
+            "description": "藍牙電腦周邊",
+            "price": 2490.0,
+            "is_available": False,
+        }
+    )
+    database.update_item(2, {"name": "iPhone 15", "price": 28900.0})
+    database.delete_item(3)
+    database.create_user({"username": "carol", "email": "Carol@example.com"})
+    database.update_user(1, {"username": "alice2", "email": "alice@example.com"})
+    database.delete_user(2)
+
+
+def test_protocol_conformance(sqlite_db):
+    """測試兩個後端都實現存儲協議"""
+    assert isinstance(sqlite_db, Storage)
+    assert isinstance(MemoryDatabase(), Storage)
+
+
+def test_parity_with_memory_db(sqlite_db):
+    """測試相同寫入後 SQLite 與內存數據庫的讀取結果一致"""
+    memory = MemoryDatabase()
+    apply_writes(memory)
+    apply_writes(sqlite_db)
+
+    assert sqlite_db.get_all_items() == memory.get_all_items()
+    assert sqlite_db.get_all_users() == memory.get_all_users()
+    assert sqlite_db.get_stats() == memory.get_stats()
+    for kwargs in (
+        {},
+        {"available_only": False},
+        {"query": "ipad"},
+        {"query": "電腦", "available_only": False},
+        {"min_price": 5000.0, "max_price": 30000.0},
+        {"query": "i", "min_price": 20000.0},
+    ):
+        assert sqlite_db.search_items(**kwargs) == memory.search_items(**kwargs)
+    assert sqlite_db.get_user_by_username("carol") == memory.get_user_by_username(
+        "carol"
+    )
+    assert sqlite_db.get_item_by_id(3) is None
+    assert sqlite_db.update_item(3, {"name": "x", "price": 1.0}) is None
+    assert sqlite_db.delete_user(2) is None
+
+
+def test_duplicate_keys(sqlite_db):
+    """測試唯一鍵衝突拋出 DuplicateKeyError 且不寫入數據"""
+    sqlite_db.create_user({"username": "alice", "email": "alice@example.com"})
+    bob = sqlite_db.create_user({"username": "bob", "email": "bob@example.com"})
+
+    with pytest.raises(DuplicateKeyError) as exc_info:
+        sqlite_db.create_user({"username": "alice", "email": "new@example.com"})
+    assert exc_info.value.field == "username"
+    with pytest.raises(DuplicateKeyError) as exc_info:
+        sqlite_db.update_user(bob.id, {"username": "bob", "email": "ALICE@example.com"})
+    assert exc_info.value.field == "email"
+
+    assert sqlite_db.get_user_by_id(bob.id) == bob
+    assert sqlite_db.get_stats()["users"]["total"] == 2
+
+
+def test_data_persists_across_instances(tmp_path):
+    """測試重新打開數據庫文件後數據和 ID 序列仍在"""
+    database = SQLiteDatabase(tmp_path / "app.db")
+    database.populate_sample_data()
+    database.close()
+
+    reopened = SQLiteDatabase(tmp_path / "app.db")
+    reopened.populate_sample_data()
+    assert len(reopened.get_all_items()) == 3
+    assert reopened.create_item({"name": "新", "price": 1.0}).id == 4
+    reopened.clear_all_data()
+    assert reopened.create_item({"name": "新", "price": 1.0}).id == 1
+    reopened.close()
+
+
+def test_concurrent_readers_and_writer(sqlite_db):
+    """測試讀連接池上的併發讀取與寫入互不干擾"""
+    sqlite_db.populate_sample_data()
+    errors = []
+
+    def read() -> None:
+        try:
+            for _ in range(200):
+                assert len(sqlite_db.search_items(available_only=False)) >= 3
+                assert sqlite_db.get_item_by_id(1) is not None
+        except Exception as e:  # pragma: no cover - 失敗時才執行
+            errors.append(e)
+
+    def write() -> None:
+        for i in range(200):
+            sqlite_db.create_item({"name": f"商品 {i}", "price": float(i)})
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    threads.append(threading.Thread(target=write))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sqlite_db.get_stats()["items"]["total"] == 203
+
+
+def test_queries_use_indexes(sqlite_db):
+    """測試價格、可用性和用戶名查詢走索引而非全表掃描"""
+    with sqlite_db._reader() as connection:
+
+        def plan(sql: str, params: tuple) -> str:
+            rows = connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return " ".join(row[-1] for row in rows)
+
+        items = "SELECT id FROM items WHERE "
+        assert "idx_items_price" in plan(items + SEARCH_MIN_PRICE, (10.0,))
+        assert "idx_items_is_available" in plan(items + SEARCH_AVAILABLE, ())
+        assert "idx_users_username" in plan(
+            "SELECT id FROM users WHERE username = ?", ("alice",)
+        )
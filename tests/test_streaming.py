@@ -0,0 +1,140 @@
+"""
+NDJSON 流式響應測試
+"""
+
+import asyncio
+import json
+import tracemalloc
+import pytest
+from fastapi.testclient import TestClient
+from src.app.database import MemoryDatabase, async_db
+from src.app.services.streaming import ndjson_records
+
+
+def make_items(count: int) -> list:
+    """生成商品數據"""
+    return [
+        {"name": f"商品 {i}", "price": float(i % 20 + 1), "is_available": i % 3 != 0}
+        for i in range(count)
+    ]
+
+
+def read_ndjson(response) -> list:
+    """解析 NDJSON 響應體"""
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text.endswith("\n") or response.text == ""
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    """把流式分塊改小，使少量數據也跨越多個塊"""
+    monkeypatch.setattr("src.core.settings.stream_chunk_size", 7)
+
+
+def test_stream_matches_json_list(client: TestClient, clean_db, small_chunks):
+    """測試兩種觸發方式的流式結果與普通 JSON 列表一致"""
+    client.post("/items/bulk", json=make_items(30))
+    client.request("DELETE", "/items/bulk", json={"ids": [7, 8, 21]})
+    expected = client.get("/items/").json()
+
+    assert read_ndjson(client.get("/items/", params={"stream": True})) == expected
+    response = client.get("/items/", headers={"Accept": "application/x-ndjson"})
+    assert read_ndjson(response) == expected
+    assert client.get("/items/").headers["content-type"] == "application/json"
+
+
+def test_stream_limit_and_cursor(client: TestClient, clean_db, small_chunks):
+    """測試流式模式下 after 為起點、limit 為總條數上限"""
+    client.post("/items/bulk", json=make_items(30))
+    cursor = client.get("/items/", params={"limit": 5}).headers["X-Next-Cursor"]
+    params = {"stream": True, "after": cursor, "limit": 16}
+    items = read_ndjson(client.get("/items/", params=params))
+    assert [item["id"] for item in items] == list(range(6, 22))
+
+    params = {"stream": True, "after": "bogus"}
+    assert client.get("/items/", params=params).status_code == 400
+
+
+def test_stream_users_and_search(client: TestClient, clean_db, small_chunks):
+    """測試用戶列表和搜索結果的流式響應"""
+    users = [{"username": f"user{i}", "email": f"u{i}@example.com"} for i in range(10)]
+    client.post("/users/bulk", json=users)
+    streamed = read_ndjson(client.get("/users/", params={"stream": True}))
+    assert streamed == client.get("/users/").json()
+
+    client.post("/items/bulk", json=make_items(60))
+    params = {"q": "商品 1", "min_price": 3.0}
+    expected = client.get("/items/search/", params=params).json()["results"]
+    response = client.get("/items/search/", params={**params, "stream": True})
+    assert read_ndjson(response) == expected
+
+    response = client.get("/items/search/", params={"q": "不存在", "stream": True})
+    assert read_ndjson(response) == []
+
+
+def test_stream_reads_store_in_chunks(client: TestClient, clean_db, monkeypatch):
+    """測試流式響應按分塊大小逐次讀取存儲，而非一次讀取全部"""
+    monkeypatch.setattr("src.core.settings.stream_chunk_size", 10)
+    client.post("/items/bulk", json=make_items(95))
+    limits = []
+    fetch = async_db.get_all_items
+
+    async def get_all_items(after: int = 0, limit=None):
+        limits.append(limit)
+        return await fetch(after, limit)
+
+    monkeypatch.setattr(async_db, "get_all_items", get_all_items)
+    items = read_ndjson(client.get("/items/", params={"stream": True}))
+    assert len(items) == 95
+    assert limits == [10] * 10
+
+
+def test_stream_search_uses_one_iterator(
+    client: TestClient, clean_db, small_chunks, monkeypatch
+):
+    """測試流式搜索共用一個迭代器，不逐塊重新分頁搜索"""
+    client.post("/items/bulk", json=make_items(60))
+    params = {"q": "商品", "min_price": 3.0}
+    expected = client.get("/items/search/", params=params).json()["results"]
+
+    async def search_items(*args, **kwargs):
+        raise AssertionError("流式搜索不應逐塊分頁搜索")
+
+    if hasattr(async_db.storage, "iter_search_items"):
+        monkeypatch.setattr(async_db, "search_items", search_items)
+    response = client.get("/items/search/", params={**params, "stream": True})
+    assert read_ndjson(response) == expected
+    response = client.get(
+        "/items/search/", params={**params, "stream": True, "limit": 9}
+    )
+    assert read_ndjson(response) == expected[:9]
+
+
+@pytest.mark.slow
+def test_stream_memory_is_independent_of_collection_size():
+    """測試流式輸出的峰值內存與集合大小無關（1k → 100k）"""
+
+    def peak(size: int) -> int:
+        database = MemoryDatabase()
+        database.create_items(make_items(size))
+
+        async def fetch(after: int, limit: int) -> list:
+            return database.get_all_items(after, limit)
+
+        async def consume() -> int:
+            sent = 0
+            async for chunk in ndjson_records(fetch, "商品"):
+                sent += len(chunk)
+            return sent
+
+        tracemalloc.start()
+        asyncio.run(consume())
+        _, result = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result
+
+    small, large = peak(1_000), peak(100_000)
+    print(f"\n流式峰值內存: 1k={small / 1024:.0f}KiB, 100k={large / 1024:.0f}KiB")
+    assert large < small * 2
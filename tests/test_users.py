@@ -104,3 +104,47 @@ def test_create_user_validation(client: TestClient, clean_db):
         "/users/", json={"username": "", "email": "test@example.com"}
     )
     assert response.status_code == 422
+
+
+def test_get_user_by_username(client: TestClient, clean_db, sample_user):
+    """測試根據用戶名獲取用戶"""
+    user_id = client.post("/users/", json=sample_user).json()["id"]
+
+    response = client.get(f"/users/by-username/{sample_user['username']}")
+    assert response.status_code == 200
+    assert response.json()["id"] == user_id
+
+    response = client.get("/users/by-username/nobody")
+    assert response.status_code == 404
+
+
+def test_create_duplicate_email_case_insensitive(
+    client: TestClient, clean_db, sample_user
+):
+    """測試電子郵件唯一性（不區分大小寫）"""
+    client.post("/users/", json=sample_user)
+
+    duplicate = {**sample_user, "username": "another", "email": "TEST@example.com"}
+    response = client.post("/users/", json=duplicate)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "電子郵件已存在"
+
+
+def test_update_username_conflict(client: TestClient, clean_db, sample_user):
+    """測試更新用戶名與其他用戶衝突"""
+    client.post("/users/", json=sample_user)
+    other = {"username": "other", "email": "other@example.com"}
+    other_id = client.post("/users/", json=other).json()["id"]
+
+    response = client.put(
+        f"/users/{other_id}", json={"username": sample_user["username"]}
+    )
+    assert response.status_code == 400
+
+    # 舊用戶名在改名後可被釋放
+    response = client.put(f"/users/{other_id}", json={"username": "renamed"})
+    assert response.status_code == 200
+    response = client.post(
+        "/users/", json={"username": "other", "email": "new@example.com"}
+    )
+    assert response.status_code == 201
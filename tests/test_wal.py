@@ -0,0 +1,176 @@
+"""
+預寫日誌測試
+"""
+
+import threading
+
+import pytest
+from src.app.database import InvalidRecordError, MemoryDatabase
+from src.app.database.wal import WriteAheadLog
+
+
+def open_database(path, window=0.0, **options) -> MemoryDatabase:
+    """打開掛載了預寫日誌的數據庫"""
+    database = MemoryDatabase(**options)
+    database.attach_wal(WriteAheadLog(path, group_commit_window=window))
+    return database
+
+
+def snapshot(database: MemoryDatabase) -> tuple:
+    """數據庫的可比較狀態"""
+    return (
+        database.get_all_items(),
+        database.get_all_users(),
+        database.get_stats(),
+    )
+
+
+@pytest.mark.parametrize("options", [{}, {"mvcc": True}, {"item_engine": "columnar"}])
+def test_replay_restores_state(tmp_path, options):
+    """測試重放日誌後數據、索引和 ID 分配與寫入時一致"""
+    path = tmp_path / "wal.log"
+    database = open_database(path, **options)
+    database.populate_sample_data()
+    for i in range(20):
+        database.create_item(
+            {"name": f"商品 {i}", "description": None, "price": float(i + 1)}
+        )
+    database.update_item(5, {"name": "改名", "price": 9.5, "is_available": False})
+    database.delete_item(2)
+    database.delete_item(999)
+    user = database.create_user({"username": "carol", "email": "carol@example.com"})
+    database.update_user(user.id, {"username": "carol2", "email": "c@example.com"})
+    database.delete_user(1)
+    expected = snapshot(database)
+    database.close_wal()
+
+    restored = open_database(path, **options)
+    assert snapshot(restored) == expected
+    assert restored.search_items(query="改名", available_only=False)[0].id == 5
+    assert restored.get_user_by_username("carol2").id == user.id
+    assert restored.create_item({"name": "新商品", "price": 1.0}).id == 24
+
+
+def test_replay_after_clear(tmp_path):
+    """測試清空操作被記錄，重放後 ID 從頭分配"""
+    path = tmp_path / "wal.log"
+    database = open_database(path)
+    database.populate_sample_data()
+    database.clear_all_data()
+    database.create_item({"name": "清空後", "price": 1.0})
+    database.close_wal()
+
+    restored = open_database(path)
+    assert [item.name for item in restored.get_all_items()] == ["清空後"]
+    assert restored.get_all_items()[0].id == 1
+    assert restored.get_all_users() == []
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    """測試尾部殘缺的日誌被截斷，之前的記錄完整恢復"""
+    path = tmp_path / "wal.log"
+    database = open_database(path)
+    database.create_item({"name": "完整", "price": 1.0})
+    database.close_wal()
+    with open(path, "ab") as log_file:
+        log_file.write(b'0badc0de {"lsn":2,"op":"put_item","rec')
+
+    restored = open_database(path)
+    assert [item.name for item in restored.get_all_items()] == ["完整"]
+    restored.create_item({"name": "之後", "price": 2.0})
+    restored.close_wal()
+
+    again = open_database(path)
+    assert [item.name for item in again.get_all_items()] == ["完整", "之後"]
+
+
+def test_group_commit_shares_fsync(tmp_path):
+    """測試組提交：並發寫入共享 fsync，返回時均已持久化"""
+    database = MemoryDatabase()
+    wal = WriteAheadLog(tmp_path / "wal.log", group_commit_window=0.005)
+    database.attach_wal(wal)
+    threads_count, writes = 8, 25
+
+    def writer(index: int) -> None:
+        for i in range(writes):
+            database.create_item({"name": f"商品 {index}-{i}", "price": 1.0})
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert wal.last_lsn == threads_count * writes
+    assert wal.syncs < threads_count * writes / 2
+    database.close_wal()
+    assert len(open_database(tmp_path / "wal.log").get_all_items()) == 200
+
+
+def test_append_requires_replay(tmp_path):
+    """測試未重放的日誌拒絕追加"""
+    wal = WriteAheadLog(tmp_path / "wal.log")
+    with pytest.raises(RuntimeError):
+        wal.append({"op": "clear"})
+    wal.close()
+
+
+def test_failed_append_publishes_no_change(tmp_path):
+    """測試日誌追加失敗時寫入不生效，不分配變更序號也不通知監聽者"""
+    wal = WriteAheadLog(tmp_path / "wal.log", group_commit_window=0.0)
+    database = MemoryDatabase()
+    database.attach_wal(wal)
+    database.create_item({"name": "已記錄", "price": 1.0})
+    changes = []
+    seq = database.listen(lambda seq, entry: changes.append(seq))
+
+    wal.close()
+    with pytest.raises(RuntimeError):
+        database.create_item({"name": "未記錄", "price": 1.0})
+    assert database.change_seq == seq
+    assert changes == []
+    assert len(database.get_all_items()) == 1
+
+
+@pytest.mark.parametrize("options", [{}, {"item_engine": "columnar"}])
+def test_invalid_record_is_never_logged(tmp_path, options):
+    """測試合併後無效的記錄在記日誌之前被拒絕，狀態和日誌都不受影響"""
+    path = tmp_path / "wal.log"
+    database = open_database(path, **options)
+    database.populate_sample_data()
+    expected = snapshot(database)
+    seq = database.listen(lambda seq, entry: None)
+
+    item = database.get_item_by_id(1)
+    with pytest.raises(InvalidRecordError):
+        database.update_item(1, {**item, "price": None})
+    with pytest.raises(InvalidRecordError):
+        database.create_item({"name": None, "price": 1.0})
+    with pytest.raises(InvalidRecordError):
+        database.update_users([(1, {"username": None})])
+    assert database.change_seq == seq
+    assert snapshot(database) == expected
+    assert database.search_items(min_price=1) == database.get_all_items()[:2]
+    database.close_wal()
+
+    assert snapshot(open_database(path, **options)) == expected
+
+
+def test_replay_rejects_invalid_entry(tmp_path):
+    """測試重放時無效的條目被拒絕且不改變狀態，其餘條目照常恢復"""
+    path = tmp_path / "wal.log"
+    database = open_database(path)
+    database.populate_sample_data()
+    expected = snapshot(database)
+    wal = database._wal
+    wal.append({"op": "put_item", "record": {"id": 1, "name": "壞", "price": None}})
+    wal.append({"op": "put_user", "record": {"id": 9, "username": "x"}})
+    database.close_wal()
+
+    restored = open_database(path)
+    assert snapshot(restored) == expected
+    entry = {"op": "put_item", "record": {**restored.get_item_by_id(2), "name": 1}}
+    with pytest.raises(InvalidRecordError):
+        restored._apply_entry(entry)
+    assert snapshot(restored) == expected
+    assert restored.search_items(query="macbook") == [restored.get_item_by_id(2)]